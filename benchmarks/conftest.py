@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+编辑器性能基准测试的公共设施
+
+基准测试不在默认的 pytest 运行范围内（testpaths 只包含 tests），需显式指定目录:
+
+    pytest benchmarks --benchmark-json=results.json
+    pytest benchmarks --benchmark-compare=baseline.json --benchmark-tolerance=0.2
+
+每项测试通过 benchmark fixture 记录多轮耗时，会话结束时汇总为 JSON。
+指定基线时逐项比较耗时中位数，超出容差的项目列为退化，会话以失败状态退出。
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import pytest
+from PySide6 import __version__ as PYSIDE_VERSION
+
+UNITS = {"KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+# 默认容差：耗时中位数超过基线的 20% 视为退化
+DEFAULT_TOLERANCE = 0.2
+
+# 中位数差值低于该毫秒数时视为计时噪声，不判定为退化
+MIN_REGRESSION_DELTA_MS = 0.05
+
+
+def parse_size(value: str) -> int:
+    """解析形如 10MB 的大小字符串"""
+    value = value.strip().upper()
+    for unit, factor in UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[: -len(unit)]) * factor)
+    return int(value)
+
+
+def generate_text(size: int) -> str:
+    """生成指定大小、每行约 80 个字符的文本"""
+    line = "x" * 79 + "\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+@dataclass
+class BenchmarkResult:
+    """单项基准测试的结果
+
+    Attributes:
+        name: 测试项名称
+        samples: 每轮耗时（毫秒）
+        operations: 每轮执行的操作数，用于计算吞吐量
+        extra: 附加信息，如文档大小
+    """
+
+    name: str
+    samples: List[float]
+    operations: int = 1
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总为可序列化的统计数据"""
+        ordered = sorted(self.samples)
+        median = statistics.median(ordered)
+        return {
+            "rounds": len(ordered),
+            "operations": self.operations,
+            "min_ms": ordered[0],
+            "median_ms": median,
+            "mean_ms": statistics.mean(ordered),
+            "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+            "max_ms": ordered[-1],
+            "ops_per_sec": self.operations * 1000 / median if median > 0 else None,
+            **self.extra,
+        }
+
+
+class Benchmark:
+    """单项测试使用的计时器"""
+
+    def __init__(self, results: Dict[str, BenchmarkResult], name: str) -> None:
+        """初始化计时器
+
+        Args:
+            results: 会话的结果表，记录时写入
+            name: 测试项名称
+        """
+        self._results = results
+        self._name = name
+
+    def __call__(
+        self,
+        func: Callable[[], Any],
+        rounds: int = 5,
+        operations: int = 1,
+        setup: Optional[Callable[[], None]] = None,
+        teardown: Optional[Callable[[], None]] = None,
+        **extra: Any,
+    ) -> Any:
+        """多轮执行并记录每轮耗时
+
+        Args:
+            func: 被测函数
+            rounds: 轮数
+            operations: 每轮执行的操作数
+            setup: 每轮计时前调用，不计入耗时
+            teardown: 每轮计时后调用，不计入耗时
+            **extra: 写入结果的附加信息
+
+        Returns:
+            Any: 最后一轮的返回值
+        """
+        samples: List[float] = []
+        result = None
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = func()
+            samples.append((time.perf_counter() - start) * 1000)
+            if teardown is not None:
+                teardown()
+        self.record(samples, operations, **extra)
+        return result
+
+    def record(self, samples: List[float], operations: int = 1, **extra: Any) -> None:
+        """记录测试自行计时得到的耗时
+
+        Args:
+            samples: 每轮耗时（毫秒）
+            operations: 每轮执行的操作数
+            **extra: 写入结果的附加信息
+        """
+        if samples:
+            self._results[self._name] = BenchmarkResult(
+                self._name, list(samples), operations, extra
+            )
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[Dict[str, Any]]:
+    """按耗时中位数比较两次结果
+
+    Args:
+        current: 本次结果，格式同输出的 JSON
+        baseline: 基线结果
+        tolerance: 允许的相对增幅
+
+    Returns:
+        List[Dict[str, Any]]: 退化的项目，基线中没有的项目不参与比较
+    """
+    regressions: List[Dict[str, Any]] = []
+    previous = baseline.get("benchmarks", {})
+    for name, stats in current.get("benchmarks", {}).items():
+        if name not in previous:
+            continue
+        before = previous[name]["median_ms"]
+        after = stats["median_ms"]
+        slower = after - before > MIN_REGRESSION_DELTA_MS
+        if slower and after > before * (1 + tolerance):
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_ms": before,
+                    "current_ms": after,
+                    "ratio": after / before if before > 0 else None,
+                }
+            )
+    return regressions
+
+
+_RESULTS = pytest.StashKey[Dict[str, BenchmarkResult]]()
+_REPORT = pytest.StashKey[Dict[str, Any]]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """注册基准测试的命令行选项"""
+    group = parser.getgroup("benchmark", "编辑器性能基准测试")
+    group.addoption("--benchmark-json", metavar="PATH", help="把结果写入该 JSON 文件")
+    group.addoption(
+        "--benchmark-compare", metavar="PATH", help="与该基线 JSON 比较，退化时失败"
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="耗时中位数允许的相对增幅，默认 0.2",
+    )
+    group.addoption(
+        "--benchmark-max-size",
+        default="500MB",
+        help="跳过超过该大小的文档，如 10MB，默认 500MB",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """创建会话的结果表"""
+    config.stash[_RESULTS] = {}
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    """当前测试项的计时器，测试项名称不含目录"""
+    name = request.node.nodeid.rsplit("/", 1)[-1]
+    return Benchmark(request.config.stash[_RESULTS], name)
+
+
+@pytest.fixture
+def benchmark_max_size(request: pytest.FixtureRequest) -> int:
+    """命令行指定的最大文档大小（字节）"""
+    return parse_size(request.config.getoption("--benchmark-max-size"))
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """汇总结果，写入 JSON 并与基线比较"""
+    config = session.config
+    results = config.stash.get(_RESULTS, {})
+    if not results:
+        return
+    report: Dict[str, Any] = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "python": platform.python_version(),
+            "pyside": PYSIDE_VERSION,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "benchmarks": {name: result.summary() for name, result in results.items()},
+    }
+
+    baseline_path = config.getoption("--benchmark-compare")
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        tolerance = config.getoption("--benchmark-tolerance")
+        report["baseline"] = str(baseline_path)
+        report["tolerance"] = tolerance
+        report["regressions"] = compare(report, baseline, tolerance)
+        if report["regressions"] and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    output_path = config.getoption("--benchmark-json")
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    config.stash[_REPORT] = report
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    """输出结果表和退化的项目"""
+    report = config.stash.get(_REPORT, None)
+    if report is None:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section("benchmark")
+    write(f"{'name':<56} {'median(ms)':>12} {'p95(ms)':>12} {'ops/s':>12}")
+    for name, stats in report["benchmarks"].items():
+        ops = "-" if stats["ops_per_sec"] is None else round(stats["ops_per_sec"])
+        write(
+            f"{name:<56} {stats['median_ms']:>12.3f} {stats['p95_ms']:>12.3f} "
+            f"{ops:>12}"
+        )
+    regressions = report.get("regressions")
+    if regressions is None:
+        return
+    if not regressions:
+        write(f"与基线 {report['baseline']} 相比没有退化")
+        return
+    write(f"与基线 {report['baseline']} 相比退化的项目:", red=True)
+    for item in regressions:
+        write(
+            f"  {item['name']}: {item['baseline_ms']:.3f}ms -> "
+            f"{item['current_ms']:.3f}ms",
+            red=True,
+        )
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+TextBuffer 编辑吞吐量基准测试
+
+在 10MB 文本的随机位置逐次插入和删除，统计插入、删除、撤销和重做的吞吐量。
+"""
+
+import random
+from typing import List, Tuple
+
+import pytest
+from conftest import generate_text
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+
+SIZE = 10 * 1024**2
+
+# 每轮的编辑次数
+EDITS = 2000
+
+
+@pytest.fixture(scope="module")
+def text() -> str:
+    """测试文本"""
+    return generate_text(SIZE)
+
+
+def _offsets(seed: int) -> List[int]:
+    """固定种子的随机偏移，编辑过程中始终有效"""
+    rng = random.Random(seed)
+    return [rng.randrange(SIZE - EDITS) for _ in range(EDITS)]
+
+
+def _load(text: str) -> TextBuffer:
+    """创建载入文本的缓冲区"""
+    buffer = TextBuffer()
+    buffer.set_content(text)
+    return buffer
+
+
+def _inserted(text: str) -> TextBuffer:
+    """载入文本并在随机位置逐次插入，留下撤销历史"""
+    buffer = _load(text)
+    for offset in _offsets(0):
+        position = buffer.offset_to_position(offset)
+        buffer.insert(position, "a")
+    return buffer
+
+
+def test_insert(benchmark, text):
+    offsets = _offsets(0)
+    buffers: List[TextBuffer] = []
+
+    def run() -> None:
+        buffer = buffers[-1]
+        for offset in offsets:
+            buffer.insert(buffer.offset_to_position(offset), "a")
+
+    benchmark(
+        run,
+        operations=EDITS,
+        setup=lambda: buffers.append(_load(text)),
+        teardown=buffers.clear,
+    )
+
+
+def test_delete(benchmark, text):
+    offsets = _offsets(1)
+    buffers: List[TextBuffer] = []
+
+    def run() -> None:
+        buffer = buffers[-1]
+        for offset in offsets:
+            start = buffer.offset_to_position(offset)
+            end = buffer.offset_to_position(offset + 1)
+            buffer.delete(start, end)
+
+    benchmark(
+        run,
+        operations=EDITS,
+        setup=lambda: buffers.append(_load(text)),
+        teardown=buffers.clear,
+    )
+
+
+@pytest.mark.parametrize("direction", ["undo", "redo"])
+def test_history(benchmark, text, direction):
+    state: List[Tuple[TextBuffer, int]] = []
+
+    def setup() -> None:
+        buffer = _inserted(text)
+        if direction == "redo":
+            while buffer.undo():
+                pass
+        state.append((buffer, 0))
+
+    def run() -> int:
+        buffer, _ = state[-1]
+        step = buffer.undo if direction == "undo" else buffer.redo
+        count = 0
+        while step():
+            count += 1
+        return count
+
+    count = benchmark(run, operations=EDITS, setup=setup, teardown=state.clear)
+    assert count > 0
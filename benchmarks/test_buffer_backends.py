@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文本缓冲区存储引擎基准测试
+
+对比片段表与行列表两种存储在不同文件大小下的加载、编辑和按行读取耗时。
+"""
+
+import random
+from typing import Callable, Dict, List
+
+import pytest
+from conftest import generate_text, parse_size
+
+from geek_fanatic.plugins.editor.buffer import LineListStorage, TextBuffer
+from geek_fanatic.plugins.editor.piece_table import PieceTable
+from geek_fanatic.plugins.editor.types import Position
+
+SIZES = ["1MB", "100MB", "1GB"]
+
+BACKENDS: Dict[str, Callable[[], TextBuffer]] = {
+    "piece_table": lambda: TextBuffer(PieceTable()),
+    "line_list": lambda: TextBuffer(LineListStorage()),
+}
+
+# 每轮的操作次数
+OPERATIONS = 1000
+
+# 大文件每轮都要重新载入，只测三轮
+ROUNDS = 3
+
+
+@pytest.fixture(params=SIZES, scope="module")
+def text(request) -> str:
+    """指定大小的测试文本，同一大小的测试共用"""
+    size = parse_size(request.param)
+    if size > parse_size(request.config.getoption("--benchmark-max-size")):
+        pytest.skip(f"超过 --benchmark-max-size: {request.param}")
+    return generate_text(size)
+
+
+def _lines(line_count: int) -> List[int]:
+    """固定种子的随机行号，删除 OPERATIONS 行之后仍有下一行"""
+    rng = random.Random(42)
+    return [rng.randrange(line_count - OPERATIONS - 1) for _ in range(OPERATIONS)]
+
+
+def _insert_single(buffer: TextBuffer, lines: List[int]) -> None:
+    for line in lines:
+        buffer.insert(Position(line, 0), "abc")
+
+
+def _insert_multi(buffer: TextBuffer, lines: List[int]) -> None:
+    for line in lines:
+        buffer.insert(Position(line, 0), "abc\ndef\n")
+
+
+def _delete_multi(buffer: TextBuffer, lines: List[int]) -> None:
+    for line in lines:
+        buffer.delete(Position(line, 0), Position(line + 1, 0))
+
+
+def _get_line(buffer: TextBuffer, lines: List[int]) -> None:
+    for line in lines:
+        buffer.get_line(line)
+
+
+EDITS: Dict[str, Callable[[TextBuffer, List[int]], None]] = {
+    "insert_single": _insert_single,
+    "insert_multi": _insert_multi,
+    "delete_multi": _delete_multi,
+    "get_line": _get_line,
+}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_load(benchmark, text, backend):
+    buffers: List[TextBuffer] = []
+    benchmark(
+        lambda: buffers[-1].set_content(text),
+        rounds=ROUNDS,
+        setup=lambda: buffers.append(BACKENDS[backend]()),
+        teardown=buffers.clear,
+        size=len(text),
+    )
+
+
+@pytest.mark.parametrize("edit", EDITS)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_edit(benchmark, text, backend, edit):
+    buffers: List[TextBuffer] = []
+    lines = _lines(text.count("\n") + 1)
+
+    def setup() -> None:
+        buffer = BACKENDS[backend]()
+        buffer.set_content(text)
+        buffers.append(buffer)
+
+    benchmark(
+        lambda: EDITS[edit](buffers[-1], lines),
+        rounds=ROUNDS,
+        operations=OPERATIONS,
+        setup=setup,
+        teardown=buffers.clear,
+        size=len(text),
+    )
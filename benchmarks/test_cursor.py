@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+大文件光标定位基准测试
+
+Editor._get_position 把字符偏移换算为行列位置，set_cursor_position
+把行列位置换算为偏移并移动光标。超过虚拟化阈值的文档由虚拟化视图显示，
+set_cursor_position 走虚拟化视图的路径。
+"""
+
+import random
+
+import pytest
+from conftest import generate_text, parse_size
+
+from geek_fanatic.plugins.editor.editor import Editor
+
+SIZES = ["10MB", "100MB"]
+
+# 每轮换算或移动的次数
+CALLS = 1000
+
+
+@pytest.fixture(params=SIZES, scope="module")
+def large_editor(request, qapp):
+    """载入指定大小文本的编辑器，同一大小的测试共用"""
+    size = parse_size(request.param)
+    if size > parse_size(request.config.getoption("--benchmark-max-size")):
+        pytest.skip(f"超过 --benchmark-max-size: {request.param}")
+    editor = Editor()
+    editor.setPlainText(generate_text(size))
+    yield editor
+    editor.deleteLater()
+
+
+def test_get_position(benchmark, large_editor):
+    length = large_editor.buffer.get_length()
+    offsets = random.Random(0).sample(range(length), CALLS)
+
+    def run() -> None:
+        for offset in offsets:
+            large_editor._get_position(offset)
+
+    benchmark(run, operations=CALLS, size=length)
+
+
+def test_set_cursor_position(benchmark, large_editor):
+    buffer = large_editor.buffer
+    length = buffer.get_length()
+    positions = [
+        buffer.offset_to_position(offset)
+        for offset in random.Random(1).sample(range(length), CALLS)
+    ]
+
+    def run() -> None:
+        for position in positions:
+            large_editor.set_cursor_position(position)
+
+    benchmark(run, operations=CALLS, size=length)
+    assert large_editor.get_cursor_position() == positions[-1]
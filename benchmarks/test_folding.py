@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代码折叠基准测试
+
+生成指定行数的类 Python 源码，统计折叠索引的首次构建、全部折叠、
+全部展开、单个大区域的折叠和展开，以及折叠状态下按键的耗时。
+"""
+
+import time
+from typing import List
+
+import pytest
+
+from geek_fanatic.plugins.editor.editor import Editor
+
+# 文档行数
+LINES = 200_000
+
+# 折叠状态下输入的字符数
+KEYSTROKES = 200
+
+# 每个类的源码模板，包含缩进区域和跨行括号区域
+CLASS_TEMPLATE = [
+    "class Model{index}:",
+    '    """示例类 {index}"""',
+    "",
+    "    FIELDS = [",
+    '        "name",',
+    '        "value",',
+    "    ]",
+    "",
+    "    def compute(self, items):",
+    "        total = 0",
+    "        for item in items:",
+    "            if item > {index}:",
+    "                total += item",
+    "            else:",
+    "                total -= item",
+    "        return total",
+    "",
+    "    def describe(self):",
+    "        return {{",
+    '            "id": {index},',
+    '            "fields": self.FIELDS,',
+    "        }}",
+    "",
+]
+
+# 中部某个类的首行，作为单个区域的测试对象
+MIDDLE_CLASS = LINES // 2 - LINES // 2 % len(CLASS_TEMPLATE)
+
+
+def generate_source(lines: int) -> str:
+    """生成至少指定行数的源码"""
+    result: List[str] = []
+    index = 0
+    while len(result) < lines:
+        result.extend(line.format(index=index) for line in CLASS_TEMPLATE)
+        index += 1
+    return "\n".join(result[:lines])
+
+
+@pytest.fixture(scope="module")
+def editor(qapp):
+    """显示示例源码的编辑器，本模块的测试共用"""
+    editor = Editor()
+    editor.resize(800, 600)
+    editor.show()
+    editor.setPlainText(generate_source(LINES))
+    qapp.processEvents()
+    yield editor
+    editor.deleteLater()
+
+
+def test_build_index(benchmark, editor):
+    folding = editor.folding
+    # 恢复增量更新时行信息失效，下次使用时重建
+    benchmark(lambda: folding.line_count, setup=folding.resume, lines=LINES)
+
+
+def test_enumerate_regions(benchmark, editor):
+    folding = editor.folding
+    count = benchmark(lambda: sum(1 for _ in folding.regions()), lines=LINES)
+    assert count > 0
+
+
+def test_fold_all(benchmark, editor):
+    folded = benchmark(editor.fold_all, teardown=editor.unfold_all, lines=LINES)
+    assert folded > 0
+
+
+def test_unfold_all(benchmark, editor):
+    document = editor._text_edit.document()
+    benchmark(editor.unfold_all, setup=editor.fold_all, lines=LINES)
+    assert document.lineCount() == document.blockCount()
+
+
+def test_fold_one_class(benchmark, editor):
+    benchmark(
+        lambda: editor.fold(MIDDLE_CLASS),
+        teardown=lambda: editor.unfold(MIDDLE_CLASS),
+        lines=LINES,
+    )
+
+
+def test_unfold_one_class(benchmark, editor):
+    benchmark(
+        lambda: editor.unfold(MIDDLE_CLASS),
+        setup=lambda: editor.fold(MIDDLE_CLASS),
+        lines=LINES,
+    )
+
+
+def test_keystroke_while_folded(benchmark, editor):
+    editor.fold_all()
+    text_edit = editor._text_edit
+    block = text_edit.document().findBlockByNumber(MIDDLE_CLASS)
+    cursor = text_edit.textCursor()
+    cursor.setPosition(block.position() + block.length() - 1)
+    text_edit.setTextCursor(cursor)
+
+    timings: List[float] = []
+    for _ in range(KEYSTROKES):
+        start = time.perf_counter()
+        text_edit.insertPlainText("a")
+        timings.append((time.perf_counter() - start) * 1000)
+    editor.unfold_all()
+
+    assert editor.content == text_edit.toPlainText()
+    benchmark.record(timings, lines=LINES)
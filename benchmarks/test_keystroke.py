@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+单次按键延迟基准测试
+
+向编辑器发送真实的按键事件。每次按键依次经过事件过滤器、QTextDocument、
+缓冲区增量同步和 Editor._on_text_changed，统计每次按键的耗时。
+"""
+
+import time
+from typing import List, Union
+
+import pytest
+from conftest import generate_text, parse_size
+from PySide6.QtCore import Qt
+
+from geek_fanatic.plugins.editor.editor import Editor
+
+SIZES = ["100KB", "1MB", "10MB"]
+
+# 每个文档输入的字符数，每 40 个字符换行一次
+KEYSTROKES = 400
+
+
+def _press(qtbot, editor: Editor, key: Union[str, Qt.Key]) -> float:
+    """发送一次按键，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    qtbot.keyClick(editor._text_edit, key)
+    return (time.perf_counter() - start) * 1000
+
+
+@pytest.mark.parametrize("size_name", SIZES)
+def test_keystroke(qtbot, benchmark, benchmark_max_size, size_name):
+    size = parse_size(size_name)
+    if size > benchmark_max_size:
+        pytest.skip(f"超过 --benchmark-max-size: {size_name}")
+    editor = Editor()
+    qtbot.addWidget(editor)
+    editor.setPlainText(generate_text(size))
+    editor.show()
+    qtbot.waitExposed(editor)
+
+    # 在文档中部输入
+    cursor = editor._text_edit.textCursor()
+    cursor.setPosition(editor.buffer.get_length() // 2)
+    editor._text_edit.setTextCursor(cursor)
+
+    timings: List[float] = []
+    for index in range(KEYSTROKES):
+        if index % 40 == 39:
+            timings.append(_press(qtbot, editor, Qt.Key_Return))
+        else:
+            timings.append(_press(qtbot, editor, "a"))
+    # 退格同样走增量路径
+    for _ in range(KEYSTROKES // 4):
+        timings.append(_press(qtbot, editor, Qt.Key_Backspace))
+
+    assert editor.content == editor._text_edit.toPlainText()
+    benchmark.record(timings, size=size)
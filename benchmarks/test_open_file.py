@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+EditorManager.open_file 基准测试
+
+统计从调用 open_file 到文件载入完成的耗时。超过超大文件阈值的文件
+以只读查看器打开，open_file 返回时即已完成。
+"""
+
+from typing import Callable
+
+import pytest
+from conftest import generate_text, parse_size
+
+from geek_fanatic.plugins.editor import EditorManager
+
+SIZES = ["1KB", "100KB", "1MB", "10MB", "100MB", "500MB"]
+
+# 单轮超过该大小的文件只测一轮
+_SINGLE_ROUND_SIZE = 10 * 1024**2
+
+# 等待载入完成的超时（毫秒）
+_LOAD_TIMEOUT = 600_000
+
+
+@pytest.fixture(scope="module")
+def sample_file(tmp_path_factory: pytest.TempPathFactory) -> Callable[[int], str]:
+    """按大小生成测试文件，同一大小只生成一次"""
+    directory = tmp_path_factory.mktemp("open_file")
+
+    def create(size: int) -> str:
+        path = directory / f"sample_{size}.txt"
+        if not path.exists():
+            # 分块写入，避免一次生成整个大文件的文本
+            chunk = generate_text(1024**2)
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                for _ in range(size // len(chunk)):
+                    f.write(chunk)
+                f.write(chunk[: size % len(chunk)])
+        return str(path)
+
+    return create
+
+
+@pytest.mark.parametrize("size_name", SIZES)
+def test_open_file(qtbot, benchmark, benchmark_max_size, sample_file, size_name):
+    size = parse_size(size_name)
+    if size > benchmark_max_size:
+        pytest.skip(f"超过 --benchmark-max-size: {size_name}")
+    path = sample_file(size)
+    manager = EditorManager()
+    qtbot.addWidget(manager)
+
+    def open_file() -> None:
+        manager.open_file(path)
+        editor = manager.current_editor()
+        # 载入结束的信号在主线程排队发出，检查之后等待不会错过
+        if editor is not None and editor.is_loading():
+            loaded = editor.document.loadingChanged
+            with qtbot.waitSignal(loaded, timeout=_LOAD_TIMEOUT):
+                pass
+
+    def close() -> None:
+        manager._on_tab_close_requested(0)
+
+    rounds = 1 if size > _SINGLE_ROUND_SIZE else 5
+    benchmark(open_file, rounds=rounds, teardown=close, size=size)
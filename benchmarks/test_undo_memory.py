@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+撤销历史内存基准测试
+
+模拟连续输入单词、换行、退格和光标跳转，统计大量按键的耗时，
+并在结果中附上撤销历史的组数、估算内存和逐对象统计的实际内存。
+"""
+
+import random
+import sys
+import time
+from typing import Set
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.types import Position
+from geek_fanatic.plugins.editor.undo import UndoGroup, UndoHistory
+
+WORDS = ["def", "return", "self", "value", "buffer", "position", "line", "i"]
+
+# 模拟的按键次数
+KEYSTROKES = 1_000_000
+
+# 撤销历史内存上限（字节）
+MEMORY_LIMIT = 64 * 1024 * 1024
+
+
+class FakeClock:
+    """模拟时钟，每次按键前进固定时间"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(buffer: TextBuffer, clock: FakeClock, keystrokes: int) -> None:
+    """模拟按键"""
+    rng = random.Random(7)
+    line = column = 0
+    count = 0
+    while count < keystrokes:
+        roll = rng.random()
+        if roll < 0.01:
+            # 光标跳到任意行首
+            line = rng.randrange(buffer.get_line_count())
+            column = 0
+            clock.now += 2.0
+            continue
+        if roll < 0.05 and column > 0:
+            # 退格
+            buffer.delete(Position(line, column - 1), Position(line, column))
+            column -= 1
+            count += 1
+            clock.now += 0.1
+            continue
+        for char in rng.choice(WORDS) + rng.choice(" \n"):
+            buffer.insert(Position(line, column), char)
+            if char == "\n":
+                line += 1
+                column = 0
+            else:
+                column += 1
+            count += 1
+            clock.now += 0.15
+
+
+def deep_size(history: UndoHistory) -> int:
+    """逐对象统计撤销栈实际占用的字节数"""
+    seen: Set[int] = set()
+
+    def size_of(obj: object) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        total = sys.getsizeof(obj)
+        if isinstance(obj, UndoGroup):
+            total += size_of(obj.operations)
+        elif isinstance(obj, list):
+            total += sum(size_of(item) for item in obj)
+        elif hasattr(obj, "__slots__"):
+            total += sum(size_of(getattr(obj, name)) for name in obj.__slots__)
+        return total
+
+    return sum(size_of(group) for group in history._undo)
+
+
+def test_undo_memory(benchmark):
+    clock = FakeClock()
+    buffer = TextBuffer(history=UndoHistory(memory_limit=MEMORY_LIMIT, clock=clock))
+    buffer.set_content("")
+
+    # 单轮耗时以秒计，只测一轮
+    start = time.perf_counter()
+    simulate(buffer, clock, KEYSTROKES)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    history = buffer.history
+    measured = deep_size(history)
+    assert history.memory_usage <= MEMORY_LIMIT
+    benchmark.record(
+        [elapsed],
+        operations=KEYSTROKES,
+        undo_groups=history.group_count(),
+        estimated_bytes=history.memory_usage,
+        measured_bytes=measured,
+        bytes_per_keystroke=measured / KEYSTROKES,
+    )
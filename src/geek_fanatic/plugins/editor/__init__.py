@@ -4,11 +4,14 @@
 
 from geek_fanatic.resources import icons_rc  # 导入图标资源
 
+import os
+from collections import OrderedDict
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Set, Tuple, Union
 
-from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QVBoxLayout, QWidget, QTabWidget
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
+from PySide6.QtWidgets import QMessageBox, QVBoxLayout, QWidget, QTabWidget
 
 from geek_fanatic.core.plugin import Plugin, PluginViews, ActivityIcon
 from geek_fanatic.core.config import ConfigRegistry
@@ -17,9 +20,49 @@ from geek_fanatic.core.command import CommandRegistry
 from geek_fanatic.core.layout import Layout
 from geek_fanatic.core.widgets.work_area import WorkTab
 
+from .buffer import TextBuffer
+from .completion import (
+    COMPLETION_DELAY_MS,
+    CompletionEngine,
+    WordCompletionProvider,
+    WordIndex,
+)
+from .document import SharedDocument
 from .editor import Editor
 from .file_explorer import FileExplorer
-from .commands.basic import DeleteCommand, RedoCommand, UndoCommand
+from .file_loader import FileLoader
+from .file_saver import SAVE_CHUNK_SIZE, FileSaver, FsyncPolicy
+from .file_watcher import WATCH_DEBOUNCE_MS, FileChange, FileWatcher
+from .huge_file_viewer import HUGE_FILE_THRESHOLD, HugeFileViewer
+from .lexers import lexer_for_path
+from .search import SearchEngine, SearchQuery
+from .search_view import WorkspaceSearchView
+from .session import (
+    MAX_LIVE_EDITORS,
+    SessionSnapshot,
+    SessionTab,
+    TabPlaceholder,
+    default_session_path,
+    load_session,
+    save_session,
+)
+from .trigram_index import TrigramIndexer
+from .types import Position
+from .undo import UNDO_MEMORY_LIMIT
+from .virtual_view import VIRTUAL_LINE_COUNT, VIRTUAL_LINE_LENGTH
+from .workspace_search import WORKSPACE_MAX_FILE_SIZE
+from .commands.basic import (
+    DeleteCommand,
+    FoldAllCommand,
+    FoldCommand,
+    GotoLineCommand,
+    RedoCommand,
+    UndoCommand,
+    UnfoldAllCommand,
+    UnfoldCommand,
+)
+from .commands.file import SaveAllCommand, SaveCommand
+from .commands.search import FindCommand, ReplaceAllCommand
 
 def load_icon(name: str) -> QIcon:
     """加载图标"""
@@ -31,10 +74,39 @@ def load_icon(name: str) -> QIcon:
 class EditorManager(QWidget):
     """编辑器管理器"""
     
-    def __init__(self) -> None:
-        """初始化编辑器管理器"""
+    def __init__(self, huge_file_threshold: int = HUGE_FILE_THRESHOLD) -> None:
+        """初始化编辑器管理器
+
+        Args:
+            huge_file_threshold: 超过该字节数的文件以只读查看器打开
+        """
         super().__init__()
-        self._editors: Dict[str, Editor] = {}
+        self._editors: Dict[str, Union[Editor, HugeFileViewer, TabPlaceholder]] = {}
+        self._paths: Dict[QWidget, str] = {}  # 标签页控件到文件路径的反向索引
+        # 打开的文件的共享文档，标签页和额外的视图都挂接在上面
+        self._documents: Dict[str, SharedDocument] = {}
+        # 保留控件的编辑器，按最近使用的顺序排列
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._max_live_editors = MAX_LIVE_EDITORS
+        self._loaders: Dict[str, FileLoader] = {}  # 正在加载的文件
+        self._pending_positions: Dict[str, Position] = {}  # 加载完成后跳转的位置
+        self._pending_scrolls: Dict[str, Tuple[int, int]] = {}  # 加载完成后的滚动位置
+        # 磁盘上已变化、但因有未保存的修改而没有重新读取的文件
+        self._conflicts: Set[str] = set()
+        self._huge_file_threshold = huge_file_threshold
+        self._undo_memory_limit = UNDO_MEMORY_LIMIT
+        self._virtual_thresholds = (VIRTUAL_LINE_LENGTH, VIRTUAL_LINE_COUNT)
+        self._saver = FileSaver(parent=self)
+        self._saver.saved.connect(self._on_file_saved)
+        self._saver.failed.connect(self._on_save_failed)
+        self._watcher = FileWatcher(parent=self)
+        self._watcher.filesChanged.connect(self._on_files_changed)
+        self._watcher.failed.connect(self._on_watch_failed)
+        self._search_engine = SearchEngine(self)
+        # 打开的缓冲区（含只保留缓冲区的标签页）的单词索引
+        self._word_index = WordIndex()
+        self._completion = CompletionEngine(self)
+        self._completion.add_provider(WordCompletionProvider(self._word_index))
         self._setup_ui()
     
     def _setup_ui(self) -> None:
@@ -47,34 +119,716 @@ class EditorManager(QWidget):
         self._tab_widget.setTabsClosable(True)
         self._tab_widget.setMovable(True)
         self._tab_widget.tabCloseRequested.connect(self._on_tab_close_requested)
+        self._tab_widget.currentChanged.connect(self._on_current_changed)
         self._layout.addWidget(self._tab_widget)
+
+        # 保存快捷键
+        QShortcut(QKeySequence.Save, self, self.save_current)
+        QShortcut(QKeySequence("Ctrl+K, S"), self, self.save_all)
     
-    def open_file(self, file_path: str) -> None:
-        """打开文件"""
+    @property
+    def saver(self) -> FileSaver:
+        """获取文件保存器"""
+        return self._saver
+
+    @property
+    def watcher(self) -> FileWatcher:
+        """获取已打开文件的监视器"""
+        return self._watcher
+
+    @property
+    def search_engine(self) -> SearchEngine:
+        """获取查找替换引擎"""
+        return self._search_engine
+
+    @property
+    def completion_engine(self) -> CompletionEngine:
+        """获取所有编辑器共用的补全引擎"""
+        return self._completion
+
+    @property
+    def word_index(self) -> WordIndex:
+        """获取打开的缓冲区的单词索引"""
+        return self._word_index
+
+    def current_editor(self) -> Optional[Editor]:
+        """获取当前标签页的编辑器"""
+        current = self._tab_widget.currentWidget()
+        return current if isinstance(current, Editor) else None
+
+    def find_in_current(self, query: SearchQuery) -> bool:
+        """在当前编辑器中查找，结果逐批追加到引擎的结果模型
+
+        Returns:
+            bool: 是否开始了查找
+        """
+        editor = self.current_editor()
+        if editor is None or editor.is_loading():
+            return False
+        self._search_engine.find(editor.buffer, query)
+        return True
+
+    def replace_all_in_current(self, query: SearchQuery, replacement: str) -> bool:
+        """在当前编辑器中全部替换，作为一个撤销步骤应用
+
+        Returns:
+            bool: 是否开始了替换
+        """
+        editor = self.current_editor()
+        if editor is None or editor.is_loading():
+            return False
+        self._search_engine.replace_all(editor.buffer, query, replacement, editor)
+        return True
+
+    def set_huge_file_threshold(self, threshold: int) -> None:
+        """设置超大文件阈值
+
+        Args:
+            threshold: 超过该字节数的文件以只读查看器打开
+        """
+        self._huge_file_threshold = threshold
+
+    def set_undo_memory_limit(self, limit: int) -> None:
+        """设置每个编辑器撤销历史的内存上限
+
+        Args:
+            limit: 内存上限（字节）
+        """
+        self._undo_memory_limit = limit
+        for document in self._documents.values():
+            document.buffer.history.set_memory_limit(limit)
+
+    def set_virtual_thresholds(self, line_length: int, line_count: int) -> None:
+        """设置编辑器切换到虚拟化视图的阈值
+
+        Args:
+            line_length: 任一行超过该字符数时切换
+            line_count: 总行数超过该值时切换
+        """
+        self._virtual_thresholds = (line_length, line_count)
+        for document in self._documents.values():
+            document.set_virtual_thresholds(line_length, line_count)
+
+    def set_max_live_editors(self, count: int) -> None:
+        """设置保留编辑器控件的标签页数
+
+        更早使用的标签页只保留缓冲区，再次激活时重建编辑器。
+
+        Args:
+            count: 保留控件的最近使用标签页数，至少为 1
+        """
+        self._max_live_editors = max(1, count)
+        self._evict_editors()
+
+    def set_completion_delay(self, delay: int) -> None:
+        """设置输入后发起补全请求前的等待时间
+
+        Args:
+            delay: 毫秒数
+        """
+        self._completion.set_delay(delay)
+
+    def open_file(self, file_path: str, position: Optional[Position] = None) -> None:
+        """打开文件
+
+        Args:
+            file_path: 文件路径
+            position: 打开后光标跳转的位置，文件仍在加载时于加载完成后跳转
+        """
         if file_path in self._editors:
-            editor = self._editors[file_path]
-            self._tab_widget.setCurrentWidget(editor)
+            self._tab_widget.setCurrentWidget(self._editors[file_path])
+            # 激活占位标签页时会替换为编辑器，文件无法打开时移除标签页
+            editor = self._editors.get(file_path)
+            if position is not None and isinstance(editor, Editor):
+                self._move_cursor(file_path, editor, position)
             return
         
-        editor = Editor()
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                editor.setPlainText(f.read())
-        except Exception as e:
+            is_huge = os.path.getsize(file_path) > self._huge_file_threshold
+        except OSError as e:
             print(f"Error loading file: {e}")
             return
-        
-        self._editors[file_path] = editor
-        self._tab_widget.addTab(editor, Path(file_path).name)
+        if is_huge:
+            self._open_huge_file(file_path)
+            return
+
+        # 标签页已关闭但其他视图仍在显示该文件时，挂接到同一个文档，无需重新加载
+        document = self._documents.get(file_path)
+        editor = self._create_editor(file_path)
+        self._set_widget(file_path, editor)
+        if document is not None:
+            name = Path(file_path).name
+            title = f"● {name}" if document.is_modified() else name
+            self._tab_widget.addTab(editor, title)
+            self._tab_widget.setCurrentWidget(editor)
+            if position is not None:
+                self._move_cursor(file_path, editor, position)
+            return
+        self._tab_widget.addTab(editor, f"{Path(file_path).name} (加载中)")
         self._tab_widget.setCurrentWidget(editor)
+        self._start_loading(file_path, editor, position)
+
+    def _create_editor(
+        self, file_path: str, buffer: Optional[TextBuffer] = None
+    ) -> Editor:
+        """创建标签页中的编辑器，文件已有共享文档时挂接到该文档
+
+        Args:
+            file_path: 文件路径
+            buffer: 沿用的缓冲区，创建后需调用 rebuild_view
+        """
+        editor = Editor(self._document_for(file_path, buffer))
+        editor.set_completion_engine(self._completion)
+        editor.modificationChanged.connect(
+            lambda modified: self._on_modification_changed(file_path, modified)
+        )
+        return editor
+
+    def _document_for(
+        self, file_path: str, buffer: Optional[TextBuffer] = None
+    ) -> SharedDocument:
+        """获取文件的共享文档，没有时按当前配置创建"""
+        document = self._documents.get(file_path)
+        if document is not None:
+            return document
+        document = SharedDocument(buffer)
+        document.buffer.history.set_memory_limit(self._undo_memory_limit)
+        document.set_virtual_thresholds(*self._virtual_thresholds)
+        # 在文档为空时安装高亮器，载入完成后于空闲时间分析
+        document.set_lexer(lexer_for_path(file_path))
+        self._word_index.add_buffer(document.buffer)
+        self._documents[file_path] = document
+        return document
+
+    def open_view(self, file_path: str) -> Optional[Editor]:
+        """为已打开的文件创建一个额外的编辑器视图
+
+        新视图与标签页中的编辑器挂接到同一个共享文档，编辑即时反映到所有视图，
+        光标、选择和滚动位置各自独立。视图由调用方放入分栏或新窗口，
+        关闭前需调用 close_view。
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            Optional[Editor]: 新视图，文件没有已创建的编辑器或仍在加载时返回 None
+        """
+        document = self._documents.get(file_path)
+        if document is None or file_path in self._loaders:
+            return None
+        view = Editor(document)
+        view.set_completion_engine(self._completion)
+        return view
+
+    def close_view(self, view: Editor) -> None:
+        """关闭 open_view 创建的视图，最后一个视图关闭时释放共享文档"""
+        for path, document in self._documents.items():
+            if document is view.document:
+                # 标签页也已关闭时不再需要监视
+                if self._release_view(path, view) and path not in self._editors:
+                    self._watcher.unwatch(path)
+                break
+        view.deleteLater()
+
+    def _release_view(self, file_path: str, editor: Editor) -> bool:
+        """把编辑器从共享文档上解除挂接
+
+        文档被释放且标签页没有退回为保留缓冲区的占位控件时，
+        缓冲区的单词不再参与补全。
+
+        Returns:
+            bool: 文档是否已没有视图并被释放
+        """
+        document = editor.document
+        editor.detach()
+        if document.ref_count:
+            return False
+        if self._documents.get(file_path) is document:
+            del self._documents[file_path]
+        if not isinstance(self._editors.get(file_path), TabPlaceholder):
+            self._word_index.remove_buffer(document.buffer)
+        return True
+
+    def _start_loading(
+        self, file_path: str, editor: Editor, position: Optional[Position]
+    ) -> None:
+        """后台分块加载，完成前标签页显示加载进度"""
+        loader = FileLoader(editor, file_path, parent=self)
+        loader.progressChanged.connect(
+            lambda percent: self._on_load_progress(file_path, percent)
+        )
+        loader.finished.connect(lambda: self._on_load_finished(file_path))
+        loader.failed.connect(lambda message: self._on_load_failed(file_path, message))
+        self._loaders[file_path] = loader
+        if position is not None:
+            self._pending_positions[file_path] = position
+        loader.start()
+
+    def _move_cursor(self, file_path: str, editor: Editor, position: Position) -> None:
+        """移动光标，文件仍在加载时推迟到加载完成"""
+        if file_path in self._loaders:
+            self._pending_positions[file_path] = position
+            return
+        editor.set_cursor_position(position)
+        editor.setFocus()
+
+    def _on_load_progress(self, file_path: str, percent: int) -> None:
+        """更新标签页上的加载进度"""
+        editor = self._editors.get(file_path)
+        if editor is None:
+            return
+        index = self._tab_widget.indexOf(editor)
+        if index >= 0:
+            self._tab_widget.setTabText(index, f"{Path(file_path).name} ({percent}%)")
+
+    def _on_load_finished(self, file_path: str) -> None:
+        """加载完成"""
+        loader = self._loaders.pop(file_path, None)
+        if loader is not None:
+            loader.deleteLater()
+        position = self._pending_positions.pop(file_path, None)
+        scroll = self._pending_scrolls.pop(file_path, None)
+        editor = self._editors.get(file_path)
+        if editor is None:
+            return
+        index = self._tab_widget.indexOf(editor)
+        if index >= 0:
+            self._tab_widget.setTabText(index, Path(file_path).name)
+        # 载入完成后才开始监视，以载入的内容作为已知内容
+        self._watcher.watch(file_path)
+        if position is not None and isinstance(editor, Editor):
+            self._move_cursor(file_path, editor, position)
+        if scroll is not None and isinstance(editor, Editor):
+            editor.set_scroll_position(*scroll)
+
+    def _on_load_failed(self, file_path: str, message: str) -> None:
+        """加载失败时关闭对应标签页"""
+        print(f"Error loading file: {message}")
+        self._pending_positions.pop(file_path, None)
+        self._pending_scrolls.pop(file_path, None)
+        self._watcher.unwatch(file_path)
+        loader = self._loaders.pop(file_path, None)
+        if loader is not None:
+            loader.deleteLater()
+        editor = self._remove_widget(file_path)
+        if editor is None:
+            return
+        if isinstance(editor, Editor):
+            self._release_view(file_path, editor)
+        index = self._tab_widget.indexOf(editor)
+        if index >= 0:
+            self._tab_widget.removeTab(index)
     
+    def save_file(self, file_path: str, allow_lossy: bool = False) -> bool:
+        """在后台保存指定文件
+
+        内容在提交时固定，保存期间可以继续编辑。载入时有字节无法解码而被
+        替换为 U+FFFD 的文件，除非明确允许，否则先询问用户，以免静默写入替换字符。
+
+        Args:
+            file_path: 文件路径
+            allow_lossy: 是否不经询问直接保存有损解码的文件
+
+        Returns:
+            bool: 是否提交了保存请求
+        """
+        editor = self._editors.get(file_path)
+        document = self._documents.get(file_path)
+        if isinstance(editor, TabPlaceholder):
+            # 只保留缓冲区的标签页直接从缓冲区保存，无需重建编辑器
+            buffer = editor.buffer
+            if buffer is None:
+                return False
+        elif document is not None and not document.is_loading():
+            buffer = document.buffer
+        else:
+            return False
+        # 按载入时检测到的编码、BOM 和换行符风格写回
+        file_format = buffer.file_format
+        if file_format.lossy:
+            if not allow_lossy and not self._confirm_lossy_save(
+                file_path, file_format.encoding
+            ):
+                return False
+            # 写入后文件内容即为替换后的文本，之后按普通文件保存
+            file_format = replace(file_format, lossy=False)
+            buffer.set_file_format(file_format)
+        self._saver.save(
+            file_path,
+            file_format.encode_chunks(buffer.iter_chunks(SAVE_CHUNK_SIZE)),
+            file_format.encoding,
+        )
+        self._set_modified(file_path, False)
+        if file_path in self._conflicts:
+            # 保存即以编辑器的内容覆盖磁盘上的变化
+            self._conflicts.discard(file_path)
+            self._on_modification_changed(file_path, False)
+        return True
+
+    def _confirm_lossy_save(self, file_path: str, encoding: str) -> bool:
+        """询问是否保存有损解码的文件
+
+        Returns:
+            bool: 用户是否确认写入替换字符
+        """
+        answer = QMessageBox.warning(
+            self,
+            "保存文件",
+            f"{Path(file_path).name} 含有无法按 {encoding} 解码的字节，"
+            "载入时已替换为 U+FFFD。\n\n保存会把替换字符写入文件，仍要保存吗？",
+            QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Cancel,
+            QMessageBox.StandardButton.Cancel,
+        )
+        return answer == QMessageBox.StandardButton.Save
+
+    def _set_modified(self, file_path: str, modified: bool) -> None:
+        """设置共享文档或只保留缓冲区的标签页的修改状态"""
+        editor = self._editors.get(file_path)
+        document = self._documents.get(file_path)
+        if document is not None:
+            document.set_modified(modified)
+        elif isinstance(editor, TabPlaceholder) and editor.buffer is not None:
+            editor.buffer.set_modified(modified)
+            self._on_modification_changed(file_path, modified)
+
+    def save_current(self) -> None:
+        """保存当前标签页的文件"""
+        path = self._paths.get(self._tab_widget.currentWidget())
+        if path is not None:
+            self.save_file(path)
+
+    def save_all(self) -> None:
+        """并发保存所有已修改的文件"""
+        for path, document in list(self._documents.items()):
+            if document.is_modified():
+                self.save_file(path)
+        for path, editor in list(self._editors.items()):
+            if isinstance(editor, TabPlaceholder) and editor.is_dirty:
+                self.save_file(path)
+
+    def _on_file_saved(self, file_path: str) -> None:
+        """文件保存成功"""
+        # 自身写入引起的变化事件不需要重新读取
+        self._watcher.update_stamp(file_path)
+        print(f"File saved: {file_path}")
+
+    def _on_save_failed(self, file_path: str, message: str) -> None:
+        """文件保存失败时恢复修改状态"""
+        print(f"Error saving file: {message}")
+        self._set_modified(file_path, True)
+
+    def _on_files_changed(self, changes: List[FileChange]) -> None:
+        """把一批磁盘上变化的文件以差异方式应用到编辑器
+
+        有未保存修改的编辑器保留当前内容，不被磁盘上的内容覆盖，
+        只在标签页上标记冲突，直到保存时以编辑器的内容覆盖磁盘。
+        """
+        for change in changes:
+            editor = self._editors.get(change.path)
+            document = self._documents.get(change.path)
+            buffer: Optional[TextBuffer] = None
+            if isinstance(editor, TabPlaceholder):
+                buffer = editor.buffer
+            if buffer is not None:
+                modified = buffer.is_modified()
+            elif document is not None and change.path not in self._loaders:
+                modified = document.is_modified()
+            else:
+                continue
+            if modified:
+                self._conflicts.add(change.path)
+                self._on_modification_changed(change.path, True)
+                continue
+            if document is not None:
+                # 挂接同一文档的所有视图一起更新
+                document.buffer.set_file_format(change.file_format)
+                document.apply_external_change(change.text)
+            elif buffer is not None:
+                # 只保留缓冲区的标签页直接更新缓冲区
+                buffer.set_file_format(change.file_format)
+                buffer.apply_edits(buffer.diff_edits(change.text))
+                buffer.set_modified(False)
+
+    def _on_watch_failed(self, file_path: str, message: str) -> None:
+        """重新读取变化的文件失败"""
+        print(f"Error reloading file: {message}")
+
+    def _on_modification_changed(self, file_path: str, modified: bool) -> None:
+        """在标签页标题上标记未保存的修改和与磁盘内容的冲突"""
+        editor = self._editors.get(file_path)
+        if editor is None or file_path in self._loaders:
+            return
+        index = self._tab_widget.indexOf(editor)
+        if index >= 0:
+            self._tab_widget.setTabText(index, self._tab_title(file_path, modified))
+            tooltip = file_path
+            if file_path in self._conflicts:
+                tooltip += "\n磁盘上的文件已被修改，保存将覆盖磁盘上的内容"
+            self._tab_widget.setTabToolTip(index, tooltip)
+
+    def _tab_title(self, file_path: str, modified: bool) -> str:
+        """编辑器标签页的标题"""
+        title = Path(file_path).name
+        if modified:
+            title = f"● {title}"
+        if file_path in self._conflicts:
+            title = f"{title} [磁盘已更改]"
+        return title
+
+    def _open_huge_file(self, file_path: str) -> None:
+        """以只读查看器打开超大文件"""
+        try:
+            viewer = HugeFileViewer(file_path)
+        except OSError as e:
+            print(f"Error loading file: {e}")
+            return
+
+        self._set_widget(file_path, viewer)
+        self._tab_widget.addTab(viewer, f"{Path(file_path).name} [只读]")
+        self._tab_widget.setCurrentWidget(viewer)
+
+    def session_snapshot(self) -> SessionSnapshot:
+        """获取打开的标签页、未保存的内容、光标和滚动位置的快照"""
+        snapshot = SessionSnapshot(active=self._tab_widget.currentIndex())
+        for index in range(self._tab_widget.count()):
+            widget = self._tab_widget.widget(index)
+            path = self._paths.get(widget)
+            if path is None:
+                continue
+            if isinstance(widget, TabPlaceholder):
+                snapshot.tabs.append(widget.snapshot())
+            elif isinstance(widget, Editor) and path not in self._loaders:
+                position = widget.get_cursor_position()
+                snapshot.tabs.append(
+                    SessionTab(
+                        path,
+                        position.line,
+                        position.column,
+                        widget.scroll_position(),
+                        widget.content if widget.is_modified() else None,
+                        widget.buffer.file_format,
+                    )
+                )
+            else:
+                snapshot.tabs.append(SessionTab(path))
+        return snapshot
+
+    def save_session(self, session_path: str) -> None:
+        """把会话快照写入文件
+
+        Raises:
+            OSError: 写入失败
+        """
+        save_session(session_path, self.session_snapshot())
+
+    def restore_session(self, snapshot: SessionSnapshot) -> None:
+        """恢复会话
+
+        只为当前标签页创建编辑器，其余标签页以占位控件代替，首次激活时再恢复。
+
+        Args:
+            snapshot: 会话快照
+        """
+        self._tab_widget.blockSignals(True)
+        try:
+            for tab in snapshot.tabs:
+                if tab.path in self._editors:
+                    continue
+                placeholder = self._restore_placeholder(tab)
+                self._set_widget(tab.path, placeholder)
+                name = Path(tab.path).name
+                title = f"● {name}" if tab.is_dirty else name
+                self._tab_widget.addTab(placeholder, title)
+            if 0 <= snapshot.active < len(snapshot.tabs):
+                active = self._editors.get(snapshot.tabs[snapshot.active].path)
+                if active is not None:
+                    self._tab_widget.setCurrentWidget(active)
+        finally:
+            self._tab_widget.blockSignals(False)
+        self._on_current_changed(self._tab_widget.currentIndex())
+
+    def _restore_placeholder(self, tab: SessionTab) -> TabPlaceholder:
+        """为快照中的标签页创建占位控件，未保存的内容放入缓冲区"""
+        if tab.content is None:
+            return TabPlaceholder(tab)
+        buffer = TextBuffer()
+        buffer.history.set_memory_limit(self._undo_memory_limit)
+        buffer.set_content(tab.content)
+        buffer.set_file_format(tab.file_format)
+        buffer.set_modified(True)
+        self._word_index.add_buffer(buffer)
+        return TabPlaceholder(replace(tab, content=None), buffer)
+
+    def _set_widget(
+        self, file_path: str, widget: Union[Editor, HugeFileViewer, TabPlaceholder]
+    ) -> None:
+        """记录文件对应的标签页控件，并维护反向索引"""
+        old = self._editors.get(file_path)
+        if old is not None:
+            self._paths.pop(old, None)
+        self._editors[file_path] = widget
+        self._paths[widget] = file_path
+
+    def _remove_widget(
+        self, file_path: str
+    ) -> Optional[Union[Editor, HugeFileViewer, TabPlaceholder]]:
+        """移除文件对应的标签页控件记录"""
+        widget = self._editors.pop(file_path, None)
+        if widget is not None:
+            self._paths.pop(widget, None)
+        self._recent.pop(file_path, None)
+        return widget
+
+    def _replace_tab(
+        self,
+        file_path: str,
+        old: QWidget,
+        new: Union[Editor, HugeFileViewer, TabPlaceholder],
+        title: str,
+    ) -> None:
+        """在原位置用新控件替换标签页，不触发激活其他标签页"""
+        self._tab_widget.blockSignals(True)
+        try:
+            current = self._tab_widget.currentWidget()
+            index = self._tab_widget.indexOf(old)
+            self._tab_widget.removeTab(index)
+            self._tab_widget.insertTab(index, new, title)
+            if current is old:
+                self._tab_widget.setCurrentWidget(new)
+        finally:
+            self._tab_widget.blockSignals(False)
+        self._set_widget(file_path, new)
+
+    def _on_current_changed(self, index: int) -> None:
+        """激活占位标签页时重建编辑器，并只保留最近使用的编辑器控件"""
+        widget: Optional[QWidget] = self._tab_widget.widget(index)
+        if isinstance(widget, TabPlaceholder):
+            widget = self._realize(widget)
+        if not isinstance(widget, Editor):
+            return
+        path = self._paths.get(widget)
+        if path is not None:
+            self._recent[path] = None
+            self._recent.move_to_end(path)
+            self._evict_editors()
+
+    def _evict_editors(self) -> None:
+        """把超出数量的最久未使用的编辑器退回只保留缓冲区的状态"""
+        if len(self._recent) <= self._max_live_editors:
+            return
+        current = self._tab_widget.currentWidget()
+        for path in list(self._recent):
+            if len(self._recent) <= self._max_live_editors:
+                break
+            editor = self._editors.get(path)
+            # 当前标签页、仍在加载的编辑器和还有其他视图的文档不退回
+            if editor is current or path in self._loaders:
+                continue
+            if isinstance(editor, Editor) and editor.document.ref_count > 1:
+                continue
+            # 文档的撤销栈随编辑器释放，有撤销历史的编辑器不退回
+            if isinstance(editor, Editor) and editor.document.has_undo_history():
+                continue
+            if isinstance(editor, Editor):
+                self._evict(path, editor)
+            else:
+                self._recent.pop(path)
+
+    def _evict(self, file_path: str, editor: Editor) -> None:
+        """释放编辑器控件及其文档，标签页只保留缓冲区、光标和滚动位置"""
+        buffer = editor.buffer
+        # 文档撤销回保存状态时缓冲区仍记为已修改，以编辑器的状态为准
+        modified = editor.is_modified()
+        if modified != buffer.is_modified():
+            buffer.set_modified(modified)
+        position = editor.get_cursor_position()
+        tab = SessionTab(
+            file_path,
+            position.line,
+            position.column,
+            editor.scroll_position(),
+            None,
+            buffer.file_format,
+        )
+        placeholder = TabPlaceholder(tab, buffer)
+        title = self._tab_widget.tabText(self._tab_widget.indexOf(editor))
+        self._replace_tab(file_path, editor, placeholder, title)
+        self._recent.pop(file_path, None)
+        self._release_view(file_path, editor)
+        editor.deleteLater()
+
+    def _realize(
+        self, placeholder: TabPlaceholder
+    ) -> Optional[Union[Editor, HugeFileViewer]]:
+        """把占位标签页替换为编辑器
+
+        保留了缓冲区时据此重建编辑器，否则从磁盘加载文件。
+
+        Returns:
+            Optional[Union[Editor, HugeFileViewer]]: 新的编辑器，文件无法打开时返回 None
+        """
+        tab = placeholder.tab
+        buffer = placeholder.buffer
+        name = Path(tab.path).name
+        widget: Optional[Union[Editor, HugeFileViewer]] = None
+        try:
+            if buffer is not None:
+                widget = self._create_editor(tab.path, buffer)
+                title = self._tab_title(tab.path, buffer.is_modified())
+            elif os.path.getsize(tab.path) > self._huge_file_threshold:
+                widget = HugeFileViewer(tab.path)
+                title = f"{name} [只读]"
+            else:
+                widget = self._create_editor(tab.path)
+                title = f"{name} (加载中)"
+        except OSError as e:
+            print(f"Error loading file: {e}")
+
+        if widget is None:
+            self._remove_widget(tab.path)
+            self._tab_widget.removeTab(self._tab_widget.indexOf(placeholder))
+            placeholder.deleteLater()
+            return None
+        self._replace_tab(tab.path, placeholder, widget, title)
+        placeholder.deleteLater()
+
+        position = Position(tab.line, tab.column)
+        if isinstance(widget, Editor):
+            if buffer is not None:
+                widget.rebuild_view()
+                widget.set_cursor_position(position)
+                widget.set_scroll_position(*tab.scroll)
+                if not self._watcher.is_watching(tab.path):
+                    self._watcher.watch(tab.path)
+            else:
+                self._pending_scrolls[tab.path] = tab.scroll
+                self._start_loading(tab.path, widget, position)
+        return widget
+
     def _on_tab_close_requested(self, index: int) -> None:
         """处理标签页关闭请求"""
         editor = self._tab_widget.widget(index)
-        for path, ed in self._editors.items():
-            if ed == editor:
-                del self._editors[path]
-                break
+        path = self._paths.get(editor)
+        if path is not None:
+            self._remove_widget(path)
+            # 关闭仍在加载的标签页时取消加载
+            loader = self._loaders.pop(path, None)
+            if loader is not None:
+                loader.cancel()
+                loader.deleteLater()
+            self._pending_positions.pop(path, None)
+            self._pending_scrolls.pop(path, None)
+            self._conflicts.discard(path)
+            # 其他视图仍在显示该文件时保留共享文档并继续监视
+            released = True
+            if isinstance(editor, Editor):
+                released = self._release_view(path, editor)
+            elif isinstance(editor, TabPlaceholder) and editor.buffer is not None:
+                self._word_index.remove_buffer(editor.buffer)
+            if released:
+                self._watcher.unwatch(path)
+        if isinstance(editor, HugeFileViewer):
+            editor.close_file()
         self._tab_widget.removeTab(index)
 
 class GFProtocol:
@@ -95,6 +849,8 @@ class EditorPlugin(Plugin):
         self._GF_impl = GF
         self._file_explorer = FileExplorer()
         self._editor_manager = EditorManager()
+        self._search_view = WorkspaceSearchView(self._file_explorer.root_path)
+        self._search_indexer = TrigramIndexer(self._search_view.search.executor)
     
     @property
     def id(self) -> str:
@@ -126,11 +882,17 @@ class EditorPlugin(Plugin):
                 id="explorer",
                 icon=load_icon("explorer"),
                 tooltip="文件资源管理器"
-            )
+            ),
+            ActivityIcon(
+                id="search",
+                icon=load_icon("search"),
+                tooltip="搜索"
+            ),
         ]
         
         # 侧边栏视图
         views.side_views["explorer"] = self._file_explorer
+        views.side_views["search"] = self._search_view
         
         # 工作区编辑器
         views.work_views["editor"] = self._editor_manager
@@ -146,9 +908,17 @@ class EditorPlugin(Plugin):
         
         # 注册配置
         self._register_configuration()
+        self._apply_configuration()
         
         # 连接信号
         self._connect_signals()
+
+        # 恢复上次退出时的会话。get_typed 会把 False 当作未设置而返回默认值，
+        # 布尔配置读取原始值
+        if self._GF_impl.config_registry.get("editor.hotExit", True):
+            snapshot = load_session(default_session_path())
+            if snapshot is not None:
+                self._editor_manager.restore_session(snapshot)
     
     def _register_commands(self) -> None:
         """注册编辑器命令"""
@@ -156,6 +926,15 @@ class EditorPlugin(Plugin):
             DeleteCommand(),
             UndoCommand(),
             RedoCommand(),
+            GotoLineCommand(),
+            FoldCommand(),
+            UnfoldCommand(),
+            FoldAllCommand(),
+            UnfoldAllCommand(),
+            SaveCommand(self._editor_manager),
+            SaveAllCommand(self._editor_manager),
+            FindCommand(self._editor_manager),
+            ReplaceAllCommand(self._editor_manager),
         ]
         
         for command in commands:
@@ -188,22 +967,151 @@ class EditorPlugin(Plugin):
                     "default": 4,
                     "description": "制表符宽度",
                 },
-            }
+            },
+            "editor.hugeFileThreshold": {
+                "type": int,
+                "default": HUGE_FILE_THRESHOLD,
+                "description": "超过该字节数的文件以只读查看器打开",
+            },
+            "editor.undoMemoryLimit": {
+                "type": int,
+                "default": UNDO_MEMORY_LIMIT,
+                "description": "每个编辑器撤销历史的内存上限（字节）",
+            },
+            "editor.virtualLineLength": {
+                "type": int,
+                "default": VIRTUAL_LINE_LENGTH,
+                "description": "任一行超过该字符数时改用只绘制可见片段的虚拟化视图",
+            },
+            "editor.virtualLineCount": {
+                "type": int,
+                "default": VIRTUAL_LINE_COUNT,
+                "description": "总行数超过该值时改用只绘制可见片段的虚拟化视图",
+            },
+            "editor.saveFsync": {
+                "type": str,
+                "default": FsyncPolicy.FILE.value,
+                "description": "保存时的磁盘同步策略：none、file 或 full",
+                "validator": lambda value: value in {p.value for p in FsyncPolicy},
+            },
+            "editor.watchDebounce": {
+                "type": int,
+                "default": WATCH_DEBOUNCE_MS,
+                "description": "已打开文件在磁盘上变化后，合并变化事件的等待时间（毫秒）",
+            },
+            "editor.maxLiveEditors": {
+                "type": int,
+                "default": MAX_LIVE_EDITORS,
+                "description": "保留编辑器控件的最近使用标签页数，更早的标签页只保留文本",
+            },
+            "editor.completionDelay": {
+                "type": int,
+                "default": COMPLETION_DELAY_MS,
+                "description": "输入后发起自动补全请求前的等待时间（毫秒）",
+            },
+            "editor.hotExit": {
+                "type": bool,
+                "default": True,
+                "description": "退出时保存打开的标签页和未保存的内容，下次启动时恢复",
+            },
+            "editor.searchMaxFileSize": {
+                "type": int,
+                "default": WORKSPACE_MAX_FILE_SIZE,
+                "description": "工作区搜索跳过超过该字节数的文件",
+            },
+            "editor.searchIndex": {
+                "type": bool,
+                "default": True,
+                "description": "为工作区建立三元组索引以加速搜索",
+            },
         }
         self._GF_impl.config_registry.register(config)
+
+    def _apply_configuration(self) -> None:
+        """应用编辑器配置"""
+        registry = self._GF_impl.config_registry
+        threshold = registry.get_typed("editor.hugeFileThreshold", int)
+        self._editor_manager.set_huge_file_threshold(threshold or HUGE_FILE_THRESHOLD)
+        undo_limit = registry.get_typed("editor.undoMemoryLimit", int)
+        self._editor_manager.set_undo_memory_limit(undo_limit or UNDO_MEMORY_LIMIT)
+        line_length = registry.get_typed("editor.virtualLineLength", int)
+        line_count = registry.get_typed("editor.virtualLineCount", int)
+        self._editor_manager.set_virtual_thresholds(
+            line_length or VIRTUAL_LINE_LENGTH, line_count or VIRTUAL_LINE_COUNT
+        )
+        live = registry.get_typed("editor.maxLiveEditors", int)
+        self._editor_manager.set_max_live_editors(live or MAX_LIVE_EDITORS)
+        fsync = registry.get_typed("editor.saveFsync", str, FsyncPolicy.FILE.value)
+        self._editor_manager.saver.set_fsync_policy(FsyncPolicy(fsync))
+        debounce = registry.get_typed("editor.watchDebounce", int)
+        self._editor_manager.watcher.set_debounce(debounce or WATCH_DEBOUNCE_MS)
+        delay = registry.get_typed("editor.completionDelay", int)
+        self._editor_manager.set_completion_delay(
+            COMPLETION_DELAY_MS if delay is None else delay
+        )
+        max_size = registry.get_typed("editor.searchMaxFileSize", int)
+        self._search_view.search.set_max_file_size(max_size or WORKSPACE_MAX_FILE_SIZE)
+        self._search_indexer.set_max_file_size(max_size or WORKSPACE_MAX_FILE_SIZE)
+        # get_typed 会把 False 当作未设置而返回默认值，布尔配置读取原始值
+        if registry.get("editor.searchIndex", True):
+            # 后台加载并增量刷新索引，完成前搜索退回到完整遍历
+            self._search_view.search.set_candidate_source(
+                self._search_indexer.candidates
+            )
+            self._search_indexer.set_root(self._file_explorer.root_path())
+        else:
+            self._search_view.search.set_candidate_source(None)
+            self._search_indexer.cancel()
     
     def _connect_signals(self) -> None:
         """连接信号"""
         # 监听文件浏览器的文件选择
         self._file_explorer.fileSelected.connect(self._on_file_selected)
+        # 打开工作区搜索结果
+        self._search_view.matchActivated.connect(self._on_search_match_activated)
+        # 保存的文件增量更新搜索索引
+        self._editor_manager.saver.saved.connect(self._on_file_saved)
+        # 已打开文件在磁盘上变化时同样刷新索引
+        self._editor_manager.watcher.filesChanged.connect(self._on_files_changed)
     
     def _on_file_selected(self, file_path: str) -> None:
         """处理文件选择事件"""
         self._editor_manager.open_file(file_path)
+
+    def _on_file_saved(self, file_path: str) -> None:
+        """刷新已保存文件的索引"""
+        self._search_indexer.refresh([file_path])
+
+    def _on_files_changed(self, changes: List[FileChange]) -> None:
+        """刷新磁盘上变化的已打开文件的索引"""
+        self._search_indexer.refresh([change.path for change in changes])
+
+    def _on_search_match_activated(self, file_path: str, line: int, column: int) -> None:
+        """打开搜索结果所在的文件并跳转到匹配位置"""
+        self._editor_manager.open_file(file_path, Position(line, column))
     
 
     def cleanup(self) -> None:
         """清理插件"""
+        # 保存会话，下次启动时恢复标签页和未保存的内容
+        if self._GF_impl.config_registry.get("editor.hotExit", True):
+            try:
+                self._editor_manager.save_session(default_session_path())
+            except OSError as e:
+                print(f"Error saving session: {e}")
         # 清理编辑器资源
+        for loader in self._editor_manager._loaders.values():
+            loader.cancel()
+        self._editor_manager._loaders.clear()
+        self._editor_manager.search_engine.cancel()
+        self._editor_manager.completion_engine.cancel()
+        self._editor_manager.watcher.cancel()
+        self._search_indexer.cancel()
+        self._search_view.search.shutdown()
+        self._editor_manager.saver.wait_for_done()
+        for editor in self._editor_manager._editors.values():
+            if isinstance(editor, HugeFileViewer):
+                editor.close_file()
         self._editor_manager._editors.clear()
+        self._editor_manager._documents.clear()
         super().cleanup()
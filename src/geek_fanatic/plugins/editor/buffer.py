@@ -5,9 +5,305 @@
 文本缓冲区实现模块
 """
 
-from typing import List, Optional
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .types import Position, TextOperation, InsertOperation, DeleteOperation
+from .decorations import DecorationStore
+from .diff import LineHashes, diff_hashes, hash_lines
+from .encoding import FileFormat
+from .line_index import LineIndex
+from .oplog import OperationLog
+from .piece_table import PieceTable
+from .undo import EditOperation, UndoHistory
+from .types import (
+    Position,
+    TextOperation,
+    TextReader,
+    TextStorage,
+    InsertOperation,
+    DeleteOperation,
+)
+
+# 为映射旧版本位置保留的最近编辑数量
+CHANGE_JOURNAL_LIMIT = 4096
+
+# 批量替换时相距不超过该字符数的编辑合并为一次存储替换
+EDIT_CLUSTER_GAP = 1024
+
+# 编辑监听器，参数为编辑前受影响的整行文本和编辑后对应的整行文本
+EditListener = Callable[[str, str], None]
+
+class LineListStorage:
+    """按行列表存储
+
+    以字符串列表按行保存内容。多行编辑需要拼接整个列表，
+    适合小文件，也作为片段表存储的对照实现。
+    """
+
+    def __init__(self) -> None:
+        """初始化存储"""
+        self._content: List[str] = [""]  # 按行存储的内容
+        self._index = LineIndex()  # 行首偏移索引
+
+    def set_text(self, text: str) -> None:
+        """设置完整内容"""
+        self._content = text.split("\n")
+        self._index.rebuild(map(len, self._content))
+
+    def get_text(self) -> str:
+        """获取完整内容"""
+        return "\n".join(self._content)
+
+    def get_line(self, line_number: int) -> str:
+        """获取指定行的内容"""
+        if 0 <= line_number < len(self._content):
+            return self._content[line_number]
+        return ""
+
+    def get_line_count(self) -> int:
+        """获取总行数"""
+        return len(self._content)
+
+    def get_length(self) -> int:
+        """获取总字符数"""
+        return self._index.length
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[str]:
+        """按顺序分块迭代完整内容"""
+        return self._iter_lines(list(self._content), chunk_size)
+
+    @staticmethod
+    def _iter_lines(lines: List[str], chunk_size: int) -> Iterator[str]:
+        """把行列表合并为不超过块大小的文本块"""
+        chunk: List[str] = []
+        size = 0
+        last = len(lines) - 1
+        for number, line in enumerate(lines):
+            chunk.append(line if number == last else line + "\n")
+            size += len(chunk[-1])
+            if size >= chunk_size:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield "".join(chunk)
+
+    def offset_to_position(self, offset: int) -> Position:
+        """将字符偏移转换为行列位置"""
+        line, column = self._index.locate(offset)
+        return Position(line, column)
+
+    def position_to_offset(self, position: Position) -> int:
+        """将行列位置转换为字符偏移"""
+        line = max(0, min(position.line, len(self._content) - 1))
+        column = max(0, min(position.column, len(self._content[line])))
+        return self._index.line_start(line) + column
+
+    def insert(self, position: Position, text: str) -> None:
+        """在指定位置插入文本"""
+        if not text:
+            return
+
+        # 处理多行插入
+        lines = text.split("\n")
+        current_line = self._content[position.line]
+        
+        if len(lines) == 1:
+            # 单行插入
+            new_line = (current_line[:position.column] + 
+                       text + 
+                       current_line[position.column:])
+            self._content[position.line] = new_line
+            self._index.add(position.line, len(new_line) - len(current_line))
+        else:
+            # 多行插入
+            first_line = current_line[:position.column] + lines[0]
+            last_line = lines[-1] + current_line[position.column:]
+            
+            # 替换当前行并插入新行
+            self._content[position.line] = first_line
+            self._content[position.line + 1:position.line + 1] = lines[1:-1]
+            self._content.insert(position.line + len(lines) - 1, last_line)
+            self._index.rebuild(map(len, self._content))
+
+    def delete(self, start: Position, end: Position) -> None:
+        """删除指定范围的文本"""
+        if start.line == end.line:
+            # 单行删除
+            line = self._content[start.line]
+            new_line = line[:start.column] + line[end.column:]
+            self._content[start.line] = new_line
+            self._index.add(start.line, len(new_line) - len(line))
+        else:
+            # 多行删除
+            first_line = self._content[start.line][:start.column]
+            last_line = self._content[end.line][end.column:]
+            
+            # 合并首尾行
+            self._content[start.line] = first_line + last_line
+            # 删除中间行
+            del self._content[start.line + 1:end.line + 1]
+            self._index.rebuild(map(len, self._content))
+
+    def get_range(self, start: Position, end: Position) -> str:
+        """获取指定范围的文本"""
+        if start.line == end.line:
+            # 单行文本
+            return self._content[start.line][start.column:end.column]
+        
+        # 多行文本
+        result = []
+        # 第一行
+        result.append(self._content[start.line][start.column:])
+        # 中间行
+        result.extend(self._content[start.line + 1:end.line])
+        # 最后一行
+        result.append(self._content[end.line][:end.column])
+        
+        return "\n".join(result)
+
+    def snapshot(self) -> "LineListStorage":
+        """获取当前内容的只读快照
+
+        复制行列表（只复制字符串引用）并重建行索引，复杂度为 O(行数)。
+        """
+        snapshot = LineListStorage()
+        snapshot._content = list(self._content)
+        snapshot._index.rebuild(map(len, snapshot._content))
+        return snapshot
+
+class TextSnapshot:
+    """文本缓冲区快照
+
+    某一版本内容的只读视图，读取接口与 TextBuffer 一致，可交给后台线程使用。
+    比较 version 与缓冲区的当前版本即可判断基于快照的结果是否过期，
+    过期的位置可用 TextBuffer.map_position 映射到最新内容。
+    """
+
+    __slots__ = ("_reader", "_version", "_file_format")
+
+    def __init__(
+        self, reader: TextReader, version: int, file_format: FileFormat
+    ) -> None:
+        """初始化快照
+
+        Args:
+            reader: 存储引擎提供的只读快照
+            version: 快照对应的缓冲区版本号
+            file_format: 文件的编码和换行符风格
+        """
+        self._reader = reader
+        self._version = version
+        self._file_format = file_format
+
+    @property
+    def version(self) -> int:
+        """快照对应的缓冲区版本号"""
+        return self._version
+
+    @property
+    def file_format(self) -> FileFormat:
+        """文件的编码、BOM 和换行符风格"""
+        return self._file_format
+
+    def get_content(self) -> str:
+        """获取完整内容"""
+        return self._reader.get_text()
+
+    def get_line(self, line_number: int) -> str:
+        """获取指定行的内容"""
+        return self._reader.get_line(line_number)
+
+    def get_line_count(self) -> int:
+        """获取总行数"""
+        return self._reader.get_line_count()
+
+    def get_length(self) -> int:
+        """获取总字符数"""
+        return self._reader.get_length()
+
+    def get_text(self, start: Position, end: Position) -> str:
+        """获取指定范围的文本"""
+        return self._reader.get_range(start, end)
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024) -> Iterator[str]:
+        """按顺序分块迭代完整内容"""
+        return self._reader.iter_chunks(chunk_size)
+
+    def offset_to_position(self, offset: int) -> Position:
+        """将字符偏移转换为行列位置"""
+        return self._reader.offset_to_position(offset)
+
+    def position_to_offset(self, position: Position) -> int:
+        """将行列位置转换为字符偏移"""
+        return self._reader.position_to_offset(position)
+
+class TextTransaction:
+    """文本事务
+
+    收集一组编辑，提交时排序后一次性应用，所有编辑只记录为一个撤销组。
+    编辑的位置都基于事务开始时的内容，事务中的编辑在提交前不改变缓冲区。
+    同一位置的多个插入按加入的顺序拼接，其余范围不能重叠。
+    """
+
+    def __init__(self, buffer: "TextBuffer") -> None:
+        """初始化事务
+
+        Args:
+            buffer: 用于换算行列位置的缓冲区
+        """
+        self._buffer = buffer
+        self._edits: List[Tuple[int, int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def insert(self, position: Position, text: str) -> None:
+        """在指定位置插入文本"""
+        offset = self._buffer.position_to_offset(position)
+        self.replace_range(offset, offset, text)
+
+    def delete(self, start: Position, end: Position) -> None:
+        """删除指定范围的文本"""
+        self.replace(start, end, "")
+
+    def replace(self, start: Position, end: Position, text: str) -> None:
+        """把指定范围替换为新文本"""
+        self.replace_range(
+            self._buffer.position_to_offset(start),
+            self._buffer.position_to_offset(end),
+            text,
+        )
+
+    def replace_range(self, start: int, end: int, text: str) -> None:
+        """按字符偏移把 [start, end) 替换为新文本"""
+        if start > end:
+            start, end = end, start
+        if start < end or text:
+            self._edits.append((start, end, text))
+
+    def edits(self) -> List[Tuple[int, int, str]]:
+        """按起始偏移排序并合并后的编辑
+
+        Returns:
+            List[Tuple[int, int, str]]: (起始偏移, 结束偏移, 新文本) 列表
+
+        Raises:
+            ValueError: 编辑范围重叠
+        """
+        merged: List[Tuple[int, int, str]] = []
+        # 稳定排序，同一位置的插入保持加入的顺序，并排在从该位置开始的替换之前
+        for start, end, text in sorted(self._edits, key=lambda edit: edit[:2]):
+            if merged:
+                last_start, last_end, last_text = merged[-1]
+                if start < last_end:
+                    raise ValueError("事务中的编辑范围重叠")
+                if start == last_start == last_end:
+                    merged[-1] = (start, end, last_text + text)
+                    continue
+            merged.append((start, end, text))
+        return merged
 
 class TextBuffer:
     """文本缓冲区类
@@ -15,31 +311,258 @@ class TextBuffer:
     提供基础的文本存储和操作功能。
     """
 
-    def __init__(self) -> None:
-        """初始化缓冲区"""
-        self._content: List[str] = [""]  # 按行存储的内容
-        self._undo_stack: List[TextOperation] = []  # 撤销栈
-        self._redo_stack: List[TextOperation] = []  # 重做栈
+    def __init__(
+        self,
+        storage: Optional[TextStorage] = None,
+        history: Optional[UndoHistory] = None,
+    ) -> None:
+        """初始化缓冲区
+
+        Args:
+            storage: 底层存储引擎，默认使用片段表
+            history: 撤销历史，默认使用带内存上限的合并历史
+        """
+        self._storage: TextStorage = storage or PieceTable()  # 文本存储
+        self._history = history or UndoHistory()  # 撤销历史
+        self._version = 0  # 内容版本号，每次修改递增
+        self._file_format = FileFormat()  # 文件的编码和换行符风格
+        self._line_hashes = LineHashes()  # 每行的哈希值，用于计算差异
+        self._saved_state = self._history.state  # 上次保存时的内容状态号
+        self._journal = OperationLog()  # 最近执行的编辑，用于映射旧版本的位置
+        self._journal_version = 0  # 编辑记录中第一个操作执行前的版本号
+        self._decorations = DecorationStore()  # 附加在文本范围上的装饰
+        self._edit_listeners: List[EditListener] = []  # 编辑监听器
+        self._transaction: Optional[TextTransaction] = None  # 进行中的事务
+        self._transaction_depth = 0  # 事务的嵌套层数
 
     def get_content(self) -> str:
         """获取完整内容"""
-        return "\n".join(self._content)
+        return self._storage.get_text()
 
     def set_content(self, text: str) -> None:
         """设置完整内容"""
-        self._content = text.split("\n")
-        self._undo_stack.clear()
-        self._redo_stack.clear()
+        previous = self._storage.get_text() if self._edit_listeners else ""
+        self._storage.set_text(text)
+        self._version += 1
+        # 整体替换后旧版本的位置和装饰的范围都失去意义
+        self._journal = OperationLog()
+        self._journal_version = self._version
+        self._decorations.clear()
+        self._line_hashes.invalidate()
+        self.clear_history()
+        self._history.new_state()
+        for listener in list(self._edit_listeners):
+            listener(previous, text)
+
+    def add_edit_listener(self, listener: EditListener) -> None:
+        """添加编辑监听器
+
+        每次编辑之后以编辑前受影响的整行文本和编辑后对应的整行文本调用，
+        整体替换内容时两者分别为替换前后的完整内容。
+        用于按编辑增量维护单词索引等派生数据，无需重新扫描整个缓冲区。
+        """
+        self._edit_listeners.append(listener)
+
+    def remove_edit_listener(self, listener: EditListener) -> None:
+        """移除编辑监听器"""
+        if listener in self._edit_listeners:
+            self._edit_listeners.remove(listener)
+
+    @property
+    def version(self) -> int:
+        """内容版本号
+
+        每次修改内容都会递增，可用于判断后台计算的结果是否已过期。
+        """
+        return self._version
+
+    @property
+    def decorations(self) -> DecorationStore:
+        """附加在文本范围上的装饰，偏移随编辑自动调整"""
+        return self._decorations
+
+    def snapshot(self) -> TextSnapshot:
+        """获取当前内容的只读快照
+
+        片段表存储只保存根节点的引用，复杂度为 O(1)，之后的编辑不影响快照，
+        适合搜索、高亮、索引和保存等后台任务在用户继续输入时读取一致的内容。
+
+        Returns:
+            TextSnapshot: 带版本号的快照
+        """
+        return TextSnapshot(self._storage.snapshot(), self._version, self._file_format)
+
+    def map_position(self, position: Position, version: int) -> Optional[Position]:
+        """把旧版本内容中的位置映射到当前内容
+
+        按顺序重放该版本之后的编辑：位于插入点及其之后的位置随插入的文本后移，
+        位于被删除范围内的位置移到范围起点。
+
+        Args:
+            position: 旧版本中的位置
+            version: 位置所基于的版本号，通常取自 TextSnapshot.version
+
+        Returns:
+            Optional[Position]: 当前内容中的位置，编辑记录已不覆盖该版本时返回 None
+        """
+        first = version - self._journal_version
+        if first < 0 or version > self._version:
+            return None
+        line, column = position.line, position.column
+        for index in range(first, len(self._journal)):
+            line, column = self._map_through(self._journal[index], line, column)
+        return Position(line, column)
+
+    def is_modified(self) -> bool:
+        """内容是否在上次保存后被修改
+
+        比较撤销历史的状态号，复杂度为 O(1)，撤销回保存时的状态视为未修改。
+        """
+        return self._history.state != self._saved_state
+
+    def set_modified(self, modified: bool) -> None:
+        """设置修改状态
+
+        Args:
+            modified: 为 False 时把当前内容记为已保存，为 True 时标记为未保存
+        """
+        if modified:
+            self._saved_state = -1
+            return
+        # 之后的输入不再合并到保存前的撤销组，使撤销能回到保存时的状态
+        self._history.close_group()
+        self._saved_state = self._history.state
+
+    @property
+    def file_format(self) -> FileFormat:
+        """文件的编码、BOM 和换行符风格
+
+        内容中的换行符统一为 \n，保存时按该格式还原。
+        """
+        return self._file_format
+
+    def set_file_format(self, file_format: FileFormat) -> None:
+        """设置文件格式，通常在载入文件时由检测结果确定"""
+        self._file_format = file_format
+
+    @property
+    def history(self) -> UndoHistory:
+        """获取撤销历史"""
+        return self._history
+
+    def clear_history(self) -> None:
+        """清空撤销和重做历史"""
+        self._history.clear()
 
     def get_line(self, line_number: int) -> str:
         """获取指定行的内容"""
-        if 0 <= line_number < len(self._content):
-            return self._content[line_number]
-        return ""
+        return self._storage.get_line(line_number)
+
+    def line_hashes(self) -> "array[int]":
+        """每行的哈希值
+
+        编辑时增量维护，只重新计算被编辑过的行。
+        """
+        storage = self._storage
+        hashes = self._line_hashes.get(storage.get_text, storage.get_line)
+        if len(hashes) != storage.get_line_count():
+            # 增量维护出现偏差时退回整体重建
+            self._line_hashes.invalidate()
+            hashes = self._line_hashes.get(storage.get_text, storage.get_line)
+        return hashes
+
+    def diff_edits(self, text: str) -> List[Tuple[int, int, str]]:
+        """计算把当前内容变为新内容所需的最少替换
+
+        按行比较哈希值，只为变化的行生成替换，结果可直接传给 apply_edits。
+
+        Args:
+            text: 新内容，换行符应已统一为 \n
+
+        Returns:
+            List[Tuple[int, int, str]]: (起始偏移, 结束偏移, 新文本) 列表
+        """
+        lines = text.split("\n")
+        hunks = diff_hashes(self.line_hashes(), hash_lines(lines))
+        line_count = self.get_line_count()
+        edits: List[Tuple[int, int, str]] = []
+        for hunk in hunks:
+            new_lines = lines[hunk.new_start:hunk.new_end]
+            start = self.position_to_offset(Position(hunk.old_start, 0))
+            if hunk.old_end < line_count:
+                # 中间的行连同各自的换行符一起替换
+                end = self.position_to_offset(Position(hunk.old_end, 0))
+                replacement = "".join(line + "\n" for line in new_lines)
+            elif hunk.old_start > 0:
+                # 末尾的行从上一行的换行符开始替换，最后一行没有换行符
+                previous = hunk.old_start - 1
+                start = self.position_to_offset(Position(previous, 0)) + len(
+                    self.get_line(previous)
+                )
+                end = self.get_length()
+                replacement = "".join("\n" + line for line in new_lines)
+            else:
+                end = self.get_length()
+                replacement = "\n".join(new_lines)
+            if edits and edits[-1][1] == start:
+                # 空行两侧的差异块换算为偏移后会相接，合并为一次替换
+                previous_start, _, previous_text = edits.pop()
+                start, replacement = previous_start, previous_text + replacement
+            edits.append((start, end, replacement))
+        return edits
 
     def get_line_count(self) -> int:
         """获取总行数"""
-        return len(self._content)
+        return self._storage.get_line_count()
+
+    def get_length(self) -> int:
+        """获取总字符数"""
+        return self._storage.get_length()
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024) -> Iterator[str]:
+        """按顺序分块迭代完整内容
+
+        迭代器在调用时固定当前内容，可在后台线程中消费，
+        用于保存等不希望拼接出完整字符串的场景。
+
+        Args:
+            chunk_size: 每块的最大字符数
+        """
+        return self._storage.iter_chunks(chunk_size)
+
+    def get_text(self, start: Position, end: Position) -> str:
+        """获取指定范围的文本
+
+        Args:
+            start: 起始位置
+            end: 结束位置
+
+        Returns:
+            str: 范围内的文本
+        """
+        return self._get_text(start, end)
+
+    def offset_to_position(self, offset: int) -> Position:
+        """将字符偏移转换为行列位置
+
+        Args:
+            offset: 字符偏移，超出范围时限制到文档内
+
+        Returns:
+            Position: 对应的行列位置
+        """
+        return self._storage.offset_to_position(offset)
+
+    def position_to_offset(self, position: Position) -> int:
+        """将行列位置转换为字符偏移
+
+        Args:
+            position: 行列位置，超出范围时限制到文档内
+
+        Returns:
+            int: 对应的字符偏移
+        """
+        return self._storage.position_to_offset(position)
 
     def insert(self, position: Position, text: str) -> None:
         """插入文本
@@ -50,8 +573,7 @@ class TextBuffer:
         """
         operation = InsertOperation(position, text)
         self._execute_operation(operation)
-        self._undo_stack.append(operation)
-        self._redo_stack.clear()
+        self._history.push(operation)
 
     def delete(self, start: Position, end: Position) -> None:
         """删除文本
@@ -69,8 +591,185 @@ class TextBuffer:
         deleted_text = self._get_text(start, end)
         operation = DeleteOperation(start, end, deleted_text)
         self._execute_operation(operation)
-        self._undo_stack.append(operation)
-        self._redo_stack.clear()
+        self._history.push(operation)
+
+    def apply_edits(self, edits: Sequence[Tuple[int, int, str]]) -> None:
+        """批量替换多个互不重叠的范围
+
+        所有替换作为一个撤销组记录，撤销一次即可全部还原。
+
+        相距很近的编辑（如多光标输入、全部替换）合并为一次存储替换，
+        撤销历史、编辑记录和装饰仍按每个编辑分别更新。
+
+        Args:
+            edits: (起始偏移, 结束偏移, 新文本) 列表，偏移基于修改前的内容
+        """
+        operations: List[EditOperation] = []
+        clusters: List[List[Tuple[int, int, str]]] = []
+        for edit in sorted(edits, key=lambda edit: edit[0]):
+            if clusters and edit[0] - clusters[-1][-1][1] <= EDIT_CLUSTER_GAP:
+                clusters[-1].append(edit)
+            else:
+                clusters.append([edit])
+        # 从后往前应用，前面的偏移不受影响
+        for cluster in reversed(clusters):
+            if len(cluster) > 1:
+                operations.extend(self._apply_cluster(cluster))
+                continue
+            start, end, text = cluster[0]
+            start_position = self.offset_to_position(start)
+            if end > start:
+                end_position = self.offset_to_position(end)
+                deleted = DeleteOperation(
+                    start_position, end_position, self._get_text(start_position, end_position)
+                )
+                self._execute_operation(deleted)
+                operations.append(deleted)
+            if text:
+                inserted = InsertOperation(start_position, text)
+                self._execute_operation(inserted)
+                operations.append(inserted)
+        self._history.push_group(operations)
+
+    def begin_transaction(self) -> TextTransaction:
+        """开始事务
+
+        事务可以嵌套，内层事务的编辑并入最外层事务，在最外层提交时统一应用。
+        多光标编辑、全部替换和格式化等在多处修改的场景，通过事务只需一次
+        排序后的应用、一个撤销组和一次内容变更。
+
+        Returns:
+            TextTransaction: 收集编辑的事务
+        """
+        if self._transaction is None:
+            self._transaction = TextTransaction(self)
+        self._transaction_depth += 1
+        return self._transaction
+
+    def commit_transaction(self) -> None:
+        """提交事务，最外层事务提交时应用所有编辑
+
+        Raises:
+            RuntimeError: 没有进行中的事务
+            ValueError: 事务中的编辑范围重叠，此时事务被丢弃
+        """
+        if self._transaction is None:
+            raise RuntimeError("没有进行中的事务")
+        self._transaction_depth -= 1
+        if self._transaction_depth:
+            return
+        transaction = self._transaction
+        self._transaction = None
+        edits = transaction.edits()
+        if edits:
+            self.apply_edits(edits)
+
+    def rollback_transaction(self) -> None:
+        """丢弃进行中的事务，包括外层事务收集的编辑"""
+        self._transaction = None
+        self._transaction_depth = 0
+
+    def in_transaction(self) -> bool:
+        """是否有进行中的事务"""
+        return self._transaction is not None
+
+    @contextmanager
+    def transaction(self) -> Iterator[TextTransaction]:
+        """以上下文管理器的形式使用事务，正常退出时提交，发生异常时丢弃
+
+        Yields:
+            TextTransaction: 收集编辑的事务
+        """
+        transaction = self.begin_transaction()
+        try:
+            yield transaction
+        except BaseException:
+            self.rollback_transaction()
+            raise
+        self.commit_transaction()
+
+    def _apply_cluster(
+        self, cluster: List[Tuple[int, int, str]]
+    ) -> List[EditOperation]:
+        """把一组按偏移排序、相距很近的编辑作为一次存储替换应用
+
+        Returns:
+            List[EditOperation]: 与从后往前逐个执行等价的操作序列
+        """
+        span_start = cluster[0][0]
+        span_end = cluster[-1][1]
+        first = self.offset_to_position(span_start)
+        last = self.offset_to_position(span_end)
+        old = self._get_text(first, last)
+
+        # 由替换范围内的文本逐段推出每个编辑两端的行列位置
+        positions: List[Position] = []
+        line = first.line
+        line_start = -first.column  # 当前行行首相对 span_start 的偏移
+        previous = 0
+        pieces: List[str] = []
+        for start, end, text in cluster:
+            pieces.append(old[previous:start - span_start])
+            pieces.append(text)
+            for offset in (start - span_start, end - span_start):
+                line_feeds = old.count("\n", previous, offset)
+                if line_feeds:
+                    line += line_feeds
+                    line_start = old.rfind("\n", previous, offset) + 1
+                previous = offset
+                positions.append(Position(line, offset - line_start))
+        pieces.append(old[previous:])
+        new = "".join(pieces)
+
+        # 编辑记录和装饰按从后往前逐个执行的顺序更新
+        operations: List[EditOperation] = []
+        for index in range(len(cluster) - 1, -1, -1):
+            start, end, text = cluster[index]
+            start_position = positions[2 * index]
+            if end > start:
+                deleted = DeleteOperation(
+                    start_position,
+                    positions[2 * index + 1],
+                    old[start - span_start:end - span_start],
+                )
+                self._version += 1
+                self._record(deleted)
+                self._decorations.delete_text(start, end - start)
+                operations.append(deleted)
+            if text:
+                inserted = InsertOperation(start_position, text)
+                self._version += 1
+                self._record(inserted)
+                self._decorations.insert_text(start, len(text))
+                operations.append(inserted)
+
+        listeners = self._edit_listeners
+        before = self._lines_text(first.line, last.line) if listeners else ""
+        if span_end > span_start:
+            self._delete_text(first, last)
+        if new:
+            self._insert_text(first, new)
+        line_feeds = new.count("\n")
+        self._line_hashes.splice(first.line, last.line - first.line + 1, line_feeds + 1)
+        if listeners:
+            after = self._lines_text(first.line, first.line + line_feeds)
+            for listener in list(listeners):
+                listener(before, after)
+        return operations
+
+    def replay(self, operations: Iterable[EditOperation]) -> None:
+        """按顺序重新执行一组操作，例如回放宏或操作日志
+
+        所有操作作为一个撤销组记录。
+
+        Args:
+            operations: 插入或删除操作，位置基于执行该操作前的内容
+        """
+        executed: List[EditOperation] = []
+        for operation in operations:
+            self._execute_operation(operation)
+            executed.append(operation)
+        self._history.push_group(executed)
 
     def undo(self) -> bool:
         """撤销操作
@@ -78,13 +777,12 @@ class TextBuffer:
         Returns:
             bool: 是否成功撤销
         """
-        if not self._undo_stack:
+        operations = self._history.pop_undo()
+        if operations is None:
             return False
 
-        operation = self._undo_stack.pop()
-        reversed_operation = operation.reverse()
-        self._execute_operation(reversed_operation)
-        self._redo_stack.append(operation)
+        for operation in operations:
+            self._execute_operation(operation)
         return True
 
     def redo(self) -> bool:
@@ -93,80 +791,99 @@ class TextBuffer:
         Returns:
             bool: 是否成功重做
         """
-        if not self._redo_stack:
+        operations = self._history.pop_redo()
+        if operations is None:
             return False
 
-        operation = self._redo_stack.pop()
-        self._execute_operation(operation)
-        self._undo_stack.append(operation)
+        for operation in operations:
+            self._execute_operation(operation)
         return True
 
     def _execute_operation(self, operation: TextOperation) -> None:
         """执行文本操作
         
         Args:
-            operation: 要执行的操作
+            operation: 要执行的操作，不是插入或删除时忽略
         """
+        if not isinstance(operation, (InsertOperation, DeleteOperation)):
+            return
+        self._version += 1
+        self._record(operation)
+        listeners = self._edit_listeners
         if isinstance(operation, InsertOperation):
+            line = operation.position.line
+            line_feeds = operation.text.count("\n")
+            before = self._storage.get_line(line) if listeners else ""
+            if self._decorations:
+                self._decorations.insert_text(
+                    self.position_to_offset(operation.position), len(operation.text)
+                )
             self._insert_text(operation.position, operation.text)
-        elif isinstance(operation, DeleteOperation):
+            self._line_hashes.splice(line, 1, line_feeds + 1)
+        else:
+            line = operation.start.line
+            line_feeds = 0
+            before = self._lines_text(line, operation.end.line) if listeners else ""
+            if self._decorations:
+                self._decorations.delete_text(
+                    self.position_to_offset(operation.start),
+                    len(operation.deleted_text),
+                )
             self._delete_text(operation.start, operation.end)
+            self._line_hashes.splice(line, operation.end.line - line + 1, 1)
+        if listeners:
+            after = self._lines_text(line, line + line_feeds)
+            for listener in list(listeners):
+                listener(before, after)
+
+    def _lines_text(self, first: int, last: int) -> str:
+        """获取 first 到 last 行（含）的文本，以换行符连接"""
+        if first == last:
+            return self._storage.get_line(first)
+        lines = (self._storage.get_line(line) for line in range(first, last + 1))
+        return "\n".join(lines)
+
+    def _record(self, operation: EditOperation) -> None:
+        """把操作追加到编辑记录，超出上限时丢弃较早的一半"""
+        self._journal.append(operation)
+        count = len(self._journal)
+        if count > CHANGE_JOURNAL_LIMIT:
+            dropped = count - CHANGE_JOURNAL_LIMIT // 2
+            self._journal = OperationLog(
+                self._journal[index] for index in range(dropped, count)
+            )
+            self._journal_version += dropped
+
+    @staticmethod
+    def _map_through(
+        operation: EditOperation, line: int, column: int
+    ) -> Tuple[int, int]:
+        """计算位置在执行一个操作之后的新位置"""
+        if isinstance(operation, InsertOperation):
+            start = operation.position
+            if (line, column) >= (start.line, start.column):
+                end = operation.end
+                if line == start.line:
+                    column = end.column + column - start.column
+                line += end.line - start.line
+            return line, column
+        start, end = operation.start, operation.end
+        if (line, column) >= (end.line, end.column):
+            if line == end.line:
+                column = start.column + column - end.column
+            line -= end.line - start.line
+        elif (line, column) > (start.line, start.column):
+            line, column = start.line, start.column
+        return line, column
 
     def _insert_text(self, position: Position, text: str) -> None:
         """在指定位置插入文本"""
-        if not text:
-            return
-
-        # 处理多行插入
-        lines = text.split("\n")
-        current_line = self._content[position.line]
-        
-        if len(lines) == 1:
-            # 单行插入
-            new_line = (current_line[:position.column] + 
-                       text + 
-                       current_line[position.column:])
-            self._content[position.line] = new_line
-        else:
-            # 多行插入
-            first_line = current_line[:position.column] + lines[0]
-            last_line = lines[-1] + current_line[position.column:]
-            
-            # 替换当前行并插入新行
-            self._content[position.line] = first_line
-            self._content[position.line + 1:position.line + 1] = lines[1:-1]
-            self._content.insert(position.line + len(lines) - 1, last_line)
+        self._storage.insert(position, text)
 
     def _delete_text(self, start: Position, end: Position) -> None:
         """删除指定范围的文本"""
-        if start.line == end.line:
-            # 单行删除
-            line = self._content[start.line]
-            new_line = line[:start.column] + line[end.column:]
-            self._content[start.line] = new_line
-        else:
-            # 多行删除
-            first_line = self._content[start.line][:start.column]
-            last_line = self._content[end.line][end.column:]
-            
-            # 合并首尾行
-            self._content[start.line] = first_line + last_line
-            # 删除中间行
-            del self._content[start.line + 1:end.line + 1]
+        self._storage.delete(start, end)
 
     def _get_text(self, start: Position, end: Position) -> str:
         """获取指定范围的文本"""
-        if start.line == end.line:
-            # 单行文本
-            return self._content[start.line][start.column:end.column]
-        
-        # 多行文本
-        result = []
-        # 第一行
-        result.append(self._content[start.line][start.column:])
-        # 中间行
-        result.extend(self._content[start.line + 1:end.line])
-        # 最后一行
-        result.append(self._content[end.line][:end.column])
-        
-        return "\n".join(result)
+        return self._storage.get_range(start, end)
@@ -9,6 +9,7 @@ from typing import Optional
 
 from ....core.command import Command, command
 from ..editor import Editor
+from ..types import Position
 
 @command("editor.delete")
 class DeleteCommand(Command):
@@ -52,3 +53,63 @@ class ClearSelectionCommand(Command):
             return
             
         editor.clear_selection()
+
+@command("editor.goto_line")
+class GotoLineCommand(Command):
+    """跳转到指定行列命令"""
+    
+    def execute(
+        self, editor: Optional[Editor] = None, line: int = 0, column: int = 0
+    ) -> None:
+        if editor is None:
+            return
+            
+        editor.set_cursor_position(Position(line, column))
+
+@command("editor.fold")
+class FoldCommand(Command):
+    """折叠命令，未指定行时折叠光标所在的区域"""
+    
+    def execute(
+        self, editor: Optional[Editor] = None, line: Optional[int] = None
+    ) -> None:
+        if editor is None:
+            return
+            
+        if line is None:
+            line = editor.get_cursor_position().line
+        editor.fold(line)
+
+@command("editor.unfold")
+class UnfoldCommand(Command):
+    """展开命令，未指定行时展开光标所在行的区域"""
+    
+    def execute(
+        self, editor: Optional[Editor] = None, line: Optional[int] = None
+    ) -> None:
+        if editor is None:
+            return
+            
+        if line is None:
+            line = editor.get_cursor_position().line
+        editor.unfold(line)
+
+@command("editor.fold_all")
+class FoldAllCommand(Command):
+    """全部折叠命令"""
+    
+    def execute(self, editor: Optional[Editor] = None) -> None:
+        if editor is None:
+            return
+            
+        editor.fold_all()
+
+@command("editor.unfold_all")
+class UnfoldAllCommand(Command):
+    """全部展开命令"""
+    
+    def execute(self, editor: Optional[Editor] = None) -> None:
+        if editor is None:
+            return
+            
+        editor.unfold_all()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件命令模块
+"""
+
+from typing import TYPE_CHECKING
+
+from ....core.command import Command, command
+
+if TYPE_CHECKING:
+    from .. import EditorManager
+
+
+@command("editor.save")
+class SaveCommand(Command):
+    """保存当前文件命令"""
+
+    def __init__(self, manager: "EditorManager") -> None:
+        super().__init__("保存当前文件")
+        self._manager = manager
+
+    def execute(self) -> None:
+        self._manager.save_current()
+
+
+@command("editor.save_all")
+class SaveAllCommand(Command):
+    """保存全部文件命令"""
+
+    def __init__(self, manager: "EditorManager") -> None:
+        super().__init__("保存全部文件")
+        self._manager = manager
+
+    def execute(self) -> None:
+        self._manager.save_all()
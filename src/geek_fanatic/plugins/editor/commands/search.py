@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查找替换命令模块
+"""
+
+from typing import TYPE_CHECKING
+
+from ....core.command import Command, command
+from ..search import SearchQuery
+
+if TYPE_CHECKING:
+    from .. import EditorManager
+
+
+@command("editor.find")
+class FindCommand(Command):
+    """在当前文件中查找命令"""
+
+    def __init__(self, manager: "EditorManager") -> None:
+        super().__init__("在当前文件中查找")
+        self._manager = manager
+
+    def execute(self, query: SearchQuery) -> None:
+        self._manager.find_in_current(query)
+
+
+@command("editor.replace_all")
+class ReplaceAllCommand(Command):
+    """在当前文件中全部替换命令"""
+
+    def __init__(self, manager: "EditorManager") -> None:
+        super().__init__("在当前文件中全部替换")
+        self._manager = manager
+
+    def execute(self, query: SearchQuery, replacement: str) -> None:
+        self._manager.replace_all_in_current(query, replacement)
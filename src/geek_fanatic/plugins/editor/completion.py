@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+自动补全模块
+
+补全请求经过防抖后分发给所有提供者，每个提供者在独立的线程池中并行执行，
+结果按提供者逐个到达并合并。新的请求会取消仍在进行的请求，过期的结果被丢弃。
+
+内置的单词提供者使用跨缓冲区的前缀索引：有序的单词列表加上每个单词的
+出现次数，按缓冲区的编辑增量更新，前缀查询只需一次二分查找。
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .buffer import TextBuffer, TextSnapshot
+from .types import Position
+
+# 请求的防抖时间（毫秒）
+COMPLETION_DELAY_MS = 50
+
+# 每个提供者返回的最大补全项数
+MAX_COMPLETION_ITEMS = 50
+
+# 补全使用的线程数
+COMPLETION_THREADS = 4
+
+# 单次更新新增或移除的单词超过该数量时整体重建有序列表
+_REBUILD_THRESHOLD = 1024
+
+# 比较编辑前后文本时每次比较的字符数
+_COMPARE_STEP = 4096
+
+# 索引的单词：以字母或下划线开头，至少两个字符
+_WORD = re.compile(r"[^\W\d]\w+")
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _common_prefix(first: str, second: str) -> int:
+    """两个字符串的公共前缀长度，按块比较后在不同的块内逐字符查找"""
+    limit = min(len(first), len(second))
+    index = 0
+    while index < limit:
+        end = min(index + _COMPARE_STEP, limit)
+        if first[index:end] == second[index:end]:
+            index = end
+            continue
+        while first[index] == second[index]:
+            index += 1
+        return index
+    return limit
+
+
+def _common_suffix(first: str, second: str, limit: int) -> int:
+    """两个字符串不超过 limit 的公共后缀长度"""
+    first_end = len(first)
+    second_end = len(second)
+    index = 0
+    while index < limit:
+        step = min(_COMPARE_STEP, limit - index)
+        if (
+            first[first_end - index - step : first_end - index]
+            == second[second_end - index - step : second_end - index]
+        ):
+            index += step
+            continue
+        while first[first_end - index - 1] == second[second_end - index - 1]:
+            index += 1
+        return index
+    return limit
+
+
+def _changed_text(removed: str, added: str) -> Tuple[str, str]:
+    """去掉编辑前后文本中相同的开头和结尾，只保留变化部分所在的完整单词
+
+    一行很长时，在其中输入一个字符只需重新分词光标附近的单词。
+    """
+    start = _common_prefix(removed, added)
+    limit = min(len(removed), len(added)) - start
+    end = _common_suffix(removed, added, limit)
+    # 向两侧扩展到单词边界，使被截断的单词完整
+    while start > 0 and _WORD_CHAR.match(removed, start - 1):
+        start -= 1
+    removed_end = len(removed) - end
+    added_end = len(added) - end
+    while end > 0 and _WORD_CHAR.match(removed, removed_end):
+        removed_end += 1
+        added_end += 1
+        end -= 1
+    return removed[start:removed_end], added[start:added_end]
+
+
+@dataclass
+class CompletionItem:
+    """补全项
+
+    Attributes:
+        label: 显示的文本
+        detail: 附加说明，如类型或来源
+        insert_text: 接受时插入的文本，为 None 时插入 label
+    """
+
+    label: str
+    detail: str = ""
+    insert_text: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CompletionRequest:
+    """补全请求
+
+    Attributes:
+        request_id: 请求编号
+        snapshot: 请求时缓冲区的只读快照
+        position: 光标位置
+        prefix: 光标前正在输入的单词
+    """
+
+    request_id: int
+    snapshot: TextSnapshot
+    position: Position
+    prefix: str
+
+
+class CompletionProvider(Protocol):
+    """补全提供者协议类
+
+    complete 在后台线程中调用，多个提供者并行执行。
+    """
+
+    @property
+    def name(self) -> str:
+        """提供者名称，用于合并结果和报告错误"""
+        ...
+
+    def complete(
+        self, request: CompletionRequest, is_cancelled: Callable[[], bool]
+    ) -> List[CompletionItem]:
+        """计算补全项
+
+        Args:
+            request: 补全请求
+            is_cancelled: 返回 True 时请求已被取消，耗时的提供者应尽早返回
+
+        Returns:
+            List[CompletionItem]: 按相关度排列的补全项
+        """
+        ...
+
+
+class WordIndex:
+    """跨缓冲区的单词前缀索引
+
+    以缓冲区的编辑监听器接收编辑前后受影响的整行文本，只对这些行
+    重新分词并更新出现次数，出现次数归零的单词从有序列表中移除。
+    所有公开方法都是线程安全的。
+    """
+
+    def __init__(self) -> None:
+        """初始化空索引"""
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}  # 单词到所有缓冲区中的出现次数
+        self._words: List[str] = []  # 有序的不同单词
+        self._buffers: Dict[int, TextBuffer] = {}  # 已索引的缓冲区
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._words)
+
+    def add_buffer(self, buffer: TextBuffer) -> None:
+        """索引缓冲区的当前内容，并跟随其后的编辑更新"""
+        if id(buffer) in self._buffers:
+            return
+        self._buffers[id(buffer)] = buffer
+        buffer.add_edit_listener(self._apply_delta)
+        self._apply_delta("", buffer.get_content())
+
+    def remove_buffer(self, buffer: TextBuffer) -> None:
+        """从索引中移除缓冲区的全部单词"""
+        if self._buffers.pop(id(buffer), None) is None:
+            return
+        buffer.remove_edit_listener(self._apply_delta)
+        self._apply_delta(buffer.get_content(), "")
+
+    def count(self, word: str) -> int:
+        """单词在所有已索引缓冲区中的出现次数"""
+        with self._lock:
+            return self._counts.get(word, 0)
+
+    def complete(self, prefix: str, limit: int = MAX_COMPLETION_ITEMS) -> List[str]:
+        """查找以 prefix 开头的单词
+
+        Args:
+            prefix: 前缀，不返回与前缀相同的单词
+            limit: 最大结果数
+
+        Returns:
+            List[str]: 按字典序排列的单词
+        """
+        result: List[str] = []
+        with self._lock:
+            words = self._words
+            index = bisect_left(words, prefix)
+            while index < len(words) and len(result) < limit:
+                word = words[index]
+                if not word.startswith(prefix):
+                    break
+                if word != prefix:
+                    result.append(word)
+                index += 1
+        return result
+
+    def _apply_delta(self, removed: str, added: str) -> None:
+        """按编辑前后的文本更新出现次数"""
+        if removed == added:
+            return
+        removed, added = _changed_text(removed, added)
+        before = Counter(_WORD.findall(removed))
+        after = Counter(_WORD.findall(added))
+        with self._lock:
+            counts = self._counts
+            created: List[str] = []
+            deleted: List[str] = []
+            for word, number in (before - after).items():
+                remaining = counts.get(word, 0) - number
+                if remaining > 0:
+                    counts[word] = remaining
+                else:
+                    counts.pop(word, None)
+                    deleted.append(word)
+            for word, number in (after - before).items():
+                if word not in counts:
+                    created.append(word)
+                counts[word] = counts.get(word, 0) + number
+
+            if len(created) + len(deleted) > _REBUILD_THRESHOLD:
+                self._words = sorted(counts)
+                return
+            words = self._words
+            for word in deleted:
+                index = bisect_left(words, word)
+                if index < len(words) and words[index] == word:
+                    del words[index]
+            for word in created:
+                insort(words, word)
+
+
+class WordCompletionProvider:
+    """基于单词索引的补全提供者"""
+
+    def __init__(self, index: WordIndex, limit: int = MAX_COMPLETION_ITEMS) -> None:
+        """初始化提供者
+
+        Args:
+            index: 单词索引
+            limit: 最大补全项数
+        """
+        self._index = index
+        self._limit = limit
+
+    @property
+    def name(self) -> str:
+        """提供者名称"""
+        return "words"
+
+    def complete(
+        self, request: CompletionRequest, is_cancelled: Callable[[], bool]
+    ) -> List[CompletionItem]:
+        """返回以请求前缀开头的已索引单词"""
+        return [
+            CompletionItem(word, "单词")
+            for word in self._index.complete(request.prefix, self._limit)
+        ]
+
+
+class _CompletionTaskSignals(QObject):
+    """补全任务信号"""
+
+    finished = Signal(int, str, object)  # 请求编号, 提供者名称, 补全项列表
+    failed = Signal(int, str, str)  # 请求编号, 提供者名称, 错误信息
+
+
+class _CompletionTask(QRunnable):
+    """在后台线程中调用一个提供者"""
+
+    def __init__(
+        self, request: CompletionRequest, provider: CompletionProvider
+    ) -> None:
+        """初始化补全任务
+
+        Args:
+            request: 补全请求
+            provider: 补全提供者
+        """
+        super().__init__()
+        self.signals = _CompletionTaskSignals()
+        self._request = request
+        self._provider = provider
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消任务"""
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        """任务是否已取消"""
+        return self._cancelled
+
+    def run(self) -> None:
+        """执行补全"""
+        request_id = self._request.request_id
+        name = self._provider.name
+        try:
+            items = self._provider.complete(self._request, self.is_cancelled)
+        except Exception as e:  # 提供者的任何错误都只影响自身的结果
+            if not self._cancelled:
+                self.signals.failed.emit(request_id, name, str(e))
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(request_id, name, items)
+
+
+class CompletionEngine(QObject):
+    """补全引擎
+
+    同一时刻只处理一个请求。请求在防抖时间内没有被新的请求替换时，
+    才分发给所有提供者；每个提供者完成后立即发出合并后的结果，
+    快速的提供者不必等待慢的提供者。
+    """
+
+    # 信号定义
+    completionsReady = Signal(int, object)  # 请求编号, 合并后的补全项列表
+    providerFailed = Signal(str, str)  # 提供者名称, 错误信息
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """初始化补全引擎"""
+        super().__init__(parent)
+        self._providers: List[CompletionProvider] = []
+        self._request_id = 0
+        self._pending: Optional[CompletionRequest] = None  # 等待防抖结束的请求
+        self._tasks: List[_CompletionTask] = []  # 当前请求正在执行的任务
+        self._results: Dict[str, List[CompletionItem]] = {}  # 当前请求已到达的结果
+        # 独立的线程池，不与搜索、索引等长时间任务争用线程
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(COMPLETION_THREADS)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(COMPLETION_DELAY_MS)
+        self._timer.timeout.connect(self._dispatch)
+
+    def providers(self) -> List[CompletionProvider]:
+        """已注册的提供者"""
+        return list(self._providers)
+
+    def add_provider(self, provider: CompletionProvider) -> None:
+        """注册提供者，结果按注册顺序合并"""
+        if provider not in self._providers:
+            self._providers.append(provider)
+
+    def remove_provider(self, provider: CompletionProvider) -> None:
+        """移除提供者"""
+        if provider in self._providers:
+            self._providers.remove(provider)
+
+    def set_delay(self, delay: int) -> None:
+        """设置请求的防抖时间
+
+        Args:
+            delay: 毫秒数
+        """
+        self._timer.setInterval(max(0, delay))
+
+    def is_running(self) -> bool:
+        """是否有等待中或进行中的请求"""
+        return self._pending is not None or bool(self._tasks)
+
+    def request(self, snapshot: TextSnapshot, position: Position, prefix: str) -> int:
+        """发起补全请求，取消之前的请求
+
+        Args:
+            snapshot: 缓冲区的只读快照
+            position: 光标位置
+            prefix: 光标前正在输入的单词
+
+        Returns:
+            int: 请求编号，与 completionsReady 的参数对应
+        """
+        self.cancel()
+        self._request_id += 1
+        self._pending = CompletionRequest(self._request_id, snapshot, position, prefix)
+        self._timer.start()
+        return self._request_id
+
+    def cancel(self, request_id: Optional[int] = None) -> None:
+        """取消等待中和进行中的请求
+
+        Args:
+            request_id: 只在该请求仍是当前请求时取消，为 None 时总是取消
+        """
+        if request_id is not None and request_id != self._request_id:
+            return
+        self._timer.stop()
+        self._pending = None
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._results = {}
+
+    def _dispatch(self) -> None:
+        """防抖结束，把请求并行分发给所有提供者"""
+        request = self._pending
+        self._pending = None
+        if request is None:
+            return
+        for provider in self._providers:
+            task = _CompletionTask(request, provider)
+            task.signals.finished.connect(self._on_task_finished)
+            task.signals.failed.connect(self._on_task_failed)
+            self._tasks.append(task)
+            self._pool.start(task)
+
+    def _on_task_finished(
+        self, request_id: int, name: str, items: List[CompletionItem]
+    ) -> None:
+        """合并一个提供者的结果"""
+        if request_id != self._request_id or not self._tasks:
+            return
+        self._results[name] = items
+        self._finish_task(name)
+        self.completionsReady.emit(request_id, self._merged())
+
+    def _on_task_failed(self, request_id: int, name: str, message: str) -> None:
+        """报告提供者的错误"""
+        if request_id != self._request_id or not self._tasks:
+            return
+        self._finish_task(name)
+        self.providerFailed.emit(name, message)
+
+    def _finish_task(self, name: str) -> None:
+        """移除已完成的任务"""
+        self._tasks = [task for task in self._tasks if task._provider.name != name]
+
+    def _merged(self) -> List[CompletionItem]:
+        """按提供者的注册顺序合并结果，去除标签相同的项"""
+        seen = set()
+        merged: List[CompletionItem] = []
+        for provider in self._providers:
+            for item in self._results.get(provider.name, ()):
+                if item.label not in seen:
+                    seen.add(item.label)
+                    merged.append(item)
+        return merged
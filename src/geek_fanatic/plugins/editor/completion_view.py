@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+补全列表视图模块
+"""
+
+from typing import List, Optional
+
+from PySide6.QtCore import QRect, Qt, Signal
+from PySide6.QtWidgets import QAbstractItemView, QListWidget, QListWidgetItem, QWidget
+
+from .completion import CompletionItem
+
+# 列表最多同时显示的行数
+VISIBLE_ROWS = 10
+
+
+class CompletionPopup(QListWidget):
+    """补全列表
+
+    浮在编辑器上方且不获取焦点，按键由编辑器转发，
+    编辑器在输入时保持焦点，列表只负责显示和选择。
+    """
+
+    # 信号定义
+    itemAccepted = Signal(object)  # 被接受的 CompletionItem
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        """初始化补全列表
+
+        Args:
+            parent: 编辑器widget，列表的位置相对于它计算
+        """
+        super().__init__(parent)
+        self.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # 所有行等高，布局时无需逐行测量
+        self.setUniformItemSizes(True)
+        self._items: List[CompletionItem] = []
+        self.itemClicked.connect(self._on_item_clicked)
+        self.setStyleSheet(
+            """
+            QListWidget {
+                background-color: #252526;
+                color: #d4d4d4;
+                border: 1px solid #454545;
+                font-family: 'Consolas';
+                font-size: 14px;
+            }
+            QListWidget::item:selected {
+                background-color: #04395e;
+            }
+        """
+        )
+
+    def show_items(self, items: List[CompletionItem], anchor: QRect) -> None:
+        """显示补全项，没有补全项时隐藏
+
+        Args:
+            items: 补全项
+            anchor: 光标矩形（全局坐标），列表显示在它的下方
+        """
+        self._items = list(items)
+        self.clear()
+        if not self._items:
+            self.hide()
+            return
+        for item in self._items:
+            entry = QListWidgetItem(item.label)
+            if item.detail:
+                entry.setToolTip(item.detail)
+            self.addItem(entry)
+        self.setCurrentRow(0)
+
+        rows = min(len(self._items), VISIBLE_ROWS)
+        height = self.sizeHintForRow(0) * rows + 2 * self.frameWidth()
+        width = max(self.sizeHintForColumn(0) + 2 * self.frameWidth() + 24, 200)
+        if len(self._items) > VISIBLE_ROWS:
+            width += self.verticalScrollBar().sizeHint().width()
+        self.setGeometry(anchor.left(), anchor.bottom() + 1, width, height)
+        self.show()
+
+    def move_selection(self, rows: int) -> None:
+        """上下移动选中项，越过两端时停在首项或末项"""
+        if not self._items:
+            return
+        row = min(max(self.currentRow() + rows, 0), len(self._items) - 1)
+        self.setCurrentRow(row)
+
+    def page_rows(self) -> int:
+        """一页的行数，用于 PageUp 和 PageDown"""
+        return VISIBLE_ROWS - 1
+
+    def current_item(self) -> Optional[CompletionItem]:
+        """当前选中的补全项"""
+        row = self.currentRow()
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
+
+    def _on_item_clicked(self, entry: QListWidgetItem) -> None:
+        """单击接受补全项"""
+        row = self.row(entry)
+        if 0 <= row < len(self._items):
+            self.itemAccepted.emit(self._items[row])
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文本装饰模块
+
+为文本范围附加标记、诊断、书签和高亮等装饰。每个来源的装饰放在一棵
+按起始偏移排序的区间树中，树采用带随机优先级的平衡树（Treap），每个节点
+汇总子树的最大结束偏移，因此范围查询为 O(log n + k)。
+
+编辑时位于编辑点之后的整棵子树只记一个待下推的偏移增量，真正的偏移在
+访问节点时才更新，只有跨越编辑点的装饰需要逐个调整。
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class Decoration:
+    """文本装饰
+
+    Attributes:
+        start: 起始偏移
+        end: 结束偏移（不含）
+        data: 附加数据，如诊断信息或书签名称
+    """
+
+    __slots__ = ("start", "end", "data")
+
+    start: int
+    end: int
+    data: Any
+
+
+class _Node:
+    """区间树节点
+
+    节点自身的 start 和 end 始终准确，delta 是尚未下推到子节点的偏移增量。
+    """
+
+    __slots__ = (
+        "start",
+        "end",
+        "max_end",
+        "delta",
+        "priority",
+        "left",
+        "right",
+        "data",
+    )
+
+    def __init__(self, start: int, end: int, data: Any, priority: float) -> None:
+        self.start = start
+        self.end = end
+        self.max_end = end  # 子树中最大的结束偏移
+        self.delta = 0  # 待下推到子树的偏移增量
+        self.priority = priority  # 堆优先级
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.data = data
+
+
+def _shift(node: Optional[_Node], delta: int) -> None:
+    """把整棵子树平移 delta，只修改根节点并记下待下推的增量"""
+    if node is not None and delta:
+        node.start += delta
+        node.end += delta
+        node.max_end += delta
+        node.delta += delta
+
+
+def _push(node: _Node) -> None:
+    """把待下推的增量应用到子节点"""
+    if node.delta:
+        _shift(node.left, node.delta)
+        _shift(node.right, node.delta)
+        node.delta = 0
+
+
+def _update(node: _Node) -> None:
+    """按子节点重新计算最大结束偏移"""
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _split(
+    node: Optional[_Node], offset: int
+) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """按起始偏移拆分为小于 offset 和不小于 offset 的两棵树"""
+    if node is None:
+        return None, None
+    _push(node)
+    if node.start < offset:
+        node.right, right = _split(node.right, offset)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, offset)
+    _update(node)
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """按顺序合并两棵树，left 中的起始偏移均不大于 right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        _push(left)
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    _push(right)
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _build(nodes: List[_Node]) -> Optional[_Node]:
+    """由按起始偏移排序的节点线性构建树"""
+    stack: List[_Node] = []
+    for node in nodes:
+        last: Optional[_Node] = None
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+    if not stack:
+        return None
+    _update_all(stack[0])
+    return stack[0]
+
+
+def _update_all(node: Optional[_Node]) -> None:
+    """自底向上重新计算整棵树的最大结束偏移"""
+    if node is None:
+        return
+    _update_all(node.left)
+    _update_all(node.right)
+    _update(node)
+
+
+def _clip_ends(node: Optional[_Node], offset: int, extra: int, floor: int) -> None:
+    """调整起始偏移小于 offset 且结束偏移大于 offset 的装饰
+
+    结束偏移改为 max(floor, end + extra)，只访问最大结束偏移大于 offset 的子树。
+    """
+    if node is None or node.max_end <= offset:
+        return
+    _push(node)
+    if node.end > offset:
+        node.end = max(floor, node.end + extra)
+    _clip_ends(node.left, offset, extra, floor)
+    _clip_ends(node.right, offset, extra, floor)
+    _update(node)
+
+
+def _collapse(node: Optional[_Node], start: int, removed: int) -> None:
+    """调整起点位于被删除范围内的装饰：起点移到范围起点，终点随之前移"""
+    if node is None:
+        return
+    _push(node)
+    node.end = max(start, node.end - removed)
+    node.start = start
+    _collapse(node.left, start, removed)
+    _collapse(node.right, start, removed)
+    _update(node)
+
+
+class _Layer:
+    """单个来源的装饰区间树"""
+
+    def __init__(self, rng: random.Random) -> None:
+        self._random = rng
+        self._root: Optional[_Node] = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def reset(self, decorations: Iterable[Decoration]) -> None:
+        """用新的装饰替换全部内容"""
+        rng = self._random.random
+        nodes = [
+            _Node(item.start, max(item.start, item.end), item.data, rng())
+            for item in decorations
+        ]
+        nodes.sort(key=lambda node: node.start)
+        self._root = _build(nodes)
+        self._count = len(nodes)
+
+    def add(self, decoration: Decoration) -> None:
+        """加入一个装饰"""
+        start = decoration.start
+        node = _Node(
+            start, max(start, decoration.end), decoration.data, self._random.random()
+        )
+        left, right = _split(self._root, start)
+        self._root = _merge(_merge(left, node), right)
+        self._count += 1
+
+    def insert(self, offset: int, length: int) -> None:
+        """在 offset 处插入 length 个字符
+
+        起点不早于插入点的装饰整体后移，跨越插入点的装饰向后延长。
+        """
+        left, right = _split(self._root, offset)
+        _shift(right, length)
+        _clip_ends(left, offset, length, 0)
+        self._root = _merge(left, right)
+
+    def delete(self, offset: int, length: int) -> None:
+        """删除 [offset, offset + length) 范围内的字符
+
+        起点在范围之后的装饰整体前移，与范围重叠的装饰裁去重叠部分。
+        """
+        end = offset + length
+        left, rest = _split(self._root, offset)
+        middle, right = _split(rest, end)
+        _shift(right, -length)
+        _collapse(middle, offset, length)
+        _clip_ends(left, offset, -length, offset)
+        self._root = _merge(_merge(left, middle), right)
+
+    def query(self, start: int, end: int, result: List[Decoration]) -> None:
+        """收集与 [start, end] 相交的装饰，按起始偏移排序"""
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            # 左子树的最大结束偏移小于 start 时其中没有相交的装饰
+            while node is not None and node.max_end >= start:
+                _push(node)
+                stack.append(node)
+                node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if node.start > end:
+                return
+            if node.end >= start:
+                result.append(Decoration(node.start, node.end, node.data))
+            node = node.right
+
+    def items(self) -> Iterator[Decoration]:
+        """按起始偏移顺序迭代全部装饰"""
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                _push(node)
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield Decoration(node.start, node.end, node.data)
+            node = node.right
+
+
+class DecorationStore:
+    """文本装饰存储
+
+    装饰按来源（如插件名称）分组，每个来源可以一次性整体替换，
+    适合诊断这类每次重新计算全部结果的场景。偏移与 TextBuffer 的字符偏移
+    一致，由缓冲区在每次编辑时调用 insert_text 和 delete_text 调整。
+
+    在装饰起点插入文本时装饰整体后移，在终点插入时不延长；
+    被完全删除的装饰保留为起点和终点重合的空装饰。
+    """
+
+    def __init__(self) -> None:
+        """初始化存储"""
+        self._layers: Dict[str, _Layer] = {}
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return sum(len(layer) for layer in self._layers.values())
+
+    def owners(self) -> List[str]:
+        """带有装饰的来源"""
+        return list(self._layers)
+
+    def set_decorations(self, owner: str, decorations: Iterable[Decoration]) -> None:
+        """整体替换某个来源的装饰
+
+        排序后线性建树，复杂度为 O(n log n)。
+
+        Args:
+            owner: 来源名称
+            decorations: 新的装饰，为空时移除该来源
+        """
+        layer = _Layer(self._random)
+        layer.reset(decorations)
+        if len(layer):
+            self._layers[owner] = layer
+        else:
+            self._layers.pop(owner, None)
+
+    def add(self, owner: str, decoration: Decoration) -> None:
+        """为某个来源加入一个装饰"""
+        layer = self._layers.get(owner)
+        if layer is None:
+            layer = self._layers[owner] = _Layer(self._random)
+        layer.add(decoration)
+
+    def clear(self, owner: Optional[str] = None) -> None:
+        """移除某个来源的装饰，owner 为 None 时移除全部"""
+        if owner is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(owner, None)
+
+    def decorations(self, owner: str) -> List[Decoration]:
+        """某个来源的全部装饰，按起始偏移排序"""
+        layer = self._layers.get(owner)
+        return list(layer.items()) if layer is not None else []
+
+    def query(
+        self, start: int, end: int, owner: Optional[str] = None
+    ) -> Dict[str, List[Decoration]]:
+        """查询与 [start, end] 相交的装饰，例如可见范围内的装饰
+
+        Args:
+            start: 起始偏移
+            end: 结束偏移
+            owner: 只查询该来源，为 None 时查询全部来源
+
+        Returns:
+            Dict[str, List[Decoration]]: 来源到按起始偏移排序的装饰列表，
+                不含没有结果的来源
+        """
+        owners = [owner] if owner is not None else list(self._layers)
+        result: Dict[str, List[Decoration]] = {}
+        for name in owners:
+            layer = self._layers.get(name)
+            if layer is None:
+                continue
+            found: List[Decoration] = []
+            layer.query(start, end, found)
+            if found:
+                result[name] = found
+        return result
+
+    def insert_text(self, offset: int, length: int) -> None:
+        """按插入的文本调整装饰的偏移"""
+        if length > 0:
+            for layer in self._layers.values():
+                layer.insert(offset, length)
+
+    def delete_text(self, offset: int, length: int) -> None:
+        """按删除的文本调整装饰的偏移"""
+        if length > 0:
+            for layer in self._layers.values():
+                layer.delete(offset, length)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+行差异计算模块
+
+以每行文本的哈希值为比较单位：先去掉公共的首尾行，再用 Myers 算法
+求最短编辑。编辑距离超过上限时，以两边各只出现一次的行为锚点
+（patience diff）把问题切成小段分别处理，仍超过上限的段整体视为替换，
+保证最坏情况下的耗时可控。相同行的连续比较按切片成块进行。
+哈希值为 64 位，不同行的哈希碰撞概率可以忽略。
+"""
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Myers 算法在一段内搜索的最大编辑距离，耗时与其平方成正比
+MYERS_MAX_COST = 64
+
+
+@dataclass(frozen=True)
+class DiffHunk:
+    """差异块：旧内容的若干行替换为新内容的若干行
+
+    Attributes:
+        old_start: 旧内容的起始行
+        old_end: 旧内容的结束行（不含）
+        new_start: 新内容的起始行
+        new_end: 新内容的结束行（不含）
+    """
+
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+
+def hash_lines(lines: Sequence[str]) -> "array[int]":
+    """计算每行的哈希值"""
+    return array("q", map(hash, lines))
+
+
+class LineHashes:
+    """按行缓存的哈希值
+
+    编辑时只调整数组长度并记录需要重新计算的行区间，
+    取值时才重新计算，连续编辑不会反复哈希同一行。
+    """
+
+    def __init__(self) -> None:
+        """初始化缓存"""
+        self._hashes = array("q")
+        self._valid = False  # 为 False 时下次取值重建全部哈希
+        self._dirty_start = 0  # 需要重新计算的行区间
+        self._dirty_end = 0
+
+    def invalidate(self) -> None:
+        """内容被整体替换，下次取值时重建"""
+        self._valid = False
+        self._hashes = array("q")
+
+    def splice(self, line: int, removed: int, added: int) -> None:
+        """记录一次编辑：从 line 开始的 removed 行被替换为 added 行
+
+        Args:
+            line: 编辑的起始行
+            removed: 编辑前涉及的行数
+            added: 编辑后涉及的行数
+        """
+        if not self._valid:
+            return
+        if removed != added:
+            self._hashes[line : line + removed] = array("q", bytes(8 * added))
+
+        # 已有的脏区间按行数变化平移，再与本次编辑的区间合并
+        delta = added - removed
+        old_end = line + removed
+        start, end = line, line + added
+        if self._dirty_start < self._dirty_end:
+            dirty_start = self._dirty_start
+            if dirty_start >= old_end:
+                dirty_start += delta
+            dirty_end = self._dirty_end
+            if dirty_end > old_end:
+                dirty_end += delta
+            start = min(start, dirty_start)
+            end = max(end, dirty_end)
+        self._dirty_start, self._dirty_end = start, end
+
+    def get(
+        self, get_text: Callable[[], str], get_line: Callable[[int], str]
+    ) -> "array[int]":
+        """获取每行的哈希值，必要时重新计算
+
+        Args:
+            get_text: 返回完整内容的函数，用于重建
+            get_line: 返回指定行内容的函数，用于重新计算脏区间
+
+        Returns:
+            array[int]: 每行的哈希值，调用方不应修改
+        """
+        if not self._valid:
+            self._hashes = hash_lines(get_text().split("\n"))
+            self._valid = True
+        elif self._dirty_start < self._dirty_end:
+            hashes = self._hashes
+            for line in range(self._dirty_start, min(self._dirty_end, len(hashes))):
+                hashes[line] = hash(get_line(line))
+        self._dirty_start = self._dirty_end = 0
+        return self._hashes
+
+
+def diff_hashes(old: Sequence[int], new: Sequence[int]) -> List[DiffHunk]:
+    """计算两组行哈希之间的差异
+
+    Args:
+        old: 旧内容每行的哈希值
+        new: 新内容每行的哈希值
+
+    Returns:
+        List[DiffHunk]: 按位置排列、互不相邻的差异块
+    """
+    hunks: List[DiffHunk] = []
+    _diff_range(old, 0, len(old), new, 0, len(new), hunks)
+    # 锚点之间各段的结果按位置排序后合并相邻的块
+    hunks.sort(key=lambda hunk: hunk.old_start)
+
+    merged: List[DiffHunk] = []
+    for hunk in hunks:
+        if (
+            merged
+            and merged[-1].old_end == hunk.old_start
+            and merged[-1].new_end == hunk.new_start
+        ):
+            last = merged.pop()
+            hunk = DiffHunk(last.old_start, hunk.old_end, last.new_start, hunk.new_end)
+        merged.append(hunk)
+    return merged
+
+
+def _diff_range(
+    a: Sequence[int],
+    a_start: int,
+    a_end: int,
+    b: Sequence[int],
+    b_start: int,
+    b_end: int,
+    hunks: List[DiffHunk],
+) -> None:
+    """计算 a[a_start:a_end] 与 b[b_start:b_end] 的差异并追加到 hunks"""
+    limit = min(a_end - a_start, b_end - b_start)
+    common = _match_forward(a, a_start, b, b_start, limit)
+    a_start += common
+    b_start += common
+    limit = min(a_end - a_start, b_end - b_start)
+    common = _match_backward(a, a_end, b, b_end, limit)
+    a_end -= common
+    b_end -= common
+    if a_start == a_end or b_start == b_end:
+        if a_start < a_end or b_start < b_end:
+            hunks.append(DiffHunk(a_start, a_end, b_start, b_end))
+        return
+
+    # 改动较少时 Myers 很快得到结果，否则按锚点切分
+    if _myers(a, a_start, a_end, b, b_start, b_end, hunks):
+        return
+    anchors = _unique_anchors(a, a_start, a_end, b, b_start, b_end)
+    if not anchors:
+        hunks.append(DiffHunk(a_start, a_end, b_start, b_end))
+        return
+    for i, j in anchors:
+        _diff_range(a, a_start, i, b, b_start, j, hunks)
+        a_start, b_start = i + 1, j + 1
+    _diff_range(a, a_start, a_end, b, b_start, b_end, hunks)
+
+
+def _match_forward(
+    a: Sequence[int], i: int, b: Sequence[int], j: int, limit: int
+) -> int:
+    """a[i:] 与 b[j:] 相同前缀的长度，最多比较 limit 个
+
+    按倍增的块比较切片，块内不同时缩小块长，连续相同的长段只需少量比较。
+    """
+    count = 0
+    size = 8
+    while count < limit:
+        size = min(size, limit - count)
+        if a[i + count : i + count + size] == b[j + count : j + count + size]:
+            count += size
+            size *= 2
+        elif size == 1:
+            break
+        else:
+            size //= 2
+    return count
+
+
+def _match_backward(
+    a: Sequence[int], i: int, b: Sequence[int], j: int, limit: int
+) -> int:
+    """a[:i] 与 b[:j] 相同后缀的长度，最多比较 limit 个"""
+    count = 0
+    size = 8
+    while count < limit:
+        size = min(size, limit - count)
+        if a[i - count - size : i - count] == b[j - count - size : j - count]:
+            count += size
+            size *= 2
+        elif size == 1:
+            break
+        else:
+            size //= 2
+    return count
+
+
+def _unique_anchors(
+    a: Sequence[int],
+    a_start: int,
+    a_end: int,
+    b: Sequence[int],
+    b_start: int,
+    b_end: int,
+) -> List[Tuple[int, int]]:
+    """在两边各只出现一次的行中取最长递增子序列作为锚点"""
+    a_counts: Dict[int, int] = {}
+    a_positions: Dict[int, int] = {}
+    for i in range(a_start, a_end):
+        value = a[i]
+        a_counts[value] = a_counts.get(value, 0) + 1
+        a_positions[value] = i
+    b_counts: Dict[int, int] = {}
+    for j in range(b_start, b_end):
+        value = b[j]
+        if a_counts.get(value) == 1:
+            b_counts[value] = b_counts.get(value, 0) + 1
+    pairs = [
+        (a_positions[b[j]], j) for j in range(b_start, b_end) if b_counts.get(b[j]) == 1
+    ]
+    if not pairs:
+        return []
+    pairs.sort()
+
+    # 按 b 中的位置求最长递增子序列（耐心排序）
+    tails: List[int] = []  # 各长度子序列末尾的 b 位置
+    tail_indexes: List[int] = []  # 对应的 pairs 下标
+    previous: List[int] = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[pile] = j
+            tail_indexes[pile] = index
+        previous[index] = tail_indexes[pile - 1] if pile > 0 else -1
+    result: List[Tuple[int, int]] = []
+    index = tail_indexes[-1]
+    while index >= 0:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _myers(
+    a: Sequence[int],
+    a_start: int,
+    a_end: int,
+    b: Sequence[int],
+    b_start: int,
+    b_end: int,
+    hunks: List[DiffHunk],
+) -> bool:
+    """用 Myers 算法计算一段的最短编辑
+
+    Returns:
+        bool: 是否在编辑距离上限内得到结果，为 False 时 hunks 不变
+    """
+    n = a_end - a_start
+    m = b_end - b_start
+    max_cost = min(n + m, MYERS_MAX_COST)
+    offset = max_cost + 1
+    v = [0] * (2 * max_cost + 3)  # 对角线 k 上到达的最远 x，下标为 k + offset
+    trace: List[List[int]] = []  # 每一步开始前 [-d-1, d+1] 范围内的 v
+
+    for d in range(max_cost + 1):
+        trace.append(v[offset - d - 1 : offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            if x < n and y < m and a[a_start + x] == b[b_start + y]:
+                common = _match_forward(
+                    a, a_start + x, b, b_start + y, min(n - x, m - y)
+                )
+                x += common
+                y += common
+            v[offset + k] = x
+            if x >= n and y >= m:
+                matches = _backtrack(trace, d, n, m)
+                _hunks_between(matches, a_start, a_end, b_start, b_end, hunks)
+                return True
+    return False
+
+
+def _backtrack(
+    trace: List[List[int]], cost: int, x: int, y: int
+) -> List[Tuple[int, int]]:
+    """从终点回溯 Myers 的搜索记录，返回按顺序排列的匹配行对（相对段起点）"""
+    matches: List[Tuple[int, int]] = []
+    for d in range(cost, 0, -1):
+        v = trace[d]
+        base = d + 1  # trace[d] 中对角线 k 的下标为 k + base
+        k = x - y
+        if k == -d or (k != d and v[base + k - 1] < v[base + k + 1]):
+            # 由对角线 k + 1 向下移动，插入一行
+            previous_k = k + 1
+            previous_x = v[base + previous_k]
+            middle_x = previous_x
+        else:
+            # 由对角线 k - 1 向右移动，删除一行
+            previous_k = k - 1
+            previous_x = v[base + previous_k]
+            middle_x = previous_x + 1
+        # 移动之后沿对角线前进的部分都是匹配行
+        while x > middle_x:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = previous_x, previous_x - previous_k
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        matches.append((x, y))
+    matches.reverse()
+    return matches
+
+
+def _hunks_between(
+    matches: List[Tuple[int, int]],
+    a_start: int,
+    a_end: int,
+    b_start: int,
+    b_end: int,
+    hunks: List[DiffHunk],
+) -> None:
+    """把匹配行对之间的空隙转换为差异块"""
+    i, j = a_start, b_start
+    for x, y in matches:
+        x += a_start
+        y += b_start
+        if x > i or y > j:
+            hunks.append(DiffHunk(i, x, j, y))
+        i, j = x + 1, y + 1
+    if i < a_end or j < b_end:
+        hunks.append(DiffHunk(i, a_end, j, b_end))
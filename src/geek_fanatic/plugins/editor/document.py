@@ -0,0 +1,691 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+共享文档模块
+
+每个打开的文件只有一个文本缓冲区和一个 QTextDocument，任意数量的编辑器视图
+（分栏或新窗口）挂接到同一个文档上，内存占用不随视图数量增长。
+普通视图直接显示共享的 QTextDocument，编辑以文档变更的增量（位置、删除数、
+新增数）通知各视图的排版；虚拟化视图下各视图读写同一个缓冲区，
+编辑后其他视图只重绘可见行。
+
+缓冲区同步、分块载入、虚拟化切换、语法高亮和折叠都是文档级的状态，
+在这里统一维护；光标、选择和滚动位置由各视图自行维护。
+"""
+
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QPlainTextDocumentLayout, QPlainTextEdit, QWidget
+
+from .buffer import TextBuffer, TextTransaction
+from .decorations import Decoration, DecorationStore
+from .folding import FoldingModel
+from .highlighter import IncrementalHighlighter
+from .lexers import RegexLexer
+from .types import Position
+from .virtual_view import VIRTUAL_LINE_COUNT, VIRTUAL_LINE_LENGTH
+
+
+def utf16_length(text: str) -> int:
+    """文本按 UTF-16 计的长度，增补平面字符（如 emoji）占两个单位"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+def utf16_index(text: str, units: int) -> int:
+    """把文本开头的 UTF-16 单位数换算为码点下标
+
+    Args:
+        text: 文本
+        units: UTF-16 单位数，落在增补平面字符中间时计入该字符
+
+    Returns:
+        int: 码点下标，超出文本时为文本长度
+    """
+    if text.isascii():
+        return max(0, min(units, len(text)))
+    index = 0
+    for char in text:
+        if units <= 0:
+            break
+        units -= 2 if char > "\uffff" else 1
+        index += 1
+    return index
+
+
+def _astral_count(text: str) -> int:
+    """文本中增补平面字符的个数"""
+    return utf16_length(text) - len(text)
+
+
+class SharedDocument(QObject):
+    """一个文件的共享文档
+
+    以挂接的视图数作为引用计数，最后一个视图解除挂接后由持有者释放。
+    高亮器和折叠模型属于文档，只按第一个视图的可见范围和光标工作，
+    该视图解除挂接时转交给下一个视图。撤销栈同样属于文档，
+    在任一视图中撤销都会撤销最近一次编辑。
+    """
+
+    # 信号定义
+    modificationChanged = Signal(bool)  # 修改状态变更信号
+    loadingChanged = Signal(bool)  # 开始或结束分块载入
+    contentReset = Signal()  # 文档内容被整体替换
+    virtualEntered = Signal(bool)  # 切换到虚拟化视图或重置其内容，参数为是否保留光标
+    virtualLeft = Signal()  # 切换回普通视图
+    longestLineChanged = Signal(int)  # 分块载入时已知的最长行字符数变化
+    edited = Signal(object)  # 虚拟化视图下缓冲区被修改，参数为发起修改的视图或 None
+    decorationsChanged = Signal()  # 装饰被替换或清除
+
+    def __init__(
+        self, buffer: Optional[TextBuffer] = None, parent: Optional[QObject] = None
+    ) -> None:
+        """初始化共享文档
+
+        Args:
+            buffer: 沿用的文本缓冲区，需调用 rebuild 显示其内容
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._buffer = buffer if buffer is not None else TextBuffer()  # 文本缓冲区
+        self._views: List[Tuple[QWidget, QPlainTextEdit]] = []  # 挂接的视图及其编辑控件
+        self._sync_suspended = False  # 是否暂停增量同步
+        self._loading = False  # 是否正在异步加载
+        self._virtual = False  # 是否使用虚拟化视图
+        self._virtual_modified = False  # 虚拟化视图下最近一次通知的修改状态
+        self._virtual_line_length = VIRTUAL_LINE_LENGTH  # 切换阈值：最长行字符数
+        self._virtual_line_count = VIRTUAL_LINE_COUNT  # 切换阈值：总行数
+        self._longest = 0  # 虚拟化视图下已知的最长行字符数
+        self._load_longest = 0  # 分块载入时已知的最长行字符数
+        self._load_tail = 0  # 分块载入时最后一行已载入的字符数
+        self._load_lines = 1  # 分块载入时已载入的行数
+        self._highlighter: Optional[IncrementalHighlighter] = None  # 语法高亮器
+        # 缓冲区中增补平面字符的个数，为 0 时码点偏移与文档位置相同；
+        # 虚拟化视图下文档已清空，不维护
+        self._astral = 0
+
+        self._document = QTextDocument(self)
+        self._document.setDocumentLayout(QPlainTextDocumentLayout(self._document))
+        self._document.contentsChange.connect(self._on_contents_change)
+        self._document.modificationChanged.connect(self._on_modification_changed)
+        self._folding = FoldingModel(self._document, self._is_formatting, parent=self)
+
+        # 编辑使文档超过阈值时，在事件循环中切换到虚拟化视图
+        self._virtual_timer = QTimer(self)
+        self._virtual_timer.setSingleShot(True)
+        self._virtual_timer.setInterval(0)
+        self._virtual_timer.timeout.connect(self._switch_to_virtual)
+
+    @property
+    def buffer(self) -> TextBuffer:
+        """文本缓冲区"""
+        return self._buffer
+
+    @property
+    def text_document(self) -> QTextDocument:
+        """普通视图共同显示的文档"""
+        return self._document
+
+    @property
+    def ref_count(self) -> int:
+        """挂接的视图数"""
+        return len(self._views)
+
+    def views(self) -> List[QWidget]:
+        """按挂接顺序排列的视图"""
+        return [view for view, _ in self._views]
+
+    def attach(self, view: QWidget, text_edit: QPlainTextEdit) -> None:
+        """挂接视图
+
+        Args:
+            view: 视图
+            text_edit: 视图中显示共享文档的编辑控件
+        """
+        self._views.append((view, text_edit))
+        if len(self._views) == 1:
+            self._set_primary(text_edit)
+
+    def detach(self, view: QWidget) -> None:
+        """解除视图的挂接，第一个视图解除时高亮器和折叠模型转交给下一个视图"""
+        for index, (attached, _) in enumerate(self._views):
+            if attached is view:
+                del self._views[index]
+                break
+        else:
+            return
+        if index == 0:
+            self._set_primary(self._views[0][1] if self._views else None)
+
+    def _set_primary(self, text_edit: Optional[QPlainTextEdit]) -> None:
+        """设置高亮器和折叠模型所跟随的编辑控件"""
+        self._folding.set_view(text_edit)
+        if self._highlighter is not None:
+            self._highlighter.set_view(text_edit)
+
+    def _primary_text_edit(self) -> Optional[QPlainTextEdit]:
+        """第一个视图的编辑控件"""
+        return self._views[0][1] if self._views else None
+
+    # 缓冲区同步
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        """按文档变更增量同步缓冲区
+
+        只把变更区间作为删除和插入操作应用到缓冲区，避免每次按键
+        都复制并重新拆分整个文档。
+
+        Args:
+            position: 变更起始位置，按 UTF-16 计
+            removed: 删除的 UTF-16 单位数
+            added: 新增的 UTF-16 单位数
+        """
+        if self._sync_suspended or self._virtual:
+            return
+        # 高亮器应用格式时文本不变
+        if self._is_formatting():
+            return
+
+        document_length = self._document.characterCount() - 1
+        # 整体替换时 Qt 报告的数量会包含文档末尾的段落分隔符，需要截断
+        added = max(0, min(added, document_length - position))
+
+        added_text = ""
+        if added:
+            cursor = QTextCursor(self._document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            added_text = (
+                cursor.selectedText().replace("\u2029", "\n").replace("\u2028", "\n")
+            )
+
+        # Qt 的位置和数量按 UTF-16 计数，换算为缓冲区的码点偏移。
+        # 变更位置之前的内容不变，可以按变更后的文档换算起始位置
+        offset = self.from_document_offset(position)
+        start = self._buffer.offset_to_position(offset)
+        removed_text = ""
+        if removed:
+            # 删除的码点数不超过 UTF-16 单位数，先多取再按单位数截断
+            end_offset = min(offset + removed, self._buffer.get_length())
+            removed_text = self._buffer_text(offset, end_offset)
+            if self._astral:
+                removed_text = removed_text[: utf16_index(removed_text, removed)]
+        if removed_text:
+            # 仅格式变化时文本不变，无需修改缓冲区
+            if removed_text == added_text:
+                return
+            end = self._buffer.offset_to_position(offset + len(removed_text))
+            self._buffer.delete(start, end)
+        if added_text:
+            self._buffer.insert(start, added_text)
+        self._astral += _astral_count(added_text) - _astral_count(removed_text)
+
+        self._ensure_synced()
+        if added:
+            self._check_edited_lines(position, added)
+
+    def _is_formatting(self) -> bool:
+        """高亮器是否正在应用格式，此时文档的变更通知只涉及格式"""
+        return self._highlighter is not None and self._highlighter.is_formatting()
+
+    def _buffer_text(self, start: int, end: int) -> str:
+        """缓冲区中码点偏移 start 到 end 之间的文本"""
+        buffer = self._buffer
+        return buffer.get_text(
+            buffer.offset_to_position(start), buffer.offset_to_position(end)
+        )
+
+    def _ensure_synced(self) -> None:
+        """校验缓冲区与文档按 UTF-16 计的长度一致
+
+        换行被规范化等原因导致两者不一致时，退回全量同步以保证内容正确。
+        """
+        length = self._buffer.get_length() + self._astral
+        if length != self._document.characterCount() - 1:
+            text = self._document.toPlainText()
+            self._buffer.set_content(text)
+            self._astral = _astral_count(text)
+
+    # 位置换算
+    def document_position(self, position: Position) -> int:
+        """把缓冲区的行列位置换算为文档中的位置
+
+        缓冲区按码点计数，QTextDocument 和 QTextCursor 按 UTF-16 计数，
+        含增补平面字符时两者不同。两者的行号相同，只需换算列号。
+
+        Args:
+            position: 行列位置，超出范围时限制到文档内
+
+        Returns:
+            int: 可用于 QTextCursor.setPosition 的位置
+        """
+        block = self._document.findBlockByNumber(max(position.line, 0))
+        if not block.isValid():
+            return self._document.characterCount() - 1
+        column = max(position.column, 0)
+        if self._astral:
+            return block.position() + utf16_length(block.text()[:column])
+        return block.position() + min(column, block.length() - 1)
+
+    def position_at(self, document_position: int) -> Position:
+        """把文档中的位置（如 QTextCursor.position()）换算为缓冲区的行列位置"""
+        document_position = max(
+            0, min(document_position, self._document.characterCount() - 1)
+        )
+        block = self._document.findBlock(document_position)
+        units = document_position - block.position()
+        if self._astral:
+            return Position(block.blockNumber(), utf16_index(block.text(), units))
+        return Position(block.blockNumber(), units)
+
+    def to_document_offset(self, offset: int) -> int:
+        """把缓冲区的码点偏移换算为文档中的位置"""
+        if not self._astral:
+            return offset
+        return self.document_position(self._buffer.offset_to_position(offset))
+
+    def from_document_offset(self, document_position: int) -> int:
+        """把文档中的位置换算为缓冲区的码点偏移"""
+        if not self._astral:
+            return document_position
+        return self._buffer.position_to_offset(self.position_at(document_position))
+
+    def _set_document_text(self, text: str) -> None:
+        """整体替换文档内容，不同步到缓冲区，也不记录撤销历史，各视图的光标回到开头"""
+        self._sync_suspended = True
+        self._folding.suspend()
+        try:
+            self._document.setPlainText(text)
+        finally:
+            self._sync_suspended = False
+            self._folding.resume()
+        self.contentReset.emit()
+
+    # 载入
+    def load_text(self, text: str) -> None:
+        """整体载入文本
+
+        载入视为新文档，直接重置缓冲区而不记录撤销历史。
+        超过阈值的文本只写入缓冲区，由虚拟化视图显示。
+        """
+        lines = text.split("\n")
+        longest = max(map(len, lines))
+        if self._exceeds_thresholds(longest, len(lines)):
+            self._buffer.set_content(text)
+            self._enter_virtual_mode(longest, False)
+            self.set_modified(False)
+            return
+
+        self._leave_virtual_mode()
+        self._set_document_text(text)
+        self._buffer.set_content(text)
+        self._astral = _astral_count(text)
+        self._buffer.set_modified(False)
+        self._document.setModified(False)
+        self._ensure_synced()
+
+    def rebuild(self) -> None:
+        """按缓冲区的当前内容重建文档
+
+        用于沿用其他编辑器的缓冲区，缓冲区的撤销历史和修改状态保持不变；
+        文档的撤销栈从空开始。
+        """
+        text = self._buffer.get_content()
+        lines = text.split("\n")
+        longest = max(map(len, lines))
+        self._document.setModified(self._buffer.is_modified())
+        if self._exceeds_thresholds(longest, len(lines)):
+            self._enter_virtual_mode(longest, False)
+            return
+
+        self._leave_virtual_mode()
+        self._set_document_text(text)
+        self._astral = _astral_count(text)
+        self._document.setModified(self._buffer.is_modified())
+        self._ensure_synced()
+
+    def begin_loading(self) -> None:
+        """开始分块载入
+
+        载入期间各视图只读，文档不记录撤销历史。
+        """
+        self._loading = True
+        self._load_longest = 0
+        self._load_tail = 0
+        self._load_lines = 1
+        self.load_text("")
+        self._document.setUndoRedoEnabled(False)
+        self._folding.suspend()
+        if self._highlighter is not None:
+            self._highlighter.suspend()
+        self.loadingChanged.emit(True)
+
+    def append_loaded_text(self, text: str) -> None:
+        """在文档末尾追加一块载入的文本
+
+        已载入的内容超过阈值时切换到虚拟化视图，之后的块只追加到缓冲区。
+        """
+        self._track_loaded_lines(text)
+        if not self._virtual and self._exceeds_thresholds(
+            self._load_longest, self._load_lines
+        ):
+            self._enter_virtual_mode(self._load_longest, False)
+        if not self._virtual:
+            cursor = QTextCursor(self._document)
+            cursor.movePosition(QTextCursor.End)
+            self._sync_suspended = True
+            try:
+                cursor.insertText(text)
+            finally:
+                self._sync_suspended = False
+            self._astral += _astral_count(text)
+        end = self._buffer.offset_to_position(self._buffer.get_length())
+        self._buffer.insert(end, text)
+        if self._virtual:
+            self._longest = self._load_longest
+            self.longestLineChanged.emit(self._longest)
+
+    def _track_loaded_lines(self, text: str) -> None:
+        """统计分块载入的行数和最长行"""
+        parts = text.split("\n")
+        head = self._load_tail + len(parts[0])
+        if len(parts) == 1:
+            self._load_tail = head
+        else:
+            self._load_tail = len(parts[-1])
+            self._load_lines += len(parts) - 1
+            head = max(head, max(map(len, parts)))
+        self._load_longest = max(self._load_longest, head)
+
+    def finish_loading(self) -> None:
+        """结束分块载入"""
+        self._loading = False
+        self._buffer.clear_history()
+        self._document.setUndoRedoEnabled(True)
+        if self._virtual:
+            self._longest = self._load_longest
+            self.virtualEntered.emit(False)
+            self.set_modified(False)
+            self.loadingChanged.emit(False)
+            return
+        self._ensure_synced()
+        self._buffer.set_modified(False)
+        self._document.setModified(False)
+        self._folding.resume()
+        if self._highlighter is not None:
+            self._highlighter.resume()
+        self.loadingChanged.emit(False)
+
+    def is_loading(self) -> bool:
+        """是否正在分块载入"""
+        return self._loading
+
+    # 虚拟化视图
+    def is_virtual(self) -> bool:
+        """是否正在使用虚拟化视图
+
+        此时文档已清空，内容只保存在缓冲区中，不提供折叠和语法高亮。
+        """
+        return self._virtual
+
+    def longest_line(self) -> int:
+        """虚拟化视图下已知的最长行字符数"""
+        return self._longest
+
+    def set_virtual_thresholds(self, line_length: int, line_count: int) -> None:
+        """设置切换到虚拟化视图的阈值
+
+        阈值在载入和编辑时检查，已切换的文档在重新载入前保持虚拟化视图。
+
+        Args:
+            line_length: 任一行超过该字符数时切换
+            line_count: 总行数超过该值时切换
+        """
+        self._virtual_line_length = line_length
+        self._virtual_line_count = line_count
+
+    def _exceeds_thresholds(self, longest: int, lines: int) -> bool:
+        """最长行或总行数是否超过切换阈值"""
+        return longest > self._virtual_line_length or lines > self._virtual_line_count
+
+    def _check_edited_lines(self, position: int, added: int) -> None:
+        """检查编辑新增内容所在的行，超过阈值时安排切换到虚拟化视图"""
+        if self._virtual_timer.isActive() or self._loading:
+            return
+        document = self._document
+        exceeded = document.blockCount() > self._virtual_line_count
+        block = document.findBlock(position)
+        last = document.findBlock(position + added).blockNumber()
+        while not exceeded and block.isValid() and block.blockNumber() <= last:
+            exceeded = block.length() - 1 > self._virtual_line_length
+            block = block.next()
+        if exceeded:
+            # 文档变更信号仍在分发，推迟到事件循环中切换
+            self._virtual_timer.start()
+
+    def _switch_to_virtual(self) -> None:
+        """编辑使文档超过阈值后切换到虚拟化视图，各视图保留光标"""
+        if self._virtual or self._loading:
+            return
+        self._enter_virtual_mode(0, True)
+
+    def _enter_virtual_mode(self, longest: int, keep_cursor: bool) -> None:
+        """切换到虚拟化视图
+
+        缓冲区已包含全部内容，清空文档以释放其排版数据，修改状态转由缓冲区记录。
+
+        Args:
+            longest: 已知的最长行字符数
+            keep_cursor: 各视图是否保留当前光标位置，否则移到文档开头
+        """
+        self._virtual_timer.stop()
+        if not self._virtual:
+            self._virtual = True
+            self._virtual_modified = self._document.isModified()
+            if self._virtual_modified != self._buffer.is_modified():
+                self._buffer.set_modified(self._virtual_modified)
+            self._folding.suspend()
+            if self._highlighter is not None:
+                self._highlighter.suspend()
+            undo_enabled = self._document.isUndoRedoEnabled()
+            self._document.setUndoRedoEnabled(False)
+            self._document.clear()
+            self._document.setUndoRedoEnabled(undo_enabled)
+        self._longest = longest
+        self.virtualEntered.emit(keep_cursor)
+
+    def _leave_virtual_mode(self) -> None:
+        """在载入新内容前切换回普通视图"""
+        self._virtual_timer.stop()
+        if not self._virtual:
+            return
+        self._virtual = False
+        self._document.setModified(self._buffer.is_modified())
+        self._virtual_modified = False
+        self.virtualLeft.emit()
+        self._folding.resume()
+        if self._highlighter is not None and not self._loading:
+            self._highlighter.resume()
+
+    def notify_edited(self, source: Optional[QWidget] = None) -> None:
+        """虚拟化视图直接修改缓冲区后，更新修改状态并通知各视图重绘
+
+        Args:
+            source: 发起修改的视图，为 None 时所有视图都需要重绘
+        """
+        self._update_virtual_modified()
+        self.edited.emit(source)
+
+    # 语法高亮与折叠
+    @property
+    def highlighter(self) -> Optional[IncrementalHighlighter]:
+        """语法高亮器，未设置词法分析器时为 None"""
+        return self._highlighter
+
+    def set_lexer(self, lexer: Optional[RegexLexer]) -> None:
+        """设置语法高亮使用的词法分析器
+
+        Args:
+            lexer: 词法分析器，为 None 时关闭语法高亮
+        """
+        if self._highlighter is not None:
+            self._highlighter.set_view(None)
+            self._highlighter.setDocument(None)
+            self._highlighter.deleteLater()
+            self._highlighter = None
+        if lexer is None:
+            return
+        self._highlighter = IncrementalHighlighter(self._document, lexer, self)
+        self._highlighter.set_view(self._primary_text_edit())
+        if self._loading:
+            self._highlighter.suspend()
+        elif not self._document.isEmpty():
+            self._highlighter.resume()
+
+    @property
+    def folding(self) -> FoldingModel:
+        """代码折叠模型"""
+        return self._folding
+
+    # 装饰
+    @property
+    def decorations(self) -> DecorationStore:
+        """附加在文本范围上的装饰，偏移随编辑自动调整"""
+        return self._buffer.decorations
+
+    def set_decorations(self, owner: str, decorations: Iterable[Decoration]) -> None:
+        """整体替换某个来源的装饰并通知各视图
+
+        Args:
+            owner: 来源名称，如插件名称
+            decorations: 新的装饰，偏移基于缓冲区的当前内容
+        """
+        self._buffer.decorations.set_decorations(owner, decorations)
+        self.decorationsChanged.emit()
+
+    def clear_decorations(self, owner: Optional[str] = None) -> None:
+        """移除某个来源的装饰，owner 为 None 时移除全部"""
+        self._buffer.decorations.clear(owner)
+        self.decorationsChanged.emit()
+
+    # 修改状态
+    def is_modified(self) -> bool:
+        """内容是否已修改且未保存
+
+        虚拟化视图下由缓冲区的撤销状态号判断，撤销回保存时的状态视为未修改。
+        """
+        if self._virtual:
+            return self._buffer.is_modified()
+        return self._document.isModified()
+
+    def set_modified(self, modified: bool) -> None:
+        """设置修改状态"""
+        self._buffer.set_modified(modified)
+        if not self._virtual:
+            self._document.setModified(modified)
+        else:
+            self._update_virtual_modified()
+
+    def has_undo_history(self) -> bool:
+        """文档是否有可撤销或重做的步骤
+
+        虚拟化视图的撤销历史保存在缓冲区中，重建文档后仍然可用，视为没有。
+        """
+        if self._virtual:
+            return False
+        return self._document.isUndoAvailable() or self._document.isRedoAvailable()
+
+    def _on_modification_changed(self, modified: bool) -> None:
+        """转发文档的修改状态，虚拟化视图下文档已清空，不再转发"""
+        if not self._virtual:
+            self.modificationChanged.emit(modified)
+
+    def _update_virtual_modified(self) -> None:
+        """虚拟化视图下修改状态变化时发出通知"""
+        modified = self._buffer.is_modified()
+        if modified != self._virtual_modified:
+            self._virtual_modified = modified
+            self.modificationChanged.emit(modified)
+
+    # 批量编辑
+    def apply_edits(self, edits: Sequence[Tuple[int, int, str]]) -> None:
+        """批量替换多个互不重叠的范围
+
+        文档和缓冲区各记录为一个撤销步骤，只触发一次内容变更。
+
+        Args:
+            edits: (起始偏移, 结束偏移, 新文本) 列表，偏移基于修改前的内容
+        """
+        if not edits:
+            return
+        if self._virtual:
+            self._buffer.apply_edits(edits)
+            self.notify_edited()
+            return
+        # 偏移按码点计数，修改前全部换算为文档中的位置，
+        # 同时统计编辑前后增补平面字符个数的变化
+        ordered = sorted(edits, key=lambda edit: edit[0], reverse=True)
+        ranges: List[Tuple[int, int, str]] = []
+        astral = self._astral
+        for start, end, text in ordered:
+            ranges.append(
+                (self.to_document_offset(start), self.to_document_offset(end), text)
+            )
+            astral += _astral_count(text)
+            if self._astral and end > start:
+                astral -= _astral_count(self._buffer_text(start, end))
+        cursor = QTextCursor(self._document)
+        self._sync_suspended = True
+        cursor.beginEditBlock()
+        try:
+            for start, end, text in ranges:
+                cursor.setPosition(start)
+                cursor.setPosition(end, QTextCursor.KeepAnchor)
+                cursor.insertText(text)
+        finally:
+            cursor.endEditBlock()
+            self._sync_suspended = False
+        self._buffer.apply_edits(edits)
+        self._astral = astral
+        self._ensure_synced()
+
+    @contextmanager
+    def transaction(self) -> Iterator[TextTransaction]:
+        """收集一组编辑，正常退出时以 apply_edits 一次性应用，发生异常时丢弃
+
+        文档和缓冲区各记录为一个撤销步骤，各视图只收到一次内容变更。
+
+        Yields:
+            TextTransaction: 收集编辑的事务，位置基于事务开始时的内容
+        """
+        transaction = TextTransaction(self._buffer)
+        yield transaction
+        self.apply_edits(transaction.edits())
+
+    def apply_external_change(self, text: str) -> int:
+        """把外部修改后的内容以差异方式应用到文档
+
+        只替换变化的行，各视图的光标、折叠和撤销历史都得以保留，
+        整个变更作为一个撤销步骤。应用前未修改时，应用后仍视为未修改。
+
+        Args:
+            text: 新内容，换行符应已统一为 \n
+
+        Returns:
+            int: 应用的差异块数量
+        """
+        was_modified = self.is_modified()
+        edits = self._buffer.diff_edits(text)
+        self.apply_edits(edits)
+        if self._buffer.get_content() != text:
+            # 差异应用的结果与新内容不一致时整体替换，仍视为已修改，
+            # 避免下次保存时写入错误的内容
+            self.apply_edits([(0, self._buffer.get_length(), text)])
+            return len(edits)
+        if edits and not was_modified:
+            self.set_modified(False)
+        return len(edits)
@@ -5,47 +5,168 @@
 编辑器核心实现模块
 """
 
-from typing import Dict, Optional, Tuple
+import re
+from typing import (
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QTextCursor
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit
+from PySide6.QtCore import QEvent, QObject, QPoint, QRect, Qt, QTimer, Signal
+from PySide6.QtGui import (
+    QColor,
+    QKeyEvent,
+    QKeySequence,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QResizeEvent,
+    QShortcut,
+    QTextCharFormat,
+    QTextCursor,
+)
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QTextEdit
 
-from .buffer import TextBuffer
+from .buffer import TextBuffer, TextTransaction
+from .completion import CompletionEngine, CompletionItem
+from .completion_view import CompletionPopup
+from .decorations import Decoration
+from .document import SharedDocument, utf16_length
+from .folding import FoldingModel, FoldRegion
+from .highlighter import IncrementalHighlighter
+from .lexers import RegexLexer
+from .multi_cursor import Cursor, MultiCursor
 from .types import Position
+from .virtual_view import VirtualTextView
+
+# 光标前正在输入的单词
+_PREFIX = re.compile(r"\w+$")
+
+# 只按下修饰键时补全列表保持不变
+_MODIFIER_KEYS = (Qt.Key_Shift, Qt.Key_Control, Qt.Key_Alt, Qt.Key_Meta)
+
+# 附加光标和附加光标选中内容的颜色
+_CURSOR_COLOR = "#aeafad"
+_SELECTION_COLOR = "#264f78"
+
+class _CursorOverlay(QWidget):
+    """覆盖在文本框视口上的透明层，绘制多光标模式下的附加光标"""
+
+    def __init__(
+        self, rects: Callable[[], List[QRect]], parent: QPlainTextEdit
+    ) -> None:
+        """初始化覆盖层
+
+        Args:
+            rects: 返回附加光标矩形（视口坐标）的函数
+            parent: 文本框
+        """
+        super().__init__(parent)
+        self._rects = rects
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self.hide()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """绘制附加光标"""
+        painter = QPainter(self)
+        color = QColor(_CURSOR_COLOR)
+        for rect in self._rects():
+            painter.fillRect(rect.x(), rect.y(), 2, rect.height(), color)
 
 class Editor(QWidget):
     """编辑器核心类
-    
-    提供基础的文本编辑功能。
+
+    提供基础的文本编辑功能。编辑器是共享文档的一个视图，同一文件的多个
+    编辑器（分栏或新窗口）挂接到同一个文档，光标、选择和滚动位置各自独立。
     """
 
     # 信号定义
     contentChanged = Signal()  # 内容变更信号
     selectionChanged = Signal()  # 选择变更信号
     cursorPositionChanged = Signal(int, int)  # 光标位置变更信号
+    modificationChanged = Signal(bool)  # 修改状态变更信号
 
-    def __init__(self) -> None:
-        """初始化编辑器"""
+    def __init__(self, document: Optional[SharedDocument] = None) -> None:
+        """初始化编辑器
+
+        Args:
+            document: 挂接的共享文档，为 None 时创建只属于该编辑器的文档
+        """
         super().__init__()
-        self._buffer = TextBuffer()  # 文本缓冲区
+        # 共享文档
+        self._document = document if document is not None else SharedDocument()
         self._cursor_position = Position(0, 0)  # 当前光标位置
         self._selection_start: Optional[Position] = None  # 选择起始位置
         self._selection_end: Optional[Position] = None  # 选择结束位置
-        
+        self._decoration_formats: Dict[str, QTextCharFormat] = {}  # 各来源装饰的格式
+        self._completion: Optional[CompletionEngine] = None  # 补全引擎
+        self._completion_request = 0  # 本视图最近一次补全请求的编号
+        self._completion_start = 0  # 被补全单词的起始偏移
+        self._completion_pending = False  # 下一次文本变更后发起补全请求
+        # 多光标，编辑通过共享文档的事务提交
+        self._multi_cursor = MultiCursor(
+            self._document.buffer, self._document.transaction
+        )
+
         # 创建UI
         self._setup_ui()
         self._connect_signals()
+        self._document.attach(self, self._text_edit)
+
+        # 挂接到已有内容的文档时按其当前状态显示
+        self._text_edit.setReadOnly(self._document.is_loading())
+        if self._document.is_virtual():
+            self._on_virtual_entered(False)
 
     def _setup_ui(self) -> None:
         """设置UI"""
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
-        
+
         self._text_edit = QPlainTextEdit()
         self._text_edit.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self._text_edit.setDocument(self._document.text_document)
         layout.addWidget(self._text_edit)
 
+        # 超长行或超多行时改用只排版可见片段的视图，直接读写缓冲区
+        self._virtual_view = VirtualTextView(self._document.buffer)
+        self._virtual_view.hide()
+        layout.addWidget(self._virtual_view)
+        self.setFocusProxy(self._text_edit)
+
+        # 补全列表不获取焦点，按键经事件过滤器转发
+        self._completion_popup = CompletionPopup(self)
+        self._completion_popup.itemAccepted.connect(self._accept_completion)
+        self._text_edit.installEventFilter(self)
+        self._text_edit.viewport().installEventFilter(self)
+
+        # 多光标模式下主光标仍是文本框自身的光标，附加光标画在覆盖层上
+        self._cursor_overlay = _CursorOverlay(self._extra_cursor_rects, self._text_edit)
+
+        # 滚动、编辑和装饰变化合并为一次可见范围内装饰的刷新
+        self._decoration_timer = QTimer(self)
+        self._decoration_timer.setSingleShot(True)
+        self._decoration_timer.setInterval(0)
+        self._decoration_timer.timeout.connect(self._refresh_decorations)
+
+        # 折叠和多光标快捷键
+        for sequence, slot in (
+            ("Ctrl+Shift+[", self._fold_current),
+            ("Ctrl+Shift+]", self._unfold_current),
+            ("Ctrl+K, Ctrl+0", self.fold_all),
+            ("Ctrl+K, Ctrl+J", self.unfold_all),
+            ("Ctrl+Alt+Up", self.add_cursor_above),
+            ("Ctrl+Alt+Down", self.add_cursor_below),
+        ):
+            shortcut = QShortcut(QKeySequence(sequence), self, slot)
+            shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+
         # 设置样式
         self._text_edit.setStyleSheet("""
             QPlainTextEdit {
@@ -64,14 +185,74 @@ class Editor(QWidget):
         self._text_edit.textChanged.connect(self._on_text_changed)
         self._text_edit.selectionChanged.connect(self._on_selection_changed)
         self._text_edit.cursorPositionChanged.connect(self._on_cursor_position_changed)
+        self._virtual_view.textEdited.connect(self._on_virtual_edited)
+        self._text_edit.verticalScrollBar().valueChanged.connect(
+            self._schedule_decorations
+        )
+        for scroll_bar in (
+            self._text_edit.verticalScrollBar(),
+            self._text_edit.horizontalScrollBar(),
+        ):
+            scroll_bar.valueChanged.connect(self._update_cursor_overlay)
+        self._virtual_view.selectionChanged.connect(self._on_virtual_selection_changed)
+        self._virtual_view.cursorPositionChanged.connect(
+            self._on_virtual_cursor_position_changed
+        )
+
+        # 共享文档的通知，解除挂接时断开
+        document = self._document
+        self._document_slots = (
+            (document.modificationChanged, self._on_modification_changed),
+            (document.loadingChanged, self._on_loading_changed),
+            (document.contentReset, self._on_content_reset),
+            (document.virtualEntered, self._on_virtual_entered),
+            (document.virtualLeft, self._on_virtual_left),
+            (document.longestLineChanged, self._on_longest_line_changed),
+            (document.edited, self._on_document_edited),
+            (document.decorationsChanged, self._schedule_decorations),
+            (document.folding.foldingChanged, self._schedule_decorations),
+        )
+        for signal, slot in self._document_slots:
+            signal.connect(slot)
+
+    @property
+    def document(self) -> SharedDocument:
+        """挂接的共享文档"""
+        return self._document
+
+    def detach(self) -> None:
+        """从共享文档上解除挂接
+
+        在关闭分栏或窗口中的编辑器之前调用，之后编辑器显示一个空文档，
+        不再跟随共享文档的变化，共享文档可以安全释放。
+        """
+        if self not in self._document.views():
+            return
+        for signal, slot in self._document_slots:
+            signal.disconnect(slot)
+        self._document.detach(self)
+        self._hide_completion()
+        self.clear_extra_cursors()
+        self._text_edit.setDocument(None)
 
     def _on_text_changed(self) -> None:
         """处理文本变更"""
-        self._buffer.set_content(self._text_edit.toPlainText())
-        self.contentChanged.emit()
+        if not self._document.is_virtual():
+            self._schedule_decorations()
+            self._update_cursor_overlay()
+            if self._completion_pending:
+                self._completion_pending = False
+                self._request_completion(False)
+            self.contentChanged.emit()
+
+    def _on_modification_changed(self, modified: bool) -> None:
+        """转发共享文档的修改状态"""
+        self.modificationChanged.emit(modified)
 
     def _on_selection_changed(self) -> None:
         """处理选择变更"""
+        if self._document.is_virtual():
+            return
         cursor = self._text_edit.textCursor()
         if cursor.hasSelection():
             start_pos = self._get_position(cursor.selectionStart())
@@ -86,50 +267,670 @@ class Editor(QWidget):
 
     def _on_cursor_position_changed(self) -> None:
         """处理光标位置变更"""
-        cursor = self._text_edit.textCursor()
-        block = cursor.block()
-        line = block.blockNumber()
-        column = cursor.positionInBlock()
-        self._cursor_position = Position(line, column)
-        self.cursorPositionChanged.emit(line, column)
+        if self._document.is_virtual():
+            return
+        # 文本框的位置按 UTF-16 计数，换算为缓冲区的行列位置
+        position = self._document.position_at(self._text_edit.textCursor().position())
+        self._cursor_position = position
+        self.cursorPositionChanged.emit(position.line, position.column)
 
     def _get_position(self, index: int) -> Optional[Position]:
-        """从文本索引获取位置"""
-        if index < 0:
-            return None
-            
-        text = self._text_edit.toPlainText()
-        if index > len(text):
+        """从文本框的位置获取缓冲区的行列位置
+
+        文本框按 UTF-16 计数，由文档按所在段落换算列号，复杂度为 O(log n)。
+        """
+        if index < 0 or index > self._text_edit.document().characterCount() - 1:
             return None
-            
-        # 计算行号和列号
-        text_before = text[:index]
-        line = text_before.count('\n')
-        if line == 0:
-            return Position(0, index)
-            
-        last_newline = text_before.rindex('\n')
-        column = index - last_newline - 1
-        return Position(line, column)
+        return self._document.position_at(index)
+
+    def rebuild_view(self) -> None:
+        """按缓冲区的当前内容重建视图
+
+        用于沿用其他编辑器的缓冲区，缓冲区的撤销历史和修改状态保持不变；
+        文档的撤销栈从空开始。
+        """
+        self._document.rebuild()
+
+    def begin_loading(self) -> None:
+        """开始分块载入
+
+        载入期间编辑器只读，文档不记录撤销历史。
+        """
+        self._document.begin_loading()
+
+    def append_loaded_text(self, text: str) -> None:
+        """在文档末尾追加一块载入的文本
+
+        已载入的内容超过阈值时切换到虚拟化视图，之后的块只追加到缓冲区。
+        """
+        self._document.append_loaded_text(text)
+
+    def finish_loading(self) -> None:
+        """结束分块载入"""
+        self._document.finish_loading()
+
+    def is_loading(self) -> bool:
+        """是否正在分块载入"""
+        return self._document.is_loading()
+
+    def _on_loading_changed(self, loading: bool) -> None:
+        """载入期间只读，载入完成后光标回到文档开头"""
+        self._text_edit.setReadOnly(loading)
+        if not loading and not self._document.is_virtual():
+            self._text_edit.moveCursor(QTextCursor.Start)
+
+    def _on_content_reset(self) -> None:
+        """文档内容被整体替换后光标回到开头"""
+        self._text_edit.moveCursor(QTextCursor.Start)
+
+    # 虚拟化视图
+    def is_virtual(self) -> bool:
+        """是否正在使用虚拟化视图
+
+        虚拟化视图只排版可见行中可见的水平片段，此时不提供折叠和语法高亮。
+        """
+        return self._document.is_virtual()
+
+    def set_virtual_thresholds(self, line_length: int, line_count: int) -> None:
+        """设置切换到虚拟化视图的阈值
+
+        阈值属于共享文档，在载入和编辑时检查，已切换的文档在重新载入前
+        保持虚拟化视图。
+
+        Args:
+            line_length: 任一行超过该字符数时切换
+            line_count: 总行数超过该值时切换
+        """
+        self._document.set_virtual_thresholds(line_length, line_count)
+
+    def _on_virtual_entered(self, keep_cursor: bool) -> None:
+        """共享文档切换到虚拟化视图，或在虚拟化视图下被整体替换
+
+        Args:
+            keep_cursor: 是否保留当前光标位置，否则移到文档开头
+        """
+        self.clear_extra_cursors()
+        if self._virtual_view.isHidden():
+            focused = self._text_edit.hasFocus()
+            self._text_edit.hide()
+            self._virtual_view.show()
+            self.setFocusProxy(self._virtual_view)
+            if focused:
+                self._virtual_view.setFocus()
+        self._virtual_view.set_read_only(self._document.is_loading())
+        self._virtual_view.set_longest_line(self._document.longest_line())
+        self._virtual_view.reset(self._cursor_position if keep_cursor else None)
+
+    def _on_virtual_left(self) -> None:
+        """共享文档在载入新内容前切换回普通视图"""
+        focused = self._virtual_view.hasFocus()
+        self._virtual_view.hide()
+        self._text_edit.show()
+        self.setFocusProxy(self._text_edit)
+        if focused:
+            self._text_edit.setFocus()
+
+    def _on_longest_line_changed(self, longest: int) -> None:
+        """分块载入追加了内容，更新水平滚动范围并重绘"""
+        self._virtual_view.set_longest_line(longest)
+        self._virtual_view.refresh()
+
+    def _on_virtual_edited(self) -> None:
+        """虚拟化视图修改了缓冲区，通知挂接同一文档的视图"""
+        self._document.notify_edited(self)
+
+    def _on_document_edited(self, source: Optional[QWidget]) -> None:
+        """虚拟化视图下缓冲区被修改，其他视图发起的修改需要重绘"""
+        if source is not self:
+            self._virtual_view.refresh()
+        self.contentChanged.emit()
+
+    def _on_virtual_selection_changed(self) -> None:
+        """虚拟化视图的选择变更"""
+        selection = self._virtual_view.selection()
+        if selection is None:
+            self._selection_start = None
+            self._selection_end = None
+        else:
+            self._selection_start, self._selection_end = selection
+        self.selectionChanged.emit()
+
+    def _on_virtual_cursor_position_changed(self, line: int, column: int) -> None:
+        """虚拟化视图的光标位置变更"""
+        self._cursor_position = Position(line, column)
+        self.cursorPositionChanged.emit(line, column)
 
     # 公共接口
     def setPlainText(self, text: str) -> None:
         """设置文本内容"""
-        self._text_edit.setPlainText(text)
+        self._document.load_text(text)
 
     def clear(self) -> None:
         """清空内容"""
+        if self._document.is_virtual():
+            self._virtual_view.select_all()
+            self._virtual_view.remove_selected_text()
+            return
         self._text_edit.clear()
 
+    @property
+    def highlighter(self) -> Optional[IncrementalHighlighter]:
+        """语法高亮器，未设置词法分析器时为 None"""
+        return self._document.highlighter
+
+    def set_lexer(self, lexer: Optional[RegexLexer]) -> None:
+        """设置语法高亮使用的词法分析器，对挂接同一文档的所有视图生效
+
+        Args:
+            lexer: 词法分析器，为 None 时关闭语法高亮
+        """
+        self._document.set_lexer(lexer)
+
+    @property
+    def folding(self) -> FoldingModel:
+        """代码折叠模型，由挂接同一文档的视图共用"""
+        return self._document.folding
+
+    def fold(self, line: int) -> bool:
+        """折叠从指定行开始的区域，该行不是区域起始行时折叠包含它的最内层区域"""
+        folding = self._document.folding
+        if folding.region(line) is None:
+            region = folding.enclosing_region(line)
+            if region is None:
+                return False
+            line = region[0]
+        return folding.fold(line)
+
+    def unfold(self, line: int) -> bool:
+        """展开从指定行开始的已折叠区域"""
+        return self._document.folding.unfold(line)
+
+    def toggle_fold(self, line: int) -> bool:
+        """切换指定行所在区域的折叠状态"""
+        return self._document.folding.toggle(line)
+
+    def fold_all(self) -> int:
+        """折叠所有区域"""
+        return self._document.folding.fold_all()
+
+    def unfold_all(self) -> int:
+        """展开所有已折叠的区域"""
+        return self._document.folding.unfold_all()
+
+    def folded_regions(self) -> List[FoldRegion]:
+        """当前已折叠的区域"""
+        return self._document.folding.folded_regions()
+
+    def _fold_current(self) -> None:
+        """折叠光标所在行的区域"""
+        self.fold(self._text_edit.textCursor().blockNumber())
+
+    def _unfold_current(self) -> None:
+        """展开光标所在行的已折叠区域"""
+        self.unfold(self._text_edit.textCursor().blockNumber())
+
+    # 装饰
+    def set_decorations(self, owner: str, decorations: Iterable[Decoration]) -> None:
+        """整体替换某个来源的装饰，共享同一文档的视图都会更新
+
+        Args:
+            owner: 来源名称，如插件名称
+            decorations: 新的装饰，偏移基于缓冲区的当前内容
+        """
+        self._document.set_decorations(owner, decorations)
+
+    def clear_decorations(self, owner: Optional[str] = None) -> None:
+        """移除某个来源的装饰，owner 为 None 时移除全部"""
+        self._document.clear_decorations(owner)
+
+    def set_decoration_format(
+        self, owner: str, char_format: Optional[QTextCharFormat]
+    ) -> None:
+        """设置某个来源的装饰在本视图中的显示格式
+
+        只有设置了格式的来源会被绘制，未设置格式的装饰（如书签）
+        可通过 visible_decorations 查询后自行绘制。
+
+        Args:
+            owner: 来源名称
+            char_format: 显示格式，为 None 时不再绘制该来源
+        """
+        if char_format is None:
+            self._decoration_formats.pop(owner, None)
+        else:
+            self._decoration_formats[owner] = char_format
+        self._schedule_decorations()
+
+    def visible_decorations(
+        self, owner: Optional[str] = None
+    ) -> Dict[str, List[Decoration]]:
+        """与可见行相交的装饰
+
+        Args:
+            owner: 只查询该来源，为 None 时查询全部来源
+
+        Returns:
+            Dict[str, List[Decoration]]: 来源到按起始偏移排序的装饰列表
+        """
+        if self._document.is_virtual():
+            return {}
+        start, end = self._visible_range()
+        return self._document.decorations.query(start, end, owner)
+
+    def _visible_range(self) -> Tuple[int, int]:
+        """可见行在缓冲区中的起止偏移"""
+        first = self._text_edit.firstVisibleBlock()
+        bottom = QPoint(0, max(0, self._text_edit.viewport().height() - 1))
+        last = self._text_edit.cursorForPosition(bottom).block()
+        return (
+            self._document.from_document_offset(first.position()),
+            self._document.from_document_offset(last.position() + last.length() - 1),
+        )
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        """尺寸变化后可见行可能增加，刷新装饰"""
+        super().resizeEvent(event)
+        self._schedule_decorations()
+
+    def _schedule_decorations(self) -> None:
+        """在事件循环中刷新可见范围内的装饰"""
+        if (
+            self._decoration_formats
+            or self._text_edit.extraSelections()
+            or self.has_extra_cursors()
+        ):
+            self._decoration_timer.start()
+
+    def _refresh_decorations(self) -> None:
+        """按可见范围重新生成带格式的装饰"""
+        selections: List[QTextEdit.ExtraSelection] = []
+        if self._decoration_formats and not self._document.is_virtual():
+            length = self._document.buffer.get_length()
+            start, end = self._visible_range()
+            for owner, char_format in self._decoration_formats.items():
+                found = self._document.decorations.query(start, end, owner)
+                for decoration in found.get(owner, ()):
+                    selection = QTextEdit.ExtraSelection()
+                    # 装饰的偏移基于缓冲区，经文档换算为文本框的位置
+                    selection.cursor = self._text_cursor(
+                        Cursor(min(decoration.start, length), min(decoration.end, length))
+                    )
+                    selection.format = char_format
+                    selections.append(selection)
+        if self.has_extra_cursors() and not self._document.is_virtual():
+            # 主光标的选中内容由文本框自身绘制
+            primary = self._multi_cursor.primary()
+            selected = QTextCharFormat()
+            selected.setBackground(QColor(_SELECTION_COLOR))
+            for cursor in self._multi_cursor.cursors():
+                if cursor == primary or not cursor.has_selection():
+                    continue
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = self._text_cursor(cursor)
+                selection.format = selected
+                selections.append(selection)
+        self._text_edit.setExtraSelections(selections)
+
+    # 自动补全
+    def set_completion_engine(self, engine: Optional[CompletionEngine]) -> None:
+        """设置补全引擎，同一引擎可以由多个编辑器共用
+
+        Args:
+            engine: 补全引擎，为 None 时关闭自动补全
+        """
+        if self._completion is not None:
+            self._hide_completion()
+            self._completion.completionsReady.disconnect(self._on_completions_ready)
+        self._completion = engine
+        if engine is not None:
+            engine.completionsReady.connect(self._on_completions_ready)
+
+    def trigger_completion(self) -> None:
+        """在光标处显式发起补全，光标前没有单词时列出全部候选"""
+        self._request_completion(True)
+
+    def is_completion_visible(self) -> bool:
+        """补全列表是否正在显示"""
+        return self._completion_popup.isVisible()
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """在文本框处理之前处理补全和多光标相关的按键与鼠标事件"""
+        if watched is self._text_edit:
+            if isinstance(event, QKeyEvent) and event.type() == QEvent.KeyPress:
+                if self.has_extra_cursors():
+                    if self._multi_cursor_key(event):
+                        return True
+                elif self._completion_key(event):
+                    return True
+            if event.type() == QEvent.FocusOut:
+                self._hide_completion()
+        elif (
+            isinstance(event, QMouseEvent) and event.type() == QEvent.MouseButtonPress
+        ):
+            self._hide_completion()
+            if self._multi_cursor_click(event):
+                return True
+        elif event.type() == QEvent.Resize:
+            self._cursor_overlay.setGeometry(self._text_edit.viewport().geometry())
+        return super().eventFilter(watched, event)
+
+    def _completion_key(self, event: QKeyEvent) -> bool:
+        """处理一次按键
+
+        补全列表显示时方向键、翻页键、回车、Tab 和 Esc 由列表使用；
+        输入单词字符或在列表显示时退格，会在文本变更后重新请求补全；
+        其他按键关闭列表并取消进行中的请求。
+
+        Returns:
+            bool: 按键是否已被使用，不再交给文本框
+        """
+        if self._completion is None:
+            return False
+        popup = self._completion_popup
+        key = event.key()
+        if popup.isVisible():
+            if key in (Qt.Key_Up, Qt.Key_Down):
+                popup.move_selection(-1 if key == Qt.Key_Up else 1)
+                return True
+            if key in (Qt.Key_PageUp, Qt.Key_PageDown):
+                rows = popup.page_rows()
+                popup.move_selection(-rows if key == Qt.Key_PageUp else rows)
+                return True
+            if key in (Qt.Key_Return, Qt.Key_Enter, Qt.Key_Tab):
+                item = popup.current_item()
+                if item is not None:
+                    self._accept_completion(item)
+                    return True
+            if key == Qt.Key_Escape:
+                self._hide_completion()
+                return True
+        modifiers = event.modifiers()
+        if key == Qt.Key_Space and modifiers & Qt.ControlModifier:
+            self.trigger_completion()
+            return True
+        if key in _MODIFIER_KEYS:
+            return False
+        text = event.text()
+        typing = not modifiers & (Qt.ControlModifier | Qt.AltModifier)
+        if typing and len(text) == 1 and (text.isalnum() or text == "_"):
+            self._completion_pending = True
+        elif key == Qt.Key_Backspace and popup.isVisible():
+            self._completion_pending = True
+        else:
+            self._hide_completion()
+        return False
+
+    def _request_completion(self, explicit: bool) -> None:
+        """以光标前的单词为前缀发起补全请求
+
+        Args:
+            explicit: 是否为显式请求，否则光标前没有单词时关闭列表
+        """
+        engine = self._completion
+        if engine is None or self._document.is_virtual():
+            return
+        cursor = self._text_edit.textCursor()
+        # 列号按码点计数，与块文本的下标和缓冲区的位置一致
+        position = self._document.position_at(cursor.position())
+        match = _PREFIX.search(cursor.block().text(), 0, position.column)
+        prefix = match.group() if match else ""
+        if not prefix and not explicit:
+            self._hide_completion()
+            return
+        # 补全起点是文本框中的位置，按 UTF-16 计数
+        self._completion_start = cursor.position() - utf16_length(prefix)
+        self._completion_request = engine.request(
+            self._document.buffer.snapshot(), position, prefix
+        )
+
+    def _on_completions_ready(
+        self, request_id: int, items: List[CompletionItem]
+    ) -> None:
+        """显示本视图当前请求的补全项，其他视图或过期请求的结果被忽略"""
+        if request_id != self._completion_request or self._document.is_virtual():
+            return
+        cursor = self._text_edit.textCursor()
+        if cursor.position() < self._completion_start:
+            self._hide_completion()
+            return
+        cursor.setPosition(self._completion_start)
+        rect = self._text_edit.cursorRect(cursor)
+        anchor = QRect(
+            self._text_edit.viewport().mapToGlobal(rect.topLeft()), rect.size()
+        )
+        self._completion_popup.show_items(items, anchor)
+
+    def _accept_completion(self, item: CompletionItem) -> None:
+        """用补全项替换光标前的单词"""
+        self._hide_completion()
+        cursor = self._text_edit.textCursor()
+        cursor.setPosition(self._completion_start, QTextCursor.KeepAnchor)
+        text = item.insert_text if item.insert_text is not None else item.label
+        cursor.insertText(text)
+        self._text_edit.setTextCursor(cursor)
+
+    def _hide_completion(self) -> None:
+        """关闭补全列表并取消本视图进行中的请求"""
+        self._completion_pending = False
+        self._completion_popup.hide()
+        if self._completion_request and self._completion is not None:
+            self._completion.cancel(self._completion_request)
+        self._completion_request = 0
+
+    # 多光标
+    def transaction(self) -> ContextManager[TextTransaction]:
+        """收集一组编辑，退出 with 语句时一次性应用
+
+        所有编辑只记录为一个撤销步骤，只触发一次 contentChanged，
+        位置基于事务开始时的内容。
+        """
+        return self._document.transaction()
+
+    def has_extra_cursors(self) -> bool:
+        """是否处于多光标模式"""
+        return len(self._multi_cursor) > 1
+
+    def cursors(self) -> List[Cursor]:
+        """按起始偏移排序的全部光标，不在多光标模式时只有文本框自身的光标"""
+        if self.has_extra_cursors():
+            return self._multi_cursor.cursors()
+        if self._document.is_virtual():
+            offset = self._document.buffer.position_to_offset(self._cursor_position)
+            return [Cursor(offset, offset)]
+        return [self._current_cursor()]
+
+    def add_cursor(self, position: Position) -> None:
+        """在指定位置加入光标并进入多光标模式，新光标成为主光标
+
+        虚拟化视图不支持多光标。
+        """
+        if self._begin_multi_cursor():
+            offset = self._document.buffer.position_to_offset(position)
+            self._multi_cursor.add(offset)
+            self._show_extra_cursors()
+
+    def add_cursor_above(self) -> None:
+        """在最上方光标的上一行加入光标"""
+        if self._begin_multi_cursor():
+            self._multi_cursor.add_vertical(-1)
+            self._show_extra_cursors()
+
+    def add_cursor_below(self) -> None:
+        """在最下方光标的下一行加入光标"""
+        if self._begin_multi_cursor():
+            self._multi_cursor.add_vertical(1)
+            self._show_extra_cursors()
+
+    def clear_extra_cursors(self) -> None:
+        """退出多光标模式，只保留文本框自身的光标"""
+        if not len(self._multi_cursor):
+            return
+        self._multi_cursor.clear()
+        self._cursor_overlay.hide()
+        self._schedule_decorations()
+
+    def _begin_multi_cursor(self) -> bool:
+        """以文本框的当前光标作为第一个光标，返回是否可以使用多光标"""
+        if self._document.is_virtual():
+            return False
+        if not len(self._multi_cursor):
+            self._multi_cursor.set_cursors([self._current_cursor()])
+        return True
+
+    def _current_cursor(self) -> Cursor:
+        """文本框的光标，位置换算为缓冲区偏移"""
+        cursor = self._text_edit.textCursor()
+        return Cursor(
+            self._document.from_document_offset(cursor.anchor()),
+            self._document.from_document_offset(cursor.position()),
+        )
+
+    def _text_cursor(self, cursor: Cursor) -> QTextCursor:
+        """按缓冲区偏移表示的光标创建文本框的光标
+
+        多光标按缓冲区的码点偏移记录，文本框按 UTF-16 计数，需经文档换算。
+        """
+        text_cursor = QTextCursor(self._text_edit.document())
+        text_cursor.setPosition(self._document.to_document_offset(cursor.anchor))
+        text_cursor.setPosition(
+            self._document.to_document_offset(cursor.position), QTextCursor.KeepAnchor
+        )
+        return text_cursor
+
+    def _show_extra_cursors(self) -> None:
+        """文本框的光标移到主光标并重绘附加光标，光标合并为一个时退出多光标模式"""
+        primary = self._multi_cursor.primary()
+        if primary is not None:
+            self._text_edit.setTextCursor(self._text_cursor(primary))
+        if len(self._multi_cursor) > 1:
+            self._cursor_overlay.setGeometry(self._text_edit.viewport().geometry())
+            self._cursor_overlay.show()
+            self._cursor_overlay.update()
+        else:
+            self._multi_cursor.clear()
+            self._cursor_overlay.hide()
+        self._schedule_decorations()
+
+    def _update_cursor_overlay(self) -> None:
+        """滚动或内容变化后重绘附加光标"""
+        if self._cursor_overlay.isVisible():
+            if self.has_extra_cursors():
+                self._cursor_overlay.update()
+            else:
+                self.clear_extra_cursors()
+
+    def _extra_cursor_rects(self) -> List[QRect]:
+        """可见范围内附加光标的矩形（视口坐标）"""
+        rects: List[QRect] = []
+        if not self.has_extra_cursors() or self._document.is_virtual():
+            return rects
+        start, end = self._visible_range()
+        primary = self._multi_cursor.primary()
+        for cursor in self._multi_cursor.cursors():
+            if cursor == primary or not start <= cursor.position <= end:
+                continue
+            text_cursor = self._text_cursor(Cursor(cursor.position, cursor.position))
+            rects.append(self._text_edit.cursorRect(text_cursor))
+        return rects
+
+    def _multi_cursor_click(self, event: QMouseEvent) -> bool:
+        """Alt+单击加入光标，其他单击退出多光标模式
+
+        Returns:
+            bool: 事件是否已被使用，不再交给文本框
+        """
+        if event.button() == Qt.LeftButton and event.modifiers() & Qt.AltModifier:
+            if self._begin_multi_cursor():
+                point = event.position().toPoint()
+                position = self._text_edit.cursorForPosition(point).position()
+                self._multi_cursor.add(self._document.from_document_offset(position))
+                self._show_extra_cursors()
+                return True
+        self.clear_extra_cursors()
+        return False
+
+    def _multi_cursor_key(self, event: QKeyEvent) -> bool:
+        """多光标模式下在所有光标处执行一次按键
+
+        输入、退格、删除、回车和 Tab 作为一个事务提交；方向键、Home 和 End
+        移动所有光标，按住 Shift 时扩展选择；Esc 退出多光标模式。
+        其他按键（撤销、复制等快捷键）交给文本框处理。
+
+        Returns:
+            bool: 按键是否已被使用，不再交给文本框
+        """
+        multi_cursor = self._multi_cursor
+        key = event.key()
+        modifiers = event.modifiers()
+        select = bool(modifiers & Qt.ShiftModifier)
+        text = event.text()
+        if key == Qt.Key_Escape:
+            self.clear_extra_cursors()
+            return True
+        if key in (Qt.Key_Left, Qt.Key_Right):
+            multi_cursor.move(-1 if key == Qt.Key_Left else 1, select)
+        elif key in (Qt.Key_Up, Qt.Key_Down):
+            multi_cursor.move_lines(-1 if key == Qt.Key_Up else 1, select)
+        elif key in (Qt.Key_Home, Qt.Key_End):
+            multi_cursor.move_to_line_boundary(key == Qt.Key_End, select)
+        elif key == Qt.Key_Backspace:
+            multi_cursor.delete_backward()
+        elif key == Qt.Key_Delete:
+            multi_cursor.delete_forward()
+        elif key in (Qt.Key_Return, Qt.Key_Enter):
+            multi_cursor.insert_text("\n")
+        elif key == Qt.Key_Tab:
+            multi_cursor.insert_text("\t")
+        elif (
+            text
+            and text.isprintable()
+            and not modifiers & (Qt.ControlModifier | Qt.AltModifier)
+        ):
+            multi_cursor.insert_text(text)
+        else:
+            return False
+        self._show_extra_cursors()
+        return True
+
+    @property
+    def buffer(self) -> TextBuffer:
+        """获取文本缓冲区"""
+        return self._document.buffer
+
+    def is_modified(self) -> bool:
+        """内容是否已修改且未保存
+
+        虚拟化视图下由缓冲区的撤销状态号判断，撤销回保存时的状态视为未修改。
+        """
+        return self._document.is_modified()
+
+    def set_modified(self, modified: bool) -> None:
+        """设置修改状态"""
+        self._document.set_modified(modified)
+
+    def apply_external_change(self, text: str) -> int:
+        """把外部修改后的内容以差异方式应用到编辑器
+
+        只替换变化的行，光标、折叠和撤销历史都得以保留，
+        整个变更作为一个撤销步骤。应用前未修改时，应用后仍视为未修改。
+
+        Args:
+            text: 新内容，换行符应已统一为 \n
+
+        Returns:
+            int: 应用的差异块数量
+        """
+        return self._document.apply_external_change(text)
+
     @property
     def content(self) -> str:
         """获取编辑器内容"""
-        return self._buffer.get_content()
+        return self._document.buffer.get_content()
 
     @content.setter
     def content(self, text: str) -> None:
         """设置编辑器内容"""
-        self._text_edit.setPlainText(text)
+        self._document.load_text(text)
 
     def get_cursor_position(self) -> Position:
         """获取光标位置"""
@@ -137,15 +938,28 @@ class Editor(QWidget):
 
     def set_cursor_position(self, position: Position) -> None:
         """设置光标位置"""
+        if self._document.is_virtual():
+            self._virtual_view.set_cursor_position(position)
+            return
         cursor = self._text_edit.textCursor()
-        cursor.movePosition(QTextCursor.Start)
-        for _ in range(position.line):
-            cursor.movePosition(QTextCursor.NextBlock)
-        cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor, position.column)
+        cursor.setPosition(self._document.document_position(position))
         self._text_edit.setTextCursor(cursor)
 
+    def scroll_position(self) -> Tuple[int, int]:
+        """获取垂直和水平滚动条的值"""
+        view = self._virtual_view if self._document.is_virtual() else self._text_edit
+        return view.verticalScrollBar().value(), view.horizontalScrollBar().value()
+
+    def set_scroll_position(self, vertical: int, horizontal: int) -> None:
+        """设置垂直和水平滚动条的值，超出范围时取边界值"""
+        view = self._virtual_view if self._document.is_virtual() else self._text_edit
+        view.verticalScrollBar().setValue(vertical)
+        view.horizontalScrollBar().setValue(horizontal)
+
     def has_selection(self) -> bool:
         """是否有选中内容"""
+        if self._document.is_virtual():
+            return self._virtual_view.has_selection()
         return self._text_edit.textCursor().hasSelection()
 
     def get_selection(self) -> Optional[Tuple[Position, Position]]:
@@ -158,16 +972,25 @@ class Editor(QWidget):
 
     def clear_selection(self) -> None:
         """清除选中区域"""
+        if self._document.is_virtual():
+            self._virtual_view.clear_selection()
+            return
         cursor = self._text_edit.textCursor()
         cursor.clearSelection()
         self._text_edit.setTextCursor(cursor)
 
     def insert_text(self, text: str) -> None:
         """插入文本"""
+        if self._document.is_virtual():
+            self._virtual_view.insert_text(text)
+            return
         self._text_edit.insertPlainText(text)
 
     def delete_at_cursor(self) -> None:
         """在光标位置删除字符"""
+        if self._document.is_virtual():
+            self._virtual_view.delete_previous_char()
+            return
         cursor = self._text_edit.textCursor()
         cursor.deletePreviousChar()
 
@@ -175,18 +998,36 @@ class Editor(QWidget):
         """删除选中内容"""
         if not self.has_selection():
             return
+        if self._document.is_virtual():
+            self._virtual_view.remove_selected_text()
+            return
         selection = self.get_selection()
         if selection is None:
             return
-        start, end = selection
-        self._buffer.delete(start, end)
+        # 缓冲区由文档变更信号同步，这里只需操作文档
         cursor = self._text_edit.textCursor()
         cursor.removeSelectedText()
 
+    def apply_edits(self, edits: Sequence[Tuple[int, int, str]]) -> None:
+        """批量替换多个互不重叠的范围
+
+        文档和缓冲区各记录为一个撤销步骤，只触发一次内容变更。
+
+        Args:
+            edits: (起始偏移, 结束偏移, 新文本) 列表，偏移基于修改前的内容
+        """
+        self._document.apply_edits(edits)
+
     def undo(self) -> None:
         """撤销操作"""
+        if self._document.is_virtual():
+            self._virtual_view.undo()
+            return
         self._text_edit.undo()
 
     def redo(self) -> None:
         """重做操作"""
+        if self._document.is_virtual():
+            self._virtual_view.redo()
+            return
         self._text_edit.redo()
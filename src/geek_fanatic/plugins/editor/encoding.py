@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件编码检测与流式解码模块
+
+打开文件时根据 BOM 和第一块数据推测编码，之后用同一个增量解码器
+逐块解码，每个字节只解码一次。解码时统一换行符为 \\n，
+并记录原文件的编码、BOM 和换行符风格，保存时据此还原。
+"""
+
+import codecs
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, Optional, Tuple
+
+# 按顺序匹配的 BOM，UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 开头，需要先匹配
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# 无 BOM 的 UTF-16 文本中，ASCII 字符的高字节为 0，
+# 某一奇偶位置上 0 字节的比例超过该值时判定为 UTF-16
+UTF16_ZERO_RATIO = 0.4
+
+# GB18030 解码结果的非 ASCII 字符中，中日韩字符和全角标点的比例
+# 达到该值时采用 GB18030，否则视为 Latin-1
+GB18030_CJK_RATIO = 0.6
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+class LineEnding(str, Enum):
+    """换行符风格"""
+
+    LF = "\n"
+    CRLF = "\r\n"
+    CR = "\r"
+
+
+@dataclass(frozen=True)
+class FileFormat:
+    """文件的编码、BOM 和换行符风格
+
+    缓冲区内的文本不含 BOM，换行符统一为 \\n，保存时按此格式还原。
+
+    Attributes:
+        encoding: Python 编解码器名称
+        bom: 文件开头是否有 BOM
+        line_ending: 换行符风格
+        lossy: 载入时有不符合该编码的字节被替换为 U+FFFD，
+            按原编码保存会丢失这些字节
+    """
+
+    encoding: str = "utf-8"
+    bom: bool = False
+    line_ending: LineEnding = LineEnding.LF
+    lossy: bool = False
+
+    def encode_chunks(self, chunks: Iterator[str]) -> Iterator[str]:
+        """把缓冲区的文本块转换为写入文件的文本块
+
+        补回 BOM 并还原换行符，编码仍由保存时的增量编码器完成。
+
+        Args:
+            chunks: 缓冲区按顺序产生的文本块
+
+        Returns:
+            Iterator[str]: 按文件格式转换后的文本块
+        """
+        if self.bom:
+            # U+FEFF 按目标编码编码后即为该编码的 BOM
+            yield "\ufeff"
+        line_ending = self.line_ending.value
+        for chunk in chunks:
+            if line_ending != "\n":
+                chunk = chunk.replace("\n", line_ending)
+            yield chunk
+
+
+def _try_decode(data: bytes, encoding: str, final: bool) -> Optional[str]:
+    """严格解码，失败时返回 None
+
+    非最终数据末尾被截断的多字节序列由增量解码器保留，不视为错误。
+    """
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(data, final)
+    except UnicodeDecodeError:
+        return None
+
+
+def _guess_utf16(sample: bytes) -> Optional[str]:
+    """根据 0 字节的奇偶分布推测无 BOM 的 UTF-16 字节序"""
+    half = len(sample) // 2
+    if half < 2:
+        return None
+    even_zeros = sample[0::2].count(0)
+    odd_zeros = sample[1::2].count(0)
+    threshold = half * UTF16_ZERO_RATIO
+    if odd_zeros > threshold and even_zeros < half * 0.05:
+        return "utf-16-le"
+    if even_zeros > threshold and odd_zeros < half * 0.05:
+        return "utf-16-be"
+    return None
+
+
+def detect_encoding(sample: bytes, final: bool = False) -> Tuple[str, int]:
+    """根据文件开头的数据推测编码
+
+    依次检查 BOM、无 BOM 的 UTF-16、UTF-8 和 GB18030，
+    都不符合时退回 Latin-1，后者可以无损表示任意字节。
+
+    Args:
+        sample: 文件开头的数据
+        final: 数据是否已到文件末尾
+
+    Returns:
+        Tuple[str, int]: 编码名称和 BOM 的字节数
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+
+    utf16 = _guess_utf16(sample)
+    if utf16 is not None and _try_decode(sample, utf16, final) is not None:
+        return utf16, 0
+    return _detect_ascii_compatible(sample, final), 0
+
+
+def _detect_ascii_compatible(sample: bytes, final: bool) -> str:
+    """在兼容 ASCII 的 UTF-8、GB18030 和 Latin-1 中推测编码"""
+    if _try_decode(sample, "utf-8", final) is not None:
+        return "utf-8"
+    text = _try_decode(sample, "gb18030", final)
+    if text is not None:
+        non_ascii = len(_NON_ASCII.findall(text))
+        if len(_CJK.findall(text)) >= non_ascii * GB18030_CJK_RATIO:
+            return "gb18030"
+    return "latin-1"
+
+
+class StreamDecoder:
+    """流式解码器
+
+    收到第一块数据时检测编码，之后用同一个增量解码器逐块解码。
+    第一块只含 ASCII 时暂按 UTF-8 解码，遇到第一块含非 ASCII 字节的数据时
+    再检测一次：此前的内容在所有兼容 ASCII 的编码下都相同，无需重新解码。
+    之后的块含有不符合该编码的字节时，此前的内容已经交出，无法换用编码重新解码，
+    改为把这些字节替换为 U+FFFD 并在文件格式中标记为有损。
+    """
+
+    def __init__(self, encoding: Optional[str] = None) -> None:
+        """初始化解码器
+
+        Args:
+            encoding: 指定的编码，为 None 时自动检测
+        """
+        self._encoding = encoding
+        self._bom = False
+        self._lossy = False  # 是否有字节被替换为 U+FFFD
+        self._provisional = False  # 是否暂按 UTF-8 解码纯 ASCII 的内容
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        if encoding is not None:
+            self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._pending_cr = ""  # 上一块末尾的 \r，可能与下一块开头的 \n 组成 \r\n
+        self._line_endings = {ending: 0 for ending in LineEnding}
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """当前使用的编码，尚未收到数据时为 None"""
+        return self._encoding
+
+    def file_format(self) -> FileFormat:
+        """已解码内容的文件格式，换行符风格取出现次数最多的一种"""
+        counts = self._line_endings
+        # 出现次数相同时优先 \n
+        line_ending = max(
+            LineEnding, key=lambda ending: (counts[ending], ending == LineEnding.LF)
+        )
+        return FileFormat(
+            self._encoding or "utf-8", self._bom, line_ending, self._lossy
+        )
+
+    def decode(self, data: bytes, final: bool = False) -> str:
+        """解码一块数据
+
+        Args:
+            data: 原始字节
+            final: 是否为最后一块
+
+        Returns:
+            str: 解码并统一换行符后的文本，不符合编码的字节替换为 U+FFFD
+        """
+        if self._decoder is None:
+            encoding, bom_length = detect_encoding(data, final)
+            self._encoding = encoding
+            self._bom = bom_length > 0
+            self._provisional = encoding == "utf-8" and data.isascii()
+            self._decoder = codecs.getincrementaldecoder(encoding)()
+            data = data[bom_length:]
+        elif self._provisional and not data.isascii():
+            # 此前只有 ASCII，解码器没有未完成的状态，直接换用新检测的编码
+            self._provisional = False
+            self._encoding = _detect_ascii_compatible(data, final)
+            self._decoder = codecs.getincrementaldecoder(self._encoding)()
+        decoder = self._decoder
+        state = decoder.getstate()
+        try:
+            text = decoder.decode(data, final)
+        except UnicodeDecodeError:
+            # 从出错前的状态起改用替换模式的解码器重新解码这一块
+            self._lossy = True
+            decoder = codecs.getincrementaldecoder(self._encoding or "utf-8")("replace")
+            decoder.setstate(state)
+            self._decoder = decoder
+            text = decoder.decode(data, final)
+        return self._translate_newlines(text, final)
+
+    def _translate_newlines(self, text: str, final: bool) -> str:
+        """统计换行符风格并统一为 \\n"""
+        text = self._pending_cr + text
+        self._pending_cr = ""
+        if text.endswith("\r") and not final:
+            self._pending_cr = "\r"
+            text = text[:-1]
+        crlf = text.count("\r\n")
+        cr = text.count("\r") - crlf
+        self._line_endings[LineEnding.CRLF] += crlf
+        self._line_endings[LineEnding.CR] += cr
+        self._line_endings[LineEnding.LF] += text.count("\n") - crlf
+        if crlf or cr:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
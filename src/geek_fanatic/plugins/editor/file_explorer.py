@@ -54,6 +54,7 @@ class FileExplorer(QWidget):
         # 创建文件系统模型
         self._model = QFileSystemModel()
         current_path = QDir.currentPath()
+        self._root_path = current_path
         print(f"设置根路径: {current_path}")
         self._model.setRootPath(current_path)
         
@@ -117,9 +118,18 @@ class FileExplorer(QWidget):
         Args:
             path: 根路径
         """
+        self._root_path = path
         self._model.setRootPath(path)
         self._tree.setRootIndex(self._model.index(path))
 
+    def root_path(self) -> str:
+        """获取根路径
+
+        Returns:
+            str: 当前显示的根目录
+        """
+        return self._root_path
+
     def get_selected_path(self) -> Optional[str]:
         """获取选中的文件路径
         
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步文件加载模块
+
+在线程池中分块读取并解码文件，界面线程按时间片把解码结果追加到
+编辑器文档中，加载过程中界面保持响应，并且可以随时取消。
+未指定编码时根据第一块数据检测，检测到的编码和换行符风格记录在缓冲区上。
+"""
+
+import os
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .editor import Editor
+from .encoding import FileFormat, StreamDecoder
+
+# 每次读取的字节数
+LOAD_CHUNK_SIZE = 256 * 1024
+
+# 每个时间片内向文档追加文本的最长耗时（毫秒）
+LOAD_TIME_SLICE_MS = 12
+
+
+class _ReadTaskSignals(QObject):
+    """读取任务信号"""
+
+    chunkDecoded = Signal(str, int)  # 解码后的文本, 已读取字节数
+    finished = Signal(object)  # 检测到的文件格式
+    failed = Signal(str)  # 错误信息
+
+
+class _FileReadTask(QRunnable):
+    """后台读取任务
+
+    分块读取文件，使用流式解码器检测编码、解码并统一换行符。
+    """
+
+    def __init__(self, file_path: str, encoding: Optional[str]) -> None:
+        """初始化读取任务
+
+        Args:
+            file_path: 文件路径
+            encoding: 文件编码，为 None 时自动检测
+        """
+        super().__init__()
+        self.signals = _ReadTaskSignals()
+        self._file_path = file_path
+        self._encoding = encoding
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消读取"""
+        self._cancelled = True
+
+    def run(self) -> None:
+        """执行读取"""
+        decoder = StreamDecoder(self._encoding)
+        read_bytes = 0
+        try:
+            with open(self._file_path, "rb") as f:
+                while not self._cancelled:
+                    data = f.read(LOAD_CHUNK_SIZE)
+                    read_bytes += len(data)
+                    text = decoder.decode(data, final=not data)
+                    if text:
+                        self.signals.chunkDecoded.emit(text, read_bytes)
+                    if not data:
+                        break
+        except (OSError, UnicodeDecodeError) as e:
+            self.signals.failed.emit(str(e))
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(decoder.file_format())
+
+
+class FileLoader(QObject):
+    """编辑器文件加载器
+
+    读取在线程池中进行，解码后的文本块先进入队列，
+    再由定时器按时间片追加到编辑器中。
+    """
+
+    # 信号定义
+    progressChanged = Signal(int)  # 加载进度百分比
+    finished = Signal()  # 加载完成
+    failed = Signal(str)  # 加载失败，参数为错误信息
+
+    def __init__(
+        self,
+        editor: Editor,
+        file_path: str,
+        encoding: Optional[str] = None,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化加载器
+
+        Args:
+            editor: 目标编辑器
+            file_path: 文件路径
+            encoding: 文件编码，为 None 时自动检测
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._editor = editor
+        self._file_path = file_path
+        self._encoding = encoding
+        self._total_bytes = 0
+        self._pending: Deque[Tuple[str, int]] = deque()  # 待追加的文本块及其读取进度
+        self._read_finished = False
+        self._file_format: Optional[FileFormat] = None  # 读取完成后检测到的文件格式
+        self._task: Optional[_FileReadTask] = None
+        self._loading = False
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._append_pending)
+
+    @property
+    def file_path(self) -> str:
+        """文件路径"""
+        return self._file_path
+
+    @property
+    def file_format(self) -> Optional[FileFormat]:
+        """检测到的文件格式，读取完成前为 None"""
+        return self._file_format
+
+    def is_loading(self) -> bool:
+        """是否正在加载"""
+        return self._loading
+
+    def start(self) -> None:
+        """开始加载"""
+        try:
+            self._total_bytes = os.path.getsize(self._file_path)
+        except OSError as e:
+            self.failed.emit(str(e))
+            return
+
+        self._loading = True
+        self._editor.begin_loading()
+        self._task = _FileReadTask(self._file_path, self._encoding)
+        self._task.signals.chunkDecoded.connect(self._on_chunk_decoded)
+        self._task.signals.finished.connect(self._on_read_finished)
+        self._task.signals.failed.connect(self._on_read_failed)
+        QThreadPool.globalInstance().start(self._task)
+
+    def cancel(self) -> None:
+        """取消加载"""
+        if not self._loading:
+            return
+        self._loading = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._timer.stop()
+        self._pending.clear()
+
+    def _on_chunk_decoded(self, text: str, read_bytes: int) -> None:
+        """接收解码后的文本块"""
+        if not self._loading:
+            return
+        self._pending.append((text, read_bytes))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _on_read_finished(self, file_format: FileFormat) -> None:
+        """读取完成"""
+        self._read_finished = True
+        self._file_format = file_format
+        self._task = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _on_read_failed(self, message: str) -> None:
+        """读取失败"""
+        self.cancel()
+        self.failed.emit(message)
+
+    def _append_pending(self) -> None:
+        """在一个时间片内尽量多地追加文本块"""
+        if not self._loading:
+            self._timer.stop()
+            return
+
+        deadline = time.perf_counter() + LOAD_TIME_SLICE_MS / 1000
+        appended_bytes = -1
+        while self._pending and time.perf_counter() < deadline:
+            text, appended_bytes = self._pending.popleft()
+            self._editor.append_loaded_text(text)
+
+        if appended_bytes >= 0 and self._total_bytes:
+            self.progressChanged.emit(appended_bytes * 100 // self._total_bytes)
+
+        if not self._pending:
+            self._timer.stop()
+            if self._read_finished:
+                self._loading = False
+                if self._file_format is not None:
+                    self._editor.buffer.set_file_format(self._file_format)
+                self._editor.finish_loading()
+                self.finished.emit()
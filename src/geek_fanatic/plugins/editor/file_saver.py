@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件保存模块
+
+保存在线程池中进行：内容分块编码写入同目录下的临时文件，
+按配置的策略同步到磁盘后原子替换目标文件，界面线程从不等待磁盘。
+"""
+
+import codecs
+import os
+import shutil
+import tempfile
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# 每次编码写入的字符数
+SAVE_CHUNK_SIZE = 1024 * 1024
+
+# 保存线程池的最大线程数
+SAVE_MAX_THREADS = 4
+
+# 新建文件的默认权限，与 open() 创建文件时相同
+NEW_FILE_MODE = 0o666
+
+
+def _read_umask() -> int:
+    """读取进程的 umask
+
+    os.umask 只能在设置的同时读取，在线程池中调用会与其他线程竞争，
+    因此只在模块加载时读取一次。
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+class FsyncPolicy(str, Enum):
+    """磁盘同步策略"""
+
+    NONE = "none"  # 不主动同步，交给操作系统
+    FILE = "file"  # 替换前同步临时文件
+    FULL = "full"  # 同步临时文件，并在替换后同步所在目录
+
+
+def write_atomic(
+    file_path: str,
+    chunks: Iterator[str],
+    encoding: str = "utf-8",
+    fsync_policy: FsyncPolicy = FsyncPolicy.FILE,
+) -> None:
+    """原子写入文件
+
+    先写入同目录下的临时文件，成功后再替换目标文件，
+    写入过程中出错不会破坏原文件。目标为符号链接时替换链接指向的文件，
+    链接本身保持不变；新建的文件按 umask 设置权限，已有文件保留原权限。
+
+    Args:
+        file_path: 目标文件路径
+        chunks: 按顺序产生文本块的迭代器
+        encoding: 文件编码
+        fsync_policy: 磁盘同步策略
+
+    Raises:
+        OSError: 写入或替换失败
+        UnicodeEncodeError: 内容无法用指定编码表示
+    """
+    file_path = os.path.realpath(file_path)
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        # 增量编码器保证 BOM 等状态只在文件开头出现一次
+        encoder = codecs.getincrementalencoder(encoding)()
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(encoder.encode(chunk))
+            f.write(encoder.encode("", final=True))
+            f.flush()
+            if fsync_policy != FsyncPolicy.NONE:
+                os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        else:
+            # mkstemp 创建的临时文件只有所有者可读写
+            os.chmod(temp_path, NEW_FILE_MODE & ~_UMASK)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync_policy == FsyncPolicy.FULL and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class _SaveTaskSignals(QObject):
+    """保存任务信号"""
+
+    saved = Signal(str)  # 文件路径
+    failed = Signal(str, str)  # 文件路径, 错误信息
+
+
+class _SaveTask(QRunnable):
+    """后台保存任务"""
+
+    def __init__(
+        self,
+        file_path: str,
+        chunks: Iterator[str],
+        encoding: str,
+        fsync_policy: FsyncPolicy,
+    ) -> None:
+        """初始化保存任务
+
+        Args:
+            file_path: 目标文件路径
+            chunks: 内容迭代器，创建时已固定内容
+            encoding: 文件编码
+            fsync_policy: 磁盘同步策略
+        """
+        super().__init__()
+        self.signals = _SaveTaskSignals()
+        self._file_path = file_path
+        self._chunks = chunks
+        self._encoding = encoding
+        self._fsync_policy = fsync_policy
+
+    def run(self) -> None:
+        """执行保存"""
+        try:
+            write_atomic(
+                self._file_path, self._chunks, self._encoding, self._fsync_policy
+            )
+        except (OSError, UnicodeEncodeError) as e:
+            self.signals.failed.emit(self._file_path, str(e))
+            return
+        self.signals.saved.emit(self._file_path)
+
+
+class FileSaver(QObject):
+    """后台文件保存器
+
+    不同文件的保存在线程池中并发执行；同一文件在上一次保存完成前
+    再次请求保存时，只保留最新的一次，待前一次完成后写入。
+    """
+
+    # 信号定义
+    saved = Signal(str)  # 保存成功，参数为文件路径
+    failed = Signal(str, str)  # 保存失败，参数为文件路径和错误信息
+
+    def __init__(
+        self,
+        fsync_policy: FsyncPolicy = FsyncPolicy.FILE,
+        max_threads: int = SAVE_MAX_THREADS,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化保存器
+
+        Args:
+            fsync_policy: 磁盘同步策略
+            max_threads: 最大并发保存数
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._fsync_policy = fsync_policy
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._running: Dict[str, _SaveTask] = {}  # 正在保存的文件
+        self._pending: Dict[str, _SaveTask] = {}  # 等待前一次保存完成的请求
+
+    @property
+    def fsync_policy(self) -> FsyncPolicy:
+        """磁盘同步策略"""
+        return self._fsync_policy
+
+    def set_fsync_policy(self, policy: FsyncPolicy) -> None:
+        """设置磁盘同步策略"""
+        self._fsync_policy = policy
+
+    def is_saving(self, file_path: Optional[str] = None) -> bool:
+        """是否有正在进行的保存
+
+        Args:
+            file_path: 指定文件，为 None 时检查所有文件
+        """
+        if file_path is None:
+            return bool(self._running)
+        return file_path in self._running
+
+    def save(
+        self, file_path: str, chunks: Iterator[str], encoding: str = "utf-8"
+    ) -> None:
+        """提交保存请求
+
+        Args:
+            file_path: 目标文件路径
+            chunks: 内容迭代器，应在提交前固定内容（如 TextBuffer.iter_chunks）
+            encoding: 文件编码
+        """
+        task = _SaveTask(file_path, chunks, encoding, self._fsync_policy)
+        task.signals.saved.connect(self._on_task_saved)
+        task.signals.failed.connect(self._on_task_failed)
+        if file_path in self._running:
+            self._pending[file_path] = task
+            return
+        self._start(file_path, task)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """等待所有保存完成，仅用于退出程序等必须同步的场景"""
+        return self._pool.waitForDone(msecs)
+
+    def _start(self, file_path: str, task: _SaveTask) -> None:
+        """启动保存任务"""
+        self._running[file_path] = task
+        self._pool.start(task)
+
+    def _on_task_saved(self, file_path: str) -> None:
+        """保存任务成功"""
+        self._finish(file_path)
+        self.saved.emit(file_path)
+
+    def _on_task_failed(self, file_path: str, message: str) -> None:
+        """保存任务失败"""
+        self._finish(file_path)
+        self.failed.emit(file_path, message)
+
+    def _finish(self, file_path: str) -> None:
+        """结束一次保存，并启动等待中的下一次"""
+        self._running.pop(file_path, None)
+        task = self._pending.pop(file_path, None)
+        if task is not None:
+            self._start(file_path, task)
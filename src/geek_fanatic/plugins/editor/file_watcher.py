@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件监视模块
+
+只监视已打开的文件。短时间内的连续变化事件合并为一次处理，
+变化的文件在线程池中重新读取和解码，结果按批次交给界面线程，
+切换分支等一次改动大量文件的操作不会引起逐个文件的界面卡顿。
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import (
+    QFileSystemWatcher,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+
+from .encoding import FileFormat, StreamDecoder
+
+# 最后一次变化事件之后等待的时间（毫秒），期间的事件合并处理
+WATCH_DEBOUNCE_MS = 300
+
+# 事件持续不断时，从第一次事件起最长等待的时间（毫秒）
+WATCH_MAX_DELAY_MS = 2000
+
+# 每批交给界面线程的最大文件数和最大字符数
+RELOAD_BATCH_FILES = 32
+RELOAD_BATCH_CHARS = 4 * 1024 * 1024
+
+# 每次读取的字节数
+RELOAD_CHUNK_SIZE = 256 * 1024
+
+# 文件的修改时间（纳秒）和大小，用于跳过内容未变化的文件
+FileStamp = Tuple[int, int]
+
+
+def file_stamp(file_path: str) -> Optional[FileStamp]:
+    """获取文件的修改时间和大小，文件不存在时返回 None"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass(frozen=True)
+class FileChange:
+    """磁盘上变化后的文件内容
+
+    Attributes:
+        path: 文件路径
+        text: 解码并统一换行符后的内容
+        file_format: 检测到的编码、BOM 和换行符风格
+    """
+
+    path: str
+    text: str
+    file_format: FileFormat
+
+
+class _ReloadTaskSignals(QObject):
+    """重新读取任务信号"""
+
+    batchRead = Signal(object)  # (路径, 内容, 文件格式, 文件戳) 列表
+    failed = Signal(str, str)  # 文件路径, 错误信息
+    finished = Signal()
+
+
+class _ReloadTask(QRunnable):
+    """后台重新读取任务
+
+    依次读取变化的文件，修改时间和大小与已知的相同时跳过，
+    读取结果累计到一定数量后作为一批发出。
+    """
+
+    def __init__(self, stamps: Dict[str, Optional[FileStamp]]) -> None:
+        """初始化读取任务
+
+        Args:
+            stamps: 需要读取的文件及其已知的文件戳
+        """
+        super().__init__()
+        self.signals = _ReloadTaskSignals()
+        self._stamps = stamps
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消读取"""
+        self._cancelled = True
+
+    def run(self) -> None:
+        """执行读取"""
+        batch: List[Tuple[str, str, FileFormat, FileStamp]] = []
+        batch_chars = 0
+        for path, known in self._stamps.items():
+            if self._cancelled:
+                return
+            try:
+                result = self._read(path, known)
+            except (OSError, UnicodeDecodeError) as e:
+                self.signals.failed.emit(path, str(e))
+                continue
+            if result is None:
+                continue
+            batch.append(result)
+            batch_chars += len(result[1])
+            if len(batch) >= RELOAD_BATCH_FILES or batch_chars >= RELOAD_BATCH_CHARS:
+                self.signals.batchRead.emit(batch)
+                batch = []
+                batch_chars = 0
+        if batch and not self._cancelled:
+            self.signals.batchRead.emit(batch)
+        if not self._cancelled:
+            self.signals.finished.emit()
+
+    @staticmethod
+    def _read(
+        path: str, known: Optional[FileStamp]
+    ) -> Optional[Tuple[str, str, FileFormat, FileStamp]]:
+        """读取一个文件，文件戳未变化时返回 None"""
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == known:
+                return None
+            decoder = StreamDecoder()
+            parts: List[str] = []
+            while True:
+                data = f.read(RELOAD_CHUNK_SIZE)
+                parts.append(decoder.decode(data, final=not data))
+                if not data:
+                    break
+        return path, "".join(parts), decoder.file_format(), stamp
+
+
+class FileWatcher(QObject):
+    """已打开文件的监视器
+
+    同一时刻只运行一个读取任务，运行期间到达的事件在任务结束后继续处理。
+    以原子替换方式写入的文件会从系统监视中移除，处理事件时重新加入。
+    """
+
+    # 信号定义
+    filesChanged = Signal(object)  # 一批内容变化的文件，参数为 FileChange 列表
+    failed = Signal(str, str)  # 重新读取失败，参数为文件路径和错误信息
+
+    def __init__(
+        self, debounce_ms: int = WATCH_DEBOUNCE_MS, parent: Optional[QObject] = None
+    ) -> None:
+        """初始化监视器
+
+        Args:
+            debounce_ms: 合并变化事件的等待时间（毫秒）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._stamps: Dict[str, Optional[FileStamp]] = {}  # 监视的文件及已知的文件戳
+        self._dirty: Set[str] = set()  # 等待重新读取的文件
+        self._first_event = 0.0  # 本轮第一次事件的时间
+        self._task: Optional[_ReloadTask] = None
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._flush)
+
+    @property
+    def debounce_ms(self) -> int:
+        """合并变化事件的等待时间（毫秒）"""
+        return self._timer.interval()
+
+    def set_debounce(self, debounce_ms: int) -> None:
+        """设置合并变化事件的等待时间（毫秒）"""
+        self._timer.setInterval(debounce_ms)
+
+    def watched(self) -> List[str]:
+        """监视中的文件"""
+        return list(self._stamps)
+
+    def is_watching(self, file_path: str) -> bool:
+        """是否正在监视文件"""
+        return file_path in self._stamps
+
+    def watch(self, file_path: str) -> None:
+        """开始监视文件，以当前的文件戳作为已知内容"""
+        self._stamps[file_path] = file_stamp(file_path)
+        self._watcher.addPath(file_path)
+
+    def unwatch(self, file_path: str) -> None:
+        """停止监视文件"""
+        self._stamps.pop(file_path, None)
+        self._dirty.discard(file_path)
+        self._watcher.removePath(file_path)
+
+    def update_stamp(self, file_path: str) -> None:
+        """记录文件的当前文件戳，用于保存后跳过自身写入引起的事件"""
+        if file_path in self._stamps:
+            self._stamps[file_path] = file_stamp(file_path)
+
+    def cancel(self) -> None:
+        """停止监视所有文件并取消正在进行的读取"""
+        self._timer.stop()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._dirty.clear()
+        self._stamps.clear()
+        files = self._watcher.files()
+        if files:
+            self._watcher.removePaths(files)
+
+    def _on_file_changed(self, file_path: str) -> None:
+        """记录变化的文件并推迟处理"""
+        if file_path not in self._stamps:
+            return
+        now = time.monotonic()
+        if not self._dirty:
+            self._first_event = now
+        self._dirty.add(file_path)
+        # 事件持续不断时不再推迟，避免一直得不到处理
+        if (now - self._first_event) * 1000 < WATCH_MAX_DELAY_MS or (
+            not self._timer.isActive()
+        ):
+            self._timer.start()
+
+    def _flush(self) -> None:
+        """在后台重新读取累计的文件"""
+        # 被删除或替换的文件不再受系统监视，存在时重新加入
+        lost = self._stamps.keys() - set(self._watcher.files())
+        for path in lost:
+            if os.path.exists(path):
+                self._watcher.addPath(path)
+        if self._task is not None or not self._dirty:
+            return
+
+        stamps = {
+            path: self._stamps[path] for path in self._dirty if path in self._stamps
+        }
+        self._dirty.clear()
+        if not stamps:
+            return
+        self._task = _ReloadTask(stamps)
+        task = self._task
+        task.signals.batchRead.connect(lambda batch: self._on_batch_read(task, batch))
+        task.signals.failed.connect(self.failed)
+        task.signals.finished.connect(lambda: self._on_task_finished(task))
+        QThreadPool.globalInstance().start(task)
+
+    def _on_batch_read(
+        self, task: _ReloadTask, batch: List[Tuple[str, str, FileFormat, FileStamp]]
+    ) -> None:
+        """一批文件读取完成"""
+        if task is not self._task:
+            return
+        changes: List[FileChange] = []
+        for path, text, file_format, stamp in batch:
+            if path not in self._stamps:
+                continue
+            self._stamps[path] = stamp
+            changes.append(FileChange(path, text, file_format))
+        if changes:
+            self.filesChanged.emit(changes)
+
+    def _on_task_finished(self, task: _ReloadTask) -> None:
+        """读取任务结束，处理期间到达的事件"""
+        if task is not self._task:
+            return
+        self._task = None
+        if self._dirty and not self._timer.isActive():
+            self._timer.start()
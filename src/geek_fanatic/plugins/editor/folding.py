@@ -0,0 +1,564 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代码折叠模块
+
+每行记录缩进宽度和括号深度信息，存放在紧凑数组中，编辑时只重新测量
+受影响的行并按切片替换。折叠区域在需要时从起始行向后扫描得出，
+代价与区域长度成正比。
+
+折叠和展开直接设置文本块的可见性和行数，再通知文档布局更新尺寸，
+不触发文档变更，因此不会重新布局整个文档，也不会触发重新高亮。
+始终保持“某行隐藏当且仅当它被某个已折叠区域覆盖”。
+"""
+
+import re
+from array import array
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QTextBlock, QTextDocument
+from PySide6.QtWidgets import QPlainTextEdit
+
+# 计算缩进宽度时制表符的宽度
+FOLD_TAB_WIDTH = 4
+
+_BRACKETS = re.compile(r"[()\[\]{}]")
+_OPENERS = frozenset("([{")
+
+# 折叠区域：起始行号, 最后一个隐藏的行号
+FoldRegion = Tuple[int, int]
+
+
+def measure_line(text: str, tab_width: int = FOLD_TAB_WIDTH) -> Tuple[int, int, int]:
+    """测量一行的缩进和括号信息
+
+    括号按字符计数，不区分字符串和注释中的括号。
+
+    Args:
+        text: 行文本，不含换行符
+        tab_width: 制表符宽度
+
+    Returns:
+        Tuple[int, int, int]: 缩进宽度（空白行为 -1）、行内括号深度的净变化、
+            行内扫描过程中达到的最低深度（不高于 0）
+    """
+    stripped = text.lstrip(" \t")
+    if not stripped:
+        indent = -1
+    else:
+        prefix = text[: len(text) - len(stripped)]
+        indent = len(prefix.expandtabs(tab_width)) if "\t" in prefix else len(prefix)
+
+    depth = 0
+    low = 0
+    for bracket in _BRACKETS.findall(stripped):
+        if bracket in _OPENERS:
+            depth += 1
+        else:
+            depth -= 1
+            if depth < low:
+                low = depth
+    return indent, depth, low
+
+
+class _FoldMarkers:
+    """按起始行排序的已折叠区域
+
+    编辑增删行时，其后所有区域的起始行都要平移。平移量不立即写入，
+    而是记为从某个下标开始尚未应用的增量；下一次在别处编辑时只需
+    把增量应用到两个下标之间的元素，连续在同一处编辑的代价为 O(1)。
+    """
+
+    def __init__(self) -> None:
+        """初始化为空"""
+        self._starts = array("i")  # 起始行号，自 _step_index 起尚需加上 _step_delta
+        self._spans = array("i")  # 隐藏的行数
+        self._step_index = 0
+        self._step_delta = 0
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def start(self, index: int) -> int:
+        """第 index 个区域的起始行号"""
+        if index >= self._step_index:
+            return self._starts[index] + self._step_delta
+        return self._starts[index]
+
+    def items(self, low: int = 0, high: Optional[int] = None) -> List[FoldRegion]:
+        """下标范围内的区域，返回起始行号和最后一个隐藏的行号"""
+        if high is None:
+            high = len(self._starts)
+        regions = []
+        for index in range(low, high):
+            start = self.start(index)
+            regions.append((start, start + self._spans[index]))
+        return regions
+
+    def bisect(self, line: int) -> int:
+        """第一个起始行号不小于指定行的区域的下标"""
+        low, high = 0, len(self._starts)
+        while low < high:
+            middle = (low + high) // 2
+            if self.start(middle) < line:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def replace(self, low: int, high: int, regions: List[FoldRegion]) -> None:
+        """用按起始行排序的区域替换下标范围内的区域"""
+        self._move_step(high)
+        self._starts[low:high] = array("i", [start for start, _ in regions])
+        self._spans[low:high] = array("i", [end - start for start, end in regions])
+        self._step_index = low + len(regions)
+
+    def shift(self, index: int, delta: int) -> None:
+        """把从指定下标开始的所有区域平移 delta 行"""
+        if not delta:
+            return
+        self._move_step(index)
+        self._step_delta += delta
+
+    def reset(self, regions: List[FoldRegion]) -> None:
+        """用按起始行排序的区域替换全部内容"""
+        self._starts = array("i", [start for start, _ in regions])
+        self._spans = array("i", [end - start for start, end in regions])
+        self._step_index = len(self._starts)
+        self._step_delta = 0
+
+    def _move_step(self, index: int) -> None:
+        """把未应用的增量的起点移到指定下标"""
+        delta = self._step_delta
+        if delta:
+            starts = self._starts
+            if index > self._step_index:
+                for position in range(self._step_index, index):
+                    starts[position] += delta
+            else:
+                for position in range(index, self._step_index):
+                    starts[position] -= delta
+        self._step_index = index
+
+
+class FoldingModel(QObject):
+    """折叠区域索引和折叠状态
+
+    每行的区域包含其后缩进更深的所有行；行内有未配对的开括号时，
+    区域至少延伸到与之配对的闭括号所在行之前。
+
+    已折叠的区域记为起始行号和隐藏的行数。隐藏的行被编辑时区域会被展开，
+    因此隐藏的行数在折叠期间保持不变，编辑只会平移其后区域的起始行。
+    """
+
+    # 信号定义
+    foldingChanged = Signal()  # 折叠状态变更信号
+
+    def __init__(
+        self,
+        document: QTextDocument,
+        ignore_change: Optional[Callable[[], bool]] = None,
+        tab_width: int = FOLD_TAB_WIDTH,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化折叠模型
+
+        Args:
+            document: 要折叠的文档
+            ignore_change: 返回 True 时忽略当前的文档变更（如仅格式变化）
+            tab_width: 制表符宽度
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._text_edit: Optional[QPlainTextEdit] = None  # 折叠时移出光标的编辑控件
+        self._document = document
+        self._ignore_change = ignore_change
+        self._tab_width = tab_width
+        self._indents = array("i")  # 每行缩进宽度，空白行为 -1
+        self._deltas = array("i")  # 每行括号深度的净变化
+        self._lows = array("i")  # 每行扫描过程中的最低括号深度
+        self._valid = False  # 行信息是否与文档一致，失效后在下次使用时重建
+        self._suspended = False  # 载入期间暂停增量更新
+        self._block_count = self._document.blockCount()  # 上次变更后的块数
+        self._folded = _FoldMarkers()  # 已折叠的区域
+        self._document.contentsChange.connect(self._on_contents_change)
+
+    def set_view(self, text_edit: Optional[QPlainTextEdit]) -> None:
+        """设置折叠时移出光标的编辑控件
+
+        折叠状态属于文档，由多个视图显示时各视图看到相同的折叠。
+
+        Args:
+            text_edit: 显示文档的编辑控件，为 None 时折叠不移动光标
+        """
+        self._text_edit = text_edit
+
+    def suspend(self) -> None:
+        """暂停增量更新，用于整体载入文档期间"""
+        self._suspended = True
+        self._valid = False
+        self._folded.reset([])
+
+    def resume(self) -> None:
+        """恢复增量更新，行信息在下次使用时重建"""
+        self._suspended = False
+        self._valid = False
+        self._block_count = self._document.blockCount()
+
+    @property
+    def line_count(self) -> int:
+        """索引覆盖的行数"""
+        self._ensure_index()
+        return len(self._indents)
+
+    def region(self, line: int) -> Optional[FoldRegion]:
+        """获取从指定行开始的折叠区域
+
+        Args:
+            line: 起始行号
+
+        Returns:
+            Optional[FoldRegion]: 起始行号和最后一个隐藏的行号，不可折叠时返回 None
+        """
+        self._ensure_index()
+        if not 0 <= line < len(self._indents):
+            return None
+        end = self._region_end(line)
+        return (line, end) if end > line else None
+
+    def regions(self) -> Iterator[FoldRegion]:
+        """按起始行顺序遍历所有折叠区域"""
+        self._ensure_index()
+        for line in range(len(self._indents)):
+            end = self._region_end(line)
+            if end > line:
+                yield line, end
+
+    def enclosing_region(self, line: int) -> Optional[FoldRegion]:
+        """获取包含指定行的最内层折叠区域
+
+        从该行向前查找，遇到的第一个覆盖该行的区域即为最内层区域。
+        只有缩进比之后各行都浅或者含未配对开括号的行才可能覆盖该行，
+        其余行直接跳过，不必计算区域。
+        """
+        self._ensure_index()
+        indents = self._indents
+        if not 0 <= line < len(indents):
+            return None
+        lowest = indents[line] + 1 if indents[line] >= 0 else len(indents) + 1
+        for start in range(line, -1, -1):
+            indent = indents[start]
+            shallower = 0 <= indent < lowest
+            if shallower:
+                lowest = indent
+            elif self._deltas[start] <= self._lows[start]:
+                continue
+            region = self.region(start)
+            if region is not None and region[1] >= line:
+                return region
+        return None
+
+    def folded_regions(self) -> List[FoldRegion]:
+        """当前已折叠的区域，按起始行排序"""
+        return self._folded.items()
+
+    def is_folded(self, line: int) -> bool:
+        """指定行是否为已折叠区域的起始行"""
+        index = self._folded.bisect(line)
+        return index < len(self._folded) and self._folded.start(index) == line
+
+    def fold(self, line: int) -> bool:
+        """折叠从指定行开始的区域
+
+        Returns:
+            bool: 是否折叠了区域
+        """
+        region = self.region(line)
+        if region is None or self.is_folded(line):
+            return False
+        start, end = region
+        index = self._folded.bisect(start)
+        self._folded.replace(index, index, [region])
+        block = self._document.findBlockByNumber(start)
+        self._set_visible(block.next(), end, False)
+        self._move_cursor_out(start, end)
+        self._update_layout()
+        return True
+
+    def unfold(self, line: int) -> bool:
+        """展开从指定行开始的已折叠区域，其中嵌套的已折叠区域保持折叠
+
+        Returns:
+            bool: 是否展开了区域
+        """
+        if not self.is_folded(line):
+            return False
+        index = self._folded.bisect(line)
+        _, end = self._folded.items(index, index + 1)[0]
+        self._folded.replace(index, index + 1, [])
+        self._sync_visibility(line + 1, end)
+        self._update_layout()
+        return True
+
+    def toggle(self, line: int) -> bool:
+        """切换指定行所在区域的折叠状态
+
+        该行本身不是区域起始行时，作用于包含它的最内层区域。
+
+        Returns:
+            bool: 折叠状态是否变化
+        """
+        if self.unfold(line):
+            return True
+        if self.region(line) is None:
+            region = self.enclosing_region(line)
+            if region is None:
+                return False
+            line = region[0]
+        return self.fold(line)
+
+    def fold_all(self) -> int:
+        """折叠所有区域
+
+        嵌套区域同样记为已折叠，只需对最外层区域设置一次块的可见性。
+
+        Returns:
+            int: 新折叠的区域数
+        """
+        self._ensure_index()
+        folded = dict(self._folded.items())
+        document = self._document
+        count = 0
+        covered = -1  # 已隐藏到的最后一行
+        for start, end in self.regions():
+            if start in folded:
+                covered = max(covered, folded[start])
+                continue
+            if end > covered:
+                first = document.findBlockByNumber(max(start, covered) + 1)
+                self._set_visible(first, end, False)
+                covered = end
+            folded[start] = end
+            count += 1
+        if not count:
+            return 0
+        self._folded.reset(sorted(folded.items()))
+        if self._text_edit is not None:
+            cursor_line = self._text_edit.textCursor().blockNumber()
+            for start, end in self._folded.items():
+                if start < cursor_line <= end:
+                    self._move_cursor_out(start, end)
+                    break
+        self._update_layout()
+        return count
+
+    def unfold_all(self) -> int:
+        """展开所有已折叠的区域
+
+        Returns:
+            int: 展开的区域数
+        """
+        spans = self._folded.items()
+        if not spans:
+            return 0
+        self._folded.reset([])
+        covered = -1
+        for start, end in spans:
+            if end > covered:
+                first = self._document.findBlockByNumber(max(start, covered) + 1)
+                self._set_visible(first, end, True)
+                covered = end
+        self._update_layout()
+        return len(spans)
+
+    def _ensure_index(self) -> None:
+        """行信息失效时按当前文档重建"""
+        if self._valid:
+            return
+        self._indents, self._deltas, self._lows = self._measure(
+            self._document.firstBlock(), self._document.blockCount()
+        )
+        self._valid = True
+
+    def _measure(
+        self, block: QTextBlock, count: int
+    ) -> Tuple["array[int]", "array[int]", "array[int]"]:
+        """测量从指定块开始的若干行"""
+        indents = array("i")
+        deltas = array("i")
+        lows = array("i")
+        tab_width = self._tab_width
+        for _ in range(count):
+            indent, delta, low = measure_line(block.text(), tab_width)
+            indents.append(indent)
+            deltas.append(delta)
+            lows.append(low)
+            block = block.next()
+        return indents, deltas, lows
+
+    def _region_end(self, line: int) -> int:
+        """计算从指定行开始的区域的最后一个隐藏行，不可折叠时返回该行本身"""
+        indents = self._indents
+        count = len(indents)
+        lows = self._lows
+        deltas = self._deltas
+        end = line
+        indent = indents[line]
+        if indent >= 0:
+            for index in range(line + 1, count):
+                current = indents[index]
+                if current < 0:
+                    continue
+                if current <= indent:
+                    break
+                end = index
+
+        depth = deltas[line] - lows[line]
+        if depth > 0:
+            # 未配对的开括号：至少延伸到配对的闭括号所在行之前
+            for index in range(line + 1, count):
+                if depth + lows[index] <= 0:
+                    return max(end, index - 1)
+                depth += deltas[index]
+            return count - 1
+        return end
+
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        """只重新测量被编辑的行，并展开受编辑影响的已折叠区域"""
+        if self._suspended:
+            return
+        if self._ignore_change is not None and self._ignore_change():
+            return
+        document = self._document
+        first = max(document.findBlock(position).blockNumber(), 0)
+        last = document.findBlock(position + added).blockNumber()
+        if last < 0:
+            last = document.blockCount() - 1
+        line_delta = document.blockCount() - self._block_count
+        self._block_count = document.blockCount()
+        self._update_index(first, last, line_delta)
+        if len(self._folded):
+            self._update_folded(first, last, line_delta)
+
+    def _update_index(self, first: int, last: int, line_delta: int) -> None:
+        """用编辑后的第 first 到 last 行替换索引中对应的旧行"""
+        if not self._valid:
+            return
+        old_last = last - line_delta
+        if old_last < first - 1 or old_last >= len(self._indents):
+            self._valid = False
+            return
+        indents, deltas, lows = self._measure(
+            self._document.findBlockByNumber(first), last - first + 1
+        )
+        self._indents[first : old_last + 1] = indents
+        self._deltas[first : old_last + 1] = deltas
+        self._lows[first : old_last + 1] = lows
+
+    def _update_folded(self, first: int, last: int, line_delta: int) -> None:
+        """展开隐藏行被编辑的区域，平移其后的区域，并校正编辑范围内块的可见性
+
+        编辑前的第 first 到 old_last 行被替换为编辑后的第 first 到 last 行。
+        起始行本身被编辑且行数变化时，隐藏的行数已不可靠，同样展开。
+        拆分或合并块时新块会继承原块的可见性，因此编辑范围内的块
+        也需要按剩余的已折叠区域重新设置。
+        """
+        old_last = last - line_delta
+        # 编辑范围内的块可能继承了被合并块的可见性，从它之前的块开始查找
+        low = self._folded.bisect(self._visible_before(first - 1))
+        high = self._folded.bisect(old_last + 1)
+        spans = [(first, last)]
+        kept: List[FoldRegion] = []
+        for start, end in self._folded.items(low, high):
+            if (start < old_last and first <= end) or (first <= start and line_delta):
+                # 原先隐藏的行在编辑后位于这个范围内
+                spans.append((min(start + 1, first), max(last, end + line_delta)))
+            else:
+                kept.append((start, end))
+        self._folded.replace(low, high, kept)
+        self._folded.shift(low + len(kept), line_delta)
+        changed = False
+        for span_start, span_end in spans:
+            changed = self._sync_visibility(span_start, span_end) or changed
+        if changed:
+            self._update_layout()
+
+    def _visible_before(self, line: int) -> int:
+        """指定行或其之前最近的可见行，不存在时返回 0
+
+        覆盖某行的已折叠区域必然从这一行或之后开始，否则这一行也会被覆盖。
+        """
+        block = self._document.findBlockByNumber(max(line, 0))
+        while block.isValid() and not block.isVisible():
+            block = block.previous()
+        return max(block.blockNumber(), 0)
+
+    def _sync_visibility(self, first: int, last: int) -> bool:
+        """按已折叠区域设置第 first 到 last 行的可见性
+
+        Returns:
+            bool: 是否有块的可见性发生变化
+        """
+        hidden: List[FoldRegion] = []  # 合并后互不重叠的隐藏行区间
+        low = self._folded.bisect(self._visible_before(first))
+        high = self._folded.bisect(last)
+        for start, end in self._folded.items(low, high):
+            if end < first:
+                continue
+            if hidden and start + 1 <= hidden[-1][1] + 1:
+                hidden[-1] = (hidden[-1][0], max(hidden[-1][1], end))
+            else:
+                hidden.append((start + 1, end))
+
+        changed = False
+        index = 0
+        block = self._document.findBlockByNumber(first)
+        line = first
+        while block.isValid() and line <= last:
+            while index < len(hidden) and hidden[index][1] < line:
+                index += 1
+            visible = index == len(hidden) or line < hidden[index][0]
+            if block.isVisible() != visible:
+                self._set_block_visible(block, visible)
+                changed = True
+            block = block.next()
+            line += 1
+        return changed
+
+    def _set_visible(self, block: QTextBlock, end: int, visible: bool) -> None:
+        """设置从指定块到指定行的所有块的可见性"""
+        if not block.isValid():
+            return
+        for _ in range(end - block.blockNumber() + 1):
+            if not block.isValid():
+                break
+            block.setVisible(visible)
+            block.setLineCount(max(1, block.layout().lineCount()) if visible else 0)
+            block = block.next()
+
+    @staticmethod
+    def _set_block_visible(block: QTextBlock, visible: bool) -> None:
+        """设置单个块的可见性，并同步其在文档中占用的行数"""
+        block.setVisible(visible)
+        block.setLineCount(max(1, block.layout().lineCount()) if visible else 0)
+
+    def _move_cursor_out(self, start: int, end: int) -> None:
+        """光标位于被隐藏的行时移到区域起始行的末尾"""
+        if self._text_edit is None:
+            return
+        cursor = self._text_edit.textCursor()
+        if start < cursor.blockNumber() <= end:
+            block = self._document.findBlockByNumber(start)
+            cursor.setPosition(block.position() + block.length() - 1)
+            self._text_edit.setTextCursor(cursor)
+
+    def _update_layout(self) -> None:
+        """通知文档布局尺寸变化并重绘视口"""
+        layout = self._document.documentLayout()
+        layout.documentSizeChanged.emit(layout.documentSize())
+        layout.requestUpdate()
+        if self._text_edit is not None:
+            self._text_edit.viewport().update()
+        self.foldingChanged.emit()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量语法高亮模块
+
+每个文本块的用户状态保存词法分析器在该行结束时的状态，编辑后
+QSyntaxHighlighter 从被修改的块开始重新分析，直到某块的结束状态与之前一致。
+每次编辑同步分析的块数有上限，超出部分和尚未分析的部分记为待处理，
+在空闲时按时间片处理，并且优先处理可见的块。
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QPoint, QTimer
+from PySide6.QtGui import (
+    QColor,
+    QSyntaxHighlighter,
+    QTextBlock,
+    QTextCharFormat,
+    QTextCursor,
+    QTextDocument,
+)
+from PySide6.QtWidgets import QPlainTextEdit
+
+from .lexers import RegexLexer, TokenType
+
+# 每次编辑后同步分析的最大块数（可见块不受限制）
+EDIT_BLOCK_BUDGET = 64
+
+# 每个空闲时间片的最长耗时（毫秒）
+IDLE_SLICE_MS = 8
+
+# 记号类型的默认颜色
+TOKEN_COLORS = {
+    TokenType.KEYWORD: "#569CD6",
+    TokenType.CONSTANT: "#569CD6",
+    TokenType.STRING: "#CE9178",
+    TokenType.COMMENT: "#6A9955",
+    TokenType.NUMBER: "#B5CEA8",
+    TokenType.FUNCTION: "#DCDCAA",
+    TokenType.DECORATOR: "#4EC9B0",
+}
+
+
+class IncrementalHighlighter(QSyntaxHighlighter):
+    """增量语法高亮器
+
+    待处理的位置用 QTextCursor 记录，编辑时由文档自动调整位置。
+    暂缓分析的块保留原有的状态和格式，使 QSyntaxHighlighter 停止向后传播。
+    """
+
+    def __init__(
+        self,
+        document: QTextDocument,
+        lexer: RegexLexer,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化高亮器
+
+        应在文档为空时创建，避免 QSyntaxHighlighter 同步分析整个文档。
+
+        Args:
+            document: 要高亮的文档
+            lexer: 词法分析器
+            parent: 父对象，为 None 时以文档为父对象
+        """
+        super().__init__(parent if parent is not None else document)
+        self._text_edit: Optional[QPlainTextEdit] = None  # 决定可见范围的编辑控件
+        self._lexer = lexer
+        self._formats: Dict[TokenType, QTextCharFormat] = {}
+        for token, color in TOKEN_COLORS.items():
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            self._formats[token] = text_format
+
+        self._pending: List[QTextCursor] = []  # 需要从该处重新分析的位置
+        self._last_deferred = -2  # 最近一次暂缓的块号，用于合并连续的待处理块
+        self._suspended = False  # 载入期间暂停分析
+        self._formatting = False  # 是否正在由高亮器应用格式
+        self._provisional = False  # 是否在未知前序状态下预先分析可见块
+        self._deadline: Optional[float] = None  # 空闲时间片的截止时间
+        self._budget = 0  # 当前编辑剩余可同步分析的块数
+        self._visible = (0, -1)  # 可见块号范围
+        self._visible_stale = True  # 可见块是否可能需要预先分析
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._process_slice)
+
+        # 先于 QSyntaxHighlighter 自身的连接，使编辑预算在重新分析前重置
+        document.contentsChange.connect(self._on_contents_change)
+        self.setDocument(document)
+
+    def set_view(self, text_edit: Optional[QPlainTextEdit]) -> None:
+        """设置决定可见范围的编辑控件
+
+        文档由多个视图显示时只优先处理其中一个视图的可见块。
+
+        Args:
+            text_edit: 显示文档的编辑控件，为 None 时不再优先处理任何块
+        """
+        if self._text_edit is not None:
+            self._text_edit.updateRequest.disconnect(self._on_update_request)
+        self._text_edit = text_edit
+        self._visible = (0, -1)
+        self._visible_stale = True
+        if text_edit is not None:
+            text_edit.updateRequest.connect(self._on_update_request)
+            self._update_visible()
+
+    @property
+    def lexer(self) -> RegexLexer:
+        """词法分析器"""
+        return self._lexer
+
+    def is_formatting(self) -> bool:
+        """是否正在应用格式，此时文档的变更通知只涉及格式"""
+        return self._formatting
+
+    def has_pending(self) -> bool:
+        """是否还有待分析的块"""
+        return bool(self._pending)
+
+    def suspend(self) -> None:
+        """暂停分析，用于分块载入文档期间"""
+        self._suspended = True
+        self._timer.stop()
+
+    def resume(self) -> None:
+        """恢复分析，并从文档开头在空闲时重新分析"""
+        self._suspended = False
+        self._clear_pending()
+        self._mark_pending(0, 0)
+
+    def finish(self, deadline_ms: Optional[float] = None) -> bool:
+        """同步处理待分析的块
+
+        Args:
+            deadline_ms: 最长耗时（毫秒），为 None 时处理全部
+
+        Returns:
+            bool: 是否已全部处理
+        """
+        deadline = float("inf")
+        if deadline_ms is not None:
+            deadline = time.perf_counter() + deadline_ms / 1000
+        while self._pending and time.perf_counter() < deadline:
+            self._run_pending(deadline)
+        return not self._pending
+
+    def highlightBlock(self, text: str) -> None:
+        """分析一个块，或在不允许分析时保留原状态和格式"""
+        if self._suspended:
+            return
+        block = self.currentBlock()
+        number = block.blockNumber()
+        if not self._may_lex(number):
+            # 保留原状态使传播停止，保留原格式避免闪烁
+            self.setCurrentBlockState(self.currentBlockState())
+            for format_range in block.layout().formats():
+                self.setFormat(
+                    format_range.start, format_range.length, format_range.format
+                )
+            self._mark_pending(number, block.position())
+            return
+
+        previous = self.previousBlockState()
+        tokens, state = self._lexer.lex(text, max(previous, 0))
+        formats = self._formats
+        for start, length, token in tokens:
+            self.setFormat(start, length, formats[token])
+        self.setCurrentBlockState(state)
+        if self._pending and not self._provisional:
+            self._discard_pending(block)
+
+    def _may_lex(self, number: int) -> bool:
+        """当前是否允许分析指定的块"""
+        first, last = self._visible
+        if first <= number <= last:
+            return True
+        if self._provisional:
+            return False
+        if self._deadline is not None:
+            return time.perf_counter() < self._deadline
+        if self._budget > 0:
+            self._budget -= 1
+            return True
+        return False
+
+    def _mark_pending(self, number: int, position: int) -> None:
+        """记录需要重新分析的块，连续暂缓的块只记录第一个"""
+        if number != self._last_deferred + 1 or not self._pending:
+            self._add_pending(position)
+        self._last_deferred = number
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _add_pending(self, position: int) -> None:
+        """添加待处理位置，已有相同位置时忽略"""
+        if any(cursor.position() == position for cursor in self._pending):
+            return
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(position)
+        self._pending.append(cursor)
+
+    def _discard_pending(self, block: QTextBlock) -> None:
+        """移除位于已分析块内的待处理位置"""
+        start = block.position()
+        end = start + block.length()
+        self._pending = [
+            cursor for cursor in self._pending if not start <= cursor.position() < end
+        ]
+
+    def _clear_pending(self) -> None:
+        """清空待处理位置"""
+        self._pending.clear()
+        self._last_deferred = -2
+
+    def _on_contents_change(self, position: int, removed: int, added: int) -> None:
+        """编辑发生时重置同步分析预算"""
+        if self._formatting:
+            return
+        self._budget = EDIT_BLOCK_BUDGET
+        self._last_deferred = -2
+        self._visible_stale = True
+        self._update_visible()
+
+    def _on_update_request(self, *args: object) -> None:
+        """视口滚动或重绘时更新可见范围，必要时尽快处理可见的待分析块"""
+        if self._update_visible() and self._pending and not self._timer.isActive():
+            self._timer.start()
+
+    def _update_visible(self) -> bool:
+        """重新计算可见块号范围
+
+        Returns:
+            bool: 范围是否变化
+        """
+        if self._text_edit is None:
+            return False
+        viewport = self._text_edit.viewport()
+        first = self._text_edit.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self._text_edit.cursorForPosition(
+            QPoint(0, max(0, viewport.height() - 1))
+        ).blockNumber()
+        visible = (first, last)
+        if visible == self._visible:
+            return False
+        self._visible = visible
+        self._visible_stale = True
+        return True
+
+    def _pending_blocks(self) -> List[Tuple[int, QTextBlock]]:
+        """按块号排序的待处理块"""
+        document = self.document()
+        blocks = {}
+        for cursor in self._pending:
+            block = document.findBlock(cursor.position())
+            if block.isValid():
+                blocks[block.blockNumber()] = block
+        return sorted(blocks.items(), key=lambda item: item[0])
+
+    def _process_slice(self) -> None:
+        """空闲时间片：先处理可见的待分析块，再从最早的待处理位置向后推进"""
+        if self._suspended or not self._pending:
+            return
+        deadline = time.perf_counter() + IDLE_SLICE_MS / 1000
+        self._highlight_visible()
+        self._run_pending(deadline)
+        if self._pending:
+            self._timer.start()
+
+    def _highlight_visible(self) -> None:
+        """在前序状态可能未知的情况下预先分析可见块
+
+        分析结果是临时的：可见范围首尾各记一个待处理位置，
+        之后按正确的前序状态从头推进时会再次校正。
+        """
+        if not self._visible_stale:
+            return
+        self._visible_stale = False
+        pending = self._pending_blocks()
+        first, last = self._visible
+        if not pending or pending[0][0] > last:
+            return
+        document = self.document()
+        self._provisional = True
+        self._formatting = True
+        try:
+            block = document.findBlockByNumber(max(first, pending[0][0]))
+            while block.isValid() and block.blockNumber() <= last:
+                self.rehighlightBlock(block)
+                block = block.next()
+        finally:
+            self._provisional = False
+            self._formatting = False
+        for block in (document.findBlockByNumber(first), block):
+            if block.isValid():
+                self._add_pending(block.position())
+
+    def _run_pending(self, deadline: float) -> None:
+        """从最早的待处理位置开始按正确的前序状态分析，直到收敛或超时"""
+        pending = self._pending_blocks()
+        if not pending:
+            self._clear_pending()
+            return
+        number, block = pending[0]
+        self._discard_pending(block)
+        self._last_deferred = -2
+        self._deadline = deadline
+        self._formatting = True
+        try:
+            self.rehighlightBlock(block)
+        finally:
+            self._deadline = None
+            self._formatting = False
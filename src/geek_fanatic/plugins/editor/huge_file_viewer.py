@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+超大文件只读查看器模块
+
+通过 mmap 映射文件，在后台线程中分块建立行首偏移索引，
+视口只解码并绘制当前可见的行，内存占用与文件大小基本无关。
+未指定编码时根据文件开头的数据检测，UTF-16 等多字节编码的换行符按码元对齐查找。
+"""
+
+import mmap
+from array import array
+from itertools import accumulate
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, Qt, QThreadPool, Signal
+from PySide6.QtGui import (
+    QColor,
+    QFont,
+    QFontMetrics,
+    QPainter,
+    QPaintEvent,
+    QResizeEvent,
+)
+from PySide6.QtWidgets import QAbstractScrollArea, QWidget
+
+from .encoding import detect_encoding
+
+# 超过该大小的文件使用只读查看器打开
+HUGE_FILE_THRESHOLD = 256 * 1024 * 1024
+
+# 建立索引时每次扫描的字节数
+INDEX_CHUNK_SIZE = 16 * 1024 * 1024
+
+# 单行最多解码的字节数，避免超长行拖慢绘制
+MAX_LINE_BYTES = 64 * 1024
+
+# 检测编码时读取的文件开头字节数
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
+def _segment_lengths(chunk: bytes, newline: bytes) -> List[int]:
+    """按换行符切分一块数据，返回各段的字节数
+
+    多字节编码的换行符只在码元边界处计入，块的起点须与码元对齐。
+    """
+    if len(newline) == 1:
+        return [len(part) for part in chunk.split(newline)]
+    width = len(newline)
+    lengths = []
+    start = 0
+    position = chunk.find(newline)
+    while position >= 0:
+        if position % width:
+            # 跨越两个码元的字节序列不是换行符
+            position = chunk.find(newline, position + 1)
+            continue
+        lengths.append(position - start)
+        start = position + width
+        position = chunk.find(newline, start)
+    lengths.append(len(chunk) - start)
+    return lengths
+
+
+class _IndexerSignals(QObject):
+    """索引任务信号"""
+
+    chunkIndexed = Signal(object, int)  # 本块的行首偏移数组, 本块最长行字节数
+    finished = Signal()
+
+
+class _LineIndexer(QRunnable):
+    """后台行索引任务
+
+    按块扫描映射的文件，把每块内的行首偏移通过信号发送到界面线程。
+    """
+
+    def __init__(self, data: mmap.mmap, size: int, start: int, newline: bytes) -> None:
+        """初始化索引任务
+
+        Args:
+            data: 已映射的文件
+            size: 文件大小
+            start: 第一行的起始偏移，即 BOM 的字节数
+            newline: 按文件编码编码的换行符
+        """
+        super().__init__()
+        self.signals = _IndexerSignals()
+        self._data = data
+        self._size = size
+        self._start = start
+        self._newline = newline
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消索引"""
+        self._cancelled = True
+
+    def run(self) -> None:
+        """执行索引"""
+        width = len(self._newline)
+        offset = self._start
+        while offset < self._size and not self._cancelled:
+            chunk = self._data[offset : offset + INDEX_CHUNK_SIZE]
+            lengths = _segment_lengths(chunk, self._newline)
+            # 每个换行符之后都是新的行首
+            starts = array(
+                "q",
+                accumulate((length + width for length in lengths[:-1]), initial=offset),
+            )[1:]
+            self.signals.chunkIndexed.emit(starts, max(lengths))
+            offset += len(chunk)
+        if not self._cancelled:
+            self.signals.finished.emit()
+
+
+class HugeFileViewer(QAbstractScrollArea):
+    """超大文件只读查看器
+
+    只绘制可见窗口内的行，索引尚未完成时可以浏览已索引的部分。
+    """
+
+    # 信号定义
+    indexProgress = Signal(int, int)  # 已索引字节数, 文件总字节数
+    indexFinished = Signal(int)  # 总行数
+
+    def __init__(
+        self,
+        file_path: str,
+        encoding: Optional[str] = None,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        """初始化查看器
+
+        Args:
+            file_path: 文件路径
+            encoding: 文件编码，为 None 时根据文件开头的数据检测
+            parent: 父widget
+        """
+        super().__init__(parent)
+        self._file_path = file_path
+        self._file = open(file_path, "rb")
+        self._size = self._file.seek(0, 2)
+        self._data: Optional[mmap.mmap] = None
+        if self._size:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        bom_length = 0
+        if encoding is None:
+            sample = self._data[:ENCODING_SAMPLE_SIZE] if self._data else b""
+            final = self._size <= ENCODING_SAMPLE_SIZE
+            encoding, bom_length = detect_encoding(sample, final)
+        self._encoding = encoding
+        self._newline = "\n".encode(encoding)  # 按文件编码编码的换行符
+        self._line_starts = array("q", [bom_length])  # 行首偏移索引
+        self._max_line_bytes = 0  # 已知的最长行字节数
+        self._indexed = self._data is None  # 是否已完成索引
+        self._indexer: Optional[_LineIndexer] = None
+
+        self._setup_ui()
+        self._start_indexing()
+
+    def _setup_ui(self) -> None:
+        """设置UI"""
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPixelSize(14)
+        self.viewport().setFont(font)
+        self.setFont(font)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setStyleSheet(
+            """
+            QAbstractScrollArea {
+                background-color: #1e1e1e;
+                border: none;
+            }
+        """
+        )
+        self._update_scroll_bars()
+
+    def _start_indexing(self) -> None:
+        """在线程池中启动行索引"""
+        if self._data is None:
+            return
+        self._indexer = _LineIndexer(
+            self._data, self._size, self._line_starts[0], self._newline
+        )
+        self._indexer.signals.chunkIndexed.connect(self._on_chunk_indexed)
+        self._indexer.signals.finished.connect(self._on_index_finished)
+        QThreadPool.globalInstance().start(self._indexer)
+
+    def _on_chunk_indexed(self, starts: "array[int]", max_line_bytes: int) -> None:
+        """合并一块索引结果"""
+        self._line_starts.extend(starts)
+        self._max_line_bytes = max(self._max_line_bytes, max_line_bytes)
+        self._update_scroll_bars()
+        self.viewport().update()
+        indexed = self._line_starts[-1] if len(self._line_starts) > 1 else 0
+        self.indexProgress.emit(indexed, self._size)
+
+    def _on_index_finished(self) -> None:
+        """索引完成"""
+        self._indexed = True
+        self._indexer = None
+        self._update_scroll_bars()
+        self.viewport().update()
+        self.indexFinished.emit(self.line_count)
+
+    @property
+    def file_path(self) -> str:
+        """文件路径"""
+        return self._file_path
+
+    @property
+    def encoding(self) -> str:
+        """文件编码"""
+        return self._encoding
+
+    @property
+    def line_count(self) -> int:
+        """当前可浏览的行数"""
+        if self._indexed:
+            return len(self._line_starts)
+        return len(self._line_starts) - 1
+
+    def is_indexed(self) -> bool:
+        """是否已完成索引"""
+        return self._indexed
+
+    def get_line(self, line_number: int) -> str:
+        """获取指定行的内容
+
+        超长行只解码前 MAX_LINE_BYTES 个字节。
+        """
+        if self._data is None or not 0 <= line_number < self.line_count:
+            return ""
+        start = self._line_starts[line_number]
+        if line_number + 1 < len(self._line_starts):
+            end = self._line_starts[line_number + 1] - len(self._newline)
+        else:
+            end = self._size
+        data = self._data[start : min(end, start + MAX_LINE_BYTES)]
+        return data.decode(self._encoding, errors="replace").rstrip("\r")
+
+    def close_file(self) -> None:
+        """停止索引并释放文件映射"""
+        if self._indexer is not None:
+            self._indexer.cancel()
+            self._indexer = None
+        # 索引任务可能仍持有映射，交给垃圾回收在其结束后释放
+        self._data = None
+        self._file.close()
+
+    # 视口绘制
+    def _line_height(self) -> int:
+        """行高"""
+        return QFontMetrics(self.viewport().font()).lineSpacing()
+
+    def _char_width(self) -> int:
+        """等宽字符宽度"""
+        return max(1, QFontMetrics(self.viewport().font()).horizontalAdvance("M"))
+
+    def _visible_line_count(self) -> int:
+        """视口可容纳的行数"""
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _update_scroll_bars(self) -> None:
+        """根据索引和视口大小更新滚动条范围"""
+        visible_lines = self._visible_line_count()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.line_count - visible_lines))
+        vertical.setPageStep(visible_lines)
+        vertical.setSingleStep(1)
+
+        visible_columns = self.viewport().width() // self._char_width()
+        horizontal = self.horizontalScrollBar()
+        max_columns = min(self._max_line_bytes, MAX_LINE_BYTES)
+        horizontal.setRange(0, max(0, max_columns - visible_columns))
+        horizontal.setPageStep(visible_columns)
+        horizontal.setSingleStep(1)
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        """视口尺寸变化时更新滚动条"""
+        super().resizeEvent(event)
+        self._update_scroll_bars()
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        """滚动时重绘视口"""
+        self.viewport().update()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """只绘制可见行和可见的水平片段"""
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), QColor("#1e1e1e"))
+        painter.setPen(QColor("#d4d4d4"))
+
+        line_height = self._line_height()
+        char_width = self._char_width()
+        ascent = QFontMetrics(self.viewport().font()).ascent()
+        first_line = self.verticalScrollBar().value()
+        first_column = self.horizontalScrollBar().value()
+        visible_columns = self.viewport().width() // char_width + 1
+
+        for row in range(self._visible_line_count() + 1):
+            line_number = first_line + row
+            if line_number >= self.line_count:
+                break
+            text = self.get_line(line_number).expandtabs(4)
+            text = text[first_column : first_column + visible_columns]
+            painter.drawText(0, row * line_height + ascent, text)
+        painter.end()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+语法词法分析模块
+
+词法分析器逐行工作：输入一行文本和上一行结束时的状态，
+输出本行的记号区间和本行结束时的状态。状态为0表示不在跨行结构中，
+正数表示处于某个跨行结构（如多行字符串、块注释）内部。
+"""
+
+import os
+import re
+from enum import IntEnum
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+
+class TokenType(IntEnum):
+    """记号类型"""
+
+    KEYWORD = 1
+    CONSTANT = 2
+    STRING = 3
+    COMMENT = 4
+    NUMBER = 5
+    FUNCTION = 6
+    DECORATOR = 7
+
+
+# 记号区间：起始列, 长度, 记号类型
+Token = Tuple[int, int, TokenType]
+
+# 单行规则：正则表达式, 记号类型
+Rule = Tuple[str, TokenType]
+
+# 跨行区域：起始正则表达式, 结束正则表达式, 记号类型
+Region = Tuple[str, str, TokenType]
+
+
+class RegexLexer:
+    """基于正则表达式的逐行词法分析器
+
+    所有规则合并为一个带命名分组的正则表达式，每行只需一次从左到右的扫描；
+    跨行区域的编号加一即为行结束状态。
+    """
+
+    def __init__(
+        self, name: str, regions: Sequence[Region], rules: Sequence[Rule]
+    ) -> None:
+        """初始化词法分析器
+
+        Args:
+            name: 语言名称
+            regions: 跨行区域，优先于单行规则匹配
+            rules: 单行规则，按顺序优先匹配
+        """
+        self.name = name
+        self._region_ends: List[Tuple[Pattern[str], TokenType]] = []
+        self._group_tokens: Dict[str, TokenType] = {}
+        self._group_regions: Dict[str, int] = {}
+        parts: List[str] = []
+        for index, (start, end, token) in enumerate(regions):
+            group = f"r{index}"
+            parts.append(f"(?P<{group}>{start})")
+            self._group_regions[group] = index
+            self._region_ends.append((re.compile(end), token))
+        for index, (pattern, token) in enumerate(rules):
+            group = f"t{index}"
+            parts.append(f"(?P<{group}>{pattern})")
+            self._group_tokens[group] = token
+        self._master = re.compile("|".join(parts))
+
+    def lex(self, text: str, state: int) -> Tuple[List[Token], int]:
+        """分析一行文本
+
+        Args:
+            text: 行文本，不含换行符
+            state: 上一行结束时的状态
+
+        Returns:
+            Tuple[List[Token], int]: 本行的记号区间和本行结束时的状态
+        """
+        tokens: List[Token] = []
+        position = 0
+        if 0 < state <= len(self._region_ends):
+            end, token = self._region_ends[state - 1]
+            match = end.search(text)
+            if match is None:
+                return [(0, len(text), token)], state
+            tokens.append((0, match.end(), token))
+            position = match.end()
+
+        length = len(text)
+        while position < length:
+            match = self._master.search(text, position)
+            if match is None:
+                break
+            group = match.lastgroup or ""
+            start = match.start()
+            region = self._group_regions.get(group)
+            if region is not None:
+                end, token = self._region_ends[region]
+                closing = end.search(text, match.end())
+                if closing is None:
+                    tokens.append((start, length - start, token))
+                    return tokens, region + 1
+                tokens.append((start, closing.end() - start, token))
+                position = closing.end()
+                continue
+            if match.end() > start:
+                tokens.append((start, match.end() - start, self._group_tokens[group]))
+            position = max(match.end(), start + 1)
+        return tokens, 0
+
+
+def _words(words: str) -> str:
+    """把空白分隔的单词列表转为全词匹配的正则表达式"""
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+
+_NUMBER = (
+    r"\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+"
+    r"|\d[\d_]*(?:\.[\d_]*)?(?:[eE][+-]?\d+)?)[jJlLuUfF]*\b"
+)
+
+PYTHON_LEXER = RegexLexer(
+    "python",
+    regions=[
+        (r'(?:\b[rRbBuUfF]{1,2})?"""', r'(?:\\.|[^\\])*?"""', TokenType.STRING),
+        (r"(?:\b[rRbBuUfF]{1,2})?'''", r"(?:\\.|[^\\])*?'''", TokenType.STRING),
+    ],
+    rules=[
+        (r"#.*", TokenType.COMMENT),
+        (r'[rRbBuUfF]{0,2}"(?:\\.|[^"\\])*"?', TokenType.STRING),
+        (r"[rRbBuUfF]{0,2}'(?:\\.|[^'\\])*'?", TokenType.STRING),
+        (r"^\s*@[\w.]+", TokenType.DECORATOR),
+        (
+            _words(
+                "and as assert async await break class continue def del elif else "
+                "except finally for from global if import in is lambda nonlocal "
+                "not or pass raise return try while with yield match case"
+            ),
+            TokenType.KEYWORD,
+        ),
+        (_words("True False None self cls"), TokenType.CONSTANT),
+        (r"\b[A-Za-z_]\w*(?=\s*\()", TokenType.FUNCTION),
+        (_NUMBER, TokenType.NUMBER),
+    ],
+)
+
+C_LIKE_LEXER = RegexLexer(
+    "c-like",
+    regions=[
+        (r"/\*", r"\*/", TokenType.COMMENT),
+        (r"`", r"(?:\\.|[^\\`])*`", TokenType.STRING),
+    ],
+    rules=[
+        (r"//.*", TokenType.COMMENT),
+        (r'"(?:\\.|[^"\\])*"?', TokenType.STRING),
+        (r"'(?:\\.|[^'\\])*'?", TokenType.STRING),
+        (r"^\s*#\s*\w+", TokenType.DECORATOR),
+        (r"@\w+", TokenType.DECORATOR),
+        (
+            _words(
+                "auto break case catch class const constexpr continue default "
+                "delete do else enum export extends extern final finally for "
+                "function if implements import interface let namespace new "
+                "override package private protected public return static struct "
+                "super switch template this throw try typedef typename union "
+                "using var virtual void volatile while async await yield "
+                "int long short char float double bool boolean unsigned signed"
+            ),
+            TokenType.KEYWORD,
+        ),
+        (_words("true false null nullptr undefined NULL"), TokenType.CONSTANT),
+        (r"\b[A-Za-z_]\w*(?=\s*\()", TokenType.FUNCTION),
+        (_NUMBER, TokenType.NUMBER),
+    ],
+)
+
+# 文件扩展名到词法分析器
+_LEXERS_BY_EXTENSION: Dict[str, RegexLexer] = {
+    **dict.fromkeys((".py", ".pyw", ".pyi"), PYTHON_LEXER),
+    **dict.fromkeys(
+        (
+            ".c",
+            ".h",
+            ".cc",
+            ".cpp",
+            ".cxx",
+            ".hpp",
+            ".hh",
+            ".java",
+            ".js",
+            ".jsx",
+            ".mjs",
+            ".ts",
+            ".tsx",
+            ".cs",
+            ".go",
+            ".rs",
+            ".kt",
+            ".swift",
+        ),
+        C_LIKE_LEXER,
+    ),
+}
+
+
+def lexer_for_path(file_path: str) -> Optional[RegexLexer]:
+    """根据文件扩展名选择词法分析器
+
+    Returns:
+        Optional[RegexLexer]: 词法分析器，不支持的文件类型返回 None
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    return _LEXERS_BY_EXTENSION.get(extension)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+行首偏移索引模块
+
+使用树状数组（Fenwick Tree）保存每行长度（含换行符），
+支持对数复杂度的行首偏移查询、偏移到行号的反查以及单行长度更新。
+"""
+
+from typing import Iterable, List, Tuple
+
+
+class LineIndex:
+    """行首偏移索引
+
+    行号和偏移都从0开始计数，最后一行不含换行符。
+    """
+
+    def __init__(self, line_lengths: Iterable[int] = (0,)) -> None:
+        """初始化索引
+
+        Args:
+            line_lengths: 各行长度（不含换行符）
+        """
+        self._lengths: List[int] = []  # 各行长度（含换行符）
+        self._tree: List[int] = [0]  # 树状数组，下标从1开始
+        self.rebuild(line_lengths)
+
+    def rebuild(self, line_lengths: Iterable[int]) -> None:
+        """根据各行长度重建索引"""
+        self._lengths = [length + 1 for length in line_lengths] or [1]
+        self._lengths[-1] -= 1
+        tree = [0] + self._lengths
+        size = len(tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    @property
+    def line_count(self) -> int:
+        """总行数"""
+        return len(self._lengths)
+
+    @property
+    def length(self) -> int:
+        """总字符数"""
+        return self.line_start(self.line_count)
+
+    def line_length(self, line: int) -> int:
+        """获取指定行长度（不含换行符）"""
+        length = self._lengths[line]
+        return length if line == self.line_count - 1 else length - 1
+
+    def line_start(self, line: int) -> int:
+        """获取指定行首的偏移
+
+        Args:
+            line: 行号，等于总行数时返回文档长度
+        """
+        total = 0
+        i = max(0, min(line, self.line_count))
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """把偏移转换为行号和列号
+
+        超出范围的偏移会被限制到文档内。
+
+        Returns:
+            Tuple[int, int]: 行号和列号
+        """
+        offset = max(0, min(offset, self.length))
+        # 在树状数组上二分查找行首不超过 offset 的最后一行
+        line = 0
+        remaining = offset
+        step = 1 << (self.line_count.bit_length() - 1)
+        while step:
+            next_line = line + step
+            if next_line <= self.line_count and self._tree[next_line] <= remaining:
+                line = next_line
+                remaining -= self._tree[next_line]
+            step >>= 1
+        if line == self.line_count:
+            line -= 1
+            remaining += self._lengths[line]
+        return line, remaining
+
+    def add(self, line: int, delta: int) -> None:
+        """调整指定行的长度
+
+        Args:
+            line: 行号
+            delta: 长度变化量
+        """
+        self._lengths[line] += delta
+        i = line + 1
+        size = len(self._tree)
+        while i < size:
+            self._tree[i] += delta
+            i += i & -i
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多光标编辑模块
+
+所有光标上的同一次输入或删除在一个事务中提交：编辑排序后一次性应用，
+只记录一个撤销组，只触发一次内容变更。光标以字符偏移表示，同时保留
+光标所基于内容的快照，缓冲区被其他视图或撤销修改后，
+按缓冲区的编辑记录映射到当前内容。
+"""
+
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Iterable, List, Optional, Tuple
+
+from .buffer import TextBuffer, TextSnapshot, TextTransaction
+from .types import Position
+
+# 创建事务的函数，默认直接作用于缓冲区，编辑器中作用于共享文档
+TransactionFactory = Callable[[], ContextManager[TextTransaction]]
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """光标
+
+    Attributes:
+        anchor: 选择的固定端，与 position 相同时没有选择
+        position: 光标所在的偏移
+    """
+
+    anchor: int
+    position: int
+
+    @property
+    def start(self) -> int:
+        """选择的起始偏移"""
+        return min(self.anchor, self.position)
+
+    @property
+    def end(self) -> int:
+        """选择的结束偏移"""
+        return max(self.anchor, self.position)
+
+    def has_selection(self) -> bool:
+        """是否有选中内容"""
+        return self.anchor != self.position
+
+
+class MultiCursor:
+    """多光标编辑模型
+
+    光标按起始偏移排序且互不重叠，编辑或移动后重合的光标自动合并。
+    最后加入的光标为主光标，编辑器据此滚动和显示自身的光标。
+    """
+
+    def __init__(
+        self, buffer: TextBuffer, transaction: Optional[TransactionFactory] = None
+    ) -> None:
+        """初始化多光标
+
+        Args:
+            buffer: 文本缓冲区
+            transaction: 创建事务的函数，为 None 时使用 buffer.transaction
+        """
+        self._buffer = buffer
+        self._transaction = transaction or buffer.transaction
+        self._cursors: List[Cursor] = []
+        self._primary = 0  # 主光标在列表中的下标
+        # 光标所基于的内容，缓冲区被修改后据此换算行列位置并映射到最新内容
+        self._snapshot: TextSnapshot = buffer.snapshot()
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._cursors)
+
+    def cursors(self) -> List[Cursor]:
+        """按起始偏移排序的全部光标"""
+        self._sync()
+        return list(self._cursors)
+
+    def primary(self) -> Optional[Cursor]:
+        """主光标，没有光标时为 None"""
+        self._sync()
+        return self._cursors[self._primary] if self._cursors else None
+
+    def set_cursors(self, cursors: Iterable[Cursor]) -> None:
+        """替换全部光标，最后一个为主光标"""
+        cursors = list(cursors)
+        self._store(cursors, len(cursors) - 1)
+
+    def add(self, position: int, anchor: Optional[int] = None) -> None:
+        """加入一个光标并设为主光标
+
+        Args:
+            position: 光标偏移
+            anchor: 选择的固定端，为 None 时没有选择
+        """
+        cursors = self.cursors()
+        cursors.append(Cursor(position if anchor is None else anchor, position))
+        self._store(cursors, len(cursors) - 1)
+
+    def add_vertical(self, lines: int) -> bool:
+        """在最上方光标之上或最下方光标之下的行加入光标，列号尽量保持不变
+
+        Args:
+            lines: 行数，负数向上
+
+        Returns:
+            bool: 是否加入了光标，超出首行或末行时返回 False
+        """
+        cursors = self.cursors()
+        if not cursors:
+            return False
+        edge = cursors[0] if lines < 0 else cursors[-1]
+        position = self._buffer.offset_to_position(edge.position)
+        line = position.line + lines
+        if not 0 <= line < self._buffer.get_line_count():
+            return False
+        column = min(position.column, len(self._buffer.get_line(line)))
+        self.add(self._buffer.position_to_offset(Position(line, column)))
+        return True
+
+    def clear(self) -> None:
+        """移除全部光标"""
+        self._store([], 0)
+
+    def insert_text(self, text: str) -> None:
+        """在每个光标处输入文本，有选择时替换选中内容"""
+        self._edit(lambda cursor: (cursor.start, cursor.end, text))
+
+    def delete_backward(self) -> None:
+        """删除每个光标前的一个字符，有选择时删除选中内容"""
+
+        def backward(cursor: Cursor) -> Tuple[int, int, str]:
+            if cursor.has_selection():
+                return cursor.start, cursor.end, ""
+            return max(cursor.position - 1, 0), cursor.position, ""
+
+        self._edit(backward)
+
+    def delete_forward(self) -> None:
+        """删除每个光标后的一个字符，有选择时删除选中内容"""
+        length = self._buffer.get_length()
+
+        def forward(cursor: Cursor) -> Tuple[int, int, str]:
+            if cursor.has_selection():
+                return cursor.start, cursor.end, ""
+            return cursor.position, min(cursor.position + 1, length), ""
+
+        self._edit(forward)
+
+    def move(self, characters: int, select: bool = False) -> None:
+        """把每个光标左右移动若干字符
+
+        Args:
+            characters: 字符数，负数向左
+            select: 是否保留选择的固定端以扩展选择
+        """
+        length = self._buffer.get_length()
+        self._move(lambda offset: min(max(offset + characters, 0), length), select)
+
+    def move_lines(self, lines: int, select: bool = False) -> None:
+        """把每个光标上下移动若干行，列号超出目标行时移到行尾
+
+        Args:
+            lines: 行数，负数向上
+            select: 是否保留选择的固定端以扩展选择
+        """
+        buffer = self._buffer
+        last_line = buffer.get_line_count() - 1
+
+        def target(offset: int) -> int:
+            position = buffer.offset_to_position(offset)
+            line = min(max(position.line + lines, 0), last_line)
+            column = min(position.column, len(buffer.get_line(line)))
+            return buffer.position_to_offset(Position(line, column))
+
+        self._move(target, select)
+
+    def move_to_line_boundary(self, end: bool, select: bool = False) -> None:
+        """把每个光标移到所在行的行首或行尾
+
+        Args:
+            end: 为 True 时移到行尾，否则移到行首
+            select: 是否保留选择的固定端以扩展选择
+        """
+        buffer = self._buffer
+
+        def target(offset: int) -> int:
+            line = buffer.offset_to_position(offset).line
+            column = len(buffer.get_line(line)) if end else 0
+            return buffer.position_to_offset(Position(line, column))
+
+        self._move(target, select)
+
+    def _move(self, target: Callable[[int], int], select: bool) -> None:
+        """按目标函数移动每个光标"""
+        moved: List[Cursor] = []
+        for cursor in self.cursors():
+            position = target(cursor.position)
+            moved.append(Cursor(cursor.anchor if select else position, position))
+        self._store(moved, self._primary)
+
+    def _edit(self, build: Callable[[Cursor], Tuple[int, int, str]]) -> None:
+        """在每个光标处生成一个编辑，作为一个事务提交
+
+        删除时相邻光标的范围可能重叠，重叠的编辑合并为一个，
+        对应的光标在编辑后重合为一个。
+        """
+        cursors = self.cursors()
+        if not cursors:
+            return
+        # (起始偏移, 结束偏移, 新文本, 是否包含主光标)
+        edits: List[Tuple[int, int, str, bool]] = []
+        for index, cursor in enumerate(cursors):
+            start, end, text = build(cursor)
+            primary = index == self._primary
+            if edits and (start < edits[-1][1] or start == edits[-1][0]):
+                last_start, last_end, last_text, last_primary = edits[-1]
+                edits[-1] = (
+                    min(start, last_start),
+                    max(end, last_end),
+                    last_text + text,
+                    last_primary or primary,
+                )
+                continue
+            edits.append((start, end, text, primary))
+
+        with self._transaction() as transaction:
+            for start, end, text, _ in edits:
+                transaction.replace_range(start, end, text)
+
+        # 每个编辑之后的光标位于新文本之后，偏移加上前面编辑的长度变化
+        updated: List[Cursor] = []
+        primary_index = 0
+        shift = 0
+        for start, end, text, primary in edits:
+            offset = start + shift + len(text)
+            if primary:
+                primary_index = len(updated)
+            updated.append(Cursor(offset, offset))
+            shift += len(text) - (end - start)
+        self._store(updated, primary_index)
+
+    def _store(self, cursors: List[Cursor], primary: int) -> None:
+        """排序并合并重叠的光标，记下当前内容的快照"""
+        order = sorted(range(len(cursors)), key=lambda index: cursors[index].start)
+        merged: List[Cursor] = []
+        self._primary = 0
+        for index in order:
+            cursor = cursors[index]
+            if merged and (
+                cursor.start < merged[-1].end or cursor.start == merged[-1].start
+            ):
+                last = merged[-1]
+                if cursor.has_selection() or last.has_selection():
+                    start = min(cursor.start, last.start)
+                    end = max(cursor.end, last.end)
+                    # 保持主光标的选择方向
+                    if index == primary and cursor.position < cursor.anchor:
+                        merged[-1] = Cursor(end, start)
+                    else:
+                        merged[-1] = Cursor(start, end)
+            else:
+                merged.append(cursor)
+            if index == primary:
+                self._primary = len(merged) - 1
+        self._cursors = merged
+        self._snapshot = self._buffer.snapshot()
+
+    def _sync(self) -> None:
+        """缓冲区在上次更新后被修改时，把光标映射到当前内容
+
+        编辑记录已不覆盖光标所基于的版本（例如内容被整体替换）时移除全部光标。
+        """
+        buffer = self._buffer
+        snapshot = self._snapshot
+        if snapshot.version == buffer.version:
+            return
+
+        def mapped(offset: int) -> Optional[int]:
+            position = buffer.map_position(
+                snapshot.offset_to_position(offset), snapshot.version
+            )
+            return None if position is None else buffer.position_to_offset(position)
+
+        cursors: List[Cursor] = []
+        for cursor in self._cursors:
+            anchor = mapped(cursor.anchor)
+            position = mapped(cursor.position)
+            if anchor is None or position is None:
+                self._store([], 0)
+                return
+            cursors.append(Cursor(anchor, position))
+        self._store(cursors, self._primary)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+紧凑操作日志模块
+
+长时间编辑会话和宏回放需要保存数百万个编辑操作，逐个保存
+InsertOperation/DeleteOperation 对象时，每个操作还要额外携带
+Position 和字符串对象。操作日志按列把类型、行号和列号存入
+类型化的 array，文本统一追加到分块的文本区中，每个操作只记录
+文本所在的分块、起始偏移和长度，读取时再按需构造操作对象。
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .types import DeleteOperation, InsertOperation, Position
+from .undo import EditOperation
+
+# 操作类型
+KIND_INSERT = 0
+KIND_DELETE = 1
+
+# 文本区单个分块的最大字符数，超长文本单独占用一个分块
+ARENA_CHUNK_SIZE = 64 * 1024
+
+# 未写满的分块最多保留的片段数，超过时先合并为一个片段
+ARENA_MAX_PIECES = 1024
+
+
+def _text_end(line: int, column: int, text: str) -> Position:
+    """计算从指定位置开始的文本结束后的位置"""
+    line_feeds = text.count("\n")
+    if line_feeds == 0:
+        return Position(line, column + len(text))
+    return Position(line + line_feeds, len(text) - text.rfind("\n") - 1)
+
+
+class TextArena:
+    """文本区
+
+    只追加的分块字符串存储。已写入的文本不再修改，
+    因此多个操作日志可以共享同一个文本区。
+    未写满的分块以片段列表保存，写满时才连接为一个字符串，
+    避免每次追加都复制整个分块。
+    """
+
+    def __init__(self) -> None:
+        """初始化文本区"""
+        self._chunks: List[str] = []  # 已写满的分块
+        self._pieces: List[str] = []  # 未写满的分块的片段
+        self._piece_starts: List[int] = []  # 各片段在分块中的起始偏移
+        self._open_size = 0  # 未写满的分块的字符数
+        self._size = 0  # 总字符数
+
+    @property
+    def size(self) -> int:
+        """已写入的总字符数"""
+        return self._size
+
+    @property
+    def memory_usage(self) -> int:
+        """估算的内存占用（字节）"""
+        return sum(
+            len(chunk) if chunk.isascii() else len(chunk) * 4
+            for chunk in self._chunks + self._pieces
+        )
+
+    def append(self, text: str) -> Tuple[int, int]:
+        """追加文本
+
+        Args:
+            text: 要写入的文本
+
+        Returns:
+            Tuple[int, int]: 分块编号和文本在分块中的起始偏移
+        """
+        self._size += len(text)
+        if self._pieces and self._open_size + len(text) > ARENA_CHUNK_SIZE:
+            self._seal()
+        elif len(self._pieces) >= ARENA_MAX_PIECES:
+            # 合并前后偏移不变，已记录的位置仍然有效
+            self._pieces = ["".join(self._pieces)]
+            self._piece_starts = [0]
+        start = self._open_size
+        self._pieces.append(text)
+        self._piece_starts.append(start)
+        self._open_size += len(text)
+        return len(self._chunks), start
+
+    def get(self, chunk: int, start: int, length: int) -> str:
+        """读取文本
+
+        Args:
+            chunk: 分块编号
+            start: 分块内的起始偏移
+            length: 字符数
+
+        Returns:
+            str: 文本内容
+        """
+        if chunk < len(self._chunks):
+            return self._chunks[chunk][start : start + length]
+        # 每次追加的文本都在同一个片段内
+        index = bisect_right(self._piece_starts, start) - 1
+        offset = start - self._piece_starts[index]
+        return self._pieces[index][offset : offset + length]
+
+    def _seal(self) -> None:
+        """把未写满的分块连接为一个字符串"""
+        self._chunks.append("".join(self._pieces))
+        self._pieces = []
+        self._piece_starts = []
+        self._open_size = 0
+
+
+class OperationLog:
+    """操作日志
+
+    按列保存插入和删除操作，支持追加、按下标读取、从末尾弹出和
+    生成逆操作日志。删除操作的结束位置由起始位置和被删除文本推出，
+    无需另外保存。
+    """
+
+    def __init__(
+        self,
+        operations: Iterable[EditOperation] = (),
+        arena: Optional[TextArena] = None,
+    ) -> None:
+        """初始化操作日志
+
+        Args:
+            operations: 初始操作
+            arena: 共享的文本区，为 None 时新建
+        """
+        self._arena = arena if arena is not None else TextArena()
+        self._kinds = array("b")  # 操作类型
+        self._lines = array("q")  # 插入位置或删除起点的行号
+        self._columns = array("q")  # 插入位置或删除起点的列号
+        self._chunks = array("i")  # 文本所在的分块编号
+        self._starts = array("i")  # 文本在分块中的起始偏移
+        self._lengths = array("q")  # 文本长度
+        self.extend(operations)
+
+    @property
+    def arena(self) -> TextArena:
+        """保存文本的文本区"""
+        return self._arena
+
+    @property
+    def memory_usage(self) -> int:
+        """列数组估算的内存占用（字节），不含共享的文本区"""
+        return sum(column.itemsize * len(column) for column in self._fields())
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def __iter__(self) -> Iterator[EditOperation]:
+        for index in range(len(self._kinds)):
+            yield self._operation(index)
+
+    def __getitem__(self, index: int) -> EditOperation:
+        return self._operation(self._normalize(index))
+
+    def append(self, operation: EditOperation) -> None:
+        """追加一个操作
+
+        Args:
+            operation: 插入或删除操作
+
+        Raises:
+            TypeError: 操作类型不受支持
+        """
+        if isinstance(operation, InsertOperation):
+            self.append_insert(operation.position, operation.text)
+        elif isinstance(operation, DeleteOperation):
+            self.append_delete(operation.start, operation.deleted_text)
+        else:
+            raise TypeError(f"不支持的操作类型: {type(operation).__name__}")
+
+    def extend(self, operations: Iterable[EditOperation]) -> None:
+        """依次追加多个操作"""
+        for operation in operations:
+            self.append(operation)
+
+    def append_insert(self, position: Position, text: str) -> None:
+        """追加插入操作
+
+        Args:
+            position: 插入位置
+            text: 插入的文本
+        """
+        self._append(KIND_INSERT, position.line, position.column, text)
+
+    def append_delete(self, start: Position, deleted_text: str) -> None:
+        """追加删除操作
+
+        Args:
+            start: 删除范围的起点
+            deleted_text: 被删除的文本
+        """
+        self._append(KIND_DELETE, start.line, start.column, deleted_text)
+
+    def kind(self, index: int) -> int:
+        """返回操作类型（KIND_INSERT 或 KIND_DELETE）"""
+        return self._kinds[self._normalize(index)]
+
+    def position(self, index: int) -> Position:
+        """返回插入位置或删除起点"""
+        index = self._normalize(index)
+        return Position(self._lines[index], self._columns[index])
+
+    def text(self, index: int) -> str:
+        """返回插入的文本或被删除的文本"""
+        index = self._normalize(index)
+        return self._arena.get(
+            self._chunks[index], self._starts[index], self._lengths[index]
+        )
+
+    def pop(self) -> EditOperation:
+        """移除并返回最后一个操作
+
+        Raises:
+            IndexError: 日志为空
+        """
+        if not self._kinds:
+            raise IndexError("操作日志为空")
+        operation = self._operation(len(self._kinds) - 1)
+        self.truncate(len(self._kinds) - 1)
+        return operation
+
+    def truncate(self, length: int) -> None:
+        """只保留前 length 个操作
+
+        文本区只追加，被截掉的文本仍留在其中。
+        """
+        if length >= len(self._kinds):
+            return
+        length = max(length, 0)
+        for column in self._fields():
+            del column[length:]
+
+    def clear(self) -> None:
+        """清空日志"""
+        self.truncate(0)
+
+    def reverse(self) -> "OperationLog":
+        """返回逆操作日志
+
+        按相反顺序排列每个操作的逆操作，依次执行即可撤销整个日志。
+        插入与删除互为逆操作且起点和文本相同，因此只需翻转类型列
+        并倒序各列，逆日志与原日志共享文本区。
+
+        Returns:
+            OperationLog: 逆操作日志
+        """
+        reversed_log = OperationLog(arena=self._arena)
+        reversed_log._kinds = array(
+            "b", (KIND_DELETE - kind for kind in reversed(self._kinds))
+        )
+        for name in ("_lines", "_columns", "_chunks", "_starts", "_lengths"):
+            column = array(getattr(self, name).typecode, getattr(self, name))
+            column.reverse()
+            setattr(reversed_log, name, column)
+        return reversed_log
+
+    def _fields(self) -> Tuple["array[int]", ...]:
+        """返回所有列数组"""
+        return (
+            self._kinds,
+            self._lines,
+            self._columns,
+            self._chunks,
+            self._starts,
+            self._lengths,
+        )
+
+    def _append(self, kind: int, line: int, column: int, text: str) -> None:
+        """追加一行记录"""
+        chunk, start = self._arena.append(text)
+        self._kinds.append(kind)
+        self._lines.append(line)
+        self._columns.append(column)
+        self._chunks.append(chunk)
+        self._starts.append(start)
+        self._lengths.append(len(text))
+
+    def _normalize(self, index: int) -> int:
+        """把可能为负的下标转换为非负下标
+
+        Raises:
+            IndexError: 下标越界
+        """
+        count = len(self._kinds)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("操作日志下标越界")
+        return index
+
+    def _operation(self, index: int) -> EditOperation:
+        """按下标构造操作对象"""
+        line = self._lines[index]
+        column = self._columns[index]
+        text = self._arena.get(
+            self._chunks[index], self._starts[index], self._lengths[index]
+        )
+        if self._kinds[index] == KIND_INSERT:
+            return InsertOperation(Position(line, column), text)
+        return DeleteOperation(
+            Position(line, column), _text_end(line, column, text), text
+        )
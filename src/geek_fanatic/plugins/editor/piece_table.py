@@ -0,0 +1,525 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+片段表（Piece Table）存储引擎模块
+
+原始文件文本保持只读，新插入的文本追加到分块的追加缓冲区中，
+文档由按顺序排列的片段（缓冲区编号、起始偏移、长度）组成。
+片段索引采用带随机优先级的平衡树（Treap），每个节点汇总子树的
+字符数和换行数，因此插入、删除和按行查找都是对数复杂度。
+编辑通过路径复制生成新的根节点，保存旧根节点即可得到 O(1) 的只读快照。
+"""
+
+import random
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, islice
+from typing import Iterator, List, Optional, Tuple
+
+from .types import Position
+
+# 单个追加缓冲区分块的最大字符数
+ADD_CHUNK_SIZE = 64 * 1024
+
+
+def _line_feed_offsets(text: str, base: int = 0) -> "array[int]":
+    """计算文本中所有换行符的偏移
+
+    Args:
+        text: 文本
+        base: 偏移基准值
+
+    Returns:
+        array[int]: 换行符偏移数组（升序）
+    """
+    parts = text.split("\n")
+    if len(parts) == 1:
+        return array("q")
+    offsets = accumulate(
+        map(len, islice(parts, len(parts) - 1)),
+        lambda offset, length: offset + length + 1,
+        initial=base - 1,
+    )
+    return array("q", islice(offsets, 1, None))
+
+
+class _Node:
+    """片段树节点
+
+    节点创建后不再修改，编辑操作通过路径复制生成新节点，
+    因此旧的根节点始终代表一个完整且一致的文档版本。
+    """
+
+    __slots__ = (
+        "buffer",
+        "start",
+        "length",
+        "piece_lf",
+        "priority",
+        "left",
+        "right",
+        "size",
+        "lf",
+    )
+
+    def __init__(
+        self,
+        buffer: int,
+        start: int,
+        length: int,
+        piece_lf: int,
+        priority: float,
+        left: Optional["_Node"],
+        right: Optional["_Node"],
+    ) -> None:
+        self.buffer = buffer  # 缓冲区编号
+        self.start = start  # 片段在缓冲区中的起始偏移
+        self.length = length  # 片段长度
+        self.piece_lf = piece_lf  # 片段内的换行数
+        self.priority = priority  # 堆优先级
+        self.left = left
+        self.right = right
+        # 子树汇总信息
+        self.size = length
+        self.lf = piece_lf
+        if left is not None:
+            self.size += left.size
+            self.lf += left.lf
+        if right is not None:
+            self.size += right.size
+            self.lf += right.lf
+
+    def with_children(
+        self, left: Optional["_Node"], right: Optional["_Node"]
+    ) -> "_Node":
+        """复制节点并替换子节点"""
+        return _Node(
+            self.buffer,
+            self.start,
+            self.length,
+            self.piece_lf,
+            self.priority,
+            left,
+            right,
+        )
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """按顺序合并两棵树"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return left.with_children(left.left, _merge(left.right, right))
+    return right.with_children(_merge(left, right.left), right.right)
+
+
+class PieceTableView:
+    """片段表只读视图
+
+    持有某一时刻的根节点，提供全部读取接口。节点创建后不再修改，
+    追加缓冲区也只在末尾追加，已有片段引用的内容始终不变，
+    因此视图创建后可在任意线程中读取，不受之后编辑的影响。
+    """
+
+    def __init__(
+        self,
+        root: Optional[_Node],
+        buffers: List[str],
+        line_feeds: List["array[int]"],
+    ) -> None:
+        """初始化只读视图
+
+        Args:
+            root: 片段树的根节点
+            buffers: 原始缓冲区和追加缓冲区分块
+            line_feeds: 各缓冲区的换行符偏移
+        """
+        self._buffers = buffers  # 0 号为原始缓冲区，其余为追加缓冲区分块
+        self._line_feeds = line_feeds  # 各缓冲区的换行符偏移
+        self._root = root
+
+    # 基于位置的接口
+    def get_text(self) -> str:
+        """获取完整内容"""
+        return self.get_text_range(0, self.length)
+
+    def get_line(self, line_number: int) -> str:
+        """获取指定行的内容"""
+        if not 0 <= line_number < self.get_line_count():
+            return ""
+        start = self.line_start(line_number)
+        return self.get_text_range(start, self._line_end(line_number))
+
+    def get_line_count(self) -> int:
+        """获取总行数"""
+        return (self._root.lf if self._root is not None else 0) + 1
+
+    def get_range(self, start: Position, end: Position) -> str:
+        """获取指定范围的文本"""
+        return self.get_text_range(
+            self.position_to_offset(start), self.position_to_offset(end)
+        )
+
+    # 基于偏移的接口
+    @property
+    def length(self) -> int:
+        """文档总字符数"""
+        return self._root.size if self._root is not None else 0
+
+    def get_length(self) -> int:
+        """获取总字符数"""
+        return self.length
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[str]:
+        """按顺序分块迭代完整内容
+
+        节点不可变，迭代器持有调用时的根节点，之后的编辑不影响迭代结果。
+
+        Args:
+            chunk_size: 每块的最大字符数
+        """
+        return self._iter_pieces(self._root, self._buffers, chunk_size)
+
+    def get_text_range(self, start: int, end: int) -> str:
+        """获取指定偏移范围的文本
+
+        Args:
+            start: 起始偏移
+            end: 结束偏移（不含）
+
+        Returns:
+            str: 范围内的文本
+        """
+        start = max(0, start)
+        end = min(end, self.length)
+        if start >= end:
+            return ""
+        parts: List[str] = []
+        self._collect(self._root, start, end, parts)
+        return "".join(parts)
+
+    def line_start(self, line_number: int) -> int:
+        """获取指定行首的偏移
+
+        Args:
+            line_number: 行号，必须在有效范围内
+
+        Returns:
+            int: 行首偏移
+        """
+        if line_number <= 0:
+            return 0
+        # 查找第 line_number 个换行符，行首位于其后
+        node = self._root
+        k = line_number
+        offset = 0
+        while node is not None:
+            left_lf = node.left.lf if node.left is not None else 0
+            if k <= left_lf:
+                node = node.left
+                continue
+            k -= left_lf
+            offset += node.left.size if node.left is not None else 0
+            if k <= node.piece_lf:
+                line_feeds = self._line_feeds[node.buffer]
+                index = bisect_left(line_feeds, node.start) + k - 1
+                return offset + line_feeds[index] - node.start + 1
+            k -= node.piece_lf
+            offset += node.length
+            node = node.right
+        return self.length
+
+    def position_to_offset(self, position: Position) -> int:
+        """将行列位置转换为偏移
+
+        超出范围的行号和列号会被限制到文档内。
+        """
+        line = max(0, min(position.line, self.get_line_count() - 1))
+        start = self.line_start(line)
+        column = max(0, min(position.column, self._line_end(line) - start))
+        return start + column
+
+    def offset_to_position(self, offset: int) -> Position:
+        """将偏移转换为行列位置
+
+        超出范围的偏移会被限制到文档内。
+        """
+        offset = max(0, min(offset, self.length))
+        line = self._line_feeds_before(offset)
+        return Position(line, offset - self.line_start(line))
+
+    # 内部实现
+    def _count_line_feeds(self, buffer: int, start: int, length: int) -> int:
+        """统计缓冲区指定范围内的换行数"""
+        line_feeds = self._line_feeds[buffer]
+        return bisect_left(line_feeds, start + length) - bisect_left(line_feeds, start)
+
+    def _line_feeds_before(self, offset: int) -> int:
+        """统计偏移之前的换行数"""
+        node = self._root
+        count = 0
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if offset < left_size:
+                node = node.left
+                continue
+            offset -= left_size
+            count += node.left.lf if node.left is not None else 0
+            if offset < node.length:
+                return count + self._count_line_feeds(node.buffer, node.start, offset)
+            offset -= node.length
+            count += node.piece_lf
+            node = node.right
+        return count
+
+    def _line_end(self, line_number: int) -> int:
+        """获取指定行尾（不含换行符）的偏移"""
+        if line_number + 1 < self.get_line_count():
+            return self.line_start(line_number + 1) - 1
+        return self.length
+
+    def _collect(
+        self, node: Optional[_Node], start: int, end: int, parts: List[str]
+    ) -> None:
+        """按顺序收集 [start, end) 范围内的文本片段"""
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if start < left_size:
+                self._collect(node.left, start, min(end, left_size), parts)
+            piece_start = left_size
+            piece_end = left_size + node.length
+            if start < piece_end and end > piece_start:
+                begin = node.start + max(0, start - piece_start)
+                finish = node.start + min(node.length, end - piece_start)
+                parts.append(self._buffers[node.buffer][begin:finish])
+            if end <= piece_end:
+                return
+            start = max(0, start - piece_end)
+            end -= piece_end
+            node = node.right
+
+    @staticmethod
+    def _iter_pieces(
+        root: Optional[_Node], buffers: List[str], chunk_size: int
+    ) -> Iterator[str]:
+        """中序遍历片段树，按块大小切分输出"""
+        stack: List[_Node] = []
+        node = root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            buffer = buffers[node.buffer]
+            end = node.start + node.length
+            for begin in range(node.start, end, chunk_size):
+                yield buffer[begin : min(begin + chunk_size, end)]
+            node = node.right
+
+
+class PieceTable(PieceTableView):
+    """片段表文本存储
+
+    对外提供与行列表存储一致的接口，同时提供基于字符偏移的操作。
+    """
+
+    def __init__(self, text: str = "") -> None:
+        """初始化片段表
+
+        Args:
+            text: 原始文本
+        """
+        super().__init__(None, [], [])
+        self._random = random.Random()
+        self.set_text(text)
+
+    # 基于位置的接口
+    def set_text(self, text: str) -> None:
+        """设置完整内容"""
+        self._buffers = [text]
+        self._line_feeds = [_line_feed_offsets(text)]
+        self._root = None
+        if text:
+            self._root = self._new_node(0, 0, len(text))
+
+    def insert(self, position: Position, text: str) -> None:
+        """在指定位置插入文本"""
+        self.insert_at(self.position_to_offset(position), text)
+
+    def delete(self, start: Position, end: Position) -> None:
+        """删除指定范围的文本"""
+        self.delete_range(self.position_to_offset(start), self.position_to_offset(end))
+
+    def snapshot(self) -> PieceTableView:
+        """获取当前内容的只读快照
+
+        只复制根节点和缓冲区列表的引用，复杂度为 O(1)。
+        set_text 会换用新的缓冲区列表，不影响已有的快照。
+        """
+        return PieceTableView(self._root, self._buffers, self._line_feeds)
+
+    # 基于偏移的接口
+    def insert_at(self, offset: int, text: str) -> None:
+        """在指定偏移插入文本
+
+        Args:
+            offset: 插入偏移
+            text: 要插入的文本
+        """
+        if not text:
+            return
+        offset = max(0, min(offset, self.length))
+        left, right = self._split(self._root, offset)
+
+        # 连续输入时直接延长上一个片段，避免片段数量随按键增长
+        extended = self._extend_last_piece(left, text)
+        if extended is not None:
+            self._root = _merge(extended, right)
+            return
+
+        buffer, start = self._append_to_add_buffer(text)
+        node = self._new_node(buffer, start, len(text))
+        self._root = _merge(_merge(left, node), right)
+
+    def delete_range(self, start: int, end: int) -> None:
+        """删除指定偏移范围的文本
+
+        Args:
+            start: 起始偏移
+            end: 结束偏移（不含）
+        """
+        start = max(0, min(start, self.length))
+        end = max(start, min(end, self.length))
+        if start == end:
+            return
+        left, rest = self._split(self._root, start)
+        _, right = self._split(rest, end - start)
+        self._root = _merge(left, right)
+
+    # 内部实现
+    def _new_node(self, buffer: int, start: int, length: int) -> _Node:
+        """创建单片段节点"""
+        return _Node(
+            buffer,
+            start,
+            length,
+            self._count_line_feeds(buffer, start, length),
+            self._random.random(),
+            None,
+            None,
+        )
+
+    def _split(
+        self, node: Optional[_Node], offset: int
+    ) -> Tuple[Optional[_Node], Optional[_Node]]:
+        """在指定偏移处把树拆分为前后两部分
+
+        拆分点位于片段内部时，先在该片段两端拆开，再把前后两半作为
+        新的随机优先级节点分别并入两侧。两半若沿用原优先级，同一片段
+        被反复拆分（如批量编辑）后会形成优先级相同的长链，树退化为线性深度。
+        """
+        found = self._piece_at(node, offset)
+        if found is None:
+            return self._split_between(node, offset)
+        piece_start, piece = found
+        left, rest = self._split_between(node, piece_start)
+        _, right = self._split_between(rest, piece.length)
+        head = offset - piece_start
+        tail = piece.length - head
+        return (
+            _merge(left, self._new_node(piece.buffer, piece.start, head)),
+            _merge(self._new_node(piece.buffer, piece.start + head, tail), right),
+        )
+
+    @staticmethod
+    def _piece_at(node: Optional[_Node], offset: int) -> Optional[Tuple[int, _Node]]:
+        """查找内部包含指定偏移的片段
+
+        Returns:
+            Optional[Tuple[int, _Node]]: 片段的起始偏移和节点，
+                偏移位于片段边界时返回 None
+        """
+        base = 0
+        while node is not None:
+            left_size = node.left.size if node.left is not None else 0
+            if offset <= left_size:
+                node = node.left
+                continue
+            offset -= left_size
+            if offset >= node.length:
+                base += left_size + node.length
+                offset -= node.length
+                node = node.right
+                continue
+            return base + left_size, node
+        return None
+
+    def _split_between(
+        self, node: Optional[_Node], offset: int
+    ) -> Tuple[Optional[_Node], Optional[_Node]]:
+        """在片段边界处把树拆分为前后两部分"""
+        if node is None:
+            return None, None
+        left_size = node.left.size if node.left is not None else 0
+        if offset <= left_size:
+            left, right = self._split_between(node.left, offset)
+            return left, node.with_children(right, node.right)
+        left, right = self._split_between(node.right, offset - left_size - node.length)
+        return node.with_children(node.left, left), right
+
+    def _append_to_add_buffer(self, text: str) -> Tuple[int, int]:
+        """把文本追加到追加缓冲区
+
+        Returns:
+            Tuple[int, int]: 缓冲区编号和文本在其中的起始偏移
+        """
+        last = len(self._buffers) - 1
+        if last > 0 and len(self._buffers[last]) + len(text) <= ADD_CHUNK_SIZE:
+            start = len(self._buffers[last])
+            # 只在末尾追加，已有片段引用的前缀保持不变
+            self._buffers[last] += text
+            self._line_feeds[last].extend(_line_feed_offsets(text, start))
+            return last, start
+        self._buffers.append(text)
+        self._line_feeds.append(_line_feed_offsets(text))
+        return len(self._buffers) - 1, 0
+
+    def _extend_last_piece(self, node: Optional[_Node], text: str) -> Optional[_Node]:
+        """若树的最后一个片段恰好位于追加缓冲区末尾，则将其延长
+
+        Returns:
+            Optional[_Node]: 延长后的新树，无法延长时返回 None
+        """
+        if node is None:
+            return None
+        last = node
+        while last.right is not None:
+            last = last.right
+        buffer = len(self._buffers) - 1
+        if (
+            buffer == 0
+            or last.buffer != buffer
+            or last.start + last.length != len(self._buffers[buffer])
+            or len(self._buffers[buffer]) + len(text) > ADD_CHUNK_SIZE
+        ):
+            return None
+        self._append_to_add_buffer(text)
+        return self._replace_last(node, len(text))
+
+    def _replace_last(self, node: _Node, extra: int) -> _Node:
+        """沿右侧路径复制节点，并把最后一个片段延长 extra 个字符"""
+        if node.right is not None:
+            return node.with_children(node.left, self._replace_last(node.right, extra))
+        length = node.length + extra
+        return _Node(
+            node.buffer,
+            node.start,
+            length,
+            self._count_line_feeds(node.buffer, node.start, length),
+            node.priority,
+            node.left,
+            None,
+        )
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+正则表达式结构分析模块
+
+借助标准库的正则解析器（3.11 起为 re._parser，之前为 sre_parse）分析模式的结构：
+匹配最多跨越多少个换行符，以及匹配中必然出现的字面片段。
+查找替换据此决定扫描窗口的大小，三元组索引据此筛选候选文件。
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+if sys.version_info >= (3, 11):
+    from re import _parser as sre_parse
+else:
+    import sre_parse
+
+_NEWLINE = ord("\n")
+
+# 能匹配换行符的字符类别：\s、\D、\W
+_NEWLINE_CATEGORIES = (
+    sre_parse.CATEGORY_SPACE,
+    sre_parse.CATEGORY_NOT_DIGIT,
+    sre_parse.CATEGORY_NOT_WORD,
+)
+
+# 重复结构，参数为 (最少次数, 最多次数, 子模式)
+_REPEATS = tuple(
+    op
+    for op in (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, "POSSESSIVE_REPEAT", None),
+    )
+    if op is not None
+)
+
+# 原子分组 (?>...)，3.11 起支持
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+
+def _parse(pattern: str, flags: int = 0) -> Optional[Any]:
+    """解析正则表达式，无效时返回 None"""
+    try:
+        return sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+
+@lru_cache(maxsize=64)
+def newline_span(pattern: str, flags: int = 0) -> Optional[int]:
+    """匹配从起点起最多跨越的换行符数
+
+    前后断言检查的范围也计算在内。无效的正则表达式返回 0，由编译时报错。
+
+    Args:
+        pattern: 正则表达式
+        flags: 编译标志，只有 re.DOTALL 影响结果
+
+    Returns:
+        Optional[int]: 换行符数的上限，不受限（如 \\s+）时返回 None
+    """
+    parsed = _parse(pattern, flags)
+    if parsed is None:
+        return 0
+    return _span(parsed, bool(parsed.state.flags & re.DOTALL), {})
+
+
+def may_match_newline(pattern: str, flags: int = 0) -> bool:
+    """匹配是否可能包含换行符"""
+    return newline_span(pattern, flags) != 0
+
+
+def literal_runs(pattern: str) -> Optional[List[str]]:
+    """获取匹配中必然出现的字面片段
+
+    只分析顶层的连续字面字符，重复、分组和字符集处断开；
+    顶层为分支时无法确定。
+
+    Returns:
+        Optional[List[str]]: 字面片段列表，无效或无法确定时返回 None
+    """
+    parsed = _parse(pattern)
+    if parsed is None:
+        return None
+    runs: List[str] = []
+    current: List[str] = []
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if op == sre_parse.BRANCH:
+            return None
+        if current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def _set_matches_newline(items: List[Any]) -> bool:
+    """字符集（[...] 和字符类别）是否包含换行符"""
+    negate = False
+    contains = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            contains = contains or av == _NEWLINE
+        elif op == sre_parse.RANGE:
+            contains = contains or av[0] <= _NEWLINE <= av[1]
+        elif op == sre_parse.CATEGORY:
+            contains = contains or av in _NEWLINE_CATEGORIES
+    return contains != negate
+
+
+def _span(
+    pattern: Any, dotall: bool, groups: Dict[int, Optional[int]]
+) -> Optional[int]:
+    """子模式最多跨越的换行符数，不受限时返回 None
+
+    Args:
+        pattern: 解析得到的子模式
+        dotall: 当前是否启用 DOTALL，启用时 . 也匹配换行符
+        groups: 已分析的分组编号到其换行符数，用于反向引用
+    """
+    total = 0
+    for op, av in pattern:
+        span: Optional[int] = 0
+        if op == sre_parse.LITERAL:
+            span = int(av == _NEWLINE)
+        elif op == sre_parse.NOT_LITERAL:
+            span = int(av != _NEWLINE)
+        elif op == sre_parse.ANY:
+            span = int(dotall)
+        elif op == sre_parse.IN:
+            span = int(_set_matches_newline(av))
+        elif op == sre_parse.SUBPATTERN:
+            # (?s:...) 和 (?-s:...) 只在分组内改变 DOTALL
+            group, add_flags, del_flags, sub = av
+            scoped = (dotall or bool(add_flags & re.DOTALL)) and not (
+                del_flags & re.DOTALL
+            )
+            span = _span(sub, scoped, groups)
+            if group is not None:
+                groups[group] = span
+        elif op in _REPEATS:
+            _, maximum, sub = av
+            span = _span(sub, dotall, groups)
+            if span and maximum == sre_parse.MAXREPEAT:
+                span = None
+            elif span is not None:
+                span *= maximum
+        elif op == sre_parse.BRANCH:
+            span = _max_span(_span(branch, dotall, groups) for branch in av[1])
+        elif op == _ATOMIC_GROUP:
+            span = _span(av, dotall, groups)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            span = _span(av[1], dotall, groups)
+        elif op == sre_parse.GROUPREF:
+            span = groups.get(av)
+        elif op == sre_parse.GROUPREF_EXISTS:
+            branches = [sub for sub in av[1:] if sub is not None]
+            span = _max_span(_span(sub, dotall, groups) for sub in branches)
+        else:
+            span = _nested_span(av, dotall, groups)
+        if span is None:
+            return None
+        total += span
+    return total
+
+
+def _nested_span(
+    av: Any, dotall: bool, groups: Dict[int, Optional[int]]
+) -> Optional[int]:
+    """其他结构中嵌套的子模式可能跨行时视为不受限"""
+    values = av if isinstance(av, (tuple, list)) else (av,)
+    for value in values:
+        if isinstance(value, sre_parse.SubPattern):
+            if _span(value, dotall, groups) != 0:
+                return None
+    return 0
+
+
+def _max_span(spans: Iterable[Optional[int]]) -> Optional[int]:
+    """各分支换行符数的最大值，任一分支不受限时返回 None"""
+    result = 0
+    for span in spans:
+        if span is None:
+            return None
+        result = max(result, span)
+    return result
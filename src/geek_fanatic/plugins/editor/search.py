@@ -0,0 +1,516 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查找替换模块
+
+在线程池中按行对齐的文本块扫描缓冲区，匹配结果逐块推送到结果模型；
+可能跨行的匹配在相邻块之间保留有限行数的重叠窗口。
+普通文本走 str.find 快速路径，正则表达式编译后缓存复用。
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Pattern, Tuple, Union
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QRunnable,
+    Qt,
+    QThreadPool,
+    Signal,
+)
+
+from .buffer import TextBuffer
+from .regex_syntax import newline_span
+
+# 每次扫描的字符数
+SEARCH_CHUNK_SIZE = 1024 * 1024
+
+# 单次搜索的最大结果数
+MAX_SEARCH_RESULTS = 100_000
+
+# 结果预览的最大字符数
+PREVIEW_LENGTH = 200
+
+# 跨越行数不受限的正则表达式（如 \s+）中，单个匹配最多跨越的行数
+MAX_MATCH_LINES = 1000
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    """搜索条件
+
+    Attributes:
+        pattern: 搜索文本或正则表达式
+        is_regex: 是否为正则表达式
+        case_sensitive: 是否区分大小写
+        whole_word: 是否全词匹配
+    """
+
+    pattern: str
+    is_regex: bool = False
+    case_sensitive: bool = True
+    whole_word: bool = False
+
+    @property
+    def is_literal(self) -> bool:
+        """能否使用 str.find 快速路径"""
+        return not self.is_regex and self.case_sensitive and not self.whole_word
+
+    @property
+    def line_span(self) -> Optional[int]:
+        """匹配最多跨越的换行符数，不受限时为 None"""
+        if not self.is_regex:
+            return self.pattern.count("\n")
+        return newline_span(self.pattern)
+
+    @property
+    def is_multiline(self) -> bool:
+        """匹配是否可能跨行"""
+        return self.line_span != 0
+
+
+class SearchMatch:
+    """搜索结果
+
+    偏移和行列号都从0开始计数。
+    """
+
+    __slots__ = ("start", "end", "line", "column", "preview", "replacement")
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        line: int,
+        column: int,
+        preview: str,
+        replacement: Optional[str] = None,
+    ) -> None:
+        self.start = start  # 起始偏移
+        self.end = end  # 结束偏移（不含）
+        self.line = line  # 行号
+        self.column = column  # 列号
+        self.preview = preview  # 所在行预览
+        self.replacement = replacement  # 替换后的文本
+
+
+@lru_cache(maxsize=64)
+def _compile(pattern: str, flags: int) -> Pattern[str]:
+    """编译并缓存正则表达式"""
+    return re.compile(pattern, flags)
+
+
+def compile_query(query: SearchQuery) -> Pattern[str]:
+    """把搜索条件编译为正则表达式
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    pattern = query.pattern if query.is_regex else re.escape(query.pattern)
+    if query.whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    flags = re.MULTILINE
+    if not query.case_sensitive:
+        flags |= re.IGNORECASE
+    return _compile(pattern, flags)
+
+
+def _line_aligned_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """把任意切分的文本块重新切分为以换行结尾的块（最后一块除外）"""
+    pending: List[str] = []
+    for chunk in chunks:
+        cut = chunk.rfind("\n") + 1
+        if cut == 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:cut])
+        yield "".join(pending)
+        pending = [chunk[cut:]] if cut < len(chunk) else []
+    if pending:
+        yield "".join(pending)
+
+
+def find_in_chunk(
+    chunk: str,
+    query: SearchQuery,
+    replacement: Optional[str] = None,
+    start: int = 0,
+) -> Iterator[Tuple[int, int, Optional[str]]]:
+    """在单个文本块中查找
+
+    Args:
+        chunk: 文本块
+        query: 搜索条件
+        replacement: 替换文本，正则模式下支持分组引用
+        start: 开始查找的块内偏移，之前的内容只用于 ^、\b 和后向断言
+
+    Yields:
+        Tuple[int, int, Optional[str]]: 块内起始偏移、结束偏移和替换后的文本
+    """
+    if not query.pattern:
+        return
+    if query.is_literal:
+        length = len(query.pattern)
+        position = chunk.find(query.pattern, start)
+        while position >= 0:
+            yield position, position + length, replacement
+            position = chunk.find(query.pattern, position + length)
+        return
+    regex = compile_query(query)
+    for match in regex.finditer(chunk, start):
+        if match.end() == match.start():
+            continue
+        expanded = None
+        if replacement is not None:
+            expanded = match.expand(replacement) if query.is_regex else replacement
+        yield match.start(), match.end(), expanded
+
+
+def _line_start(text: str, position: int, lines_back: int) -> int:
+    """position 所在行向前 lines_back 行的行首偏移，不足时返回 0"""
+    for _ in range(lines_back + 1):
+        position = text.rfind("\n", 0, position)
+        if position < 0:
+            return 0
+    return position + 1
+
+
+def iter_matches(
+    chunks: Iterator[str],
+    query: SearchQuery,
+    replacement: Optional[str] = None,
+) -> Iterator[List[SearchMatch]]:
+    """流式查找，每处理一个文本块产出一批结果
+
+    可能跨行的查询把块尾的若干行留到下一块一起扫描：行数取匹配跨越的
+    换行符数上限，起点距块尾不足该行数的匹配推迟到下一块确定。
+    跨越行数不受限的正则表达式按 MAX_MATCH_LINES 行计算。
+
+    Args:
+        chunks: 按顺序产生内容的迭代器
+        query: 搜索条件
+        replacement: 替换文本
+
+    Yields:
+        List[SearchMatch]: 本块内确定的结果（可能为空）
+    """
+    span = query.line_span
+    context = MAX_MATCH_LINES if span is None else min(span, MAX_MATCH_LINES)
+    text = ""  # 尚未扫描的内容，以及其前 context 行供后向断言使用，从行首开始
+    text_offset = 0  # text 在全文中的偏移
+    text_line = 0  # text 首行的行号
+    position = 0  # 在 text 中继续查找的位置
+
+    aligned = _line_aligned_chunks(chunks)
+    chunk = next(aligned, None)
+    while chunk is not None:
+        following = next(aligned, None)
+        text += chunk
+        # 起点在 limit 之前的匹配只依赖已有的内容，最后一块的全部位置都已确定
+        limit = len(text)
+        if following is not None:
+            limit = _line_start(text, limit, context)
+
+        batch: List[SearchMatch] = []
+        line = text_line
+        counted = 0
+        for start, end, expanded in find_in_chunk(text, query, replacement, position):
+            if start >= limit:
+                break
+            line += text.count("\n", counted, start)
+            counted = start
+            line_start = text.rfind("\n", 0, start) + 1
+            line_end = text.find("\n", start)
+            if line_end < 0:
+                line_end = len(text)
+            preview = text[line_start : min(line_end, line_start + PREVIEW_LENGTH)]
+            batch.append(
+                SearchMatch(
+                    text_offset + start,
+                    text_offset + end,
+                    line,
+                    start - line_start,
+                    preview,
+                    expanded,
+                )
+            )
+            position = end
+        yield batch
+
+        # 丢弃已确定的内容，保留 context 行作为下一块的前文
+        position = max(position, limit)
+        cut = _line_start(text, position, context)
+        text_line += text.count("\n", 0, cut)
+        text_offset += cut
+        text = text[cut:]
+        position -= cut
+        chunk = following
+
+
+class _SearchTaskSignals(QObject):
+    """搜索任务信号"""
+
+    matchesFound = Signal(int, object)  # 搜索编号, 结果列表
+    finished = Signal(int, bool)  # 搜索编号, 结果是否被截断
+    failed = Signal(int, str)  # 搜索编号, 错误信息
+
+
+class _SearchTask(QRunnable):
+    """后台搜索任务"""
+
+    def __init__(
+        self,
+        search_id: int,
+        chunks: Iterator[str],
+        query: SearchQuery,
+        replacement: Optional[str],
+        max_results: int,
+    ) -> None:
+        """初始化搜索任务
+
+        Args:
+            search_id: 搜索编号
+            chunks: 内容迭代器，创建时已固定内容
+            query: 搜索条件
+            replacement: 替换文本
+            max_results: 最大结果数
+        """
+        super().__init__()
+        self.signals = _SearchTaskSignals()
+        self._search_id = search_id
+        self._chunks = chunks
+        self._query = query
+        self._replacement = replacement
+        self._max_results = max_results
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消搜索"""
+        self._cancelled = True
+
+    def run(self) -> None:
+        """执行搜索"""
+        found = 0
+        truncated = False
+        try:
+            for batch in iter_matches(self._chunks, self._query, self._replacement):
+                if self._cancelled:
+                    return
+                if not batch:
+                    continue
+                if found + len(batch) > self._max_results:
+                    batch = batch[: self._max_results - found]
+                    truncated = True
+                found += len(batch)
+                self.signals.matchesFound.emit(self._search_id, batch)
+                if truncated:
+                    break
+        except re.error as e:
+            self.signals.failed.emit(self._search_id, str(e))
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(self._search_id, truncated)
+
+
+class SearchResultModel(QAbstractListModel):
+    """搜索结果模型
+
+    结果按批追加，视图可以在搜索进行中显示已找到的部分。
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """初始化结果模型"""
+        super().__init__(parent)
+        self._matches: List[SearchMatch] = []
+
+    def rowCount(
+        self, parent: Union[QModelIndex, QPersistentModelIndex] = QModelIndex()
+    ) -> int:
+        """结果数量"""
+        return 0 if parent.isValid() else len(self._matches)
+
+    def data(
+        self,
+        index: Union[QModelIndex, QPersistentModelIndex],
+        role: int = Qt.DisplayRole,
+    ) -> Any:
+        """结果显示数据"""
+        if not index.isValid() or not 0 <= index.row() < len(self._matches):
+            return None
+        match = self._matches[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{match.line + 1}:{match.column + 1}  {match.preview.strip()}"
+        if role == Qt.UserRole:
+            return match
+        return None
+
+    def matches(self) -> List[SearchMatch]:
+        """获取全部结果"""
+        return list(self._matches)
+
+    def append_matches(self, matches: List[SearchMatch]) -> None:
+        """追加一批结果"""
+        if not matches:
+            return
+        first = len(self._matches)
+        self.beginInsertRows(QModelIndex(), first, first + len(matches) - 1)
+        self._matches.extend(matches)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """清空结果"""
+        self.beginResetModel()
+        self._matches.clear()
+        self.endResetModel()
+
+
+class SearchEngine(QObject):
+    """缓冲区查找替换引擎
+
+    同一时刻只运行一个搜索，开始新的搜索会取消上一个。
+    """
+
+    # 信号定义
+    searchFinished = Signal(int, bool)  # 结果总数, 结果是否被截断
+    searchFailed = Signal(str)  # 错误信息
+    replaceFinished = Signal(int)  # 替换数量，-1 表示内容已变化而放弃替换
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """初始化搜索引擎"""
+        super().__init__(parent)
+        self._model = SearchResultModel(self)
+        self._task: Optional[_SearchTask] = None
+        self._search_id = 0
+        self._buffer: Optional[TextBuffer] = None
+        self._version = -1  # 搜索开始时的缓冲区版本
+        self._replace_target: Optional[Any] = None  # 替换目标，需提供 apply_edits
+        self._replace_matches: List[SearchMatch] = []
+
+    @property
+    def model(self) -> SearchResultModel:
+        """获取结果模型"""
+        return self._model
+
+    def is_running(self) -> bool:
+        """是否有正在进行的搜索"""
+        return self._task is not None
+
+    def is_stale(self) -> bool:
+        """当前结果是否因缓冲区修改而过期"""
+        return self._buffer is None or self._buffer.version != self._version
+
+    def find(
+        self,
+        buffer: TextBuffer,
+        query: SearchQuery,
+        max_results: int = MAX_SEARCH_RESULTS,
+    ) -> None:
+        """开始搜索，结果逐批追加到结果模型
+
+        Args:
+            buffer: 要搜索的缓冲区
+            query: 搜索条件
+            max_results: 最大结果数
+        """
+        self._start(buffer, query, None, max_results)
+
+    def replace_all(
+        self,
+        buffer: TextBuffer,
+        query: SearchQuery,
+        replacement: str,
+        target: Optional[Any] = None,
+    ) -> None:
+        """查找全部匹配并一次性替换
+
+        匹配在后台线程中查找，完成后在界面线程中作为一个撤销步骤应用。
+        若查找期间缓冲区被修改则放弃替换。
+
+        Args:
+            buffer: 要搜索的缓冲区
+            query: 搜索条件
+            replacement: 替换文本，正则模式下支持 \\1 等分组引用
+            target: 应用替换的对象（如编辑器），需提供 apply_edits，默认为缓冲区本身
+        """
+        self._start(buffer, query, replacement, max_results=2**62)
+        self._replace_target = target or buffer
+
+    def cancel(self) -> None:
+        """取消正在进行的搜索"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._replace_target = None
+        self._replace_matches = []
+
+    def _start(
+        self,
+        buffer: TextBuffer,
+        query: SearchQuery,
+        replacement: Optional[str],
+        max_results: int,
+    ) -> None:
+        """启动后台搜索"""
+        self.cancel()
+        self._model.clear()
+        self._search_id += 1
+        snapshot = buffer.snapshot()
+        self._buffer = buffer
+        self._version = snapshot.version
+        self._task = _SearchTask(
+            self._search_id,
+            snapshot.iter_chunks(SEARCH_CHUNK_SIZE),
+            query,
+            replacement,
+            max_results,
+        )
+        self._task.signals.matchesFound.connect(self._on_matches_found)
+        self._task.signals.finished.connect(self._on_search_finished)
+        self._task.signals.failed.connect(self._on_search_failed)
+        QThreadPool.globalInstance().start(self._task)
+
+    def _on_matches_found(self, search_id: int, matches: List[SearchMatch]) -> None:
+        """接收一批结果"""
+        if search_id != self._search_id:
+            return
+        if self._replace_target is not None:
+            self._replace_matches.extend(matches)
+        self._model.append_matches(matches)
+
+    def _on_search_finished(self, search_id: int, truncated: bool) -> None:
+        """搜索完成"""
+        if search_id != self._search_id:
+            return
+        self._task = None
+        if self._replace_target is not None:
+            self._apply_replacements()
+        self.searchFinished.emit(self._model.rowCount(), truncated)
+
+    def _on_search_failed(self, search_id: int, message: str) -> None:
+        """搜索失败"""
+        if search_id != self._search_id:
+            return
+        self._task = None
+        self._replace_target = None
+        self._replace_matches = []
+        self.searchFailed.emit(message)
+
+    def _apply_replacements(self) -> None:
+        """把收集到的匹配作为一个批量操作应用"""
+        target = self._replace_target
+        matches = self._replace_matches
+        self._replace_target = None
+        self._replace_matches = []
+        if self.is_stale():
+            self.replaceFinished.emit(-1)
+            return
+        edits = [(match.start, match.end, match.replacement or "") for match in matches]
+        if edits and target is not None:
+            target.apply_edits(edits)
+        self.replaceFinished.emit(len(edits))
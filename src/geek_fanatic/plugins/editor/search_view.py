@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+工作区搜索视图模块
+"""
+
+import os
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QSizePolicy,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from .search import SearchQuery
+from .workspace_search import WorkspaceMatch, WorkspaceSearch
+
+
+class WorkspaceSearchView(QWidget):
+    """工作区搜索视图
+
+    结果按文件分组显示，搜索进行中随结果到达逐批追加。
+    """
+
+    # 信号定义
+    matchActivated = Signal(str, int, int)  # 文件路径, 行号, 列号
+
+    def __init__(
+        self,
+        root_provider: Callable[[], str],
+        search: Optional[WorkspaceSearch] = None,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        """初始化搜索视图
+
+        Args:
+            root_provider: 返回当前工作区根目录的函数
+            search: 工作区搜索器，默认新建
+            parent: 父widget
+        """
+        super().__init__(parent)
+        self.setWindowTitle("搜索")
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self._root_provider = root_provider
+        self._root = ""
+        self._search = search or WorkspaceSearch(parent=self)
+        self._file_items: Dict[str, QTreeWidgetItem] = {}  # 文件路径到分组节点
+        self._match_count = 0
+        self._setup_ui()
+        self._connect_signals()
+
+    @property
+    def search(self) -> WorkspaceSearch:
+        """获取工作区搜索器"""
+        return self._search
+
+    def _setup_ui(self) -> None:
+        """设置UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.setSpacing(4)
+
+        self._input = QLineEdit()
+        self._input.setPlaceholderText("搜索")
+        layout.addWidget(self._input)
+
+        options = QHBoxLayout()
+        options.setSpacing(8)
+        self._case_box = QCheckBox("Aa")
+        self._case_box.setToolTip("区分大小写")
+        self._word_box = QCheckBox("ab")
+        self._word_box.setToolTip("全字匹配")
+        self._regex_box = QCheckBox(".*")
+        self._regex_box.setToolTip("使用正则表达式")
+        for box in (self._case_box, self._word_box, self._regex_box):
+            options.addWidget(box)
+        options.addStretch()
+        layout.addLayout(options)
+
+        self._status = QLabel()
+        layout.addWidget(self._status)
+
+        self._tree = QTreeWidget()
+        self._tree.setHeaderHidden(True)
+        self._tree.setUniformRowHeights(True)
+        self._tree.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout.addWidget(self._tree)
+
+        # 设置样式
+        self.setStyleSheet(
+            """
+            QLineEdit {
+                background: #3C3C3C;
+                color: #CCCCCC;
+                border: 1px solid #3C3C3C;
+                padding: 3px;
+            }
+            QCheckBox, QLabel {
+                color: #CCCCCC;
+            }
+            QTreeWidget {
+                background: #252526;
+                color: #CCCCCC;
+                border: none;
+            }
+            QTreeWidget::item:selected {
+                background: #094771;
+            }
+        """
+        )
+
+    def _connect_signals(self) -> None:
+        """连接信号"""
+        self._input.returnPressed.connect(self.start_search)
+        self._tree.itemActivated.connect(self._on_item_activated)
+        self._tree.itemClicked.connect(self._on_item_activated)
+        self._search.matchesFound.connect(self._on_matches_found)
+        self._search.progressChanged.connect(self._on_progress_changed)
+        self._search.searchFinished.connect(self._on_search_finished)
+        self._search.searchFailed.connect(self._on_search_failed)
+
+    def query(self) -> SearchQuery:
+        """根据输入框和选项生成搜索条件"""
+        return SearchQuery(
+            self._input.text(),
+            is_regex=self._regex_box.isChecked(),
+            case_sensitive=self._case_box.isChecked(),
+            whole_word=self._word_box.isChecked(),
+        )
+
+    def start_search(self) -> None:
+        """在当前工作区根目录下开始搜索"""
+        self._tree.clear()
+        self._file_items.clear()
+        self._match_count = 0
+        self._root = self._root_provider()
+        if self._search.search(self._root, self.query()):
+            self._status.setText("正在搜索...")
+        else:
+            self._status.clear()
+
+    def _on_matches_found(self, matches: List[WorkspaceMatch]) -> None:
+        """追加一批结果"""
+        for match in matches:
+            parent = self._file_items.get(match.path)
+            if parent is None:
+                parent = QTreeWidgetItem(self._tree)
+                parent.setText(0, os.path.relpath(match.path, self._root))
+                parent.setToolTip(0, match.path)
+                parent.setExpanded(True)
+                self._file_items[match.path] = parent
+            item = QTreeWidgetItem(parent)
+            item.setText(
+                0, f"{match.line + 1}:{match.column + 1}  {match.preview.strip()}"
+            )
+            item.setData(0, Qt.UserRole, match)
+        self._match_count += len(matches)
+
+    def _on_progress_changed(self, scanned: int) -> None:
+        """更新搜索进度"""
+        self._status.setText(
+            f"正在搜索... 已扫描 {scanned} 个文件，找到 {self._match_count} 个结果"
+        )
+
+    def _on_search_finished(self, scanned: int, truncated: bool) -> None:
+        """搜索结束"""
+        text = f"{len(self._file_items)} 个文件中有 {self._match_count} 个结果"
+        if truncated:
+            text += "（结果过多，已截断）"
+        self._status.setText(text)
+
+    def _on_search_failed(self, message: str) -> None:
+        """搜索失败"""
+        self._status.setText(f"搜索失败: {message}")
+
+    def _on_item_activated(self, item: QTreeWidgetItem, column: int = 0) -> None:
+        """打开选中结果所在的文件"""
+        match = item.data(0, Qt.UserRole)
+        if isinstance(match, WorkspaceMatch):
+            self.matchActivated.emit(match.path, match.line, match.column)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+会话快照模块
+
+退出时把打开的标签页、未保存的内容、光标和滚动位置写入紧凑的二进制快照，
+下次启动时据此恢复（hot exit）。未保存的内容经过 zlib 压缩，
+快照以临时文件写入后原子替换，写入中途退出不会破坏上一次的快照。
+"""
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QStandardPaths
+from PySide6.QtWidgets import QWidget
+
+from .buffer import TextBuffer
+from .encoding import FileFormat, LineEnding
+
+# 快照文件标识
+SESSION_MAGIC = b"GFSESS01"
+
+# 文件头：标签页数, 当前标签页下标（无时为 -1）
+_HEADER = struct.Struct("<Ii")
+
+# 标签页记录：光标行, 光标列, 垂直滚动, 水平滚动, 标志位, 换行符风格,
+# 编码名字节数, 路径字节数, 压缩内容字节数
+_TAB = struct.Struct("<IIiiBBBHI")
+
+# 标签页记录的标志位
+_FLAG_DIRTY = 0x01  # 带有未保存的内容
+_FLAG_BOM = 0x02  # 文件开头有 BOM
+_FLAG_LOSSY = 0x04  # 载入时有字节被替换为 U+FFFD
+
+# 压缩未保存内容时使用的级别，优先保证退出速度
+SESSION_COMPRESS_LEVEL = 1
+
+# 保留编辑器控件的最近使用标签页数，更早的标签页只保留缓冲区
+MAX_LIVE_EDITORS = 16
+
+_LINE_ENDINGS = list(LineEnding)
+
+
+@dataclass
+class SessionTab:
+    """一个标签页的快照
+
+    Attributes:
+        path: 文件路径
+        line: 光标所在行
+        column: 光标所在列
+        scroll: 垂直和水平滚动条的值
+        content: 未保存的内容，没有未保存的修改时为 None
+        file_format: 文件的编码、BOM 和换行符风格
+    """
+
+    path: str
+    line: int = 0
+    column: int = 0
+    scroll: Tuple[int, int] = (0, 0)
+    content: Optional[str] = None
+    file_format: FileFormat = field(default_factory=FileFormat)
+
+    @property
+    def is_dirty(self) -> bool:
+        """是否带有未保存的内容"""
+        return self.content is not None
+
+
+@dataclass
+class SessionSnapshot:
+    """整个会话的快照
+
+    Attributes:
+        tabs: 按标签顺序排列的标签页
+        active: 当前标签页的下标，没有标签页时为 -1
+    """
+
+    tabs: List[SessionTab] = field(default_factory=list)
+    active: int = -1
+
+
+def default_session_path() -> str:
+    """获取会话快照的默认保存路径"""
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.AppLocalDataLocation)
+    return os.path.join(data_dir, "session.bin")
+
+
+def save_session(session_path: str, snapshot: SessionSnapshot) -> None:
+    """原子地保存会话快照
+
+    Raises:
+        OSError: 写入失败
+    """
+    parts = [SESSION_MAGIC, _HEADER.pack(len(snapshot.tabs), snapshot.active)]
+    for tab in snapshot.tabs:
+        path_data = tab.path.encode("utf-8")
+        encoding_data = tab.file_format.encoding.encode("ascii")
+        flags = _FLAG_BOM if tab.file_format.bom else 0
+        if tab.file_format.lossy:
+            flags |= _FLAG_LOSSY
+        content = b""
+        if tab.content is not None:
+            flags |= _FLAG_DIRTY
+            content = zlib.compress(
+                tab.content.encode("utf-8", "surrogatepass"), SESSION_COMPRESS_LEVEL
+            )
+        parts.append(
+            _TAB.pack(
+                tab.line,
+                tab.column,
+                tab.scroll[0],
+                tab.scroll[1],
+                flags,
+                _LINE_ENDINGS.index(tab.file_format.line_ending),
+                len(encoding_data),
+                len(path_data),
+                len(content),
+            )
+        )
+        parts.extend((encoding_data, path_data, content))
+
+    os.makedirs(os.path.dirname(session_path) or ".", exist_ok=True)
+    temp_path = f"{session_path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.writelines(parts)
+    os.replace(temp_path, session_path)
+
+
+def load_session(session_path: str) -> Optional[SessionSnapshot]:
+    """加载会话快照
+
+    Returns:
+        Optional[SessionSnapshot]: 快照，文件不存在或格式不符时返回 None
+    """
+    try:
+        with open(session_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if not data.startswith(SESSION_MAGIC):
+        return None
+    try:
+        return _parse(data)
+    except (ValueError, IndexError, struct.error, UnicodeDecodeError, zlib.error):
+        return None
+
+
+def _parse(data: bytes) -> SessionSnapshot:
+    """解析快照文件内容
+
+    Raises:
+        ValueError: 文件内容不完整
+    """
+    offset = len(SESSION_MAGIC)
+    tab_count, active = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    tabs: List[SessionTab] = []
+    for _ in range(tab_count):
+        (
+            line,
+            column,
+            vertical,
+            horizontal,
+            flags,
+            line_ending,
+            encoding_size,
+            path_size,
+            content_size,
+        ) = _TAB.unpack_from(data, offset)
+        offset += _TAB.size
+        end = offset + encoding_size + path_size + content_size
+        if end > len(data):
+            raise ValueError("truncated session")
+        encoding = data[offset : offset + encoding_size].decode("ascii")
+        offset += encoding_size
+        path = data[offset : offset + path_size].decode("utf-8")
+        offset += path_size
+        content: Optional[str] = None
+        if flags & _FLAG_DIRTY:
+            content = zlib.decompress(data[offset:end]).decode("utf-8", "surrogatepass")
+        offset = end
+        file_format = FileFormat(
+            encoding,
+            bool(flags & _FLAG_BOM),
+            _LINE_ENDINGS[line_ending],
+            bool(flags & _FLAG_LOSSY),
+        )
+        tabs.append(
+            SessionTab(path, line, column, (vertical, horizontal), content, file_format)
+        )
+    if active >= len(tabs):
+        raise ValueError("corrupt session")
+    return SessionSnapshot(tabs, active)
+
+
+class TabPlaceholder(QWidget):
+    """未创建编辑器的标签页
+
+    恢复会话时除当前标签页外都以占位控件代替，首次激活时才创建编辑器并载入文件。
+    长时间未使用的编辑器也退回占位控件，只保留缓冲区，激活时据此重建编辑器。
+    """
+
+    def __init__(
+        self,
+        tab: SessionTab,
+        buffer: Optional[TextBuffer] = None,
+        parent: Optional[QWidget] = None,
+    ) -> None:
+        """初始化占位控件
+
+        Args:
+            tab: 标签页的快照，有缓冲区时其中的内容不使用
+            buffer: 保留的缓冲区，为 None 时从快照或磁盘恢复
+            parent: 父widget
+        """
+        super().__init__(parent)
+        self._tab = tab
+        self._buffer = buffer
+
+    @property
+    def tab(self) -> SessionTab:
+        """标签页的快照"""
+        return self._tab
+
+    @property
+    def buffer(self) -> Optional[TextBuffer]:
+        """保留的缓冲区"""
+        return self._buffer
+
+    @property
+    def is_dirty(self) -> bool:
+        """是否带有未保存的内容"""
+        if self._buffer is not None:
+            return self._buffer.is_modified()
+        return self._tab.is_dirty
+
+    def snapshot(self) -> SessionTab:
+        """获取标签页的快照，未保存的内容取自保留的缓冲区"""
+        if self._buffer is None:
+            return self._tab
+        content = self._buffer.get_content() if self._buffer.is_modified() else None
+        return replace(self._tab, content=content, file_format=self._buffer.file_format)
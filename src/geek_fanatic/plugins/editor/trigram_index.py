@@ -0,0 +1,653 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+工作区三元组索引模块
+
+为工作区内每个文件记录其出现过的字节三元组（按 ASCII 小写），
+搜索时先用查询中必须出现的三元组求交得到候选文件，再逐个精确验证。
+索引以紧凑的倒排表格式保存到磁盘，按文件修改时间增量更新。
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import threading
+from array import array
+from concurrent.futures import Executor, Future
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QStandardPaths, QThreadPool, Signal
+
+from .regex_syntax import literal_runs
+from .search import SearchQuery
+from .workspace_search import (
+    BINARY_SNIFF_BYTES,
+    WORKSPACE_BATCH_SIZE,
+    WORKSPACE_MAX_FILE_SIZE,
+    iter_workspace_entries,
+)
+
+# 索引文件标识
+INDEX_MAGIC = b"GFTRIGR1"
+
+# 文件头：字节序, 文件数, 三元组数, 路径区字节数
+_HEADER = struct.Struct("<B3xIII")
+
+# 倒排表差值的存储类型，按表内最大差值选择
+_DELTA_TYPECODES = ("B", "H", "I")
+
+# 索引中的一条文件记录：路径, 修改时间（纳秒）, 大小
+FileEntry = Tuple[str, int, int]
+
+
+def extract_trigrams(data: bytes) -> "array[int]":
+    """提取内容中出现的全部三元组
+
+    内容按 ASCII 小写处理，跨行的三元组不计入。
+
+    Returns:
+        array[int]: 升序排列的三元组编码
+    """
+    found: Set[bytes] = set()
+    for line in set(data.lower().split(b"\n")):
+        found.update(line[i : i + 3] for i in range(len(line) - 2))
+    return array("I", sorted(int.from_bytes(gram, "big") for gram in found))
+
+
+def _literal_runs(query: SearchQuery) -> Optional[List[bytes]]:
+    """获取匹配结果中必然出现的字面片段
+
+    Returns:
+        Optional[List[bytes]]: 字面片段列表，无法确定时返回 None
+    """
+    if not query.is_regex:
+        return [query.pattern.encode("utf-8")]
+    runs = literal_runs(query.pattern)
+    if runs is None:
+        return None
+    return [run.encode("utf-8") for run in runs]
+
+
+def query_trigrams(query: SearchQuery) -> Optional[Set[int]]:
+    """获取匹配结果中必然出现的三元组
+
+    Returns:
+        Optional[Set[int]]: 三元组编码集合，查询过短或无法分析时返回 None
+    """
+    runs = _literal_runs(query)
+    if runs is None:
+        return None
+    grams: Set[int] = set()
+    for run in runs:
+        for line in run.lower().split(b"\n"):
+            grams.update(
+                int.from_bytes(line[i : i + 3], "big") for i in range(len(line) - 2)
+            )
+    return grams or None
+
+
+def _encode_postings(file_ids: "array[int]") -> bytes:
+    """把升序的文件编号编码为差值数组"""
+    deltas = array("I", (b - a for a, b in zip([0] + list(file_ids), file_ids)))
+    peak = max(deltas) if deltas else 0
+    for typecode in _DELTA_TYPECODES:
+        if peak < 1 << (8 * array(typecode).itemsize):
+            packed = array(typecode, deltas)
+            return typecode.encode("ascii") + packed.tobytes()
+    raise ValueError("file id out of range")
+
+
+def _decode_postings(data: bytes, swap: bool = False) -> "array[int]":
+    """解码差值数组为升序的文件编号"""
+    deltas = array(chr(data[0]))
+    deltas.frombytes(data[1:])
+    if swap:
+        deltas.byteswap()
+    return array("I", accumulate(deltas))
+
+
+def _index_files(
+    file_paths: List[str], max_file_size: int
+) -> List[Tuple[str, int, int, bytes]]:
+    """在进程池中为一批文件提取三元组
+
+    二进制文件和超过大小上限的文件记录为空的三元组集合，
+    使其在文件修改前不再被重复处理。
+
+    Returns:
+        List[Tuple[str, int, int, bytes]]: 路径, 修改时间, 大小, 三元组数组的字节
+    """
+    results: List[Tuple[str, int, int, bytes]] = []
+    for file_path in file_paths:
+        try:
+            with open(file_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                data = f.read(max_file_size + 1)
+        except OSError:
+            continue
+        if len(data) > max_file_size or b"\0" in data[:BINARY_SNIFF_BYTES]:
+            grams = array("I")
+        else:
+            grams = extract_trigrams(data)
+        results.append((file_path, stat.st_mtime_ns, stat.st_size, grams.tobytes()))
+    return results
+
+
+def default_index_path(root: str) -> str:
+    """获取工作区索引文件的默认保存路径"""
+    cache_dir = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "trigram", f"{digest}.idx")
+
+
+class TrigramIndex:
+    """三元组倒排索引
+
+    从磁盘加载的部分保持紧凑的编码形式；之后新增或修改的文件分配新的编号，
+    其倒排表保存在内存中的增量部分，旧编号标记为删除，保存时合并。
+    所有公开方法都是线程安全的。
+    """
+
+    def __init__(self) -> None:
+        """初始化空索引"""
+        self._lock = threading.RLock()
+        self._files: List[Optional[FileEntry]] = []  # 文件编号到文件记录
+        self._path_ids: Dict[str, int] = {}  # 文件路径到编号
+        self._keys = array("I")  # 已编码部分的三元组，升序
+        self._ends = array("Q")  # 每个三元组倒排表在数据区的结束偏移
+        self._postings = b""  # 已编码部分的倒排表数据
+        self._swap = False  # 已编码部分的字节序是否与本机相反
+        self._delta: Dict[int, "array[int]"] = {}  # 增量部分的倒排表
+        self._dirty = False  # 是否有尚未保存的修改
+
+    @property
+    def file_count(self) -> int:
+        """索引中的文件数"""
+        return len(self._path_ids)
+
+    def is_dirty(self) -> bool:
+        """是否有尚未保存的修改"""
+        return self._dirty
+
+    def entries(self) -> Dict[str, Tuple[int, int]]:
+        """获取全部文件的修改时间和大小
+
+        Returns:
+            Dict[str, Tuple[int, int]]: 文件路径到 (修改时间, 大小)
+        """
+        with self._lock:
+            result = {}
+            for path, file_id in self._path_ids.items():
+                entry = self._files[file_id]
+                if entry is not None:
+                    result[path] = (entry[1], entry[2])
+            return result
+
+    def add_file(
+        self, path: str, mtime_ns: int, size: int, grams: Iterable[int]
+    ) -> None:
+        """添加或更新一个文件
+
+        Args:
+            path: 文件路径
+            mtime_ns: 修改时间（纳秒）
+            size: 文件大小
+            grams: 文件内容的三元组编码
+        """
+        with self._lock:
+            self._remove(path)
+            file_id = len(self._files)
+            self._files.append((path, mtime_ns, size))
+            self._path_ids[path] = file_id
+            for gram in grams:
+                postings = self._delta.get(gram)
+                if postings is None:
+                    postings = self._delta[gram] = array("I")
+                postings.append(file_id)
+            self._dirty = True
+
+    def remove_file(self, path: str) -> None:
+        """从索引中移除文件"""
+        with self._lock:
+            if self._remove(path):
+                self._dirty = True
+
+    def candidates(self, query: SearchQuery) -> Optional[List[str]]:
+        """获取可能包含匹配的文件
+
+        Returns:
+            Optional[List[str]]: 候选文件路径，查询无法使用索引时返回 None
+        """
+        grams = query_trigrams(query)
+        if grams is None:
+            return None
+        with self._lock:
+            lists = sorted((self._lookup(gram) for gram in grams), key=len)
+            if not lists or not lists[0]:
+                return []
+            result = set(lists[0])
+            for file_ids in lists[1:]:
+                result.intersection_update(file_ids)
+                if not result:
+                    return []
+            return [
+                entry[0]
+                for entry in (self._files[file_id] for file_id in sorted(result))
+                if entry is not None
+            ]
+
+    def load(self, index_path: str) -> bool:
+        """从磁盘加载索引
+
+        Returns:
+            bool: 是否加载成功，文件不存在或格式不符时返回 False
+        """
+        try:
+            with open(index_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        if not data.startswith(INDEX_MAGIC):
+            return False
+        try:
+            files, keys, ends, postings, swap = self._parse(data)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return False
+        with self._lock:
+            self._files = list(files)
+            self._path_ids = {entry[0]: i for i, entry in enumerate(files)}
+            self._keys, self._ends, self._postings = keys, ends, postings
+            self._swap = swap
+            self._delta.clear()
+            self._dirty = False
+        return True
+
+    def save(self, index_path: str) -> None:
+        """合并增量部分并原子地保存到磁盘
+
+        Raises:
+            OSError: 写入失败
+        """
+        with self._lock:
+            self._compact()
+            paths = "\0".join(entry[0] for entry in self._files if entry is not None)
+            path_data = paths.encode("utf-8")
+            mtimes = array("q", (entry[1] for entry in self._files if entry))
+            sizes = array("q", (entry[2] for entry in self._files if entry))
+            header = _HEADER.pack(
+                sys.byteorder == "big", len(mtimes), len(self._keys), len(path_data)
+            )
+            parts = [
+                INDEX_MAGIC,
+                header,
+                path_data,
+                mtimes.tobytes(),
+                sizes.tobytes(),
+                self._keys.tobytes(),
+                self._ends.tobytes(),
+                self._postings,
+            ]
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.writelines(parts)
+        os.replace(temp_path, index_path)
+
+    def _remove(self, path: str) -> bool:
+        """把文件的旧编号标记为删除"""
+        file_id = self._path_ids.pop(path, None)
+        if file_id is None:
+            return False
+        self._files[file_id] = None
+        return True
+
+    def _lookup(self, gram: int) -> "array[int]":
+        """获取一个三元组的完整倒排表，可能包含已删除的编号"""
+        result = array("I")
+        index = self._find_key(gram)
+        if index >= 0:
+            start = self._ends[index - 1] if index else 0
+            result = _decode_postings(
+                self._postings[start : self._ends[index]], self._swap
+            )
+        delta = self._delta.get(gram)
+        if delta is not None:
+            result.extend(delta)
+        return result
+
+    def _find_key(self, gram: int) -> int:
+        """在已编码部分中二分查找三元组，未找到时返回 -1"""
+        low, high = 0, len(self._keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._keys[middle] < gram:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._keys) and self._keys[low] == gram:
+            return low
+        return -1
+
+    def _compact(self) -> None:
+        """合并已编码部分和增量部分，重新分配连续的文件编号"""
+        remap = array("q", [-1]) * len(self._files)
+        files: List[Optional[FileEntry]] = []
+        for file_id, entry in enumerate(self._files):
+            if entry is not None:
+                remap[file_id] = len(files)
+                files.append(entry)
+
+        keys = array("I")
+        ends = array("Q")
+        chunks: List[bytes] = []
+        offset = 0
+        for gram in sorted(set(self._keys).union(self._delta)):
+            file_ids = array(
+                "I", (remap[i] for i in self._lookup(gram) if remap[i] >= 0)
+            )
+            if not file_ids:
+                continue
+            encoded = _encode_postings(file_ids)
+            keys.append(gram)
+            offset += len(encoded)
+            ends.append(offset)
+            chunks.append(encoded)
+
+        self._files = files
+        self._path_ids = {entry[0]: i for i, entry in enumerate(files) if entry}
+        self._keys, self._ends, self._postings = keys, ends, b"".join(chunks)
+        self._swap = False
+        self._delta.clear()
+
+    @staticmethod
+    def _parse(
+        data: bytes,
+    ) -> Tuple[List[FileEntry], "array[int]", "array[int]", bytes, bool]:
+        """解析索引文件内容
+
+        Raises:
+            ValueError: 文件内容不完整
+        """
+        offset = len(INDEX_MAGIC)
+        big_endian, file_count, key_count, path_size = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        swap = bool(big_endian) != (sys.byteorder == "big")
+
+        def take(typecode: str, count: int) -> "array[int]":
+            nonlocal offset
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset : offset + size])
+            if len(values) != count:
+                raise ValueError("truncated index")
+            if swap:
+                values.byteswap()
+            offset += size
+            return values
+
+        paths = data[offset : offset + path_size].decode("utf-8").split("\0")
+        offset += path_size
+        mtimes = take("q", file_count)
+        sizes = take("q", file_count)
+        keys = take("I", key_count)
+        ends = take("Q", key_count)
+        if file_count == 0:
+            paths = []
+        if len(paths) != file_count:
+            raise ValueError("corrupt index")
+        files = list(zip(paths, mtimes, sizes))
+        return files, keys, ends, data[offset:], swap
+
+
+class _IndexTaskSignals(QObject):
+    """索引任务信号"""
+
+    progress = Signal(int, int)  # 已处理文件数, 需要处理的文件数
+    finished = Signal(int)  # 索引中的文件数
+    failed = Signal(str)  # 错误信息
+
+
+class _IndexTask(QRunnable):
+    """后台索引刷新任务
+
+    加载磁盘上的索引，遍历工作区对比修改时间和大小，
+    把新增或修改的文件分批交给进程池提取三元组，最后保存索引。
+    """
+
+    def __init__(
+        self,
+        index: TrigramIndex,
+        root: str,
+        index_path: str,
+        executor: Executor,
+        max_file_size: int,
+        paths: Optional[List[str]] = None,
+    ) -> None:
+        """初始化索引任务
+
+        Args:
+            index: 要更新的索引
+            root: 工作区根目录
+            index_path: 索引文件路径
+            executor: 提取三元组的进程池
+            max_file_size: 文件大小上限（字节）
+            paths: 只检查这些文件，为 None 时遍历整个工作区
+        """
+        super().__init__()
+        self.signals = _IndexTaskSignals()
+        self._index = index
+        self._root = root
+        self._index_path = index_path
+        self._executor = executor
+        self._max_file_size = max_file_size
+        self._paths = paths
+        self._futures: List[Future] = []
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消刷新，已完成的部分仍保留在内存中"""
+        self._cancelled = True
+        for future in list(self._futures):
+            future.cancel()
+
+    def run(self) -> None:
+        """执行刷新"""
+        if self._paths is None and self._index.file_count == 0:
+            self._index.load(self._index_path)
+        changed = self._collect_changes()
+        total = len(changed)
+        done = 0
+        for start in range(0, total, WORKSPACE_BATCH_SIZE):
+            if self._cancelled:
+                return
+            self._futures.append(
+                self._executor.submit(
+                    _index_files,
+                    changed[start : start + WORKSPACE_BATCH_SIZE],
+                    self._max_file_size,
+                )
+            )
+        for future in self._futures:
+            if self._cancelled:
+                return
+            try:
+                results = future.result()
+            except Exception as e:  # 进程池异常不应中断整个刷新
+                self.signals.failed.emit(str(e))
+                return
+            for path, mtime_ns, size, data in results:
+                grams = array("I")
+                grams.frombytes(data)
+                self._index.add_file(path, mtime_ns, size, grams)
+            done += WORKSPACE_BATCH_SIZE
+            self.signals.progress.emit(min(done, total), total)
+
+        if self._index.is_dirty():
+            try:
+                self._index.save(self._index_path)
+            except OSError as e:
+                self.signals.failed.emit(str(e))
+                return
+        self.signals.finished.emit(self._index.file_count)
+
+    def _collect_changes(self) -> List[str]:
+        """找出需要重新提取的文件，并移除已不存在的文件"""
+        known = self._index.entries()
+        changed: List[str] = []
+        if self._paths is not None:
+            for path in self._paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    self._index.remove_file(path)
+                    continue
+                if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append(path)
+            return changed
+
+        seen: Set[str] = set()
+        for path, stat in iter_workspace_entries(self._root, self._max_file_size):
+            if self._cancelled:
+                break
+            seen.add(path)
+            if known.get(path) != (stat.st_mtime_ns, stat.st_size):
+                changed.append(path)
+        if not self._cancelled:
+            for path in known.keys() - seen:
+                self._index.remove_file(path)
+        return changed
+
+
+class TrigramIndexer(QObject):
+    """工作区索引管理器
+
+    同一时刻只运行一个刷新任务；刷新完成前索引仍可使用，
+    结果可能遗漏最近修改的文件。
+    """
+
+    # 信号定义
+    progressChanged = Signal(int, int)  # 已处理文件数, 需要处理的文件数
+    indexReady = Signal(int)  # 索引中的文件数
+    indexFailed = Signal(str)  # 错误信息
+
+    def __init__(
+        self,
+        executor_provider: Callable[[], Executor],
+        max_file_size: int = WORKSPACE_MAX_FILE_SIZE,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化索引管理器
+
+        Args:
+            executor_provider: 返回提取三元组所用进程池的函数
+            max_file_size: 超过该字节数的文件不建立索引
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._executor_provider = executor_provider
+        self._max_file_size = max_file_size
+        self._index = TrigramIndex()
+        self._root: Optional[str] = None
+        self._index_path = ""
+        self._task: Optional[_IndexTask] = None
+        self._ready = False
+
+    @property
+    def index(self) -> TrigramIndex:
+        """获取索引"""
+        return self._index
+
+    @property
+    def root(self) -> Optional[str]:
+        """已建立索引的工作区根目录"""
+        return self._root
+
+    def is_ready(self) -> bool:
+        """索引是否已完成至少一次完整刷新"""
+        return self._ready
+
+    def set_max_file_size(self, size: int) -> None:
+        """设置建立索引的文件大小上限（字节）"""
+        self._max_file_size = size
+
+    def set_root(self, root: str, index_path: Optional[str] = None) -> None:
+        """切换工作区并在后台加载、刷新索引
+
+        Args:
+            root: 工作区根目录
+            index_path: 索引文件路径，默认保存在用户缓存目录
+        """
+        self.cancel()
+        self._root = root
+        self._index_path = index_path or default_index_path(root)
+        self._index = TrigramIndex()
+        self._ready = False
+        self.refresh()
+
+    def refresh(self, paths: Optional[List[str]] = None) -> None:
+        """按修改时间增量刷新索引
+
+        Args:
+            paths: 只检查这些文件（如文件监视事件），为 None 时遍历整个工作区
+        """
+        if self._root is None:
+            return
+        if paths is not None:
+            prefix = os.path.join(os.path.abspath(self._root), "")
+            paths = [path for path in paths if os.path.abspath(path).startswith(prefix)]
+            if not paths:
+                return
+        if self._task is not None:
+            if paths is not None:
+                # 完整刷新进行中，会一并处理这些文件
+                return
+            self._task.cancel()
+        self._task = _IndexTask(
+            self._index,
+            self._root,
+            self._index_path,
+            self._executor_provider(),
+            self._max_file_size,
+            paths,
+        )
+        task = self._task
+        task.signals.progress.connect(self.progressChanged)
+        task.signals.finished.connect(lambda count: self._on_finished(task, count))
+        task.signals.failed.connect(lambda message: self._on_failed(task, message))
+        QThreadPool.globalInstance().start(task)
+
+    def cancel(self) -> None:
+        """取消正在进行的刷新"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def candidates(self, root: str, query: SearchQuery) -> Optional[List[str]]:
+        """获取工作区内可能包含匹配的文件
+
+        Returns:
+            Optional[List[str]]: 候选文件路径，索引不可用时返回 None
+        """
+        if not self._ready or root != self._root:
+            return None
+        return self._index.candidates(query)
+
+    def _on_finished(self, task: _IndexTask, file_count: int) -> None:
+        """刷新完成"""
+        if task is not self._task:
+            return
+        self._task = None
+        self._ready = True
+        self.indexReady.emit(file_count)
+
+    def _on_failed(self, task: _IndexTask, message: str) -> None:
+        """刷新失败"""
+        if task is not self._task:
+            return
+        self._task = None
+        self.indexFailed.emit(message)
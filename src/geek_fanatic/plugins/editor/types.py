@@ -6,7 +6,7 @@
 """
 
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Iterator, Protocol
 
 @dataclass
 class Position:
@@ -19,6 +19,8 @@ class Position:
         line: 行号
         column: 列号
     """
+    __slots__ = ("line", "column")
+
     line: int
     column: int
 
@@ -31,6 +33,70 @@ class TextOperation(Protocol):
         """返回此操作的逆操作"""
         ...
 
+class TextReader(Protocol):
+    """文本读取协议类
+
+    定义只读访问文本内容的接口，文本存储和快照都实现该接口。
+    """
+    def get_text(self) -> str:
+        """获取完整内容"""
+        ...
+
+    def get_line(self, line_number: int) -> str:
+        """获取指定行的内容"""
+        ...
+
+    def get_line_count(self) -> int:
+        """获取总行数"""
+        ...
+
+    def get_range(self, start: Position, end: Position) -> str:
+        """获取指定范围的文本"""
+        ...
+
+    def get_length(self) -> int:
+        """获取总字符数"""
+        ...
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[str]:
+        """按顺序分块迭代完整内容
+
+        迭代器在调用时固定当前内容，之后的编辑不影响已返回的迭代器。
+        """
+        ...
+
+    def offset_to_position(self, offset: int) -> Position:
+        """将字符偏移转换为行列位置"""
+        ...
+
+    def position_to_offset(self, position: Position) -> int:
+        """将行列位置转换为字符偏移"""
+        ...
+
+class TextStorage(TextReader, Protocol):
+    """文本存储协议类
+
+    定义文本缓冲区底层存储引擎的接口。
+    """
+    def set_text(self, text: str) -> None:
+        """设置完整内容"""
+        ...
+
+    def insert(self, position: Position, text: str) -> None:
+        """在指定位置插入文本"""
+        ...
+
+    def delete(self, start: Position, end: Position) -> None:
+        """删除指定范围的文本"""
+        ...
+
+    def snapshot(self) -> TextReader:
+        """获取当前内容的只读快照
+
+        快照不受之后编辑的影响，可在后台线程中读取。
+        """
+        ...
+
 @dataclass
 class InsertOperation:
     """插入操作
@@ -41,16 +107,25 @@ class InsertOperation:
         position: 插入位置
         text: 要插入的文本
     """
+    __slots__ = ("position", "text")
+
     position: Position
     text: str
 
+    @property
+    def end(self) -> Position:
+        """插入文本之后的位置"""
+        line_feeds = self.text.count("\n")
+        if line_feeds == 0:
+            return Position(self.position.line, self.position.column + len(self.text))
+        return Position(
+            self.position.line + line_feeds,
+            len(self.text) - self.text.rfind("\n") - 1
+        )
+
     def reverse(self) -> 'DeleteOperation':
         """返回对应的删除操作"""
-        end_position = Position(
-            self.position.line,
-            self.position.column + len(self.text)
-        )
-        return DeleteOperation(self.position, end_position, self.text)
+        return DeleteOperation(self.position, self.end, self.text)
 
 @dataclass
 class DeleteOperation:
@@ -63,6 +138,8 @@ class DeleteOperation:
         end: 结束位置
         deleted_text: 被删除的文本
     """
+    __slots__ = ("start", "end", "deleted_text")
+
     start: Position
     end: Position
     deleted_text: str
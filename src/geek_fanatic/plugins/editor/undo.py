@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+撤销历史模块
+
+把连续的单字符输入和删除按单词和时间合并为撤销组，
+并按估算的内存占用限制历史总量，超出上限时丢弃最旧的组。
+"""
+
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Union
+
+from .types import DeleteOperation, InsertOperation, Position, TextOperation
+
+# 撤销历史的默认内存上限（字节）
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# 两次编辑间隔超过该秒数时开始新的撤销组
+UNDO_GROUP_TIMEOUT = 1.0
+
+# 每个操作记录的固定开销估算（字节）
+_OPERATION_OVERHEAD = 256
+
+EditOperation = Union[InsertOperation, DeleteOperation]
+
+
+def _text_size(text: str) -> int:
+    """估算字符串占用的字节数"""
+    return len(text) if text.isascii() else len(text) * 4
+
+
+def _operation_size(operation: EditOperation) -> int:
+    """估算单个操作占用的字节数"""
+    if isinstance(operation, InsertOperation):
+        return _OPERATION_OVERHEAD + _text_size(operation.text)
+    return _OPERATION_OVERHEAD + _text_size(operation.deleted_text)
+
+
+class UndoGroup:
+    """撤销组
+
+    一次撤销或重做会整体应用组内的所有操作。
+    """
+
+    __slots__ = (
+        "operations",
+        "timestamp",
+        "size",
+        "closed",
+        "state_before",
+        "state_after",
+    )
+
+    def __init__(
+        self, operation: EditOperation, timestamp: float, state_before: int
+    ) -> None:
+        """初始化撤销组
+
+        Args:
+            operation: 组内的第一个操作
+            timestamp: 最近一次编辑的时间
+            state_before: 执行本组之前的内容状态号
+        """
+        self.operations: List[EditOperation] = [operation]
+        self.timestamp = timestamp
+        self.size = _operation_size(operation)
+        self.closed = False  # 关闭后不再合并新的操作
+        self.state_before = state_before
+        self.state_after = state_before  # 执行本组之后的内容状态号
+
+
+class UndoHistory:
+    """撤销历史
+
+    只合并单行、位置连续且在时间窗口内的同类编辑；
+    输入从空白切换到非空白字符时开始新组，使撤销以单词为单位。
+
+    每次编辑为内容分配一个新的状态号，撤销和重做恢复对应的状态号，
+    比较状态号即可在 O(1) 时间内判断内容是否回到了某个时刻。
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = UNDO_MEMORY_LIMIT,
+        group_timeout: float = UNDO_GROUP_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """初始化撤销历史
+
+        Args:
+            memory_limit: 内存上限（字节）
+            group_timeout: 合并编辑的最大时间间隔（秒）
+            clock: 时间函数
+        """
+        self._undo: Deque[UndoGroup] = deque()
+        self._redo: List[UndoGroup] = []
+        self._memory_limit = memory_limit
+        self._group_timeout = group_timeout
+        self._clock = clock
+        self._size = 0  # 撤销栈估算的总字节数
+        self._state = 0  # 当前内容的状态号
+        self._next_state = 1  # 下一个可分配的状态号
+
+    @property
+    def memory_usage(self) -> int:
+        """撤销栈估算的内存占用（字节）"""
+        return self._size
+
+    @property
+    def memory_limit(self) -> int:
+        """内存上限（字节）"""
+        return self._memory_limit
+
+    def set_memory_limit(self, limit: int) -> None:
+        """设置内存上限，必要时立即丢弃最旧的组"""
+        self._memory_limit = limit
+        self._evict()
+
+    @property
+    def state(self) -> int:
+        """当前内容的状态号，撤销和重做会恢复先前的状态号"""
+        return self._state
+
+    def new_state(self) -> int:
+        """为在历史之外被修改的内容分配新的状态号，例如整体替换内容之后"""
+        self._state = self._next_state
+        self._next_state += 1
+        return self._state
+
+    def can_undo(self) -> bool:
+        """是否可以撤销"""
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        """是否可以重做"""
+        return bool(self._redo)
+
+    def group_count(self) -> int:
+        """撤销组数量"""
+        return len(self._undo)
+
+    def clear(self) -> None:
+        """清空历史"""
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+
+    def close_group(self) -> None:
+        """结束当前撤销组，之后的编辑进入新组"""
+        if self._undo:
+            self._undo[-1].closed = True
+
+    def push(self, operation: EditOperation) -> None:
+        """记录一个已执行的操作
+
+        Args:
+            operation: 插入或删除操作
+        """
+        self._redo.clear()
+        now = self._clock()
+        group = self._undo[-1] if self._undo else None
+        if (
+            group is not None
+            and not group.closed
+            and now - group.timestamp <= self._group_timeout
+        ):
+            merged = self._merge(group.operations[-1], operation)
+            if merged is not None:
+                self._size -= group.size
+                group.size += _operation_size(merged) - _operation_size(
+                    group.operations[-1]
+                )
+                group.operations[-1] = merged
+                group.timestamp = now
+                group.state_after = self.new_state()
+                self._size += group.size
+                self._evict()
+                return
+
+        new_group = UndoGroup(operation, now, self._state)
+        new_group.state_after = self.new_state()
+        self._undo.append(new_group)
+        self._size += new_group.size
+        self._evict()
+
+    def push_group(self, operations: List[EditOperation]) -> None:
+        """把多个已执行的操作记录为一个独立的撤销组"""
+        if not operations:
+            return
+        self._redo.clear()
+        group = UndoGroup(operations[0], self._clock(), self._state)
+        group.state_after = self.new_state()
+        for operation in operations[1:]:
+            group.operations.append(operation)
+            group.size += _operation_size(operation)
+        group.closed = True
+        self._undo.append(group)
+        self._size += group.size
+        self._evict()
+
+    def pop_undo(self) -> Optional[List[TextOperation]]:
+        """取出下一组要撤销的操作
+
+        Returns:
+            Optional[List[TextOperation]]: 按执行顺序排列的逆操作，无可撤销时返回 None
+        """
+        if not self._undo:
+            return None
+        group = self._undo.pop()
+        group.closed = True
+        self._size -= group.size
+        self._redo.append(group)
+        self._state = group.state_before
+        return [operation.reverse() for operation in reversed(group.operations)]
+
+    def pop_redo(self) -> Optional[List[TextOperation]]:
+        """取出下一组要重做的操作
+
+        Returns:
+            Optional[List[TextOperation]]: 按执行顺序排列的操作，无可重做时返回 None
+        """
+        if not self._redo:
+            return None
+        group = self._redo.pop()
+        self._undo.append(group)
+        self._size += group.size
+        self._state = group.state_after
+        return list(group.operations)
+
+    def _evict(self) -> None:
+        """超出内存上限时丢弃最旧的组，至少保留最近一组"""
+        while self._size > self._memory_limit and len(self._undo) > 1:
+            self._size -= self._undo.popleft().size
+
+    @staticmethod
+    def _merge(
+        last: EditOperation, operation: EditOperation
+    ) -> Optional[EditOperation]:
+        """尝试把新操作合并到上一个操作
+
+        Returns:
+            Optional[EditOperation]: 合并后的操作，无法合并时返回 None
+        """
+        if isinstance(last, InsertOperation) and isinstance(operation, InsertOperation):
+            if "\n" in operation.text or "\n" in last.text or not operation.text:
+                return None
+            if operation.position != last.end:
+                return None
+            # 空白之后开始输入新单词时断开
+            if last.text[-1:].isspace() and not operation.text[:1].isspace():
+                return None
+            return InsertOperation(last.position, last.text + operation.text)
+
+        if isinstance(last, DeleteOperation) and isinstance(operation, DeleteOperation):
+            if (
+                last.start.line != last.end.line
+                or operation.start.line != operation.end.line
+            ):
+                return None
+            if operation.end == last.start:
+                # 连续退格
+                return DeleteOperation(
+                    operation.start,
+                    last.end,
+                    operation.deleted_text + last.deleted_text,
+                )
+            if operation.start == last.start:
+                # 连续向后删除
+                text = last.deleted_text + operation.deleted_text
+                return DeleteOperation(
+                    last.start,
+                    Position(last.start.line, last.start.column + len(text)),
+                    text,
+                )
+        return None
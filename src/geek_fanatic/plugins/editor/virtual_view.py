@@ -0,0 +1,650 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+虚拟化文本视图模块
+
+QPlainTextEdit 会排版整行文本，单行达到数 MB 时每次排版和绘制都与行长成正比。
+本视图直接读取 TextBuffer，只排版可见行中可见的水平片段：行按固定行高排列，
+列按等宽字体的字符宽度排列，每行按固定长度分段，各段排版得到的字形序列
+缓存起来，滚动和重绘时直接复用。
+"""
+
+import sys
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QPointF, Qt, Signal
+from PySide6.QtGui import (
+    QColor,
+    QFocusEvent,
+    QFont,
+    QFontMetrics,
+    QGlyphRun,
+    QGuiApplication,
+    QInputMethodEvent,
+    QKeyEvent,
+    QKeySequence,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QResizeEvent,
+    QTextLayout,
+    QTextOption,
+)
+from PySide6.QtWidgets import QAbstractScrollArea, QWidget
+
+from .buffer import TextBuffer
+from .types import Position
+
+# 任一行超过该字符数时切换到虚拟化视图
+VIRTUAL_LINE_LENGTH = 10_000
+
+# 总行数超过该值时切换到虚拟化视图
+VIRTUAL_LINE_COUNT = 1_000_000
+
+# 每段排版的字符数
+GLYPH_CHUNK_SIZE = 256
+
+# 字形缓存最多保存的段数
+GLYPH_CACHE_SIZE = 4096
+
+# 颜色与 Editor 的样式表一致
+BACKGROUND_COLOR = "#1e1e1e"
+FOREGROUND_COLOR = "#d4d4d4"
+SELECTION_COLOR = "#264f78"
+CURSOR_COLOR = "#aeafad"
+
+# 行尾列号的上限，换算位置时限制到行尾
+_LINE_END = sys.maxsize
+
+
+class GlyphRunCache:
+    """按 (行号, 段号) 缓存排版得到的字形序列
+
+    缓存项同时保存段文本，命中时比较文本确认仍然有效，
+    因此编辑后无需逐项失效，过期的项按最近最少使用淘汰。
+    """
+
+    def __init__(self, font: QFont, capacity: int = GLYPH_CACHE_SIZE) -> None:
+        """初始化缓存
+
+        Args:
+            font: 排版字体
+            capacity: 最多保存的段数
+        """
+        self._font = font
+        self._capacity = capacity
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[str, List[QGlyphRun]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_font(self, font: QFont) -> None:
+        """更换字体并清空缓存"""
+        self._font = font
+        self._entries.clear()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def get(self, line: int, chunk: int, text: str) -> List[QGlyphRun]:
+        """获取一段文本的字形序列，未命中时排版并缓存
+
+        Args:
+            line: 行号
+            chunk: 段号
+            text: 段文本
+
+        Returns:
+            List[QGlyphRun]: 以段起点为原点的字形序列
+        """
+        key = (line, chunk)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == text:
+            self._entries.move_to_end(key)
+            return entry[1]
+        runs = self._layout(text)
+        self._entries[key] = (text, runs)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+        return runs
+
+    def _layout(self, text: str) -> List[QGlyphRun]:
+        """排版一段文本，制表符按一个字符宽度显示"""
+        layout = QTextLayout(text.replace("\t", " "), self._font)
+        option = QTextOption()
+        option.setWrapMode(QTextOption.NoWrap)
+        layout.setTextOption(option)
+        layout.beginLayout()
+        layout.createLine()
+        layout.endLayout()
+        return layout.glyphRuns()
+
+
+class VirtualTextView(QAbstractScrollArea):
+    """虚拟化文本视图
+
+    以 TextBuffer 为唯一数据源，编辑直接作用于缓冲区并记录到其撤销历史。
+    按等宽单元格排列字符，列号乘以字符宽度即为横坐标，
+    因此定位任意行列都不需要排版该行之前的内容。
+    """
+
+    # 信号定义
+    cursorPositionChanged = Signal(int, int)  # 光标位置变更信号
+    selectionChanged = Signal()  # 选择变更信号
+    textEdited = Signal()  # 通过视图修改了缓冲区内容
+
+    def __init__(self, buffer: TextBuffer, parent: Optional[QWidget] = None) -> None:
+        """初始化视图
+
+        Args:
+            buffer: 显示和编辑的文本缓冲区
+            parent: 父widget
+        """
+        super().__init__(parent)
+        self._buffer = buffer
+        self._cursor = Position(0, 0)  # 光标位置
+        self._anchor = Position(0, 0)  # 选择锚点，与光标相同时没有选择
+        self._preferred_column = 0  # 上下移动时保持的列号
+        self._max_columns = 0  # 已知的最长行字符数，用于水平滚动范围
+        self._read_only = False
+
+        self._setup_ui()
+        self._cache = GlyphRunCache(self.viewport().font())
+
+    def _setup_ui(self) -> None:
+        """设置UI"""
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPixelSize(14)
+        self.viewport().setFont(font)
+        self.setFont(font)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.setAttribute(Qt.WA_InputMethodEnabled)
+        self.setStyleSheet(
+            """
+            QAbstractScrollArea {
+                background-color: #1e1e1e;
+                border: none;
+            }
+        """
+        )
+        self._update_scroll_bars()
+
+    @property
+    def buffer(self) -> TextBuffer:
+        """显示的文本缓冲区"""
+        return self._buffer
+
+    @property
+    def glyph_cache(self) -> GlyphRunCache:
+        """字形缓存"""
+        return self._cache
+
+    def set_read_only(self, read_only: bool) -> None:
+        """设置是否只读"""
+        self._read_only = read_only
+
+    def is_read_only(self) -> bool:
+        """是否只读"""
+        return self._read_only
+
+    def set_longest_line(self, length: int) -> None:
+        """设置已知的最长行字符数，用于确定水平滚动范围"""
+        self._max_columns = length
+        self._update_scroll_bars()
+
+    def reset(self, position: Optional[Position] = None) -> None:
+        """缓冲区被整体替换后重置视图状态
+
+        Args:
+            position: 光标位置，默认为文档开头
+        """
+        self._cache.clear()
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.set_cursor_position(position or Position(0, 0))
+        self.refresh()
+
+    def refresh(self) -> None:
+        """缓冲区在视图外被修改后，限制光标和锚点并重绘"""
+        self._cursor = self._clamp(self._cursor)
+        self._anchor = self._clamp(self._anchor)
+        self._update_scroll_bars()
+        self.viewport().update()
+
+    # 行信息
+    def line_count(self) -> int:
+        """总行数"""
+        return self._buffer.get_line_count()
+
+    def line_length(self, line: int) -> int:
+        """指定行的字符数（不含换行符），复杂度为 O(log n)"""
+        start = self._buffer.position_to_offset(Position(line, 0))
+        return self._buffer.position_to_offset(Position(line, _LINE_END)) - start
+
+    def _clamp(self, position: Position) -> Position:
+        """把位置限制到文档内"""
+        line = max(0, min(position.line, self.line_count() - 1))
+        column = max(0, min(position.column, self.line_length(line)))
+        return Position(line, column)
+
+    # 光标与选择
+    def cursor_position(self) -> Position:
+        """光标位置"""
+        return self._cursor
+
+    def set_cursor_position(
+        self, position: Position, keep_anchor: bool = False
+    ) -> None:
+        """移动光标
+
+        Args:
+            position: 目标位置，超出范围时限制到文档内
+            keep_anchor: 是否保留锚点以扩展选择
+        """
+        self._move_cursor(self._clamp(position), keep_anchor)
+        self._preferred_column = self._cursor.column
+
+    def _move_cursor(self, position: Position, keep_anchor: bool) -> None:
+        """移动光标并发出相应的信号，不修改上下移动时保持的列号"""
+        had_selection = self.has_selection()
+        moved = position != self._cursor
+        self._cursor = position
+        if not keep_anchor:
+            self._anchor = position
+        self.ensure_cursor_visible()
+        self.viewport().update()
+        if moved:
+            self.cursorPositionChanged.emit(position.line, position.column)
+        if had_selection or self.has_selection():
+            self.selectionChanged.emit()
+
+    def has_selection(self) -> bool:
+        """是否有选中内容"""
+        return self._cursor != self._anchor
+
+    def selection(self) -> Optional[Tuple[Position, Position]]:
+        """按文档顺序排列的选中区域，没有选择时为 None"""
+        if not self.has_selection():
+            return None
+        anchor, cursor = self._anchor, self._cursor
+        if (anchor.line, anchor.column) < (cursor.line, cursor.column):
+            return (anchor, cursor)
+        return (self._cursor, self._anchor)
+
+    def selected_text(self) -> str:
+        """选中的文本"""
+        selection = self.selection()
+        if selection is None:
+            return ""
+        return self._buffer.get_text(*selection)
+
+    def clear_selection(self) -> None:
+        """清除选择，光标位置不变"""
+        if self.has_selection():
+            self._anchor = self._cursor
+            self.viewport().update()
+            self.selectionChanged.emit()
+
+    def select_all(self) -> None:
+        """选中全部内容"""
+        last = self.line_count() - 1
+        self._anchor = Position(0, 0)
+        self._move_cursor(Position(last, self.line_length(last)), True)
+
+    # 编辑
+    def insert_text(self, text: str) -> None:
+        """在光标处插入文本，有选择时替换选中内容"""
+        if self._read_only:
+            return
+        start = self._cursor
+        selection = self.selection()
+        if selection is not None:
+            # 替换选中内容记录为一个撤销步骤
+            start = selection[0]
+            self._buffer.apply_edits(
+                [
+                    (
+                        self._buffer.position_to_offset(selection[0]),
+                        self._buffer.position_to_offset(selection[1]),
+                        text,
+                    )
+                ]
+            )
+        elif text:
+            self._buffer.insert(start, text)
+        lines = text.split("\n")
+        if len(lines) == 1:
+            end = Position(start.line, start.column + len(text))
+        else:
+            end = Position(start.line + len(lines) - 1, len(lines[-1]))
+        self._max_columns = max(self._max_columns, self.line_length(end.line))
+        self._update_scroll_bars()
+        self.set_cursor_position(end)
+        self.textEdited.emit()
+
+    def delete_previous_char(self) -> None:
+        """删除光标前的一个字符，有选择时删除选中内容"""
+        if self._read_only:
+            return
+        if not self.has_selection():
+            if self._cursor == Position(0, 0):
+                return
+            self._anchor = self._step_left(self._cursor)
+        self.remove_selected_text()
+
+    def delete_next_char(self) -> None:
+        """删除光标后的一个字符，有选择时删除选中内容"""
+        if self._read_only:
+            return
+        if not self.has_selection():
+            self._anchor = self._step_right(self._cursor)
+            if self._anchor == self._cursor:
+                return
+        self.remove_selected_text()
+
+    def remove_selected_text(self) -> None:
+        """删除选中内容"""
+        selection = self.selection()
+        if self._read_only or selection is None:
+            return
+        self._buffer.delete(*selection)
+        self.set_cursor_position(selection[0])
+        self.textEdited.emit()
+
+    def undo(self) -> bool:
+        """撤销缓冲区的上一次编辑"""
+        if self._read_only or not self._buffer.undo():
+            return False
+        self._after_history_change()
+        return True
+
+    def redo(self) -> bool:
+        """重做缓冲区的上一次撤销"""
+        if self._read_only or not self._buffer.redo():
+            return False
+        self._after_history_change()
+        return True
+
+    def _after_history_change(self) -> None:
+        """撤销或重做后限制光标并通知内容变化"""
+        self.refresh()
+        self.set_cursor_position(self._cursor)
+        self.textEdited.emit()
+
+    def copy(self) -> None:
+        """复制选中内容"""
+        if self.has_selection():
+            QGuiApplication.clipboard().setText(self.selected_text())
+
+    def cut(self) -> None:
+        """剪切选中内容"""
+        if self._read_only or not self.has_selection():
+            return
+        self.copy()
+        self.remove_selected_text()
+
+    def paste(self) -> None:
+        """粘贴剪贴板内容"""
+        text = QGuiApplication.clipboard().text()
+        if text:
+            self.insert_text(text.replace("\r\n", "\n").replace("\r", "\n"))
+
+    # 光标移动
+    def _step_left(self, position: Position) -> Position:
+        """光标左移一个字符的位置，行首时移到上一行末尾"""
+        if position.column > 0:
+            return Position(position.line, position.column - 1)
+        if position.line > 0:
+            return Position(position.line - 1, self.line_length(position.line - 1))
+        return position
+
+    def _step_right(self, position: Position) -> Position:
+        """光标右移一个字符的位置，行尾时移到下一行开头"""
+        if position.column < self.line_length(position.line):
+            return Position(position.line, position.column + 1)
+        if position.line + 1 < self.line_count():
+            return Position(position.line + 1, 0)
+        return position
+
+    def _move_lines(self, delta: int, keep_anchor: bool) -> None:
+        """上下移动光标，保持之前水平移动确定的列号"""
+        line = max(0, min(self._cursor.line + delta, self.line_count() - 1))
+        column = min(self._preferred_column, self.line_length(line))
+        self._move_cursor(Position(line, column), keep_anchor)
+
+    # 视口
+    def _line_height(self) -> int:
+        """行高"""
+        return QFontMetrics(self.viewport().font()).lineSpacing()
+
+    def _char_width(self) -> int:
+        """等宽字符宽度"""
+        return max(1, QFontMetrics(self.viewport().font()).horizontalAdvance("M"))
+
+    def _visible_line_count(self) -> int:
+        """视口可完整容纳的行数"""
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _visible_column_count(self) -> int:
+        """视口可完整容纳的列数"""
+        return max(1, self.viewport().width() // self._char_width())
+
+    def _update_scroll_bars(self) -> None:
+        """根据行数、最长行和视口大小更新滚动条范围"""
+        visible_lines = self._visible_line_count()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.line_count() - visible_lines))
+        vertical.setPageStep(visible_lines)
+        vertical.setSingleStep(1)
+
+        visible_columns = self._visible_column_count()
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, self._max_columns + 1 - visible_columns))
+        horizontal.setPageStep(visible_columns)
+        horizontal.setSingleStep(1)
+
+    def ensure_cursor_visible(self) -> None:
+        """滚动视口使光标可见"""
+        line, column = self._cursor.line, self._cursor.column
+        if column > self._max_columns:
+            self._max_columns = column
+            self._update_scroll_bars()
+
+        vertical = self.verticalScrollBar()
+        visible_lines = self._visible_line_count()
+        if line < vertical.value():
+            vertical.setValue(line)
+        elif line >= vertical.value() + visible_lines:
+            vertical.setValue(line - visible_lines + 1)
+
+        horizontal = self.horizontalScrollBar()
+        visible_columns = self._visible_column_count()
+        if column < horizontal.value():
+            horizontal.setValue(column)
+        elif column >= horizontal.value() + visible_columns:
+            horizontal.setValue(column - visible_columns + 1)
+
+    def position_at(self, x: int, y: int) -> Position:
+        """视口坐标对应的文档位置"""
+        line = self.verticalScrollBar().value() + max(0, y) // self._line_height()
+        column = self.horizontalScrollBar().value() + round(
+            max(0, x) / self._char_width()
+        )
+        return self._clamp(Position(line, column))
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        """视口尺寸变化时更新滚动条"""
+        super().resizeEvent(event)
+        self._update_scroll_bars()
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        """滚动时重绘视口"""
+        self.viewport().update()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        """只绘制可见行中可见列所在的段"""
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), QColor(BACKGROUND_COLOR))
+        painter.setPen(QColor(FOREGROUND_COLOR))
+
+        line_height = self._line_height()
+        char_width = self._char_width()
+        first_line = self.verticalScrollBar().value()
+        first_column = self.horizontalScrollBar().value()
+        last_column = first_column + self._visible_column_count() + 1
+        selection = self.selection()
+        line_count = self.line_count()
+        max_columns = self._max_columns
+
+        for row in range(self._visible_line_count() + 1):
+            line = first_line + row
+            if line >= line_count:
+                break
+            y = row * line_height
+            length = self.line_length(line)
+            max_columns = max(max_columns, length)
+
+            if selection is not None and selection[0].line <= line <= selection[1].line:
+                start, end = selection
+                # 跨行选择时行尾多绘制一格表示换行符
+                begin = start.column if line == start.line else 0
+                finish = end.column if line == end.line else length + 1
+                begin = max(begin, first_column)
+                finish = min(finish, last_column)
+                if finish > begin:
+                    painter.fillRect(
+                        (begin - first_column) * char_width,
+                        y,
+                        (finish - begin) * char_width,
+                        line_height,
+                        QColor(SELECTION_COLOR),
+                    )
+
+            end_column = min(length, last_column)
+            if end_column <= first_column:
+                continue
+            first_chunk = first_column // GLYPH_CHUNK_SIZE
+            last_chunk = (end_column - 1) // GLYPH_CHUNK_SIZE
+            for chunk in range(first_chunk, last_chunk + 1):
+                chunk_start = chunk * GLYPH_CHUNK_SIZE
+                text = self._buffer.get_text(
+                    Position(line, chunk_start),
+                    Position(line, min(length, chunk_start + GLYPH_CHUNK_SIZE)),
+                )
+                origin = QPointF((chunk_start - first_column) * char_width, y)
+                for run in self._cache.get(line, chunk, text):
+                    painter.drawGlyphRun(origin, run)
+
+        if self.hasFocus() and not self._read_only:
+            row = self._cursor.line - first_line
+            column = self._cursor.column - first_column
+            if 0 <= row <= self._visible_line_count() and column >= 0:
+                painter.fillRect(
+                    column * char_width,
+                    row * line_height,
+                    2,
+                    line_height,
+                    QColor(CURSOR_COLOR),
+                )
+        painter.end()
+
+        # 绘制时发现更长的行则扩大水平滚动范围
+        if max_columns > self._max_columns:
+            self._max_columns = max_columns
+            self._update_scroll_bars()
+
+    # 输入
+    def focusNextPrevChild(self, next: bool) -> bool:
+        """保留 Tab 键用于输入制表符"""
+        return False
+
+    def focusInEvent(self, event: QFocusEvent) -> None:
+        """获得焦点时重绘光标"""
+        super().focusInEvent(event)
+        self.viewport().update()
+
+    def focusOutEvent(self, event: QFocusEvent) -> None:
+        """失去焦点时隐藏光标"""
+        super().focusOutEvent(event)
+        self.viewport().update()
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        """点击放置光标，按住 Shift 时扩展选择"""
+        if event.button() != Qt.LeftButton:
+            super().mousePressEvent(event)
+            return
+        point = event.position().toPoint()
+        keep_anchor = bool(event.modifiers() & Qt.ShiftModifier)
+        self.set_cursor_position(self.position_at(point.x(), point.y()), keep_anchor)
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        """拖动扩展选择"""
+        if not event.buttons() & Qt.LeftButton:
+            super().mouseMoveEvent(event)
+            return
+        point = event.position().toPoint()
+        self.set_cursor_position(self.position_at(point.x(), point.y()), True)
+
+    def inputMethodEvent(self, event: QInputMethodEvent) -> None:
+        """输入法提交的文本"""
+        if event.commitString():
+            self.insert_text(event.commitString())
+        event.accept()
+
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        """处理编辑和光标移动按键"""
+        for sequence, action in (
+            (QKeySequence.Undo, self.undo),
+            (QKeySequence.Redo, self.redo),
+            (QKeySequence.Copy, self.copy),
+            (QKeySequence.Cut, self.cut),
+            (QKeySequence.Paste, self.paste),
+            (QKeySequence.SelectAll, self.select_all),
+        ):
+            if event.matches(sequence):
+                action()
+                return
+
+        key = event.key()
+        modifiers = event.modifiers()
+        shift = bool(modifiers & Qt.ShiftModifier)
+        control = bool(modifiers & Qt.ControlModifier)
+        cursor = self._cursor
+        if key == Qt.Key_Left:
+            self.set_cursor_position(self._step_left(cursor), shift)
+        elif key == Qt.Key_Right:
+            self.set_cursor_position(self._step_right(cursor), shift)
+        elif key == Qt.Key_Up:
+            self._move_lines(-1, shift)
+        elif key == Qt.Key_Down:
+            self._move_lines(1, shift)
+        elif key == Qt.Key_PageUp:
+            self._move_lines(-self._visible_line_count(), shift)
+        elif key == Qt.Key_PageDown:
+            self._move_lines(self._visible_line_count(), shift)
+        elif key == Qt.Key_Home:
+            line = 0 if control else cursor.line
+            self.set_cursor_position(Position(line, 0), shift)
+        elif key == Qt.Key_End:
+            line = self.line_count() - 1 if control else cursor.line
+            self.set_cursor_position(Position(line, self.line_length(line)), shift)
+        elif key == Qt.Key_Backspace:
+            self.delete_previous_char()
+        elif key == Qt.Key_Delete:
+            self.delete_next_char()
+        elif key in (Qt.Key_Return, Qt.Key_Enter):
+            self.insert_text("\n")
+        elif key == Qt.Key_Tab:
+            self.insert_text("\t")
+        elif event.text() and event.text().isprintable() and not control:
+            self.insert_text(event.text())
+        else:
+            super().keyPressEvent(event)
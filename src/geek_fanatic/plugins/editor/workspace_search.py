@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+工作区搜索模块
+
+后台线程用 os.scandir 遍历工作区目录，把文件分批提交到进程池；
+各进程通过 mmap 在字节层面扫描文件，每批结果完成后立即推送到界面线程。
+"""
+
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Pattern, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .search import PREVIEW_LENGTH, SearchQuery
+
+# 超过该大小的文件不参与搜索（字节）
+WORKSPACE_MAX_FILE_SIZE = 16 * 1024 * 1024
+
+# 判断二进制文件时检查的文件头字节数
+BINARY_SNIFF_BYTES = 8192
+
+# 每个进程任务包含的文件数
+WORKSPACE_BATCH_SIZE = 64
+
+# 单次工作区搜索的最大结果数
+MAX_WORKSPACE_RESULTS = 20_000
+
+# 遍历时跳过的目录
+EXCLUDED_DIRECTORIES = frozenset(
+    {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", ".mypy_cache"}
+)
+
+
+@dataclass(frozen=True)
+class WorkspaceMatch:
+    """工作区搜索结果
+
+    行号和列号都从0开始计数，列号按字符计算。
+
+    Attributes:
+        path: 文件路径
+        line: 行号
+        column: 列号
+        preview: 所在行预览
+    """
+
+    path: str
+    line: int
+    column: int
+    preview: str
+
+
+# 根据工作区根目录和搜索条件给出候选文件的函数，返回 None 表示需要完整遍历
+CandidateSource = Callable[[str, SearchQuery], Optional[List[str]]]
+
+
+def iter_workspace_entries(
+    root: str, max_file_size: int = WORKSPACE_MAX_FILE_SIZE
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """遍历工作区内需要搜索的文件及其状态
+
+    空文件、超过大小上限的文件和 EXCLUDED_DIRECTORIES 中的目录被跳过，
+    不跟随符号链接目录，无权限访问的目录静默忽略。
+
+    Args:
+        root: 工作区根目录
+        max_file_size: 文件大小上限（字节）
+
+    Yields:
+        Tuple[str, os.stat_result]: 文件路径和文件状态
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in EXCLUDED_DIRECTORIES:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            if 0 < stat.st_size <= max_file_size:
+                                yield entry.path, stat
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def iter_workspace_files(
+    root: str, max_file_size: int = WORKSPACE_MAX_FILE_SIZE
+) -> Iterator[str]:
+    """遍历工作区内需要搜索的文件路径，规则同 iter_workspace_entries"""
+    for path, _ in iter_workspace_entries(root, max_file_size):
+        yield path
+
+
+@lru_cache(maxsize=64)
+def compile_bytes_query(query: SearchQuery) -> Optional[Pattern[bytes]]:
+    """把搜索条件编译为字节正则表达式
+
+    普通文本的区分大小写搜索返回 None，直接使用 mmap.find。
+    字节正则的忽略大小写只对 ASCII 字符生效。
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    if query.is_literal:
+        return None
+    encoded = query.pattern.encode("utf-8")
+    pattern = encoded if query.is_regex else re.escape(encoded)
+    if query.whole_word:
+        pattern = rb"\b(?:" + pattern + rb")\b"
+    flags = re.MULTILINE
+    if not query.case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def _iter_offsets(data: mmap.mmap, query: SearchQuery) -> Iterator[int]:
+    """产出映射内容中每个匹配的起始字节偏移"""
+    regex = compile_bytes_query(query)
+    if regex is None:
+        needle = query.pattern.encode("utf-8")
+        position = data.find(needle)
+        while position >= 0:
+            yield position
+            position = data.find(needle, position + len(needle))
+        return
+    for match in regex.finditer(data):
+        if match.end() > match.start():
+            yield match.start()
+
+
+def search_file(
+    file_path: str,
+    query: SearchQuery,
+    max_file_size: int = WORKSPACE_MAX_FILE_SIZE,
+    max_matches: int = MAX_WORKSPACE_RESULTS,
+) -> List[WorkspaceMatch]:
+    """在单个文件中搜索
+
+    文件以只读方式映射，文件头含 NUL 字节时视为二进制文件跳过。
+
+    Args:
+        file_path: 文件路径
+        query: 搜索条件
+        max_file_size: 文件大小上限（字节）
+        max_matches: 最大结果数
+
+    Returns:
+        List[WorkspaceMatch]: 匹配结果
+
+    Raises:
+        OSError: 文件无法读取或映射
+    """
+    matches: List[WorkspaceMatch] = []
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not 0 < size <= max_file_size:
+            return matches
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                return matches
+            line = 0
+            counted = 0
+            for start in _iter_offsets(data, query):
+                line += data[counted:start].count(b"\n")
+                counted = start
+                line_start = data.rfind(b"\n", 0, start) + 1
+                line_end = data.find(b"\n", start)
+                if line_end < 0:
+                    line_end = size
+                preview = data[line_start : min(line_end, line_start + PREVIEW_LENGTH)]
+                column = len(data[line_start:start].decode("utf-8", errors="replace"))
+                matches.append(
+                    WorkspaceMatch(
+                        file_path,
+                        line,
+                        column,
+                        preview.decode("utf-8", errors="replace").rstrip("\r"),
+                    )
+                )
+                if len(matches) >= max_matches:
+                    break
+    return matches
+
+
+def _search_files(
+    file_paths: List[str], query: SearchQuery, max_file_size: int, max_matches: int
+) -> List[WorkspaceMatch]:
+    """在进程池中搜索一批文件，无法读取的文件被跳过"""
+    matches: List[WorkspaceMatch] = []
+    for file_path in file_paths:
+        try:
+            matches.extend(
+                search_file(file_path, query, max_file_size, max_matches - len(matches))
+            )
+        except (OSError, ValueError):
+            continue
+        if len(matches) >= max_matches:
+            break
+    return matches
+
+
+class _WorkspaceSearchSignals(QObject):
+    """工作区搜索任务信号"""
+
+    matchesFound = Signal(int, object)  # 搜索编号, 结果列表
+    progress = Signal(int, int)  # 搜索编号, 已扫描文件数
+    finished = Signal(int, int, bool)  # 搜索编号, 扫描文件总数, 结果是否被截断
+
+
+class _WorkspaceSearchTask(QRunnable):
+    """工作区搜索任务
+
+    在线程池中遍历目录并向进程池分批提交文件，
+    进程池完成一批后由回调把结果发送到界面线程。
+    候选来源给出的文件较少时直接在当前线程中验证，省去进程间通信。
+    """
+
+    def __init__(
+        self,
+        search_id: int,
+        root: str,
+        query: SearchQuery,
+        executor: ProcessPoolExecutor,
+        max_file_size: int,
+        max_results: int,
+        candidate_source: Optional[CandidateSource] = None,
+    ) -> None:
+        """初始化搜索任务
+
+        Args:
+            search_id: 搜索编号
+            root: 工作区根目录
+            query: 搜索条件
+            executor: 执行扫描的进程池
+            max_file_size: 文件大小上限（字节）
+            max_results: 最大结果数
+            candidate_source: 候选文件来源（如三元组索引）
+        """
+        super().__init__()
+        self.signals = _WorkspaceSearchSignals()
+        self._search_id = search_id
+        self._root = root
+        self._query = query
+        self._executor = executor
+        self._max_file_size = max_file_size
+        self._max_results = max_results
+        self._candidate_source = candidate_source
+        self._futures: List["Future[List[WorkspaceMatch]]"] = []
+        self._lock = threading.Lock()
+        self._found = 0
+        self._scanned = 0
+        self._truncated = False
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """取消搜索，尚未开始的批次不再执行"""
+        self._cancelled = True
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def run(self) -> None:
+        """遍历目录或候选文件，并等待全部批次完成"""
+        candidates = None
+        if self._candidate_source is not None:
+            candidates = self._candidate_source(self._root, self._query)
+        if candidates is not None and len(candidates) <= WORKSPACE_BATCH_SIZE:
+            matches = _search_files(
+                candidates, self._query, self._max_file_size, self._max_results
+            )
+            self._add_results(matches, len(candidates))
+            if not self._cancelled:
+                self.signals.finished.emit(
+                    self._search_id, self._scanned, self._truncated
+                )
+            return
+
+        if candidates is None:
+            files = iter_workspace_files(self._root, self._max_file_size)
+        else:
+            files = iter(candidates)
+        batch: List[str] = []
+        for file_path in files:
+            if self._cancelled:
+                return
+            batch.append(file_path)
+            if len(batch) >= WORKSPACE_BATCH_SIZE:
+                self._submit(batch)
+                batch = []
+        if batch:
+            self._submit(batch)
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures)
+        if not self._cancelled:
+            self.signals.finished.emit(self._search_id, self._scanned, self._truncated)
+
+    def _submit(self, batch: List[str]) -> None:
+        """提交一批文件到进程池"""
+        future = self._executor.submit(
+            _search_files, batch, self._query, self._max_file_size, self._max_results
+        )
+        future.add_done_callback(lambda f: self._on_batch_done(f, len(batch)))
+        with self._lock:
+            self._futures.append(future)
+
+    def _on_batch_done(
+        self, future: "Future[List[WorkspaceMatch]]", file_count: int
+    ) -> None:
+        """进程池完成一批文件，在进程池的结果线程中调用"""
+        if self._cancelled or future.cancelled() or future.exception() is not None:
+            return
+        self._add_results(future.result(), file_count)
+
+    def _add_results(self, matches: List[WorkspaceMatch], file_count: int) -> None:
+        """发送一批结果，达到结果上限时取消剩余批次"""
+        with self._lock:
+            self._scanned += file_count
+            matches = matches[: self._max_results - self._found]
+            self._found += len(matches)
+            if self._found >= self._max_results:
+                self._truncated = True
+                self._cancelled = True
+            scanned = self._scanned
+        if matches:
+            self.signals.matchesFound.emit(self._search_id, matches)
+        self.signals.progress.emit(self._search_id, scanned)
+        if self._truncated:
+            # 结果已满，取消剩余批次并提前结束
+            with self._lock:
+                futures = list(self._futures)
+            for pending in futures:
+                pending.cancel()
+            self.signals.finished.emit(self._search_id, scanned, True)
+
+
+class WorkspaceSearch(QObject):
+    """工作区搜索器
+
+    进程池在第一次搜索时按 CPU 核数创建并在后续搜索中复用；
+    同一时刻只运行一个搜索，开始新的搜索会取消上一个。
+    """
+
+    # 信号定义
+    matchesFound = Signal(object)  # 一批结果
+    progressChanged = Signal(int)  # 已扫描文件数
+    searchFinished = Signal(int, bool)  # 扫描文件总数, 结果是否被截断
+    searchFailed = Signal(str)  # 错误信息
+
+    def __init__(
+        self,
+        max_file_size: int = WORKSPACE_MAX_FILE_SIZE,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """初始化搜索器
+
+        Args:
+            max_file_size: 超过该字节数的文件不参与搜索
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._max_file_size = max_file_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._task: Optional[_WorkspaceSearchTask] = None
+        self._search_id = 0
+        self._candidate_source: Optional[CandidateSource] = None
+
+    def set_max_file_size(self, size: int) -> None:
+        """设置参与搜索的文件大小上限（字节）"""
+        self._max_file_size = size
+
+    def set_candidate_source(self, source: Optional[CandidateSource]) -> None:
+        """设置候选文件来源，为 None 时每次搜索都遍历整个工作区"""
+        self._candidate_source = source
+
+    def is_running(self) -> bool:
+        """是否有正在进行的搜索"""
+        return self._task is not None
+
+    def search(
+        self,
+        root: str,
+        query: SearchQuery,
+        max_results: int = MAX_WORKSPACE_RESULTS,
+    ) -> bool:
+        """开始搜索，结果通过 matchesFound 信号逐批推送
+
+        Args:
+            root: 工作区根目录
+            query: 搜索条件
+            max_results: 最大结果数
+
+        Returns:
+            bool: 是否开始了搜索
+        """
+        self.cancel()
+        if not query.pattern:
+            return False
+        try:
+            # 在界面线程中检查正则表达式，避免每个进程重复报错
+            compile_bytes_query(query)
+        except re.error as e:
+            self.searchFailed.emit(str(e))
+            return False
+
+        self._search_id += 1
+        self._task = _WorkspaceSearchTask(
+            self._search_id,
+            root,
+            query,
+            self.executor(),
+            self._max_file_size,
+            max_results,
+            self._candidate_source,
+        )
+        self._task.signals.matchesFound.connect(self._on_matches_found)
+        self._task.signals.progress.connect(self._on_progress)
+        self._task.signals.finished.connect(self._on_finished)
+        QThreadPool.globalInstance().start(self._task)
+        return True
+
+    def cancel(self) -> None:
+        """取消正在进行的搜索"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def shutdown(self) -> None:
+        """取消搜索并关闭进程池"""
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        """获取进程池，第一次调用时创建
+
+        使用 spawn 方式启动子进程，避免在已有 Qt 线程的进程中 fork。
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _on_matches_found(self, search_id: int, matches: List[WorkspaceMatch]) -> None:
+        """转发当前搜索的一批结果"""
+        if search_id == self._search_id and self._task is not None:
+            self.matchesFound.emit(matches)
+
+    def _on_progress(self, search_id: int, scanned: int) -> None:
+        """转发当前搜索的进度"""
+        if search_id == self._search_id and self._task is not None:
+            self.progressChanged.emit(scanned)
+
+    def _on_finished(self, search_id: int, scanned: int, truncated: bool) -> None:
+        """当前搜索结束"""
+        if search_id != self._search_id or self._task is None:
+            return
+        self._task = None
+        self.searchFinished.emit(scanned, truncated)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+缓冲区快照与编辑记录测试
+"""
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.types import Position
+
+
+class UnknownOperation:
+    """既不是插入也不是删除的操作"""
+
+    def reverse(self) -> "UnknownOperation":
+        """逆操作"""
+        return self
+
+
+def _buffer(text: str) -> TextBuffer:
+    """创建带有指定内容的缓冲区"""
+    buffer = TextBuffer()
+    buffer.set_content(text)
+    return buffer
+
+
+def test_snapshot_keeps_its_version():
+    buffer = _buffer("one\ntwo")
+    snapshot = buffer.snapshot()
+    buffer.insert(Position(1, 0), "new ")
+    buffer.delete(Position(0, 0), Position(0, 1))
+    assert snapshot.version < buffer.version
+    assert snapshot.get_content() == "one\ntwo"
+    assert snapshot.get_line(1) == "two"
+    assert snapshot.position_to_offset(Position(1, 1)) == 5
+    assert buffer.get_content() == "ne\nnew two"
+
+
+def test_map_position_through_later_edits():
+    buffer = _buffer("abc\ndef")
+    version = buffer.version
+    buffer.insert(Position(0, 0), "x\n")
+    buffer.delete(Position(2, 0), Position(2, 2))
+    assert buffer.map_position(Position(1, 2), version) == Position(2, 0)
+    assert buffer.map_position(Position(0, 1), version) == Position(1, 1)
+    assert buffer.map_position(Position(0, 0), buffer.version + 1) is None
+
+
+def test_unknown_operation_is_ignored():
+    buffer = _buffer("abc")
+    version = buffer.version
+    buffer._execute_operation(UnknownOperation())
+    assert buffer.version == version
+    assert buffer.map_position(Position(0, 2), version) == Position(0, 2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+单词补全索引测试
+"""
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.completion import WordIndex
+from geek_fanatic.plugins.editor.types import Position
+
+
+def _buffer(text: str) -> TextBuffer:
+    """创建带有指定内容的缓冲区"""
+    buffer = TextBuffer()
+    buffer.set_content(text)
+    return buffer
+
+
+def test_complete_by_prefix():
+    index = WordIndex()
+    index.add_buffer(_buffer("format foo formula\nforward 42 fo"))
+    assert index.complete("for") == ["format", "formula", "forward"]
+    assert index.complete("for", limit=2) == ["format", "formula"]
+    # 与前缀相同的单词和数字不作为结果
+    assert index.complete("foo") == []
+    assert index.count("42") == 0
+
+
+def test_edits_update_counts():
+    buffer = _buffer("alpha beta\nalpha")
+    index = WordIndex()
+    index.add_buffer(buffer)
+    assert index.count("alpha") == 2
+
+    buffer.delete(Position(1, 0), Position(1, 5))
+    assert index.count("alpha") == 1
+    buffer.insert(Position(0, 10), " gamma")
+    assert index.complete("ga") == ["gamma"]
+    buffer.delete(Position(0, 0), Position(0, 6))
+    assert index.count("alpha") == 0
+    assert index.complete("al") == []
+
+
+def test_counts_are_shared_between_buffers():
+    first = _buffer("shared only_first")
+    second = _buffer("shared")
+    index = WordIndex()
+    index.add_buffer(first)
+    index.add_buffer(second)
+    index.add_buffer(second)
+    assert index.count("shared") == 2
+
+    index.remove_buffer(first)
+    assert index.count("shared") == 1
+    assert index.count("only_first") == 0
+    # 移除后的编辑不再影响索引
+    first.insert(Position(0, 0), "ghost ")
+    assert index.count("ghost") == 0
+    assert len(index) == 1
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文本装饰存储测试
+"""
+
+import random
+from typing import List, Tuple
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.decorations import Decoration, DecorationStore
+from geek_fanatic.plugins.editor.types import Position
+
+
+def _ranges(decorations: List[Decoration]) -> List[Tuple[int, int]]:
+    """装饰的起止偏移"""
+    return [(item.start, item.end) for item in decorations]
+
+
+def test_insert_at_edges():
+    store = DecorationStore()
+    store.set_decorations("lint", [Decoration(2, 5, "a")])
+    # 在起点插入时整体后移
+    store.insert_text(2, 3)
+    assert _ranges(store.decorations("lint")) == [(5, 8)]
+    # 在终点插入时不延长
+    store.insert_text(8, 2)
+    assert _ranges(store.decorations("lint")) == [(5, 8)]
+    # 在内部插入时延长
+    store.insert_text(6, 1)
+    assert _ranges(store.decorations("lint")) == [(5, 9)]
+
+
+def test_delete_collapses_covered_decoration():
+    store = DecorationStore()
+    store.set_decorations("lint", [Decoration(2, 4, "a"), Decoration(6, 10, "b")])
+    store.delete_text(1, 6)
+    assert _ranges(store.decorations("lint")) == [(1, 1), (1, 4)]
+    assert len(store) == 2
+
+
+def test_query_by_owner():
+    store = DecorationStore()
+    store.set_decorations("lint", [Decoration(0, 2, "a"), Decoration(10, 12, "b")])
+    store.add("bookmark", Decoration(5, 5, "mark"))
+    assert sorted(store.owners()) == ["bookmark", "lint"]
+    found = store.query(2, 6)
+    assert _ranges(found["lint"]) == [(0, 2)]
+    assert _ranges(found["bookmark"]) == [(5, 5)]
+    assert store.query(3, 4) == {}
+    assert list(store.query(0, 20, owner="lint")) == ["lint"]
+
+    store.set_decorations("lint", [])
+    assert store.owners() == ["bookmark"]
+    store.clear()
+    assert len(store) == 0
+
+
+def test_random_edits_match_brute_force():
+    rng = random.Random(3)
+    expected = []
+    for index in range(200):
+        start = rng.randrange(1000)
+        expected.append([start, start + rng.randrange(20), index])
+    store = DecorationStore()
+    store.set_decorations("lint", [Decoration(*item) for item in expected])
+
+    def move(point: int, offset: int, length: int) -> int:
+        """删除 [offset, offset + length) 后的新位置"""
+        if point < offset:
+            return point
+        return max(offset, point - length)
+
+    for _ in range(300):
+        offset = rng.randrange(1000)
+        length = rng.randint(1, 30)
+        if rng.random() < 0.5:
+            store.insert_text(offset, length)
+            for item in expected:
+                if item[0] >= offset:
+                    item[0] += length
+                    item[1] += length
+                elif item[1] > offset:
+                    item[1] += length
+        else:
+            store.delete_text(offset, length)
+            for item in expected:
+                item[0] = move(item[0], offset, length)
+                item[1] = move(item[1], offset, length)
+
+    decorations = store.decorations("lint")
+    actual = sorted((item.start, item.end, item.data) for item in decorations)
+    assert actual == sorted(tuple(item) for item in expected)
+
+    start, end = 300, 400
+    found = store.query(start, end)["lint"]
+    assert sorted(item.data for item in found) == sorted(
+        item[2] for item in expected if item[1] >= start and item[0] <= end
+    )
+
+
+def test_buffer_edits_move_decorations():
+    buffer = TextBuffer()
+    buffer.set_content("foo bar\nbaz")
+    buffer.decorations.set_decorations("lint", [Decoration(4, 7, "bar")])
+    buffer.insert(Position(0, 0), "xx")
+    buffer.delete(Position(0, 0), Position(0, 1))
+    assert _ranges(buffer.decorations.decorations("lint")) == [(5, 8)]
+    assert buffer.get_content()[5:8] == "bar"
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+行差异计算测试
+"""
+
+import random
+from typing import List
+
+import pytest
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.diff import (
+    MYERS_MAX_COST,
+    LineHashes,
+    diff_hashes,
+    hash_lines,
+)
+
+
+def _apply_hunks(old: List[str], new: List[str]) -> List[str]:
+    """按差异块把旧行替换为新行，同时检查差异块的位置"""
+    hunks = diff_hashes(hash_lines(old), hash_lines(new))
+    result: List[str] = []
+    previous = 0
+    for hunk in hunks:
+        assert hunk.old_start >= previous
+        result.extend(old[previous : hunk.old_start])
+        assert len(result) == hunk.new_start
+        result.extend(new[hunk.new_start : hunk.new_end])
+        previous = hunk.old_end
+    result.extend(old[previous:])
+    return result
+
+
+def test_identical_lines_have_no_hunks():
+    lines = ["a", "b", "c"]
+    assert diff_hashes(hash_lines(lines), hash_lines(lines)) == []
+
+
+def test_single_line_change():
+    old = ["a", "b", "c", "d"]
+    new = ["a", "B", "c", "d"]
+    hunks = diff_hashes(hash_lines(old), hash_lines(new))
+    assert len(hunks) == 1
+    hunk = hunks[0]
+    assert (hunk.old_start, hunk.old_end, hunk.new_start, hunk.new_end) == (1, 2, 1, 2)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_reconstruct_new_lines(seed):
+    rng = random.Random(seed)
+    old = [str(rng.randrange(20)) for _ in range(200)]
+    new = list(old)
+    for _ in range(rng.randint(1, MYERS_MAX_COST * 2)):
+        index = rng.randrange(len(new) + 1)
+        if new and rng.random() < 0.5:
+            del new[min(index, len(new) - 1)]
+        else:
+            new.insert(index, str(rng.randrange(40)))
+    assert _apply_hunks(old, new) == new
+
+
+def test_line_hashes_splice_recomputes_dirty_lines():
+    lines = ["a", "b", "c"]
+    hashes = LineHashes()
+    assert list(hashes.get(lambda: "\n".join(lines), lines.__getitem__)) == list(
+        hash_lines(lines)
+    )
+    lines[1:2] = ["x", "y"]
+    hashes.splice(1, 1, 2)
+    assert list(hashes.get(lambda: "\n".join(lines), lines.__getitem__)) == list(
+        hash_lines(lines)
+    )
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("a\nb\nc", "a\nB\nc"),
+        ("a\nb\nc", "a\nb\nc\nd"),
+        ("a\nb\nc", "b\nc"),
+        ("a\n\nb", "a\nb"),
+        ("", "x\ny"),
+        ("x\ny", ""),
+    ],
+)
+def test_buffer_diff_edits(old, new):
+    buffer = TextBuffer()
+    buffer.set_content(old)
+    buffer.apply_edits(buffer.diff_edits(new))
+    assert buffer.get_content() == new
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+共享文档测试
+
+QTextDocument 按 UTF-16 计数，缓冲区按码点计数，含增补平面字符时
+两者的位置不同，编辑后缓冲区应与文档保持一致且保留撤销历史。
+"""
+
+from typing import Tuple
+
+import pytest
+from PySide6.QtWidgets import QPlainTextEdit
+
+from geek_fanatic.plugins.editor.document import (
+    SharedDocument,
+    utf16_index,
+    utf16_length,
+)
+from geek_fanatic.plugins.editor.types import Position
+
+TEXT = "a😀b foo\nline2 foo\nlast"
+
+
+@pytest.fixture
+def view(qtbot) -> Tuple[SharedDocument, QPlainTextEdit]:
+    """挂接了一个编辑控件、内容含 emoji 的共享文档"""
+    document = SharedDocument()
+    text_edit = QPlainTextEdit()
+    qtbot.addWidget(text_edit)
+    text_edit.setDocument(document.text_document)
+    document.attach(text_edit, text_edit)
+    document.load_text(TEXT)
+    return document, text_edit
+
+
+def _type_at(text_edit: QPlainTextEdit, position: int, text: str) -> None:
+    """在文档位置 position 处输入文本"""
+    cursor = text_edit.textCursor()
+    cursor.setPosition(position)
+    text_edit.setTextCursor(cursor)
+    text_edit.insertPlainText(text)
+
+
+def test_utf16_helpers():
+    assert utf16_length("abc") == 3
+    assert utf16_length("a😀b") == 4
+    assert utf16_index("a😀b", 3) == 2
+    assert utf16_index("a😀b", 1) == 1
+    assert utf16_index("a😀b", 10) == 3
+
+
+def test_typing_after_non_bmp_character_keeps_history(view):
+    document, text_edit = view
+    # 文档位置 4 位于 "b" 之后
+    _type_at(text_edit, 4, "X")
+    assert document.buffer.get_content() == "a😀bX foo\nline2 foo\nlast"
+    assert document.buffer.history.can_undo()
+
+    _type_at(text_edit, 5, "😀")
+    text_edit.textCursor().deletePreviousChar()
+    assert document.buffer.get_content() == text_edit.toPlainText()
+    assert document.buffer.history.can_undo()
+
+
+def test_undo_with_non_bmp_character(view):
+    document, text_edit = view
+    _type_at(text_edit, 1, "😀")
+    text_edit.undo()
+    assert document.buffer.get_content() == TEXT
+    text_edit.redo()
+    assert document.buffer.get_content() == "a😀😀b foo\nline2 foo\nlast"
+
+
+def test_position_mapping(view):
+    document, _ = view
+    assert document.document_position(Position(0, 2)) == 3
+    assert document.document_position(Position(1, 0)) == 9
+    assert document.position_at(3) == Position(0, 2)
+    assert document.to_document_offset(8) == 9
+    assert document.from_document_offset(9) == 8
+
+
+def test_apply_edits_after_non_bmp_character(view):
+    document, text_edit = view
+    # 缓冲区偏移 4 到 7 是 "foo"
+    document.apply_edits([(4, 7, "BAR"), (0, 1, "😀")])
+    expected = "😀😀b BAR\nline2 foo\nlast"
+    assert text_edit.toPlainText() == expected
+    assert document.buffer.get_content() == expected
+    assert document.buffer.history.can_undo()
+    text_edit.undo()
+    assert document.buffer.get_content() == TEXT
+
+
+def test_external_change_with_non_bmp_character(view):
+    document, text_edit = view
+    text = "a😀b foo\nline2 fo\nLAST"
+    assert document.apply_external_change(text) > 0
+    assert text_edit.toPlainText() == text
+    assert document.buffer.get_content() == text
+    assert not document.is_modified()
+
+
+def test_undo_history_blocks_release(view):
+    document, text_edit = view
+    # 载入后文档的撤销栈为空，可以释放编辑器
+    assert not document.has_undo_history()
+    _type_at(text_edit, 0, "X")
+    assert document.has_undo_history()
+    text_edit.undo()
+    # 可重做的步骤同样随文档释放
+    assert document.has_undo_history()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+编辑器测试
+
+编辑器对外的行列位置按缓冲区的码点计数，文本框内部按 UTF-16 计数。
+"""
+
+import pytest
+from PySide6.QtGui import QTextCharFormat, QTextCursor
+
+from geek_fanatic.plugins.editor.completion import CompletionEngine, CompletionItem
+from geek_fanatic.plugins.editor.decorations import Decoration
+from geek_fanatic.plugins.editor.editor import Editor
+from geek_fanatic.plugins.editor.types import Position
+
+TEXT = "a😀b foo\nline2 foo\nlast"
+
+
+@pytest.fixture
+def editor(qtbot) -> Editor:
+    """内容含 emoji 的编辑器"""
+    editor = Editor()
+    qtbot.addWidget(editor)
+    editor.setPlainText(TEXT)
+    return editor
+
+
+def test_set_cursor_position_after_non_bmp_character(editor):
+    editor.set_cursor_position(Position(1, 0))
+    assert editor._text_edit.textCursor().blockNumber() == 1
+    assert editor._text_edit.textCursor().positionInBlock() == 0
+    assert editor.get_cursor_position() == Position(1, 0)
+
+    editor.set_cursor_position(Position(0, 4))
+    assert editor.get_cursor_position() == Position(0, 4)
+    editor.insert_text("X")
+    assert editor.content == "a😀b Xfoo\nline2 foo\nlast"
+
+
+def test_selection_positions_count_code_points(editor):
+    cursor = editor._text_edit.textCursor()
+    cursor.setPosition(3)
+    cursor.setPosition(9, QTextCursor.KeepAnchor)
+    editor._text_edit.setTextCursor(cursor)
+    assert editor.get_selection() == (Position(0, 2), Position(1, 0))
+
+
+def test_decorations_after_non_bmp_character(qtbot, editor):
+    editor.show()
+    qtbot.waitExposed(editor)
+    editor.set_decoration_format("lint", QTextCharFormat())
+    # 缓冲区偏移 4 到 7 是第一行的 "foo"，第二行的 "foo" 是 14 到 17
+    editor.set_decorations("lint", [Decoration(4, 7, None), Decoration(14, 17, None)])
+    assert editor.visible_decorations("lint")["lint"] == [
+        Decoration(4, 7, None),
+        Decoration(14, 17, None),
+    ]
+    editor._refresh_decorations()
+    selected = [
+        selection.cursor.selectedText()
+        for selection in editor._text_edit.extraSelections()
+    ]
+    assert selected == ["foo", "foo"]
+
+
+def test_completion_prefix_after_non_bmp_character(editor):
+    engine = CompletionEngine()
+    editor.set_completion_engine(engine)
+    # 光标位于第一行的 "fo" 之后
+    editor.set_cursor_position(Position(0, 6))
+    editor._request_completion(True)
+    editor._accept_completion(CompletionItem("foobar"))
+    engine.cancel()
+    assert editor.content == "a😀b foobaro\nline2 foo\nlast"
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+编辑器管理器测试
+"""
+
+from pathlib import Path
+
+import pytest
+from PySide6.QtWidgets import QMessageBox
+
+from geek_fanatic.plugins.editor import EditorManager
+from geek_fanatic.plugins.editor.encoding import FileFormat
+from geek_fanatic.plugins.editor.file_loader import LOAD_CHUNK_SIZE
+from geek_fanatic.plugins.editor.file_watcher import FileChange
+
+
+@pytest.fixture
+def manager(qtbot) -> EditorManager:
+    """没有打开文件的编辑器管理器"""
+    manager = EditorManager()
+    qtbot.addWidget(manager)
+    return manager
+
+
+def _open(qtbot, manager: EditorManager, path: Path) -> None:
+    """打开文件并等待载入完成"""
+    manager.open_file(str(path))
+    editor = manager.current_editor()
+    assert editor is not None
+    if editor.is_loading():
+        with qtbot.waitSignal(editor.document.loadingChanged):
+            pass
+
+
+@pytest.fixture
+def lossy_file(tmp_path) -> Path:
+    """第一块按 UTF-8 检测、之后的块含无效字节的文件"""
+    path = tmp_path / "lossy.txt"
+    path.write_bytes("é\n".encode() + b"a" * LOAD_CHUNK_SIZE + b"\xff\n")
+    return path
+
+
+@pytest.mark.parametrize(
+    "answer", [QMessageBox.StandardButton.Cancel, QMessageBox.StandardButton.Save]
+)
+def test_lossy_save_asks_for_confirmation(
+    qtbot, monkeypatch, manager, lossy_file, answer
+):
+    _open(qtbot, manager, lossy_file)
+    prompts = []
+
+    def warning(*args, **kwargs):
+        prompts.append(args[2])
+        return answer
+
+    monkeypatch.setattr(QMessageBox, "warning", warning)
+    original = lossy_file.read_bytes()
+    if answer == QMessageBox.StandardButton.Cancel:
+        assert not manager.save_file(str(lossy_file))
+        assert lossy_file.read_bytes() == original
+    else:
+        with qtbot.waitSignal(manager.saver.saved):
+            assert manager.save_file(str(lossy_file))
+        assert lossy_file.read_bytes().endswith("�\n".encode())
+        # 写入替换字符后按普通文件保存，不再询问
+        with qtbot.waitSignal(manager.saver.saved):
+            assert manager.save_file(str(lossy_file))
+    assert len(prompts) == 1
+    assert "utf-8" in prompts[0]
+
+
+def test_allow_lossy_skips_confirmation(qtbot, monkeypatch, manager, lossy_file):
+    _open(qtbot, manager, lossy_file)
+    monkeypatch.setattr(QMessageBox, "warning", pytest.fail)
+    with qtbot.waitSignal(manager.saver.saved):
+        assert manager.save_file(str(lossy_file), allow_lossy=True)
+
+
+def test_disk_change_with_unsaved_edits_marks_tab(qtbot, manager, tmp_path):
+    path = tmp_path / "conflict.txt"
+    path.write_text("original\n", encoding="utf-8")
+    _open(qtbot, manager, path)
+    editor = manager.current_editor()
+    assert editor is not None
+    editor.insert_text("edited ")
+    tab_widget = manager._tab_widget
+
+    manager._on_files_changed([FileChange(str(path), "from disk\n", FileFormat())])
+    # 保留未保存的修改，只在标签页上标记冲突
+    assert editor.content == "edited original\n"
+    assert tab_widget.tabText(0) == "● conflict.txt [磁盘已更改]"
+    assert "磁盘上的文件已被修改" in tab_widget.tabToolTip(0)
+
+    # 保存时以编辑器的内容覆盖磁盘，冲突标记随之清除
+    with qtbot.waitSignal(manager.saver.saved):
+        assert manager.save_file(str(path))
+    assert tab_widget.tabText(0) == "conflict.txt"
+    assert path.read_text(encoding="utf-8") == "edited original\n"
+
+    # 没有未保存的修改时直接应用磁盘上的内容
+    manager._on_files_changed([FileChange(str(path), "from disk\n", FileFormat())])
+    assert editor.content == "from disk\n"
+    assert tab_widget.tabText(0) == "conflict.txt"
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+编码检测与流式解码测试
+"""
+
+import codecs
+
+import pytest
+
+from geek_fanatic.plugins.editor.encoding import (
+    FileFormat,
+    LineEnding,
+    StreamDecoder,
+    detect_encoding,
+)
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (codecs.BOM_UTF8 + b"abc", ("utf-8", 3)),
+        (codecs.BOM_UTF16_LE + "abc".encode("utf-16-le"), ("utf-16-le", 2)),
+        (codecs.BOM_UTF32_LE + "abc".encode("utf-32-le"), ("utf-32-le", 4)),
+        ("hello world".encode("utf-16-le"), ("utf-16-le", 0)),
+        ("中文内容".encode("utf-8"), ("utf-8", 0)),
+        ("中文内容，测试。".encode("gb18030"), ("gb18030", 0)),
+        (b"caf\xe9 cr\xe8me", ("latin-1", 0)),
+    ],
+)
+def test_detect_encoding(data, expected):
+    assert detect_encoding(data, final=True) == expected
+
+
+def test_stream_decoder_splits_multibyte_sequences():
+    data = "中文\r\n内容\r\n".encode("utf-8")
+    decoder = StreamDecoder()
+    text = "".join(decoder.decode(data[i : i + 1]) for i in range(len(data)))
+    text += decoder.decode(b"", final=True)
+    assert text == "中文\n内容\n"
+    assert decoder.file_format() == FileFormat("utf-8", False, LineEnding.CRLF)
+
+
+def test_stream_decoder_redetects_after_ascii_prefix():
+    decoder = StreamDecoder()
+    text = decoder.decode(b"ascii only\n")
+    text += decoder.decode("中文内容，测试。".encode("gb18030"), final=True)
+    assert text == "ascii only\n中文内容，测试。"
+    assert decoder.encoding == "gb18030"
+
+
+def test_stream_decoder_replaces_invalid_bytes_in_later_chunks():
+    decoder = StreamDecoder()
+    text = decoder.decode("中文".encode("utf-8"))
+    text += decoder.decode(b"ok \xff\xfe end", final=True)
+    assert text == "中文ok �� end"
+    file_format = decoder.file_format()
+    assert file_format.encoding == "utf-8"
+    assert file_format.lossy
+
+
+def test_file_format_restores_line_endings_and_bom():
+    file_format = FileFormat("utf-8", True, LineEnding.CRLF)
+    chunks = file_format.encode_chunks(iter(["a\nb", "\n"]))
+    assert "".join(chunks) == "\ufeffa\r\nb\r\n"
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+原子写入测试
+"""
+
+import os
+import stat
+
+import pytest
+
+from geek_fanatic.plugins.editor.file_saver import FsyncPolicy, write_atomic
+
+
+def _mode(path) -> int:
+    """文件的权限位"""
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def _write(path, text: str) -> None:
+    """不同步磁盘地写入文本"""
+    write_atomic(str(path), iter([text]), fsync_policy=FsyncPolicy.NONE)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="依赖 POSIX 权限")
+def test_new_file_follows_umask(tmp_path):
+    umask = os.umask(0)
+    os.umask(umask)
+    _write(tmp_path / "new.txt", "text")
+    assert (tmp_path / "new.txt").read_text() == "text"
+    assert _mode(tmp_path / "new.txt") == 0o666 & ~umask
+    assert [path.name for path in tmp_path.iterdir()] == ["new.txt"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="依赖 POSIX 权限")
+def test_existing_file_keeps_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    os.chmod(path, 0o750)
+    _write(path, "new")
+    assert path.read_text() == "new"
+    assert _mode(path) == 0o750
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="不支持符号链接")
+def test_symlink_is_preserved(tmp_path):
+    target_dir = tmp_path / "real"
+    target_dir.mkdir()
+    target = target_dir / "file.txt"
+    target.write_text("old")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    _write(link, "new")
+    assert link.is_symlink()
+    assert target.read_text() == "new"
+    assert sorted(path.name for path in target_dir.iterdir()) == ["file.txt"]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文件监视测试
+
+连续的变化事件合并为一次读取，读取结果按文件数和字符数上限分批发出。
+"""
+
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from geek_fanatic.plugins.editor import file_watcher
+from geek_fanatic.plugins.editor.file_watcher import FileChange, FileWatcher
+
+# 测试中合并事件的等待时间（毫秒）
+DEBOUNCE_MS = 200
+
+
+class FakeClock:
+    """可手动推进的时间函数"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def watcher(qtbot):
+    watcher = FileWatcher(debounce_ms=DEBOUNCE_MS)
+    yield watcher
+    watcher.cancel()
+
+
+@pytest.fixture
+def files(tmp_path) -> List[Path]:
+    """五个内容不同的文件"""
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"file{index}.txt"
+        path.write_text(f"original {index}\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _record(watcher: FileWatcher) -> List[List[FileChange]]:
+    """记录发出的每一批变化"""
+    batches: List[List[FileChange]] = []
+    watcher.filesChanged.connect(batches.append)
+    return batches
+
+
+def _modify(path: Path, text: str) -> None:
+    """改写文件，长度随之变化，保证文件戳不同"""
+    path.write_text(f"{text}\n{path.read_text(encoding='utf-8')}", encoding="utf-8")
+
+
+def test_events_are_coalesced(qtbot, watcher, files):
+    batches = _record(watcher)
+    for path in files[:3]:
+        watcher.watch(str(path))
+    for round_index in range(3):
+        for path in files[:3]:
+            _modify(path, f"edit {round_index}")
+            watcher._on_file_changed(str(path))
+        # 等待时间内的事件推迟处理
+        qtbot.wait(DEBOUNCE_MS // 4)
+        assert not batches
+
+    qtbot.waitUntil(lambda: bool(batches))
+    qtbot.wait(DEBOUNCE_MS * 2)
+    assert len(batches) == 1
+    changes = {change.path: change.text for change in batches[0]}
+    assert sorted(changes) == sorted(str(path) for path in files[:3])
+    assert changes[str(files[0])].startswith("edit 2\nedit 1\nedit 0\n")
+
+
+def test_continuous_events_are_not_postponed_forever(
+    qtbot, monkeypatch, watcher, files
+):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    watcher.watch(str(files[0]))
+    watcher._on_file_changed(str(files[0]))
+    qtbot.wait(DEBOUNCE_MS // 2)
+
+    # 超过最长等待时间后新的事件不再重新计时
+    clock.now = file_watcher.WATCH_MAX_DELAY_MS / 1000 + 1
+    watcher._on_file_changed(str(files[0]))
+    assert watcher._timer.remainingTime() < DEBOUNCE_MS * 3 // 4
+
+    # 处理之后开始新的一轮，重新计时
+    qtbot.waitUntil(lambda: not watcher._timer.isActive())
+    clock.now += 1
+    watcher._on_file_changed(str(files[0]))
+    assert watcher._timer.remainingTime() > DEBOUNCE_MS * 3 // 4
+
+
+@pytest.mark.parametrize(
+    "max_files, max_chars, sizes",
+    [(2, 1 << 20, [2, 2, 1]), (32, 10, [1, 1, 1, 1, 1])],
+)
+def test_batch_limits(qtbot, monkeypatch, watcher, files, max_files, max_chars, sizes):
+    monkeypatch.setattr(file_watcher, "RELOAD_BATCH_FILES", max_files)
+    monkeypatch.setattr(file_watcher, "RELOAD_BATCH_CHARS", max_chars)
+    batches = _record(watcher)
+    for path in files:
+        watcher.watch(str(path))
+        _modify(path, "changed")
+        watcher._on_file_changed(str(path))
+    qtbot.waitUntil(lambda: sum(map(len, batches)) == len(files))
+    assert [len(batch) for batch in batches] == sizes
+
+
+def test_unchanged_and_unwatched_files_are_skipped(qtbot, watcher, files):
+    batches = _record(watcher)
+    for path in files[:3]:
+        watcher.watch(str(path))
+    # 自身写入后记录的文件戳与磁盘一致，不再重新读取
+    _modify(files[1], "saved")
+    watcher.update_stamp(str(files[1]))
+    _modify(files[2], "external")
+    _modify(files[3], "not watched")
+    for path in files[:4]:
+        watcher._on_file_changed(str(path))
+
+    qtbot.waitUntil(lambda: bool(batches))
+    qtbot.wait(DEBOUNCE_MS * 2)
+    assert [[change.path for change in batch] for batch in batches] == [[str(files[2])]]
+
+
+def test_file_system_events(qtbot, watcher, files):
+    watcher.watch(str(files[0]))
+    with qtbot.waitSignal(watcher.filesChanged, timeout=5000) as blocker:
+        _modify(files[0], "from disk")
+    assert blocker.args[0][0].text.startswith("from disk\n")
+
+    # 以原子替换方式写入的文件重新加入监视
+    replacement = files[0].with_suffix(".tmp")
+    replacement.write_text("replaced\n", encoding="utf-8")
+    with qtbot.waitSignal(watcher.filesChanged, timeout=5000) as blocker:
+        replacement.replace(files[0])
+    assert blocker.args[0][0].text == "replaced\n"
+    qtbot.waitUntil(lambda: str(files[0]) in watcher._watcher.files())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+代码折叠测试
+
+任何编辑之后都应满足：某行隐藏当且仅当它被某个已折叠区域覆盖。
+"""
+
+from typing import List, Tuple
+
+import pytest
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QPlainTextEdit
+
+from geek_fanatic.plugins.editor.folding import FoldingModel, measure_line
+
+CODE = """def a():
+    x = 1
+    if x:
+        y = 2
+    return x
+
+def b():
+    pass"""
+
+BRACKETS = """x = foo(
+a,
+b
+)
+y = [1,
+2]
+z = {1: 2}"""
+
+
+@pytest.fixture
+def view(qtbot) -> Tuple[FoldingModel, QPlainTextEdit]:
+    """显示示例代码的编辑控件及其折叠模型"""
+    text_edit = QPlainTextEdit()
+    qtbot.addWidget(text_edit)
+    text_edit.setPlainText(CODE)
+    folding = FoldingModel(text_edit.document())
+    folding.set_view(text_edit)
+    return folding, text_edit
+
+
+def _hidden(document: QTextDocument) -> List[int]:
+    """隐藏的行号"""
+    return [
+        line
+        for line in range(document.blockCount())
+        if not document.findBlockByNumber(line).isVisible()
+    ]
+
+
+def _check(folding: FoldingModel, document: QTextDocument) -> None:
+    """隐藏的行恰好是已折叠区域覆盖的行"""
+    covered = set()
+    for start, end in folding.folded_regions():
+        covered.update(range(start + 1, end + 1))
+    assert _hidden(document) == sorted(covered)
+
+
+def _insert(document: QTextDocument, line: int, column: int, text: str) -> None:
+    """在指定行列插入文本"""
+    cursor = QTextCursor(document.findBlockByNumber(line))
+    cursor.setPosition(cursor.position() + column)
+    cursor.insertText(text)
+
+
+def _delete_lines(document: QTextDocument, first: int, count: int) -> None:
+    """删除从 first 开始的 count 行（含换行符）"""
+    cursor = QTextCursor(document.findBlockByNumber(first))
+    end = document.findBlockByNumber(first + count)
+    cursor.setPosition(end.position(), QTextCursor.KeepAnchor)
+    cursor.removeSelectedText()
+
+
+def test_measure_line():
+    assert measure_line("") == (-1, 0, 0)
+    assert measure_line("\tfoo(") == (4, 1, 0)
+    assert measure_line("  ) + (") == (2, 0, -1)
+    assert measure_line("}}{") == (0, -1, -2)
+
+
+def test_regions(view):
+    folding, _ = view
+    assert list(folding.regions()) == [(0, 4), (2, 3), (6, 7)]
+    assert folding.region(1) is None
+    assert folding.enclosing_region(3) == (2, 3)
+    assert folding.enclosing_region(4) == (0, 4)
+    assert folding.enclosing_region(5) is None
+
+
+def test_folds_shift_with_edits_above(view):
+    folding, text_edit = view
+    document = text_edit.document()
+    assert folding.fold(6)
+    assert folding.fold(2)
+    _check(folding, document)
+
+    _insert(document, 0, 0, "import os\nimport sys\n")
+    assert folding.folded_regions() == [(4, 5), (8, 9)]
+    _check(folding, document)
+    assert folding.region(8) == (8, 9)
+
+    _delete_lines(document, 0, 1)
+    assert folding.folded_regions() == [(3, 4), (7, 8)]
+    _check(folding, document)
+
+    # 编辑区域之间的可见行只平移后面的区域
+    _insert(document, 5, 0, "    z = 3\n")
+    assert folding.folded_regions() == [(3, 4), (8, 9)]
+    _check(folding, document)
+
+
+def test_editing_hidden_line_unfolds(view):
+    folding, text_edit = view
+    document = text_edit.document()
+    assert folding.fold(0)
+    assert folding.fold(6)
+    assert _hidden(document) == [1, 2, 3, 4, 7]
+
+    _insert(document, 3, 8, "z = 3; ")
+    assert folding.folded_regions() == [(6, 7)]
+    _check(folding, document)
+
+    # 删除隐藏的行同样展开所在区域
+    assert folding.fold(0)
+    _delete_lines(document, 2, 1)
+    assert folding.folded_regions() == [(5, 6)]
+    _check(folding, document)
+
+
+def test_fold_moves_cursor_out(view):
+    folding, text_edit = view
+    cursor = text_edit.textCursor()
+    cursor.setPosition(text_edit.document().findBlockByNumber(3).position())
+    text_edit.setTextCursor(cursor)
+    assert folding.fold(2)
+    assert text_edit.textCursor().blockNumber() == 2
+
+
+def test_nested_fold_all_and_unfold_all(view):
+    folding, text_edit = view
+    document = text_edit.document()
+    assert folding.fold(2)
+    # 已折叠的区域不重复计数
+    assert folding.fold_all() == 2
+    assert folding.folded_regions() == [(0, 4), (2, 3), (6, 7)]
+    _check(folding, document)
+    assert folding.fold_all() == 0
+
+    # 展开外层区域时嵌套的区域保持折叠
+    assert folding.unfold(0)
+    assert _hidden(document) == [3, 7]
+    _check(folding, document)
+
+    assert folding.fold(0)
+    assert folding.unfold_all() == 3
+    assert _hidden(document) == []
+    assert folding.unfold_all() == 0
+
+    assert folding.toggle(3)
+    assert folding.folded_regions() == [(2, 3)]
+    assert folding.toggle(2)
+    assert folding.folded_regions() == []
+
+
+def test_bracket_only_regions(qtbot):
+    text_edit = QPlainTextEdit()
+    qtbot.addWidget(text_edit)
+    text_edit.setPlainText(BRACKETS)
+    document = text_edit.document()
+    folding = FoldingModel(document)
+    # 区域延伸到配对的闭括号所在行之前，闭括号在下一行时不可折叠
+    assert list(folding.regions()) == [(0, 2)]
+    assert folding.region(4) is None
+    assert folding.region(6) is None
+
+    assert folding.fold(0)
+    assert _hidden(document) == [1, 2]
+    # 在区域内加入一行后折叠展开，区域随之延伸
+    _insert(document, 1, 0, "c,\n")
+    _check(folding, document)
+    assert folding.region(0) == (0, 3)
+
+    # 删除闭括号后区域延伸到文档末尾
+    _delete_lines(document, 4, 1)
+    assert folding.region(0) == (0, document.blockCount() - 1)
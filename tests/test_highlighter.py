@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量语法高亮测试
+
+编辑一个块后只重新分析到行结束状态与之前一致的块为止。
+"""
+
+from typing import List, Tuple
+
+import pytest
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QPlainTextEdit
+
+from geek_fanatic.plugins.editor.highlighter import (
+    EDIT_BLOCK_BUDGET,
+    IncrementalHighlighter,
+)
+from geek_fanatic.plugins.editor.lexers import PYTHON_LEXER, Token
+
+LINE_COUNT = 200
+
+# 第 110 行在字符串外是单引号字符串，在三引号字符串内则结束该字符串
+LINES = [f"value_{line} = {line}" for line in range(LINE_COUNT)]
+LINES[110] = '\'"""\'  # 110'
+
+
+class CountingLexer:
+    """记录每次分析的行文本"""
+
+    def __init__(self) -> None:
+        self.lexed: List[str] = []
+
+    def lex(self, text: str, state: int) -> Tuple[List[Token], int]:
+        self.lexed.append(text)
+        return PYTHON_LEXER.lex(text, state)
+
+
+@pytest.fixture
+def view(qtbot) -> Tuple[QPlainTextEdit, IncrementalHighlighter, CountingLexer]:
+    """已分析完示例内容的高亮器，高亮器随编辑控件的文档一起释放"""
+    # 文档有布局时才发出内容变更通知，与编辑器中的用法一致
+    text_edit = QPlainTextEdit()
+    qtbot.addWidget(text_edit)
+    document = text_edit.document()
+    lexer = CountingLexer()
+    highlighter = IncrementalHighlighter(document, lexer)  # type: ignore[arg-type]
+    QTextCursor(document).insertText("\n".join(LINES))
+    assert highlighter.finish()
+    lexer.lexed.clear()
+    return text_edit, highlighter, lexer
+
+
+def _lines(document: QTextDocument, first: int, last: int) -> List[str]:
+    """第 first 到 last 行的文本"""
+    return [document.findBlockByNumber(n).text() for n in range(first, last + 1)]
+
+
+def _states(document: QTextDocument) -> List[int]:
+    """各块的结束状态"""
+    return [document.findBlockByNumber(n).userState() for n in range(LINE_COUNT)]
+
+
+def test_document_is_default_parent(view):
+    _, highlighter, _ = view
+    assert highlighter.parent() is highlighter.document()
+
+
+def test_edit_without_state_change_lexes_one_block(view):
+    _, highlighter, lexer = view
+    document = highlighter.document()
+    QTextCursor(document.findBlockByNumber(50)).insertText("other = 2; ")
+    assert lexer.lexed == _lines(document, 50, 50)
+    assert not highlighter.has_pending()
+
+
+def test_state_change_stops_where_states_converge(view):
+    _, highlighter, lexer = view
+    document = highlighter.document()
+    QTextCursor(document.findBlockByNumber(100)).insertText('"""')
+    # 第 100 行开始的字符串在第 110 行结束，之后的状态与之前一致
+    assert lexer.lexed == _lines(document, 100, 110)
+    assert _states(document)[99:112] == [0] + [1] * 10 + [0, 0]
+
+    lexer.lexed.clear()
+    QTextCursor(document.findBlockByNumber(100)).deleteChar()
+    assert lexer.lexed == _lines(document, 100, 110)
+    assert set(_states(document)) == {0}
+
+
+def test_long_propagation_is_deferred(view):
+    _, highlighter, lexer = view
+    document = highlighter.document()
+    QTextCursor(document.findBlockByNumber(120)).insertText('"""')
+    # 超出同步预算的块暂缓到空闲时处理，处理完后状态与整体分析一致
+    assert lexer.lexed == _lines(document, 120, 120 + EDIT_BLOCK_BUDGET - 1)
+    assert highlighter.has_pending()
+    assert highlighter.finish()
+    assert _states(document)[120:] == [1] * (LINE_COUNT - 120)
+    assert len(lexer.lexed) == LINE_COUNT - 120
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+超大文件查看器测试
+
+未指定编码时按文件开头的数据检测编码，UTF-16 的换行符按码元对齐查找。
+"""
+
+import pytest
+
+from geek_fanatic.plugins.editor.huge_file_viewer import HugeFileViewer
+
+LINES = ["第一行 first", "Ċ ਅĀਅ 第二行", "", "last"]
+
+
+@pytest.mark.parametrize(
+    "encoding, bom, expected",
+    [
+        ("utf-8", b"", "utf-8"),
+        ("utf-8", b"\xef\xbb\xbf", "utf-8"),
+        ("gb18030", b"", "gb18030"),
+        ("utf-16-le", b"\xff\xfe", "utf-16-le"),
+        ("utf-16-be", b"\xfe\xff", "utf-16-be"),
+    ],
+)
+def test_detects_encoding_and_lines(qtbot, tmp_path, encoding, bom, expected):
+    path = tmp_path / "huge.txt"
+    # Ċ、ਅĀ 和 Āਅ 的 UTF-16 编码含 0x0A 字节，不能当作换行符
+    path.write_bytes(bom + "\r\n".join(LINES).encode(encoding))
+    viewer = HugeFileViewer(str(path))
+    qtbot.addWidget(viewer)
+    qtbot.waitUntil(viewer.is_indexed)
+    assert viewer.encoding == expected
+    assert [viewer.get_line(line) for line in range(viewer.line_count)] == LINES
+    viewer.close_file()
+
+
+def test_empty_file(qtbot, tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    viewer = HugeFileViewer(str(path))
+    qtbot.addWidget(viewer)
+    assert viewer.is_indexed()
+    assert viewer.line_count == 1
+    assert viewer.get_line(0) == ""
+    viewer.close_file()
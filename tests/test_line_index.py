@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+行首偏移索引测试
+"""
+
+import random
+
+from geek_fanatic.plugins.editor.line_index import LineIndex
+
+
+def test_line_index_locate_and_update():
+    index = LineIndex([3, 0, 5])
+    assert index.line_count == 3
+    assert index.length == 3 + 1 + 0 + 1 + 5
+    assert [index.line_start(line) for line in range(4)] == [0, 4, 5, 10]
+    assert index.locate(0) == (0, 0)
+    assert index.locate(3) == (0, 3)
+    assert index.locate(4) == (1, 0)
+    assert index.locate(5) == (2, 0)
+    assert index.locate(10) == (2, 5)
+    assert index.locate(100) == (2, 5)
+
+    index.add(1, 4)
+    assert index.line_length(1) == 4
+    assert index.line_start(2) == 9
+    assert index.locate(8) == (1, 4)
+
+
+def test_line_index_matches_brute_force():
+    rng = random.Random(2)
+    lengths = [rng.randint(0, 9) for _ in range(37)]
+    index = LineIndex(lengths)
+    for _ in range(50):
+        line = rng.randrange(len(lengths))
+        delta = rng.randint(-lengths[line], 5)
+        lengths[line] += delta
+        index.add(line, delta)
+    starts = [0]
+    for length in lengths[:-1]:
+        starts.append(starts[-1] + length + 1)
+    for line, start in enumerate(starts):
+        assert index.line_start(line) == start
+        assert index.line_length(line) == lengths[line]
+        for column in range(lengths[line] + 1):
+            assert index.locate(start + column) == (line, column)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多光标编辑测试
+
+多光标按缓冲区的码点偏移记录，经共享文档换算为文本框的 UTF-16 位置。
+"""
+
+import pytest
+from PySide6.QtCore import Qt
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.editor import Editor
+from geek_fanatic.plugins.editor.multi_cursor import Cursor, MultiCursor
+from geek_fanatic.plugins.editor.types import Position
+
+TEXT = "😀a\n😀b\n😀c"
+
+
+def test_multi_cursor_on_buffer():
+    buffer = TextBuffer()
+    buffer.set_content("ab\ncd")
+    multi_cursor = MultiCursor(buffer)
+    multi_cursor.set_cursors([Cursor(0, 0), Cursor(3, 3)])
+    multi_cursor.insert_text("X")
+    assert buffer.get_content() == "Xab\nXcd"
+    assert multi_cursor.cursors() == [Cursor(1, 1), Cursor(5, 5)]
+    # 所有光标处的编辑只记录为一个撤销步骤
+    assert buffer.undo()
+    assert buffer.get_content() == "ab\ncd"
+
+
+@pytest.fixture
+def editor(qtbot) -> Editor:
+    """内容每行以 emoji 开头的编辑器"""
+    editor = Editor()
+    qtbot.addWidget(editor)
+    editor.setPlainText(TEXT)
+    editor.show()
+    qtbot.waitExposed(editor)
+    return editor
+
+
+def test_typing_with_cursors_after_non_bmp_characters(qtbot, editor):
+    editor.set_cursor_position(Position(0, 1))
+    editor.add_cursor_below()
+    editor.add_cursor_below()
+    assert len(editor.cursors()) == 3
+
+    qtbot.keyClick(editor._text_edit, "X")
+    expected = "😀Xa\n😀Xb\n😀Xc"
+    assert editor.content == expected
+    assert editor._text_edit.toPlainText() == expected
+    assert editor.get_cursor_position() == Position(2, 2)
+
+    qtbot.keyClick(editor._text_edit, Qt.Key_Backspace)
+    assert editor.content == TEXT
+    assert editor._text_edit.toPlainText() == TEXT
+    assert editor.buffer.history.can_undo()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+操作日志测试
+"""
+
+import pytest
+
+from geek_fanatic.plugins.editor import oplog
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.oplog import (
+    KIND_DELETE,
+    KIND_INSERT,
+    OperationLog,
+    TextArena,
+)
+from geek_fanatic.plugins.editor.types import DeleteOperation, InsertOperation, Position
+
+OPERATIONS = [
+    InsertOperation(Position(0, 0), "hello\nworld"),
+    InsertOperation(Position(1, 5), "!"),
+    DeleteOperation(Position(0, 1), Position(0, 3), "el"),
+    InsertOperation(Position(0, 1), "你好\n"),
+    DeleteOperation(Position(1, 0), Position(2, 0), "hlo\n"),
+]
+
+
+def test_arena_reads_back_across_chunks(monkeypatch):
+    monkeypatch.setattr(oplog, "ARENA_CHUNK_SIZE", 8)
+    monkeypatch.setattr(oplog, "ARENA_MAX_PIECES", 3)
+    arena = TextArena()
+    texts = ["ab", "", "cde", "f", "ghij", "x" * 20, "k", "lmn", "你好"]
+    locations = [arena.append(text) for text in texts]
+    # 写满的分块和超长文本各占一个分块，片段合并后偏移不变
+    assert locations[:5] == [(0, 0), (0, 2), (0, 2), (0, 5), (1, 0)]
+    assert locations[5] == (2, 0)
+    assert locations[6] == (3, 0)
+    for text, (chunk, start) in zip(texts, locations):
+        assert arena.get(chunk, start, len(text)) == text
+    assert arena.size == sum(map(len, texts))
+
+
+def test_indexing_and_pop():
+    log = OperationLog(OPERATIONS)
+    assert len(log) == len(OPERATIONS)
+    assert list(log) == OPERATIONS
+    assert log[-1] == OPERATIONS[-1]
+    assert log[-len(OPERATIONS)] == OPERATIONS[0]
+    assert log.kind(-1) == KIND_DELETE
+    assert log.position(-2) == Position(0, 1)
+    assert log.text(-2) == "你好\n"
+    for index in (len(OPERATIONS), -len(OPERATIONS) - 1):
+        with pytest.raises(IndexError):
+            log[index]
+
+    assert log.pop() == OPERATIONS[-1]
+    assert list(log) == OPERATIONS[:-1]
+    log.truncate(2)
+    assert list(log) == OPERATIONS[:2]
+    log.truncate(5)
+    assert len(log) == 2
+    log.append(OPERATIONS[2])
+    assert log[-1] == OPERATIONS[2]
+    log.clear()
+    with pytest.raises(IndexError):
+        log.pop()
+
+
+def test_reverse_undoes_replay():
+    buffer = TextBuffer()
+    buffer.replay(OPERATIONS)
+    edited = buffer.get_content()
+    assert edited == "h你好\nworld!"
+
+    log = OperationLog(OPERATIONS)
+    reversed_log = log.reverse()
+    assert reversed_log.arena is log.arena
+    assert reversed_log.kind(0) == KIND_INSERT
+    buffer.replay(reversed_log)
+    assert buffer.get_content() == ""
+
+    # 逆日志的逆日志与原日志相同
+    assert list(reversed_log.reverse()) == OPERATIONS
+    buffer.replay(reversed_log.reverse())
+    assert buffer.get_content() == edited
+
+
+def test_unsupported_operation():
+    with pytest.raises(TypeError):
+        OperationLog().append("insert")  # type: ignore[arg-type]
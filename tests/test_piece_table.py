@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+片段表测试
+"""
+
+import random
+
+from geek_fanatic.plugins.editor.piece_table import PieceTable
+from geek_fanatic.plugins.editor.types import Position
+
+
+def _check_lines(table: PieceTable, text: str) -> None:
+    """逐行、逐偏移比较片段表与参照字符串"""
+    lines = text.split("\n")
+    assert table.get_text() == text
+    assert table.get_length() == len(text)
+    assert table.get_line_count() == len(lines)
+    offset = 0
+    for number, line in enumerate(lines):
+        assert table.get_line(number) == line
+        assert table.line_start(number) == offset
+        assert table.position_to_offset(Position(number, len(line))) == offset + len(
+            line
+        )
+        assert table.offset_to_position(offset) == Position(number, 0)
+        offset += len(line) + 1
+
+
+def test_insert_and_delete_by_position():
+    table = PieceTable("hello\nworld")
+    table.insert(Position(1, 0), "big ")
+    table.insert(Position(0, 5), ",")
+    _check_lines(table, "hello,\nbig world")
+    table.delete(Position(0, 5), Position(1, 4))
+    _check_lines(table, "helloworld")
+    assert table.get_range(Position(0, 2), Position(0, 7)) == "llowo"
+
+
+def test_random_edits_match_string():
+    rng = random.Random(1)
+    text = "abc\ndef\n\nghi"
+    table = PieceTable(text)
+    for _ in range(500):
+        offset = rng.randint(0, len(text))
+        if text and rng.random() < 0.4:
+            end = min(len(text), offset + rng.randint(1, 6))
+            table.delete_range(offset, end)
+            text = text[:offset] + text[end:]
+        else:
+            insert = rng.choice(["x", "yz", "\n", "a\nb", "😀", ""])
+            table.insert_at(offset, insert)
+            text = text[:offset] + insert + text[offset:]
+        assert table.get_text() == text
+    _check_lines(table, text)
+    assert "".join(table.iter_chunks(7)) == text
+    assert table.get_text_range(3, 20) == text[3:20]
+
+
+def test_snapshot_is_unaffected_by_later_edits():
+    table = PieceTable("one\ntwo")
+    snapshot = table.snapshot()
+    table.insert_at(3, " and a half")
+    table.delete_range(0, 1)
+    table.set_text("replaced")
+    assert snapshot.get_text() == "one\ntwo"
+    assert snapshot.get_line(1) == "two"
+    assert table.get_text() == "replaced"
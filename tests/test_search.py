@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查找模块测试
+"""
+
+import random
+
+import pytest
+
+from geek_fanatic.plugins.editor.search import SearchQuery, compile_query, iter_matches
+
+
+@pytest.mark.parametrize(
+    "pattern, is_regex, expected",
+    [
+        ("a\nb", False, True),
+        ("a\\nb", False, False),
+        (r"a\nb", True, True),
+        (r"\x0a", True, True),
+        (r"\s+", True, True),
+        (r"[^;]+", True, True),
+        (r"\D", True, True),
+        (r"\W", True, True),
+        (r"[\x00-\x7f]", True, True),
+        (r"(?s)a.b", True, True),
+        (r"(?s:a.)b", True, True),
+        (r"foo|bar\n", True, True),
+        (r"(?=\n)", True, True),
+        (r"a.b", True, False),
+        (r"\d+", True, False),
+        (r"\w", True, False),
+        (r"[^\n]+", True, False),
+        (r"x{2,}[\t ]", True, False),
+        ("(", True, False),
+    ],
+)
+def test_is_multiline(pattern, is_regex, expected):
+    assert SearchQuery(pattern, is_regex).is_multiline is expected
+
+
+def test_regex_spanning_chunks():
+    chunks = iter(["a  \n", "  b\n"])
+    batches = list(iter_matches(chunks, SearchQuery(r"a\s+b", is_regex=True)))
+    matches = [match for batch in batches for match in batch]
+    assert [(match.start, match.end, match.line) for match in matches] == [(0, 7, 0)]
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        (r"a\nb", 1),
+        (r"a\s?b\n", 2),
+        (r"(a\n){3}", 3),
+        (r"(a\n)\1", 2),
+        (r"(?=x\ny)", 1),
+        (r"foo|bar\n\n", 2),
+        (r"[^;]{0,5}", 5),
+        (r"a.b", 0),
+        (r"\s+", None),
+        (r"foo\s+bar", None),
+        (r"x\n*?", None),
+    ],
+)
+def test_line_span(pattern, expected):
+    assert SearchQuery(pattern, is_regex=True).line_span == expected
+
+
+def test_multiline_regex_streams_per_chunk():
+    # 每块 2000 行，超过不受限的正则表达式保留的 MAX_MATCH_LINES 行
+    chunks = ["foo \n bar\n" * 1000] * 5
+    batches = list(iter_matches(iter(chunks), SearchQuery(r"foo\s+bar", True)))
+    assert len(batches) == 5
+    assert batches[0]
+    matches = [match for batch in batches for match in batch]
+    assert len(matches) == 5000
+    assert (matches[-1].start, matches[-1].line) == (10 * 4999, 2 * 4999)
+
+
+@pytest.mark.parametrize(
+    "pattern, is_regex",
+    [
+        (r"a\s+b", True),
+        (r"b\n\na", True),
+        (r"[^;]{1,6}", True),
+        (r"(?s)a.{0,3}b", True),
+        (r"(?<=a\n)b", True),
+        (r"^a|b$", True),
+        (r"(a\n)\1", True),
+        ("a\nb", False),
+    ],
+)
+def test_chunked_matches_equal_whole_text(pattern, is_regex):
+    rng = random.Random(pattern)
+    query = SearchQuery(pattern, is_regex)
+    regex = compile_query(query)
+    for _ in range(50):
+        text = "".join(rng.choice("ab \n;") for _ in range(rng.randint(0, 120)))
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, 6)))
+        chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        found = [
+            (match.start, match.end, match.line)
+            for batch in iter_matches(iter(chunks), query)
+            for match in batch
+        ]
+        expected = [
+            (match.start(), match.end(), text.count("\n", 0, match.start()))
+            for match in regex.finditer(text)
+            if match.end() > match.start()
+        ]
+        assert found == expected
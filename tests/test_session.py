@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+会话快照测试
+"""
+
+import struct
+
+import pytest
+
+from geek_fanatic.plugins.editor import EditorManager
+from geek_fanatic.plugins.editor.editor import Editor
+from geek_fanatic.plugins.editor.encoding import FileFormat, LineEnding
+from geek_fanatic.plugins.editor.session import (
+    SESSION_MAGIC,
+    SessionSnapshot,
+    SessionTab,
+    TabPlaceholder,
+    load_session,
+    save_session,
+)
+from geek_fanatic.plugins.editor.types import Position
+
+SNAPSHOT = SessionSnapshot(
+    [
+        SessionTab("/tmp/clean.py", 3, 4, (10, 0)),
+        SessionTab(
+            "/tmp/未保存.txt",
+            0,
+            2,
+            (-1, 5),
+            "你好\n\ud800 lone surrogate\n" * 100,
+            FileFormat("gb18030", False, LineEnding.CRLF, False),
+        ),
+        SessionTab(
+            "/tmp/bom.txt",
+            content="",
+            file_format=FileFormat("utf-8", True, LineEnding.CR, True),
+        ),
+    ],
+    active=1,
+)
+
+
+@pytest.fixture
+def session_data(tmp_path) -> bytes:
+    """示例快照的文件内容"""
+    path = tmp_path / "session.bin"
+    save_session(str(path), SNAPSHOT)
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("snapshot", [SNAPSHOT, SessionSnapshot()])
+def test_round_trip(tmp_path, snapshot):
+    path = str(tmp_path / "nested" / "session.bin")
+    save_session(path, snapshot)
+    assert load_session(path) == snapshot
+
+
+def test_truncated_session(tmp_path, session_data):
+    path = tmp_path / "truncated.bin"
+    for size in range(len(session_data)):
+        path.write_bytes(session_data[:size])
+        assert load_session(str(path)) is None, size
+
+
+def test_corrupt_session(tmp_path, session_data):
+    path = tmp_path / "corrupt.bin"
+    assert load_session(str(path)) is None
+
+    path.write_bytes(b"NOTSESS1" + session_data[len(SESSION_MAGIC) :])
+    assert load_session(str(path)) is None
+
+    # 当前标签页下标越界
+    header = struct.pack("<Ii", 3, 3)
+    offset = len(SESSION_MAGIC)
+    path.write_bytes(SESSION_MAGIC + header + session_data[offset + len(header) :])
+    assert load_session(str(path)) is None
+
+    # 压缩内容损坏
+    corrupt = bytearray(session_data)
+    corrupt[-10:] = b"\xff" * 10
+    path.write_bytes(bytes(corrupt))
+    assert load_session(str(path)) is None
+
+
+def test_lazy_placeholders(qtbot, tmp_path):
+    clean = tmp_path / "clean.py"
+    clean.write_text("line 0\nline 1\nline 2\n", encoding="utf-8")
+    dirty = tmp_path / "dirty.txt"
+    dirty.write_text("on disk\n", encoding="utf-8")
+    snapshot = SessionSnapshot(
+        [
+            SessionTab(str(clean), 2, 3),
+            SessionTab(str(dirty), 0, 5, content="unsaved\n"),
+        ],
+        active=1,
+    )
+    manager = EditorManager()
+    qtbot.addWidget(manager)
+    manager.restore_session(snapshot)
+
+    # 只有当前标签页创建了编辑器，未保存的内容取自快照而不是磁盘
+    tab_widget = manager._tab_widget
+    assert isinstance(tab_widget.widget(0), TabPlaceholder)
+    editor = manager.current_editor()
+    assert editor is not None
+    assert editor.content == "unsaved\n"
+    assert editor.is_modified()
+    assert editor.get_cursor_position() == Position(0, 5)
+    assert manager.session_snapshot() == snapshot
+
+    # 首次激活占位标签页时从磁盘载入并恢复光标
+    tab_widget.setCurrentIndex(0)
+    editor = manager.current_editor()
+    assert isinstance(editor, Editor)
+    if editor.is_loading():
+        with qtbot.waitSignal(editor.document.loadingChanged):
+            pass
+    assert editor.content == "line 0\nline 1\nline 2\n"
+    assert not editor.is_modified()
+    assert editor.get_cursor_position() == Position(2, 3)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+三元组索引测试
+
+候选文件必须包含所有实际有匹配的文件，保存、加载和合并增量部分后结果不变。
+"""
+
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from geek_fanatic.plugins.editor.search import SearchQuery
+from geek_fanatic.plugins.editor.trigram_index import (
+    INDEX_MAGIC,
+    TrigramIndex,
+    _decode_postings,
+    _encode_postings,
+    extract_trigrams,
+    query_trigrams,
+)
+from geek_fanatic.plugins.editor.workspace_search import search_file
+
+_HEADER = struct.Struct("<B3xIII")
+
+FILES = {
+    "a.py": "def foo_bar():\n    return 1\n",
+    "b.txt": "hello world\nfoo baz\n",
+    "c.txt": "FooBar quux\nfoo\nbaz\n",
+    "d.md": "worrrld 你好\n",
+}
+
+QUERIES = [
+    SearchQuery("foo_bar"),
+    SearchQuery("foo", case_sensitive=False),
+    SearchQuery("你好"),
+    SearchQuery("missing"),
+    SearchQuery(r"foo(bar|baz)", is_regex=True, case_sensitive=False),
+    SearchQuery(r"foo\s*baz", is_regex=True),
+    SearchQuery(r"wor+ld", is_regex=True),
+    SearchQuery(r"hel?lo", is_regex=True),
+    SearchQuery(r"hello|quux", is_regex=True),
+    SearchQuery(r"(?:foo_)+bar", is_regex=True),
+]
+
+
+@pytest.fixture
+def workspace(tmp_path) -> Dict[str, Path]:
+    """写入测试文件的工作区"""
+    paths = {}
+    for name, text in FILES.items():
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        paths[name] = path
+    return paths
+
+
+def _add(index: TrigramIndex, path: Path) -> None:
+    """按文件当前内容添加到索引"""
+    data = path.read_bytes()
+    stat = path.stat()
+    index.add_file(str(path), stat.st_mtime_ns, stat.st_size, extract_trigrams(data))
+
+
+def _build(paths: Dict[str, Path]) -> TrigramIndex:
+    """为全部文件建立索引"""
+    index = TrigramIndex()
+    for path in paths.values():
+        _add(index, path)
+    return index
+
+
+def _matching(paths: Dict[str, Path], query: SearchQuery) -> List[str]:
+    """实际有匹配的文件"""
+    return sorted(str(path) for path in paths.values() if search_file(str(path), query))
+
+
+def _check_candidates(
+    index: TrigramIndex, paths: Dict[str, Path], query: SearchQuery
+) -> None:
+    """候选文件包含所有实际有匹配的文件"""
+    candidates = index.candidates(query)
+    if candidates is None:
+        assert query_trigrams(query) is None
+        return
+    assert set(_matching(paths, query)) <= set(candidates)
+    assert set(candidates) <= {str(path) for path in paths.values()}
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda query: query.pattern)
+def test_candidates_cover_matches(workspace, query):
+    _check_candidates(_build(workspace), workspace, query)
+
+
+def test_query_trigrams():
+    assert query_trigrams(SearchQuery("ab")) is None
+    # 顶层分支无法确定必然出现的片段
+    assert query_trigrams(SearchQuery("abc|def", is_regex=True)) is None
+    # 重复处断开，只保留两侧的字面片段
+    grams = query_trigrams(SearchQuery("abcd?efg", is_regex=True))
+    assert grams == {int.from_bytes(gram, "big") for gram in (b"abc", b"efg")}
+    assert query_trigrams(SearchQuery("ABC")) == {int.from_bytes(b"abc", "big")}
+
+
+def test_save_load_round_trip(tmp_path, workspace):
+    index = _build(workspace)
+    index_path = str(tmp_path / "cache" / "index.idx")
+    index.save(index_path)
+    assert not index.is_dirty()
+
+    loaded = TrigramIndex()
+    assert loaded.load(index_path)
+    assert loaded.entries() == index.entries()
+    for query in QUERIES:
+        assert loaded.candidates(query) == index.candidates(query)
+        _check_candidates(loaded, workspace, query)
+
+
+def test_load_rejects_invalid_files(tmp_path, workspace):
+    index_path = tmp_path / "index.idx"
+    index = TrigramIndex()
+    assert not index.load(str(index_path))
+    _build(workspace).save(str(index_path))
+    data = index_path.read_bytes()
+    # 截断在路径区或数组中都视为格式不符
+    for size in (len(INDEX_MAGIC) + 4, len(INDEX_MAGIC) + _HEADER.size + 5):
+        index_path.write_bytes(data[:size])
+        assert not index.load(str(index_path))
+    index_path.write_bytes(b"NOTINDEX" + data[len(INDEX_MAGIC) :])
+    assert not index.load(str(index_path))
+    assert index.file_count == 0
+
+
+def test_remove_and_re_add_then_compact(tmp_path, workspace):
+    index = _build(workspace)
+    index_path = str(tmp_path / "index.idx")
+    index.save(index_path)
+
+    # 已编码部分中的旧编号标记为删除，新内容写入增量部分
+    index.remove_file(str(workspace["a.py"]))
+    workspace["b.txt"].write_text("nothing here\n", encoding="utf-8")
+    _add(index, workspace["b.txt"])
+    workspace["e.txt"] = tmp_path / "e.txt"
+    workspace["e.txt"].write_text("foo_bar again\n", encoding="utf-8")
+    _add(index, workspace["e.txt"])
+    del workspace["a.py"]
+    assert index.is_dirty()
+
+    before = {query.pattern: index.candidates(query) for query in QUERIES}
+    for query in QUERIES:
+        _check_candidates(index, workspace, query)
+    assert before["foo_bar"] == [str(workspace["e.txt"])]
+
+    index._compact()
+    # 合并后编号连续且不含已删除的文件
+    assert all(entry is not None for entry in index._files)
+    assert index.file_count == len(index._files) == len(workspace)
+    for query in QUERIES:
+        assert index.candidates(query) == before[query.pattern]
+
+    index.save(index_path)
+    loaded = TrigramIndex()
+    assert loaded.load(index_path)
+    for query in QUERIES:
+        assert loaded.candidates(query) == before[query.pattern]
+
+
+@pytest.mark.parametrize("peak", [0x7F, 0x1234, 0x12345])
+def test_postings_encoding(peak):
+    file_ids = array("I", [1, 2, peak, peak + 1])
+    encoded = _encode_postings(file_ids)
+    assert _decode_postings(encoded) == file_ids
+
+    # 以相反字节序写入的倒排表读取时交换字节
+    deltas = array(chr(encoded[0]))
+    deltas.frombytes(encoded[1:])
+    deltas.byteswap()
+    assert _decode_postings(encoded[:1] + deltas.tobytes(), swap=True) == file_ids
+
+
+def _byteswapped(data: bytes) -> bytes:
+    """把本机字节序的索引文件改写为相反字节序"""
+    offset = len(INDEX_MAGIC)
+    big_endian, file_count, key_count, path_size = _HEADER.unpack_from(data, offset)
+    parts = [
+        INDEX_MAGIC,
+        _HEADER.pack(not big_endian, file_count, key_count, path_size),
+    ]
+    offset += _HEADER.size
+    parts.append(data[offset : offset + path_size])
+    offset += path_size
+    ends = array("Q")
+    for typecode, count in (("q", file_count), ("q", file_count)):
+        values = array(typecode)
+        values.frombytes(data[offset : offset + values.itemsize * count])
+        offset += values.itemsize * count
+        values.byteswap()
+        parts.append(values.tobytes())
+    for typecode, values in (("I", array("I")), ("Q", ends)):
+        size = values.itemsize * key_count
+        values.frombytes(data[offset : offset + size])
+        offset += size
+        swapped = array(typecode, values)
+        swapped.byteswap()
+        parts.append(swapped.tobytes())
+    start = 0
+    for end in ends:
+        posting = data[offset + start : offset + end]
+        deltas = array(chr(posting[0]))
+        deltas.frombytes(posting[1:])
+        deltas.byteswap()
+        parts.append(posting[:1] + deltas.tobytes())
+        start = end
+    return b"".join(parts)
+
+
+def test_load_byteswapped_index(tmp_path, workspace):
+    index = _build(workspace)
+    index_path = tmp_path / "index.idx"
+    index.save(str(index_path))
+    assert index_path.read_bytes()[len(INDEX_MAGIC)] == (sys.byteorder == "big")
+    index_path.write_bytes(_byteswapped(index_path.read_bytes()))
+
+    loaded = TrigramIndex()
+    assert loaded.load(str(index_path))
+    assert loaded._swap
+    assert loaded.entries() == index.entries()
+    for query in QUERIES:
+        assert loaded.candidates(query) == index.candidates(query)
+
+    # 合并后按本机字节序保存
+    loaded.save(str(index_path))
+    reloaded = TrigramIndex()
+    assert reloaded.load(str(index_path))
+    assert not reloaded._swap
+    for query in QUERIES:
+        assert reloaded.candidates(query) == index.candidates(query)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+撤销历史测试
+"""
+
+from typing import List
+
+from geek_fanatic.plugins.editor.buffer import TextBuffer
+from geek_fanatic.plugins.editor.types import DeleteOperation, InsertOperation, Position
+from geek_fanatic.plugins.editor.undo import UndoHistory
+
+
+class FakeClock:
+    """可手动推进的时间函数"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _type(buffer: TextBuffer, text: str) -> None:
+    """在文档末尾逐个字符输入"""
+    for char in text:
+        end = buffer.offset_to_position(buffer.get_length())
+        buffer.insert(end, char)
+
+
+def _buffer(clock: FakeClock, memory_limit: int = 1 << 20) -> TextBuffer:
+    """创建使用指定时间函数的缓冲区"""
+    return TextBuffer(history=UndoHistory(memory_limit, 1.0, clock))
+
+
+def test_typing_is_undone_by_word():
+    buffer = _buffer(FakeClock())
+    _type(buffer, "hello world")
+    assert buffer.history.group_count() == 2
+    buffer.undo()
+    assert buffer.get_content() == "hello "
+    buffer.undo()
+    assert buffer.get_content() == ""
+    buffer.redo()
+    buffer.redo()
+    assert buffer.get_content() == "hello world"
+
+
+def test_pause_and_newline_start_new_groups():
+    clock = FakeClock()
+    buffer = _buffer(clock)
+    _type(buffer, "ab")
+    clock.now += 2.0
+    _type(buffer, "cd\nef")
+    undone: List[str] = []
+    while buffer.undo():
+        undone.append(buffer.get_content())
+    assert undone == ["abcd\n", "abcd", "ab", ""]
+
+
+def test_backspace_and_delete_merge():
+    buffer = _buffer(FakeClock())
+    buffer.set_content("abcdef")
+    buffer.clear_history()
+    # 连续退格
+    buffer.delete(Position(0, 5), Position(0, 6))
+    buffer.delete(Position(0, 4), Position(0, 5))
+    # 连续向后删除
+    buffer.delete(Position(0, 0), Position(0, 1))
+    buffer.delete(Position(0, 0), Position(0, 1))
+    assert buffer.get_content() == "cd"
+    assert buffer.history.group_count() == 2
+    buffer.undo()
+    assert buffer.get_content() == "abcd"
+    buffer.undo()
+    assert buffer.get_content() == "abcdef"
+
+
+def test_state_returns_after_undo():
+    history = UndoHistory(clock=FakeClock())
+    start = history.state
+    history.push(InsertOperation(Position(0, 0), "a"))
+    edited = history.state
+    assert edited != start
+    history.pop_undo()
+    assert history.state == start
+    history.pop_redo()
+    assert history.state == edited
+
+
+def test_memory_limit_evicts_oldest_groups():
+    history = UndoHistory(memory_limit=4096, clock=FakeClock())
+    for index in range(100):
+        history.push_group(
+            [DeleteOperation(Position(index, 0), Position(index, 100), "x" * 100)]
+        )
+        assert history.memory_usage <= history.memory_limit
+    assert 0 < history.group_count() < 100
+
+    # 上限低于单个组时仍保留最近一组
+    history.set_memory_limit(1)
+    assert history.group_count() == 1
+    operations = history.pop_undo()
+    assert operations is not None
+    assert operations[0] == InsertOperation(Position(99, 0), "x" * 100)
+    assert history.memory_usage == 0